@@ -1,7 +1,8 @@
 """AI and LLM components.
 
 This package contains:
-- Prompt templates (prompts)
+- Prompt templates (prompts) and token-budgeted assembly (prompt_budget)
+- Shared LLM client and response cache (llm_gateway)
 - FastMCP server (mcp_server)
 - PDF report generation (pdf_generator)
 """
@@ -0,0 +1,488 @@
+"""A.P.E.X. LLM Gateway - shared client and response cache for all LLM calls.
+
+Setup Advisor, Post Analysis reports and Prep Plans all go through
+llm_gateway.complete() instead of building their own anthropic clients.
+
+Responses are cached on disk by SHA-256 of (model, system, messages,
+temperature, max_tokens). The cache is an LRU (last access = file mtime)
+with a TTL and a total size cap, so re-running a prep plan or a Streamlit
+rerun with the same prompt costs a file read.
+
+Backends:
+- "anthropic" (default): Anthropic Messages API
+- "stub": deterministic offline responses derived from the request hash,
+  for benchmarking the whole app without network or API key
+
+Select the backend with APEX_LLM_BACKEND=stub or llm_gateway.set_backend().
+
+Provider prompt caching: pass system (or message content) as blocks with
+cache_control on the stable prefix (prompts.get_system_blocks). Cache reads and
+writes reported in the usage metadata are tallied in get_stats(); the stub
+backend simulates the provider cache so this is measurable offline.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+DEFAULT_MODEL = "claude-sonnet-4-5"
+PROMPT_CACHE_TTL_SECONDS = 300  # Provider "ephemeral" cache lifetime
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "llm_cache")
+
+
+class AnthropicBackend:
+    """Anthropic Messages API backend (client created once, reused)."""
+
+    name = "anthropic"
+
+    def __init__(self):
+        self._client = None
+
+    def is_available(self) -> bool:
+        return bool(os.environ.get("ANTHROPIC_API_KEY"))
+
+    def complete(self, request: dict) -> tuple[str, dict]:
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+
+        response = self._client.messages.create(**request)
+        return response.content[0].text, _usage_dict(getattr(response, "usage", None))
+
+    def stream(self, request: dict, usage: dict):
+        """Yield text deltas from the streaming API; fills usage when done."""
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+
+        with self._client.messages.stream(**request) as stream:
+            yield from stream.text_stream
+            usage.update(_usage_dict(getattr(stream.get_final_message(), "usage", None)))
+
+
+class StubBackend:
+    """Deterministic offline backend: same request -> same text, no network."""
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._prefix_cache = OrderedDict()  # prefix hash -> expiry
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return True
+
+    def _prompt_cache(self, request: dict) -> tuple[int, int]:
+        """Simulate the provider prompt cache: (cache_read_tokens, cache_write_tokens)."""
+        prefix = cacheable_prefix(request)
+        if not prefix:
+            return 0, 0
+        tokens = len(prefix) // 4
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            hit = self._prefix_cache.get(key, 0) > now
+            # Reads refresh the TTL, like the provider cache
+            self._prefix_cache[key] = now + PROMPT_CACHE_TTL_SECONDS
+            self._prefix_cache.move_to_end(key)
+            while len(self._prefix_cache) > 256:
+                self._prefix_cache.popitem(last=False)
+        return (tokens, 0) if hit else (0, tokens)
+
+    def _latency(self, usage: dict) -> float:
+        """Cached prefix tokens are cheap to process; scale latency by the uncached share."""
+        total = usage["input_tokens"] + usage["cache_read_input_tokens"] + usage["cache_creation_input_tokens"]
+        cached_share = usage["cache_read_input_tokens"] / total if total else 0.0
+        return self.latency * (1.0 - 0.8 * cached_share)
+
+    def _render(self, request: dict) -> tuple[str, dict]:
+        digest = request_key(request)[:12]
+        text = (
+            f"## Strategic Overview\n"
+            f"Offline stub response {digest} ({request.get('model')}).\n\n"
+            f"## Track Intelligence\n"
+            f"No live model was called for this request.\n"
+        )
+        if "[PROPOSED_CHANGE]" in json.dumps(request, default=str):
+            # Exercise the advisor's structured-change parsing
+            text += "\n[PROPOSED_CHANGE] DF: 7000"
+        prompt_tokens = (len(json.dumps(request.get("messages", []), default=str))
+                         + len(json.dumps(request.get("system", ""), default=str))) // 4
+        cache_read, cache_write = self._prompt_cache(request)
+        return text, {
+            "input_tokens": max(0, prompt_tokens - cache_read - cache_write),
+            "output_tokens": len(text) // 4,
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_write,
+        }
+
+    def complete(self, request: dict) -> tuple[str, dict]:
+        text, usage = self._render(request)
+        if self.latency:
+            time.sleep(self._latency(usage))
+        return text, usage
+
+    def stream(self, request: dict, usage: dict):
+        """Yield the stub text word by word, spreading latency across chunks."""
+        text, stub_usage = self._render(request)
+        latency = self._latency(stub_usage) if self.latency else 0.0
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if latency:
+                time.sleep(latency / len(words))
+            yield word if i == len(words) - 1 else word + " "
+        usage.update(stub_usage)
+
+
+def _usage_dict(usage) -> dict:
+    """Token counts from an API usage object (missing fields -> 0)."""
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
+
+
+def cacheable_prefix(request: dict) -> str:
+    """Serialized request content up to the last cache_control breakpoint ("" if none).
+
+    Follows the provider's prefix order: system blocks, then message content.
+    """
+    blocks = []
+    system = request.get("system")
+    if isinstance(system, list):
+        blocks.extend(system)
+    elif system:
+        blocks.append({"type": "text", "text": system})
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            blocks.extend(dict(block, role=message.get("role")) for block in content)
+        else:
+            blocks.append({"type": "text", "text": content, "role": message.get("role")})
+
+    last = max((i for i, block in enumerate(blocks) if block.get("cache_control")), default=-1)
+    if last < 0:
+        return ""
+    return json.dumps([request.get("model")] + blocks[:last + 1], sort_keys=True, default=str)
+
+
+def request_key(request: dict) -> str:
+    """SHA-256 over the fields that determine a response."""
+    material = {
+        "model": request.get("model"),
+        "system": request.get("system"),
+        "messages": request.get("messages"),
+        "temperature": request.get("temperature"),
+        "max_tokens": request.get("max_tokens"),
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class LLMGateway:
+    """Cached, instrumented entry point for LLM completions."""
+
+    def __init__(self, backend=None, cache_dir: str = CACHE_DIR,
+                 ttl_seconds: int = 7 * 24 * 3600, max_cache_bytes: int = 200 * 1024 * 1024):
+        """Initialize the gateway.
+
+        Args:
+            backend: Backend instance (default from APEX_LLM_BACKEND)
+            cache_dir: Directory for cached responses
+            ttl_seconds: Entries older than this are ignored and removed
+            max_cache_bytes: Least-recently-used entries are evicted above this size
+
+        """
+        if backend is None:
+            backend = StubBackend() if os.environ.get("APEX_LLM_BACKEND", "").lower() == "stub" else AnthropicBackend()
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_cache_bytes = max_cache_bytes
+
+        self._lock = threading.Lock()
+        self._index = None  # key -> (size_bytes, last_access); loaded lazily
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "hit_seconds": 0.0, "miss_seconds": 0.0, "evictions": 0,
+                      "input_tokens": 0, "prompt_cache_hits": 0, "prompt_cache_read_tokens": 0,
+                      "prompt_cache_write_tokens": 0}
+
+    # ------------------------------------------------------------------
+    # Backend
+    # ------------------------------------------------------------------
+
+    def set_backend(self, backend):
+        """Swap the backend (e.g. StubBackend() for offline runs)."""
+        self.backend = backend
+
+    def is_available(self) -> bool:
+        """Whether calls can be made (API key present, or stub backend)."""
+        return self.backend.is_available()
+
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        """Scan the cache directory once to seed the LRU index."""
+        if self._index is not None:
+            return
+        self._index = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                self._index[name[:-5]] = (stat.st_size, stat.st_mtime)
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except Exception:
+            self._drop(key)
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._drop(key)
+            return None
+
+        # Touch for LRU ordering
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            if key in self._index:
+                self._index[key] = (self._index[key][0], now)
+        return entry
+
+    def _put(self, key: str, text: str, usage: dict, model: str):
+        payload = json.dumps({"created_at": time.time(), "model": model, "text": text, "usage": usage})
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            self._load_index()
+        with open(tmp_path, "w") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._index[key] = (len(payload), time.time())
+            self._evict()
+
+    def _drop(self, key: str):
+        with self._lock:
+            if self._index:
+                self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Remove least-recently-used entries until under the size cap (lock held)."""
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_cache_bytes:
+            return
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_cache_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear_cache(self):
+        """Delete all cached responses."""
+        with self._lock:
+            self._load_index()
+            keys = list(self._index)
+        for key in keys:
+            self._drop(key)
+
+    # ------------------------------------------------------------------
+    # Completions
+    # ------------------------------------------------------------------
+
+    def _record_call(self, latency: float, usage: dict):
+        """Tally a backend call, including provider prompt-cache usage (lock not held)."""
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["miss_seconds"] += latency
+            self.stats["input_tokens"] += usage.get("input_tokens", 0)
+            self.stats["prompt_cache_read_tokens"] += usage.get("cache_read_input_tokens", 0)
+            self.stats["prompt_cache_write_tokens"] += usage.get("cache_creation_input_tokens", 0)
+            if usage.get("cache_read_input_tokens"):
+                self.stats["prompt_cache_hits"] += 1
+
+    def complete(self, messages: list[dict], system=None, model: str = DEFAULT_MODEL,
+                 max_tokens: int = 2000, temperature: float = 0.3, use_cache: bool = True) -> dict[str, Any]:
+        """Run a Messages API completion through the cache.
+
+        Args:
+            messages: Messages list (same shape as anthropic messages.create)
+            system: System prompt, as a string or content blocks (cache_control allowed)
+            model: Model name
+            max_tokens: Max output tokens
+            temperature: Sampling temperature
+            use_cache: Set False to force a fresh call (the result is still stored)
+
+        Returns:
+            Dict with text, cached (bool), latency (seconds) and usage (token counts)
+
+        Raises:
+            Whatever the backend raises (callers keep their own error handling)
+
+        """
+        request = {"model": model, "max_tokens": max_tokens, "temperature": temperature, "messages": messages}
+        if system is not None:
+            request["system"] = system
+        key = request_key(request)
+
+        start = time.perf_counter()
+        if use_cache:
+            entry = self._get(key)
+            if entry is not None:
+                latency = time.perf_counter() - start
+                with self._lock:
+                    self.stats["hits"] += 1
+                    self.stats["hit_seconds"] += latency
+                return {"text": entry["text"], "cached": True, "latency": latency, "usage": entry.get("usage", {})}
+
+        try:
+            text, usage = self.backend.complete(request)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        latency = time.perf_counter() - start
+
+        self._record_call(latency, usage)
+        try:
+            self._put(key, text, usage, model)
+        except OSError as e:
+            print(f"Error writing LLM cache: {e}")
+        return {"text": text, "cached": False, "latency": latency, "usage": usage}
+
+    def stream(self, messages: list[dict], system=None, model: str = DEFAULT_MODEL,
+               max_tokens: int = 2000, temperature: float = 0.3, use_cache: bool = True,
+               stats: Optional[dict] = None):
+        """Stream a completion as text chunks (generator), caching the full reply.
+
+        A cache hit yields the stored reply as a single chunk. The stream is
+        only cached once it completes.
+
+        Args:
+            messages, system, model, max_tokens, temperature, use_cache: As in complete()
+            stats: Optional dict filled with ttft (seconds to first chunk), total
+                   (seconds), cached (bool) and usage once the stream finishes
+
+        Yields:
+            Text chunks
+
+        """
+        stats = stats if stats is not None else {}
+        request = {"model": model, "max_tokens": max_tokens, "temperature": temperature, "messages": messages}
+        if system is not None:
+            request["system"] = system
+        key = request_key(request)
+
+        start = time.perf_counter()
+        if use_cache:
+            entry = self._get(key)
+            if entry is not None:
+                latency = time.perf_counter() - start
+                with self._lock:
+                    self.stats["hits"] += 1
+                    self.stats["hit_seconds"] += latency
+                stats.update(ttft=latency, total=latency, cached=True, usage=entry.get("usage", {}))
+                yield entry["text"]
+                return
+
+        usage = {}
+        chunks = []
+        try:
+            for chunk in self.backend.stream(request, usage):
+                if not chunks:
+                    stats["ttft"] = time.perf_counter() - start
+                chunks.append(chunk)
+                yield chunk
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+
+        latency = time.perf_counter() - start
+        stats.update(total=latency, cached=False, usage=usage)
+        stats.setdefault("ttft", latency)
+        self._record_call(latency, usage)
+        try:
+            self._put(key, "".join(chunks), usage, model)
+        except OSError as e:
+            print(f"Error writing LLM cache: {e}")
+
+    def get_stats(self) -> dict:
+        """Hit ratio, mean hit/miss latency, cache size, provider prompt-cache usage."""
+        with self._lock:
+            stats = dict(self.stats)
+            self._load_index()
+            stats["entries"] = len(self._index)
+            stats["cache_bytes"] = sum(size for size, _ in self._index.values())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["avg_hit_seconds"] = stats["hit_seconds"] / stats["hits"] if stats["hits"] else 0.0
+        stats["avg_miss_seconds"] = stats["miss_seconds"] / stats["misses"] if stats["misses"] else 0.0
+        prompt_tokens = stats["input_tokens"] + stats["prompt_cache_read_tokens"] + stats["prompt_cache_write_tokens"]
+        stats["prompt_cache_hit_ratio"] = stats["prompt_cache_hits"] / stats["misses"] if stats["misses"] else 0.0
+        stats["prompt_cached_share"] = stats["prompt_cache_read_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        stats["backend"] = self.backend.name
+        return stats
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
+
+
+def _benchmark():
+    """Cold vs warm calls against the stub backend (no network)."""
+    import tempfile
+
+    gateway = LLMGateway(backend=StubBackend(latency=0.5), cache_dir=tempfile.mkdtemp())
+    messages = [{"role": "user", "content": "Car pushes on corner entry, what should I change?"}]
+    for label in ("cold", "warm", "warm"):
+        response = gateway.complete(messages, system="You are the APEX engineer.")
+        print(f"{label}: cached={response['cached']} latency={response['latency'] * 1000:.1f}ms")
+
+    stats = {}
+    for _chunk in gateway.stream([{"role": "user", "content": "Streaming check"}], stats=stats):
+        pass
+    print(f"stream: ttft={stats['ttft'] * 1000:.1f}ms total={stats['total'] * 1000:.1f}ms")
+
+    # Provider prompt cache: same persona + theory prefix, different questions
+    system = [{"type": "text", "text": "You are the APEX engineer. " * 400, "cache_control": {"type": "ephemeral"}}]
+    for turn in range(3):
+        response = gateway.complete([{"role": "user", "content": f"Turn {turn}: car is loose on exit"}], system=system)
+        usage = response["usage"]
+        print(f"turn {turn}: latency={response['latency'] * 1000:.1f}ms "
+              f"cache_read={usage['cache_read_input_tokens']} cache_write={usage['cache_creation_input_tokens']}")
+    print(gateway.get_stats())
+
+
+if __name__ == "__main__":
+    _benchmark()
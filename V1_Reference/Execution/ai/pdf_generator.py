@@ -3,11 +3,32 @@ Creates printable PDF documents for race preparation plans.
 
 Uses fpdf2 library for clean, structured documents suitable for printing
 and bringing to the track.
+
+The prep plan has AI-written front sections (overview, track intelligence)
+and static sections (setup, checklist, parts, practice, contingencies) that
+always start on a new page. PrepPlanStaticSections renders the static pages
+on their own, e.g. while the LLM call is still running, and
+assemble_race_prep_plan joins them to the front pages once the AI text is in.
+
+Rendered static pages are cached by content across documents (most plans
+for the same car and conditions share them), since line-breaking text is
+where fpdf2 spends its time. PdfBookWriter joins many documents into one
+file (season books, sponsor reports): each document is rendered on its own
+and only its pages are kept, copied through PyPDF2's PdfWriter, so the
+rendered documents never pile up however many sessions the book covers.
 """
 
+import hashlib
 import io
+import json
+import threading
+import time
+from collections import OrderedDict
 
 from fpdf import FPDF
+from PyPDF2 import PdfReader, PdfWriter
+
+TEMPLATE_CACHE_SIZE = 64  # Rendered static-section variants kept across documents
 
 
 class APEXPdfGenerator(FPDF):
@@ -15,14 +36,21 @@ class APEXPdfGenerator(FPDF):
     Extends FPDF with AGR branding and structured sections.
     """
 
-    def __init__(self):
+    def __init__(self, page_offset=0, page_total=None):
+        """Args:
+            page_offset: Pages that precede this document when it is merged
+            page_total: Total pages of the merged document (None: this document's {nb},
+                0: unknown, footer shows the page number only)
+        """
         super().__init__()
         self.set_auto_page_break(auto=True, margin=15)
+        self.page_offset = page_offset
+        self.page_total = page_total
 
         # AGR Brand Colors (approximated for PDF)
         self.primary_color = (41, 128, 185)   # Blue
         self.accent_color = (231, 76, 60)     # Red/Orange
-        self.text_color = (44, 62, 80)        # Dark blue-grey
+        self.body_color = (44, 62, 80)        # Dark blue-grey
 
     def header(self):
         """Custom header for each page."""
@@ -33,7 +61,7 @@ class APEXPdfGenerator(FPDF):
 
         # Tagline
         self.set_font('Helvetica', 'I', 10)
-        self.set_text_color(*self.text_color)
+        self.set_text_color(*self.body_color)
         self.cell(0, 10, 'Avant Garde Racing', align='R')
 
         self.ln(15)
@@ -48,18 +76,24 @@ class APEXPdfGenerator(FPDF):
         self.set_y(-15)
         self.set_font('Helvetica', 'I', 8)
         self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'Generated by A.P.E.X. | Page {self.page_no()}/{{nb}}', align='C')
+        page = self.page_offset + self.page_no()
+        if self.page_total == 0:
+            # Books do not know their length up front
+            self.cell(0, 10, f'Generated by A.P.E.X. | Page {page}', align='C')
+            return
+        total = self.page_total if self.page_total is not None else '{nb}'
+        self.cell(0, 10, f'Generated by A.P.E.X. | Page {page}/{total}', align='C')
 
     def add_title(self, title, subtitle=None):
         """Add main title section."""
         self.set_font('Helvetica', 'B', 24)
-        self.set_text_color(*self.text_color)
-        self.multi_cell(0, 12, title, align='C')
+        self.set_text_color(*self.body_color)
+        self.multi_cell(0, 12, title, align='C', new_x="LMARGIN", new_y="NEXT")
 
         if subtitle:
             self.set_font('Helvetica', '', 14)
             self.set_text_color(128, 128, 128)
-            self.multi_cell(0, 8, subtitle, align='C')
+            self.multi_cell(0, 8, subtitle, align='C', new_x="LMARGIN", new_y="NEXT")
 
         self.ln(10)
 
@@ -68,7 +102,7 @@ class APEXPdfGenerator(FPDF):
         self.ln(5)
         self.set_font('Helvetica', 'B', 14)
         self.set_text_color(*self.accent_color)
-        self.cell(0, 10, title, ln=True)
+        self.cell(0, 10, title, new_x="LMARGIN", new_y="NEXT")
 
         # Underline
         self.set_draw_color(*self.accent_color)
@@ -78,24 +112,24 @@ class APEXPdfGenerator(FPDF):
         self.ln(3)
 
         # Reset text color
-        self.set_text_color(*self.text_color)
+        self.set_text_color(*self.body_color)
 
     def add_paragraph(self, text):
         """Add a paragraph of text."""
         self.set_font('Helvetica', '', 11)
-        self.set_text_color(*self.text_color)
-        self.multi_cell(0, 6, text)
+        self.set_text_color(*self.body_color)
+        self.multi_cell(0, 6, text, new_x="LMARGIN", new_y="NEXT")
         self.ln(3)
 
     def add_bullet_list(self, items):
         """Add a bulleted list."""
         self.set_font('Helvetica', '', 11)
-        self.set_text_color(*self.text_color)
+        self.set_text_color(*self.body_color)
 
         for item in items:
             # Bullet point
             self.cell(10, 6, chr(149), align='R')  # Bullet character
-            self.multi_cell(0, 6, f" {item}")
+            self.multi_cell(0, 6, f" {item}", new_x="LMARGIN", new_y="NEXT")
 
     def add_checklist(self, items, checked=None):
         """Add a checklist with checkboxes for printing.
@@ -107,13 +141,19 @@ class APEXPdfGenerator(FPDF):
         """
         checked = checked or set()
         self.set_font('Helvetica', '', 11)
-        self.set_text_color(*self.text_color)
+        self.set_text_color(*self.body_color)
 
         for i, item in enumerate(items):
-            # Checkbox (empty square or checked)
-            box_char = chr(9745) if i in checked else chr(9744)  # Ballot box
-            self.cell(10, 7, box_char, align='R')
-            self.multi_cell(0, 7, f" {item}")
+            # Checkbox drawn as a square (core fonts have no ballot box glyph)
+            x, y = self.get_x(), self.get_y()
+            self.set_draw_color(*self.body_color)
+            self.set_line_width(0.3)
+            self.rect(x + 5, y + 1.5, 4, 4)
+            if i in checked:
+                self.line(x + 5, y + 1.5, x + 9, y + 5.5)
+                self.line(x + 5, y + 5.5, x + 9, y + 1.5)
+            self.cell(10, 7, '')
+            self.multi_cell(0, 7, f" {item}", new_x="LMARGIN", new_y="NEXT")
 
     def add_setup_table(self, setup_dict, title="Setup Parameters"):
         """Add a formatted table for the 24-parameter setup.
@@ -145,10 +185,10 @@ class APEXPdfGenerator(FPDF):
             self.set_fill_color(*self.primary_color)
             self.set_text_color(255, 255, 255)
             self.set_font('Helvetica', 'B', 9)
-            self.cell(0, row_height, cat_name, ln=True, fill=True)
+            self.cell(0, row_height, cat_name, new_x="LMARGIN", new_y="NEXT", fill=True)
 
             # Parameters
-            self.set_text_color(*self.text_color)
+            self.set_text_color(*self.body_color)
             self.set_font('Helvetica', '', 9)
 
             row_params = []
@@ -183,7 +223,7 @@ class APEXPdfGenerator(FPDF):
             self.set_font('Helvetica', 'B', 10)
             self.cell(50, 7, f"{key}:")
             self.set_font('Helvetica', '', 10)
-            self.multi_cell(col_width, 7, str(value))
+            self.multi_cell(col_width, 7, str(value), new_x="LMARGIN", new_y="NEXT")
 
     def add_contingency_box(self, condition, action):
         """Add a styled contingency box (If X, then Y).
@@ -206,56 +246,23 @@ class APEXPdfGenerator(FPDF):
         self.set_text_color(*self.accent_color)
         self.cell(15, 6, "IF:")
         self.set_font('Helvetica', '', 10)
-        self.set_text_color(*self.text_color)
-        self.multi_cell(170, 6, condition)
+        self.set_text_color(*self.body_color)
+        self.multi_cell(170, 6, condition, new_x="LMARGIN", new_y="NEXT")
 
         self.set_x(15)
         self.set_font('Helvetica', 'B', 10)
         self.set_text_color(*self.primary_color)
         self.cell(15, 6, "THEN:")
         self.set_font('Helvetica', '', 10)
-        self.set_text_color(*self.text_color)
-        self.multi_cell(170, 6, action)
+        self.set_text_color(*self.body_color)
+        self.multi_cell(170, 6, action, new_x="LMARGIN", new_y="NEXT")
 
         self.ln(5)
 
 
-def generate_race_prep_plan(
-    racer_name,
-    event_name,
-    track_name,
-    event_date,
-    vehicle_info,
-    strategic_overview,
-    track_intelligence,
-    recommended_setup,
-    mechanical_checklist,
-    parts_list,
-    practice_strategy,
-    contingencies
-):
-    """Generate a complete Race Prep Plan PDF.
-
-    Args:
-        racer_name: Driver name
-        event_name: Event/session name
-        track_name: Track name
-        event_date: Date of event
-        vehicle_info: Dict with brand, model
-        strategic_overview: String with goals and expectations
-        track_intelligence: String with track-specific knowledge
-        recommended_setup: Dict of 24 setup parameters
-        mechanical_checklist: List of maintenance items
-        parts_list: List of parts/consumables to bring
-        practice_strategy: List of practice session focus items
-        contingencies: List of dicts with 'condition' and 'action' keys
-
-    Returns:
-        bytes - PDF file content
-
-    """
-    pdf = APEXPdfGenerator()
-    pdf.alias_nb_pages()
+def _add_front_sections(pdf, racer_name, event_name, track_name, event_date, vehicle_info,
+                        strategic_overview, track_intelligence):
+    """Title, event info and the AI-written sections 1-2."""
     pdf.add_page()
 
     # Title
@@ -280,10 +287,17 @@ def generate_race_prep_plan(
     pdf.add_section_header("2. Track Intelligence")
     pdf.add_paragraph(track_intelligence)
 
+
+def _add_static_sections(pdf, recommended_setup, mechanical_checklist, parts_list,
+                         practice_strategy, contingencies):
+    """Sections 3-7 and the notes page; starts on a new page so it can be rendered separately."""
     # Recommended Starting Setup
+    pdf.add_page()
     if recommended_setup:
-        pdf.add_page()
         pdf.add_setup_table(recommended_setup, "3. Recommended Starting Setup")
+    else:
+        pdf.add_section_header("3. Recommended Starting Setup")
+        pdf.add_paragraph("No matching baseline found. Start from your shop master baseline.")
 
     # Mechanical Checklist
     pdf.add_section_header("4. Pre-Race Mechanical Checklist")
@@ -325,11 +339,269 @@ def generate_race_prep_plan(
     pdf.add_paragraph("Use this space for additional observations during the event:")
     pdf.ln(50)  # Space for handwritten notes
 
-    # Generate PDF bytes
+
+def _render(build, page_offset=0, page_total=None):
+    """Run a section builder on a fresh document; returns (pdf bytes, page count)."""
+    pdf = APEXPdfGenerator(page_offset=page_offset, page_total=page_total)
+    if page_total is None:
+        pdf.alias_nb_pages()
+    build(pdf)
     output = io.BytesIO()
     pdf.output(output)
+    return output.getvalue(), pdf.page_no()
+
+
+def generate_race_prep_plan(
+    racer_name,
+    event_name,
+    track_name,
+    event_date,
+    vehicle_info,
+    strategic_overview,
+    track_intelligence,
+    recommended_setup,
+    mechanical_checklist,
+    parts_list,
+    practice_strategy,
+    contingencies
+):
+    """Generate a complete Race Prep Plan PDF.
+
+    Args:
+        racer_name: Driver name
+        event_name: Event/session name
+        track_name: Track name
+        event_date: Date of event
+        vehicle_info: Dict with brand, model
+        strategic_overview: String with goals and expectations
+        track_intelligence: String with track-specific knowledge
+        recommended_setup: Dict of 24 setup parameters
+        mechanical_checklist: List of maintenance items
+        parts_list: List of parts/consumables to bring
+        practice_strategy: List of practice session focus items
+        contingencies: List of dicts with 'condition' and 'action' keys
+
+    Returns:
+        bytes - PDF file content
+
+    """
+    def build(pdf):
+        _add_front_sections(pdf, racer_name, event_name, track_name, event_date, vehicle_info,
+                            strategic_overview, track_intelligence)
+        _add_static_sections(pdf, recommended_setup, mechanical_checklist, parts_list,
+                             practice_strategy, contingencies)
+
+    return _render(build)[0]
+
+
+_template_cache = OrderedDict()  # (content key, page_offset, page_total) -> bytes or page count
+_template_lock = threading.Lock()
+template_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _template_get(key):
+    with _template_lock:
+        if key in _template_cache:
+            _template_cache.move_to_end(key)
+            template_cache_stats["hits"] += 1
+            return _template_cache[key]
+        template_cache_stats["misses"] += 1
+        return None
+
+
+def _template_put(key, value):
+    with _template_lock:
+        _template_cache[key] = value
+        _template_cache.move_to_end(key)
+        while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+
+
+class PrepPlanStaticSections:
+    """Sections 3-7 of a prep plan, rendered independently of the AI text.
+
+    The page numbers of these pages depend on how many front pages the AI
+    text fills, which is unknown until the LLM answers. prerender() renders
+    them for the likely front page counts ahead of time; render() reuses a
+    matching render (from this plan or any earlier plan with the same
+    content) or renders on demand.
+    """
+
+    def __init__(self, recommended_setup, mechanical_checklist, parts_list, practice_strategy, contingencies):
+        self._args = (recommended_setup, mechanical_checklist, parts_list, practice_strategy, contingencies)
+        self.content_key = hashlib.sha256(
+            json.dumps(self._args, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _build(self, pdf):
+        _add_static_sections(pdf, *self._args)
+
+    @property
+    def page_count(self):
+        """Number of static pages (rendered once per content to find out)."""
+        key = (self.content_key, "pages")
+        count = _template_get(key)
+        if count is None:
+            count = _render(self._build)[1]
+            _template_put(key, count)
+        return count
+
+    def render(self, page_offset, page_total):
+        """Static pages numbered from page_offset + 1 out of page_total."""
+        key = (self.content_key, page_offset, page_total)
+        pdf_bytes = _template_get(key)
+        if pdf_bytes is None:
+            pdf_bytes = _render(self._build, page_offset, page_total)[0]
+            _template_put(key, pdf_bytes)
+        return pdf_bytes
+
+    front_pages_hint = 1  # Front page count assemble_race_prep_plan tries first
+
+    def prerender(self, front_page_guesses=(1, 2)):
+        """Render for each guessed front page count (run this while the LLM call is in flight)."""
+        self.front_pages_hint = front_page_guesses[0]
+        for front_pages in front_page_guesses:
+            self.render(front_pages, front_pages + self.page_count)
+        return self
+
+
+def assemble_race_prep_plan(static_sections, racer_name, event_name, track_name, event_date, vehicle_info,
+                            strategic_overview, track_intelligence):
+    """Render the front sections and join them with pre-rendered static sections.
+
+    Args:
+        static_sections: PrepPlanStaticSections (ideally already prerendered)
+        racer_name ... track_intelligence: As in generate_race_prep_plan
+
+    Returns:
+        bytes - PDF file content, same pages as generate_race_prep_plan
+
+    """
+    def build(pdf):
+        _add_front_sections(pdf, racer_name, event_name, track_name, event_date, vehicle_info,
+                            strategic_overview, track_intelligence)
+
+    # Render assuming a front page count; footer text does not affect layout,
+    # so a wrong guess only costs one more render with the actual count
+    static_pages = static_sections.page_count
+    front_pages = static_sections.front_pages_hint
+    front_bytes, actual_pages = _render(build, 0, front_pages + static_pages)
+    if actual_pages != front_pages:
+        front_pages = actual_pages
+        front_bytes = _render(build, 0, front_pages + static_pages)[0]
+    page_total = front_pages + static_pages
+    static_bytes = static_sections.render(front_pages, page_total)
+
+    writer = PdfWriter()
+    for part in (front_bytes, static_bytes):
+        for page in PdfReader(io.BytesIO(part)).pages:
+            writer.add_page(page)
+    output = io.BytesIO()
+    writer.write(output)
     return output.getvalue()
 
+class PdfBookWriter:
+    """Collects many rendered PDF documents into one PDF file.
+
+    Each added document is parsed and its pages are copied into a PyPDF2
+    PdfWriter with add_page, after which the parsed document is dropped;
+    the book is written to the file handle on close. Only the copied pages
+    are held, never the rendered documents or their readers.
+
+    Usage:
+        with PdfBookWriter("season.pdf") as book:
+            for pdf_bytes in documents:
+                book.add_document(pdf_bytes)
+    """
+
+    def __init__(self, path_or_stream):
+        self._own_stream = isinstance(path_or_stream, str)
+        self._stream = open(path_or_stream, "wb") if self._own_stream else path_or_stream
+        self._writer = PdfWriter()
+        self.page_count = 0
+        self.documents = 0
+
+    def add_document(self, pdf_bytes):
+        """Append every page of a PDF document; returns the number of pages added."""
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        for page in reader.pages:
+            self._writer.add_page(page)
+        added = len(reader.pages)
+        self.page_count += added
+        self.documents += 1
+        return added
+
+    def close(self):
+        """Write the book to the output file."""
+        if self._stream is None:
+            return
+        try:
+            self._writer.write(self._stream)
+        finally:
+            if self._own_stream:
+                self._stream.close()
+            self._stream = None
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _add_session_summary(pdf, session, changes):
+    """One session of a season book or sponsor report."""
+    pdf.add_page()
+    pdf.add_title(session.get('session_name') or 'Session', f"{session.get('track_name', '')} | {session.get('start_date', '')}")
+
+    best_lap = session.get('best_lap')
+    pdf.add_key_value_section({
+        "Vehicle": f"{session.get('vehicle_brand') or ''} {session.get('vehicle_model') or ''}".strip() or "N/A",
+        "Conditions": f"{session.get('traction') or 'N/A'} traction, {session.get('surface_condition') or 'N/A'}",
+        "Best Lap": f"{float(best_lap):.3f}s" if best_lap else "N/A",
+        "Setup Changes": str(session.get('change_count', len(changes)))
+    })
+
+    pdf.add_section_header("Setup Changes")
+    if changes:
+        pdf.add_bullet_list([
+            f"{c.get('parameter')}: {c.get('old_value')} -> {c.get('new_value')}"
+            + (f" ({c['impact_status']})" if c.get('impact_status') else "")
+            for c in changes
+        ])
+    else:
+        pdf.add_paragraph("No setup changes recorded.")
+
+
+def write_session_book(path_or_stream, title, subtitle, sessions, changes_for=None):
+    """Write a multi-session report (season book, sponsor report) to a file.
+
+    Args:
+        path_or_stream: Output file path or writable binary stream
+        title: Cover title, e.g. "2025 Season Book"
+        subtitle: Cover subtitle, e.g. the racer or "Prepared for <sponsor>"
+        sessions: Iterable of session dicts (as from session_service.get_session_history);
+            a generator avoids loading them all at once
+        changes_for: Optional callable(session) -> list of setup change dicts
+
+    Returns:
+        Dict with sessions and pages written
+
+    """
+    changes_for = changes_for or (lambda session: [])
+    with PdfBookWriter(path_or_stream) as book:
+        def cover(pdf):
+            pdf.add_page()
+            pdf.add_title(title, subtitle)
+
+        book.add_document(_render(cover, 0, 0)[0])
+        for session in sessions:
+            changes = changes_for(session)
+            book.add_document(_render(lambda pdf: _add_session_summary(pdf, session, changes),
+                                      book.page_count, 0)[0])
+        return {"sessions": book.documents - 1, "pages": book.page_count}
+
 
 # Quick test function
 def _test_pdf():
@@ -383,5 +655,58 @@ def _test_pdf():
     print("Test PDF generated: test_race_prep.pdf")
 
 
+def _benchmark(documents=40, book_sizes=(25, 200)):
+    """PDFs/sec for full renders vs. template-cached assembly, and book memory vs. size."""
+    import tempfile
+    import tracemalloc
+
+    static_args = dict(
+        recommended_setup={"DF": 7000, "DC": 5000, "DR": 3000, "SO_F": 350, "Tread": "Reflex", "Compound": "Green"},
+        mechanical_checklist=[f"Checklist item {i} - inspect and service as needed" for i in range(12)],
+        parts_list=[f"Spare part {i} with a longer description to wrap the line" for i in range(15)],
+        practice_strategy=["Baseline verification", "Tire evaluation", "Primary tuning", "Race simulation"],
+        contingencies=[{"condition": f"Condition {i}", "action": "Adjust springs and compound"} for i in range(4)]
+    )
+    front_args = dict(
+        racer_name="Bench Racer", event_name="Bench Nationals", track_name="Thunder Alley",
+        event_date="2025-06-01", vehicle_info={"brand": "Tekno", "model": "NB48 2.2"},
+        track_intelligence="High traction by Sunday. " * 20
+    )
+
+    start = time.perf_counter()
+    for i in range(documents):
+        generate_race_prep_plan(strategic_overview=f"Plan {i}. " + "Goals and expectations. " * 60,
+                                **front_args, **static_args)
+    full_rate = documents / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(documents):
+        assemble_race_prep_plan(PrepPlanStaticSections(**static_args),
+                                strategic_overview=f"Plan {i}. " + "Goals and expectations. " * 60, **front_args)
+    cached_rate = documents / (time.perf_counter() - start)
+    print(f"prep plans: {full_rate:.1f} PDFs/s full render, {cached_rate:.1f} PDFs/s with cached static pages")
+
+    def sessions(count):
+        for i in range(count):
+            yield {"session_name": f"Round {i + 1}", "track_name": "Thunder Alley", "start_date": "2025-06-01",
+                   "traction": "High", "surface_condition": "Smooth", "vehicle_brand": "Tekno",
+                   "vehicle_model": "NB48 2.2", "best_lap": 32.5 + i % 7 / 10, "change_count": 6}
+
+    changes = [{"parameter": "SO_F", "old_value": 350, "new_value": 400, "impact_status": "SUCCESS"}] * 6
+    for count in book_sizes:
+        with tempfile.TemporaryFile() as f:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = write_session_book(f, "Season Book", "Bench Racer", sessions(count), lambda s: changes)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = f.tell()
+        print(f"book of {count:>3} sessions: {result['pages']} pages, {count / elapsed:.1f} sessions/s, "
+              f"{size / 1024:.0f} KiB file, peak memory {peak / 1024:.0f} KiB")
+
+
 if __name__ == "__main__":
-    _test_pdf()
+    import sys
+
+    _benchmark() if "--benchmark" in sys.argv else _test_pdf()
@@ -0,0 +1,188 @@
+"""A.P.E.X. Prompt Budget - token-budgeted prompt assembly.
+
+Prompts are assembled from named sections, each with a priority (0 = never
+trimmed, higher numbers are trimmed first) and a trim strategy. When the
+estimated total exceeds the ceiling, the lowest-priority sections are
+summarized or truncated until it fits. Sections keep their original order
+in the output; priority only decides what gets cut.
+
+Trim strategies:
+- "tail": keep the beginning, cut the end
+- "head": keep the end (most recent lines), cut the beginning
+- "docs": for [DOC: ...] theory chunks, keep whole documents in order while
+  they fit, then fill the rest of the budget with the opening paragraphs of
+  the remaining documents
+
+Token counts are estimated at ~4 characters per token, which is close
+enough for budgeting and needs no tokenizer.
+"""
+
+import os
+import re
+
+CHARS_PER_TOKEN = 4
+PROMPT_TOKEN_CEILING = int(os.environ.get("APEX_PROMPT_TOKEN_CEILING", "12000"))
+
+# Section priorities used by the advisor prompts
+PRIORITY_REQUIRED = 0      # user observation, persona rules
+PRIORITY_ORP = 1           # ORP metrics, recent changes
+PRIORITY_EVENT = 2         # event context, active setup
+PRIORITY_HISTORY = 5       # institutional memory
+PRIORITY_THEORY = 9        # theory library documents
+
+# Theory docs sent in the provider-cached system prefix get a fixed share of
+# the ceiling, so the trimmed text (and the cache key) is the same every turn
+THEORY_TOKEN_BUDGET = PROMPT_TOKEN_CEILING // 2
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count for a string."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def section(name: str, text: str, priority: int = PRIORITY_EVENT, trim: str = "tail",
+            min_tokens: int = 0) -> dict:
+    """Build a prompt section.
+
+    Args:
+        name: Label used in the token report
+        text: Section text (already wrapped in its tags)
+        priority: 0 = never trimmed; higher numbers are trimmed first
+        trim: "tail", "head" or "docs"
+        min_tokens: Keep at least this much when trimming (0 allows dropping)
+
+    """
+    return {"name": name, "text": text or "", "priority": priority, "trim": trim, "min_tokens": min_tokens}
+
+
+def _truncate(text: str, max_tokens: int, keep: str) -> str:
+    """Cut text to max_tokens on a line boundary, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    marker = "\n[... trimmed for length ...]\n"
+    budget = max(0, max_chars - len(marker))
+    if keep == "head":
+        cut = text[-budget:] if budget else ""
+        newline = cut.find("\n")
+        cut = cut[newline + 1:] if 0 <= newline < len(cut) // 2 else cut
+        return marker + cut
+    cut = text[:budget]
+    newline = cut.rfind("\n")
+    cut = cut[:newline] if newline > len(cut) // 2 else cut
+    return cut + marker
+
+
+def _summarize_doc(doc: str) -> str:
+    """A [DOC: ...] chunk cut to its header and opening paragraph."""
+    header, _, body = doc.strip("\n").partition("\n")
+    first_paragraph = body.strip().split("\n\n")[0][:800]
+    return f"\n{header} [summary]\n{first_paragraph}\n"
+
+
+def _trim_docs(text: str, max_tokens: int) -> str:
+    """Fill the budget greedily: whole [DOC: ...] chunks in order, then summaries of the rest."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    parts = re.split(r'(?=\n\[DOC: )', text)
+    preamble, docs = parts[0], parts[1:]
+
+    kept = [preamble]
+    used = len(preamble)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+
+    # Whole documents, in library order, until the next one does not fit
+    index = 0
+    while index < len(docs) and used + len(docs[index]) <= max_chars:
+        kept.append(docs[index])
+        used += len(docs[index])
+        index += 1
+
+    # Opening paragraphs of the remaining documents, skipping any that do not fit
+    for doc in docs[index:]:
+        summary = _summarize_doc(doc)
+        if used + len(summary) <= max_chars:
+            kept.append(summary)
+            used += len(summary)
+
+    if len(kept) == 1:
+        # Not even one summary fits: cut the text itself
+        return _truncate(text, max_tokens, "tail")
+    return "".join(kept)
+
+
+def fit_sections(sections: list[dict], ceiling_tokens: int = PROMPT_TOKEN_CEILING) -> tuple[list[dict], dict]:
+    """Trim sections to fit a token ceiling.
+
+    Returns:
+        (sections with trimmed text, report) where report has total_tokens,
+        ceiling_tokens, trimmed (bool) and per-section
+        {name, priority, tokens_in, tokens_out}
+
+    """
+    fitted = [dict(s, tokens_in=estimate_tokens(s["text"])) for s in sections]
+    for s in fitted:
+        s["tokens_out"] = s["tokens_in"]
+
+    total = sum(s["tokens_out"] for s in fitted)
+    # Trim lowest priority first; later sections first within a priority
+    order = sorted(range(len(fitted)), key=lambda i: (-fitted[i]["priority"], -i))
+    for i in order:
+        if total <= ceiling_tokens:
+            break
+        s = fitted[i]
+        if s["priority"] == PRIORITY_REQUIRED:
+            continue
+        allowed = max(s["min_tokens"], s["tokens_out"] - (total - ceiling_tokens))
+        if s["trim"] == "docs":
+            s["text"] = _trim_docs(s["text"], allowed)
+        else:
+            s["text"] = _truncate(s["text"], allowed, s["trim"])
+        new_tokens = estimate_tokens(s["text"])
+        total -= s["tokens_out"] - new_tokens
+        s["tokens_out"] = new_tokens
+
+    report = {
+        "ceiling_tokens": ceiling_tokens,
+        "total_tokens": total,
+        "trimmed": any(s["tokens_out"] < s["tokens_in"] for s in fitted),
+        "sections": [
+            {"name": s["name"], "priority": s["priority"], "tokens_in": s["tokens_in"], "tokens_out": s["tokens_out"]}
+            for s in fitted
+        ],
+    }
+    return fitted, report
+
+
+def build_prompt(sections: list[dict], ceiling_tokens: int = PROMPT_TOKEN_CEILING,
+                 report: dict = None) -> str:
+    """Assemble sections into one prompt string within the ceiling.
+
+    Args:
+        sections: Sections from section()
+        ceiling_tokens: Token ceiling for the assembled prompt
+        report: Optional dict filled with the per-section token report
+
+    Returns:
+        Prompt text (sections joined in their original order)
+
+    """
+    fitted, section_report = fit_sections(sections, ceiling_tokens)
+    if report is not None:
+        report.update(section_report)
+    return "\n".join(s["text"] for s in fitted if s["text"])
+
+
+def trim_theory(theory: str, max_tokens: int = THEORY_TOKEN_BUDGET) -> str:
+    """Deterministically fit theory documents to a fixed budget (for cached prefixes)."""
+    return _trim_docs(theory, max_tokens)
+
+
+def split_library(library: str) -> tuple[str, str]:
+    """Split get_system_context() output into (active config, theory documents)."""
+    index = library.find("\n[DOC: ")
+    if index == -1:
+        return library, ""
+    return library[:index], library[index:]
@@ -7,6 +7,11 @@
 # 3. Spotter (Tab 3: Race Support)
 # 4. Analyst (Tab 4: Post Event Analysis)
 # 5. Librarian (Tab 5: Setup Library)
+#
+# Advisor prompts are assembled through prompt_budget so they stay under a
+# token ceiling as the theory library and history grow.
+
+from Execution.ai import prompt_budget as pb
 
 # ============================================================================
 # DEPRECATED - Maintained for backward compatibility with existing tests
@@ -170,7 +175,8 @@ Pro driver + Low ORP score:
 </orp_integration>
 """
 
-def get_tuning_prompt(car, query, event_context, library, historical_context=""):
+def get_tuning_prompt(car, query, event_context, library, historical_context="",
+                      token_ceiling=pb.PROMPT_TOKEN_CEILING, token_report=None, conversation_summary=""):
     """Boxes in the high-fidelity chassis data, circuit analysis, telemetry,
     AND historical memory for the AI.
 
@@ -180,29 +186,48 @@ def get_tuning_prompt(car, query, event_context, library, historical_context="")
         event_context: Current session context (track, conditions, etc.)
         library: Technical reference library
         historical_context: Memory from history_service (what worked/didn't work before)
+        token_ceiling: Token budget for the assembled prompt
+        token_report: Optional dict filled with per-section token counts
+        conversation_summary: Running summary of earlier turns in this conversation
 
     """
-    # Build the historical memory section
-    memory_section = ""
-    if historical_context:
-        memory_section = f"""
-    {historical_context}
-    """
-
-    return f"""
+    return pb.build_prompt(
+        _tuning_sections(car, query, event_context, library, historical_context=historical_context,
+                         conversation_summary=conversation_summary),
+        token_ceiling, token_report
+    )
+
+
+def _tuning_sections(car, query, event_context, library, historical_context="", orp_section="",
+                     conversation_summary=""):
+    """Prompt sections shared by the tuning prompt builders, in output order."""
+    active_config, theory_docs = pb.split_library(library)
+    return [
+        pb.section("event_context", f"""
     <event_context>
     PLATFORM: {car}
     {event_context}
-    </event_context>
-    {memory_section}
+    </event_context>""", pb.PRIORITY_EVENT),
+        pb.section("historical_memory", f"""
+    {historical_context}""" if historical_context else "", pb.PRIORITY_HISTORY, trim="tail"),
+        pb.section("orp_context", orp_section, pb.PRIORITY_ORP),
+        pb.section("conversation_summary", f"""
+    <earlier_conversation>
+    {conversation_summary}
+    </earlier_conversation>""" if conversation_summary else "", pb.PRIORITY_HISTORY, trim="head"),
+        pb.section("user_observation", f"""
     <user_observation>
     {query}
     </user_observation>
-
+""", pb.PRIORITY_REQUIRED),
+        pb.section("active_config", f"""
     <technical_library>
-    {library}
+    {active_config}""", pb.PRIORITY_EVENT, trim="tail", min_tokens=200),
+        pb.section("theory_library", theory_docs, pb.PRIORITY_THEORY, trim="docs"),
+        pb.section("library_close", """
     </technical_library>
-    """
+    """, pb.PRIORITY_REQUIRED),
+    ]
 
 
 def get_tuning_prompt_with_memory(car, query, event_context, library,
@@ -248,7 +273,9 @@ def get_tuning_prompt_with_memory(car, query, event_context, library,
 
 def get_tuning_prompt_with_orp(car, query, event_context, library,
                                 orp_context, experience_level,
-                                scenario, orp_score, confidence):
+                                scenario, orp_score, confidence,
+                                token_ceiling=pb.PROMPT_TOKEN_CEILING, token_report=None,
+                                conversation_summary=""):
     """Enhanced prompt builder that injects ORP context and constraints.
 
     This is the primary function for Phase 5+ advisor integration, combining:
@@ -268,6 +295,9 @@ def get_tuning_prompt_with_orp(car, query, event_context, library,
         scenario: 'A' (Avant Garde) or 'B' (Conservative)
         orp_score: 0-100 ORP score
         confidence: 1-5 driver confidence rating
+        token_ceiling: Token budget for the assembled prompt (theory docs trimmed first)
+        token_report: Optional dict filled with per-section token counts
+        conversation_summary: Running summary of earlier turns in this conversation
 
     Returns:
         Complete prompt with ORP context and constraints injected
@@ -338,20 +368,11 @@ def get_tuning_prompt_with_orp(car, query, event_context, library,
 
     orp_section += "\n    </orp_context>"
 
-    return f"""
-    <event_context>
-    PLATFORM: {car}
-    {event_context}
-    </event_context>
-    {orp_section}
-    <user_observation>
-    {query}
-    </user_observation>
-
-    <technical_library>
-    {library}
-    </technical_library>
-    """
+    return pb.build_prompt(
+        _tuning_sections(car, query, event_context, library, orp_section=orp_section,
+                         conversation_summary=conversation_summary),
+        token_ceiling, token_report
+    )
 
 def get_report_prompt(profile, session_summary, format_type):
     """Generates a professional race report prompt based on format."""
@@ -499,6 +520,21 @@ def get_system_prompt(persona_key: str, context: dict = None) -> str:
     Returns:
         str: Complete system prompt with dynamically injected context
 
+    Raises:
+        ValueError: If persona_key is not recognized
+
+    """
+    static, dynamic = get_system_prompt_parts(persona_key, context)
+    return static + dynamic
+
+
+def get_system_prompt_parts(persona_key: str, context: dict = None) -> tuple[str, str]:
+    """Split a persona system prompt into (static role text, dynamic context).
+
+    The static part is identical for every call with the same persona, so it
+    can be sent as a provider-cached prefix (see get_system_blocks). Context
+    injected from session state lives only in the dynamic part.
+
     Raises:
         ValueError: If persona_key is not recognized
 
@@ -523,11 +559,37 @@ def get_system_prompt(persona_key: str, context: dict = None) -> str:
         raise ValueError(f"Unknown persona_key: {persona_key}. Must be one of: strategist, engineer, spotter, analyst, librarian")
 
 
+def get_system_blocks(persona_key: str, context: dict = None, theory: str = "") -> list[dict]:
+    """System prompt as Messages API content blocks with a cache breakpoint.
+
+    The persona role text and theory documents form a stable prefix marked
+    with cache_control, so repeat turns read it from the provider's prompt
+    cache. Session context (ORP, change history, event) follows as an
+    uncached suffix block.
+
+    Args:
+        persona_key: Persona name (see get_system_prompt)
+        context: Dynamic context for the persona
+        theory: Theory library documents to include in the cached prefix
+
+    """
+    static, dynamic = get_system_prompt_parts(persona_key, context)
+    return cached_system_blocks(static + (f"\n<theory_library>\n{theory}\n</theory_library>\n" if theory else ""), dynamic)
+
+
+def cached_system_blocks(static: str, dynamic: str = "") -> list[dict]:
+    """Wrap a stable prefix (cache breakpoint) and an optional variable suffix as system blocks."""
+    blocks = [{"type": "text", "text": static, "cache_control": {"type": "ephemeral"}}]
+    if dynamic.strip():
+        blocks.append({"type": "text", "text": dynamic})
+    return blocks
+
+
 # ============================================================================
 # PERSONA 1: STRATEGIST (Tab 1 - Event Setup)
 # ============================================================================
 
-def _get_strategist_prompt(context: dict) -> str:
+def _get_strategist_prompt(context: dict) -> tuple[str, str]:
     """The Team Principal & Chief Strategist persona.
 
     Focus: Macro-level event planning, Scenario A/B determination, historical strategy.
@@ -555,14 +617,13 @@ def _get_strategist_prompt(context: dict) -> str:
         scenario = "A (Avant Garde/Aggressive)" if rounds >= 3 else "B (Conservative/Consistency)"
         scenario_guidance = f"\nBased on {rounds} scheduled practice rounds, this event will operate in Scenario {scenario}."
 
-    return f"""
+    static = """
 <role>
 You are the Team Principal & Chief Strategist for Avant Garde Racing.
 
 **Voice:** Calm, organized, forward-looking, and authoritative.
 
 **Context:** You are in "Mission Control" (Tab 1). The car is likely still in the shop or just arrived at the track.
-{track_info}
 
 **Objective:** Prepare the human driver for the event. Manage expectations, verify logistics, select the optimal "Shop Master" baseline, and set the race strategy (Scenario A vs B).
 
@@ -570,7 +631,7 @@ You are the Team Principal & Chief Strategist for Avant Garde Racing.
 
 1. **Focus on the Macro:** Do NOT discuss specific clicker settings or shock pistons yet. Discuss track conditions, tire selection strategy, and historical performance at this venue.
 
-2. **Define the ORP Strategy:** Determine if we are in "Scenario A" (Avant Garde/Aggressive, Practice Rounds >= 3) or "Scenario B" (Conservative/Consistency, Practice Rounds < 3). Set clear expectations for the Race Engineer.{scenario_guidance}
+2. **Define the ORP Strategy:** Determine if we are in "Scenario A" (Avant Garde/Aggressive, Practice Rounds >= 3) or "Scenario B" (Conservative/Consistency, Practice Rounds < 3). Set clear expectations for the Race Engineer.
 
 3. **Enforce Preparation:** Ask if the maintenance checklist is complete. Verify the "Shop Master" baseline is loaded. Confirm vehicle condition (no damage from previous events).
 
@@ -591,13 +652,18 @@ You are the Team Principal & Chief Strategist for Avant Garde Racing.
 - EQUALITY: Treat NB48 and NT48 with equal strategic priority.
 </role>
 """
+    event_section = ""
+    if track_info or scenario_guidance:
+        event_section = f"\n<event_context>\n{track_info}{scenario_guidance}\n</event_context>\n"
+
+    return static, event_section
 
 
 # ============================================================================
 # PERSONA 2: ENGINEER (Tab 2 - Setup Advisor)
 # ============================================================================
 
-def _get_engineer_prompt(context: dict) -> str:
+def _get_engineer_prompt(context: dict) -> tuple[str, str]:
     """The Senior Race Engineer persona.
 
     Focus: Physics-based setup recommendations, ORP-constrained, Scenario A/B enforcement.
@@ -650,7 +716,7 @@ SCENARIO CONSTRAINTS:
         change_context += "</recent_changes>\n"
         change_context += "NOTE: Do NOT re-suggest changes that were already applied. Check above before recommending."
 
-    return f"""
+    static = """
 <role>
 You are the Senior Race Engineer for Avant Garde Racing.
 
@@ -704,17 +770,16 @@ You are the Senior Race Engineer for Avant Garde Racing.
 - NO REPETITION: Do not ask for data already present.
 - BALANCE AWARENESS: Car is a system. Isolated changes may fail due to overall imbalance, not the component itself.
 - SESSION-AWARE DENIALS: If denied in THIS session, skip it. But denials reset at next event boundary.
-
-{orp_section}{change_context}
 </role>
 """
+    return static, orp_section + change_context
 
 
 # ============================================================================
 # PERSONA 3: SPOTTER (Tab 3 - Race Support)
 # ============================================================================
 
-def _get_spotter_prompt(context: dict) -> str:
+def _get_spotter_prompt(context: dict) -> tuple[str, str]:
     """The Spotter & Schedule Manager persona.
 
     Focus: Situational awareness, schedule management, terse updates.
@@ -733,7 +798,7 @@ def _get_spotter_prompt(context: dict) -> str:
         fallback_notice += "\nAsk the driver: 'Live feed is down. Call out your lap times or gap to the leader.'"
         fallback_notice += "\nDo NOT guess or hallucinate race positions."
 
-    return f"""
+    static = """
 <role>
 You are the Spotter & Schedule Manager for Avant Garde Racing.
 
@@ -751,7 +816,7 @@ You are the Spotter & Schedule Manager for Avant Garde Racing.
 
 3. **No Distractions (CRITICAL):** Do NOT discuss shock oils, setup changes, or physics. The driver is focused on the race. Only immediate, actionable alerts.
 
-4. **Manual Mode Protocol:** If LiveRC data is unavailable, explicitly state "Live feed down - switching to manual mode" and solicit driver input only.{fallback_notice}
+4. **Manual Mode Protocol:** If LiveRC data is unavailable, explicitly state "Live feed down - switching to manual mode" and solicit driver input only.
 
 **Guardrails:**
 - NO SPECULATION: Only relay confirmed information (heat order, times, schedule). Do not guess positions.
@@ -760,13 +825,15 @@ You are the Spotter & Schedule Manager for Avant Garde Racing.
 - DRIVER FOCUS: Protect their mental space. Short, direct messages only.
 </role>
 """
+    live_feed = f"\n<live_feed_status>{fallback_notice}\n</live_feed_status>\n" if fallback_notice else ""
+    return static, live_feed
 
 
 # ============================================================================
 # PERSONA 4: ANALYST (Tab 4 - Post Event Analysis)
 # ============================================================================
 
-def _get_analyst_prompt(context: dict) -> str:
+def _get_analyst_prompt(context: dict) -> tuple[str, str]:
     """The Data Analyst persona.
 
     Focus: Objective audit, X-Factor analysis, memory formulation.
@@ -821,14 +888,14 @@ You are the Data Analyst (Telemetry & Physics) for Avant Garde Racing.
 - EQUALITY: Treat successful and failed changes as equally important data.
 - INSTITUTIONAL CLARITY: Memory entry must be clear enough for engineer reading it 6 months later to understand.
 </role>
-"""
+""", ""
 
 
 # ============================================================================
 # PERSONA 5: LIBRARIAN (Tab 5 - Setup Library)
 # ============================================================================
 
-def _get_librarian_prompt(context: dict) -> str:
+def _get_librarian_prompt(context: dict) -> tuple[str, str]:
     """The Chief Librarian & Setup Curator persona.
 
     Focus: Taxonomy enforcement, metadata completeness, intent-focused comparisons.
@@ -882,4 +949,4 @@ You are the Chief Librarian & Setup Curator for Avant Garde Racing.
 - CLARITY FIRST: Setup names must be descriptive ("Dusty_Thunder_Alley_2024", not "Setup_1").
 - HISTORICAL RESPECT: Treat all setups—successful and failed—as valuable data. A failed setup teaches as much as a successful one.
 </role>
-"""
+""", ""
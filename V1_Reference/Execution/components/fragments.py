@@ -9,6 +9,12 @@ Fragments:
 - pending_recommendations_panel: Accept/Deny recommendation buttons
 - staging_modal: 24-parameter editing form (Modal isolation)
 - profile_editor_form: Profile & fleet editing (Sidebar isolation)
+- schedule_monitor_panel: Team heat schedule (polls LiveRC monitor snapshots)
+- job_status_panel: Background job progress (polls job_queue)
+- session_weather_panel: Latest recorded session weather (renews the refresher lease)
+
+Helpers:
+- track_job: Show a tab's running job, or hand back the finished job once
 
 See: Phase 6.5.1 Reactive UI Refactor plan
 """
@@ -576,3 +582,140 @@ def profile_editor_fragment(racer_profile, profile_id):
             st.error("Profile ID not found")
 
     return update_info
+
+
+@st.fragment(run_every=15)
+def schedule_monitor_panel(monitor):
+    """
+    Fragment: Team Schedule Monitor (Timed Rerender)
+
+    Copies the background LiveRC monitor's schedule into
+    st.session_state.monitored_heats and toasts "on deck" status changes.
+    Reruns every 15s on its own; the monitor thread never touches session state.
+    Each rerun renews the monitor's lease, so the thread stops by itself once
+    this browser session is gone.
+
+    Args:
+        monitor (LiveRCScheduleMonitor): Running monitor instance
+
+    Benefit: Live schedule updates without rerunning Tab 3
+    """
+    monitor.touch()
+    st.session_state.monitored_heats = monitor.get_schedule()
+
+    for change in monitor.drain_notifications():
+        if change['on_deck']:
+            st.toast(f"🚨 {change['Racer']} ON DECK: {change['Race']} ({change['Status']})")
+        elif change['Previous']:
+            st.toast(f"{change['Racer']} {change['Race']}: {change['Previous']} → {change['Status']}")
+
+    status = "🟢 Monitoring" if monitor.is_running() else "⚪ Stopped"
+    last_poll = monitor.last_poll or "pending"
+    st.caption(f"{status} · {len(monitor.targets)} drivers · last poll {last_poll}")
+
+    if st.session_state.monitored_heats:
+        render_heat_schedule(st.session_state.monitored_heats)
+
+
+def render_heat_schedule(heats):
+    """Render the event schedule rows (shared by the scan button and the monitor)."""
+    st.divider()
+    st.write("### 📅 Your Event Schedule")
+    for heat in heats:
+        c1, c2, c3 = st.columns([1, 2, 1])
+        racer = f" · {heat['Racer']}" if heat.get('Racer') else ""
+        c1.write(f"**{heat['Race']}**{racer}")
+        status = heat['Status']
+        if "Not Yet Run" in status:
+            c2.info(f"⌛ {status}")
+        elif "Complete" in status:
+            c2.success(f"🏁 {status}")
+        else:
+            c2.warning(status)
+        c3.link_button("🔗 VIEW", heat['URL'])
+
+
+
+@st.fragment(run_every=60)
+def session_weather_panel(session_id, lat, lon):
+    """
+    Fragment: Session Weather (Timed Rerender)
+
+    Keeps the background weather refresher for the active session running
+    and shows its latest recorded reading. Reruns every 60s on its own; each
+    rerun renews the refresher's lease, so the thread stops by itself once
+    this browser session is gone or moves to another racing session.
+
+    Args:
+        session_id (str): Active racing session ID
+        lat (float): Track latitude
+        lon (float): Track longitude
+
+    Benefit: Conditions keep recording without rerunning the sidebar
+    """
+    from Execution.services.weather_service import weather_service
+
+    weather_service.start_refresh(session_id, lat, lon)
+    latest = weather_service.latest(session_id)
+    if latest:
+        st.caption(
+            f"🛰️ Recording · {latest['recorded_at'][11:16]} · "
+            f"{latest['temperature_c']:.1f}°C · DA {latest['density_altitude_ft']:.0f} ft"
+        )
+    else:
+        st.caption("🛰️ Recording track weather...")
+
+@st.fragment(run_every=2)
+def job_status_panel(job_id, label):
+    """
+    Fragment: Background Job Status (Timed Rerender)
+
+    Polls job_queue every 2s and shows the job's progress bar and message.
+    When the job leaves queued/running it triggers one full rerun so the
+    owning tab can collect the result (see track_job).
+
+    Args:
+        job_id (int): Job id from job_queue.submit()
+        label (str): What the job is doing ("Building your race strategy")
+
+    Benefit: Slow work runs on job workers while the tab stays interactive
+    """
+    from Execution.services.job_queue import job_queue
+
+    job = job_queue.get(job_id)
+    if not job_queue.is_active(job):
+        st.rerun()
+
+    st.progress(job["progress"], text=f"⏳ {label}: {job['message'] or job['status'].title()}")
+    if job["status"] == "queued" and job["error"]:
+        st.caption(f"Retry {job['attempts']}/{job['max_attempts'] - 1} scheduled after: {job['error']}")
+
+
+def track_job(purpose, label):
+    """
+    Helper: Poll a tab's background job stored in st.session_state.active_jobs.
+
+    While the job is queued/running, renders job_status_panel and returns None.
+    Once it has finished, drops it from active_jobs and returns the job dict
+    (status "succeeded", "failed" or "cancelled"; result/error/payload).
+
+    Args:
+        purpose (str): active_jobs key ("prep_plan", "setup_parse", ...)
+        label (str): Progress label shown while the job runs
+
+    Returns:
+        dict or None: Finished job, or None if absent or still running
+    """
+    from Execution.services.job_queue import job_queue
+
+    job_id = st.session_state.active_jobs.get(purpose)
+    if job_id is None:
+        return None
+
+    job = job_queue.get(job_id)
+    if job_queue.is_active(job):
+        job_status_panel(job_id, label)
+        return None
+
+    del st.session_state.active_jobs[purpose]
+    return job or {"status": "failed", "error": "Job record not found", "result": None, "payload": {}}
@@ -14,7 +14,10 @@ import pandas as pd
 import streamlit as st
 from streamlit_js_eval import get_geolocation
 
+from Execution.components import fragments
 from Execution.services.profile_service import profile_service
+from Execution.services.weather_service import weather_service
+from Execution.utils.cached_helpers import clear_config_cache
 from Execution.utils.ui_helpers import get_weather
 
 
@@ -24,6 +27,7 @@ def render():
     Accesses/modifies st.session_state:
     - racer_profile: All profile fields (name, email, fleet, sponsors)
     - weather_data: Current weather/DA
+    - weather_location: Last synced track coordinates (lat, lon)
     """
     # Import config service for fleet sync
     from Execution.services.config_service import config_service
@@ -376,38 +380,9 @@ def render():
             st.divider()
             st.caption("💡 Tip: Save Profile above before syncing fleet.")
             if st.button("🔄 Sync Fleet Settings"):
-                configs = config_service.load_configs()
-
-                # Build list of vehicle display names from the saved fleet
-                fleet_vehicles = st.session_state.racer_profile.get("vehicles", [])
-                fleet_names = []
-                for v in fleet_vehicles:
-                    brand = v.get("brand", "").strip()
-                    model = v.get("model", "").strip()
-                    nickname = v.get("nickname", "").strip()
-
-                    # Use nickname if available, otherwise construct "Brand Model"
-                    if nickname:
-                        fleet_names.append(nickname)
-                    elif brand and model:
-                        fleet_names.append(f"{brand} {model}")
-                    elif brand:
-                        fleet_names.append(brand)
-                    elif model:
-                        fleet_names.append(model)
-
-                # Add missing vehicles with Universal Blank
-                for v_name in fleet_names:
-                    if v_name not in configs['Car'].tolist():
-                        blank_row = {col: 0 for col in configs.columns}
-                        blank_row['Car'] = v_name
-                        # Set reasonable defaults for text fields
-                        for txt_col in ['SP_F', 'P_F', 'SP_R', 'P_R', 'Tread', 'Compound', 'Pipe', 'Clutch']:
-                            if txt_col in blank_row:
-                                blank_row[txt_col] = "BLANK"
-                        configs = pd.concat([configs, pd.DataFrame([blank_row])], ignore_index=True)
-
-                config_service.save_configs(configs)
+                # Adds Universal Blank configs for new fleet vehicles only
+                config_service.sync_fleet(st.session_state.racer_profile)
+                clear_config_cache(st.session_state.get('profile_id'))
                 st.success("Fleet Synchronized with Master Database.")
                 st.rerun()
 
@@ -421,12 +396,16 @@ def render():
         if st.button("🛰️ Sync Track Weather"):
             loc = get_geolocation()
             if loc:
-                st.session_state.weather_data = get_weather(
-                    loc['coords']['latitude'],
-                    loc['coords']['longitude']
-                )
+                lat, lon = loc['coords']['latitude'], loc['coords']['longitude']
+                st.session_state.weather_data = get_weather(lat, lon)
+                st.session_state.weather_location = (lat, lon)
                 st.rerun()
 
+        # During a session, keep recording conditions in the background
+        session_id = st.session_state.get('active_session_id')
+        if session_id and st.session_state.get('weather_location'):
+            fragments.session_weather_panel(session_id, *st.session_state.weather_location)
+
         # Display weather data if available
         if st.session_state.weather_data:
             st.sidebar.metric(
@@ -449,10 +428,14 @@ def _clear_session_state_for_profile_switch():
         'actual_setup',
         'pending_changes',
         'track_context',
-        'messages',  # Chat history
+        'advisor_history_pages',  # Chat history paging (history itself is in conversation_store)
+        'advisor_last_audio',
+        'advisor_timings',
         'weather_data',
         'track_media',
         'tire_media',
+        'track_media_refs',
+        'tire_media_refs',
         'x_factor_audit_id',
         'x_factor_state',
         'last_report',
@@ -465,6 +448,7 @@ def _clear_session_state_for_profile_switch():
         'event_url',
         'monitored_heats',
         'active_classes',
+        'schedule_monitor',
         'show_staging_modal',
         'staging_package',
         'staging_data',
@@ -479,8 +463,17 @@ def _clear_session_state_for_profile_switch():
         'last_save_result',
         'draft_picker_shown',
         'prep_plan_pdf',
+        'active_jobs',
     ]
 
+    # Stop the LiveRC monitor thread before dropping its handle
+    if st.session_state.get('schedule_monitor') is not None:
+        st.session_state.schedule_monitor.stop()
+
+    # Stop background weather recording for the outgoing session
+    if st.session_state.get('active_session_id'):
+        weather_service.stop_refresh(st.session_state.active_session_id)
+
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
@@ -489,43 +482,14 @@ def _clear_session_state_for_profile_switch():
 def _sync_fleet_for_profile(racer_profile):
     """Sync the profile's vehicles to the Shop Master database.
 
-    Called when switching profiles to load their vehicles into car_configs.csv.
+    Called when switching profiles to load their vehicles into the Shop
+    Master. Only vehicles that have no config yet are written, so the cost
+    follows what changed rather than the fleet size.
 
     Args:
         racer_profile (dict): The racer profile with vehicles list
     """
     from Execution.services.config_service import config_service
 
-    configs = config_service.load_configs()
-
-    # Build list of vehicle display names from the fleet
-    fleet_vehicles = racer_profile.get("vehicles", [])
-    fleet_names = []
-
-    for v in fleet_vehicles:
-        brand = v.get("brand", "").strip()
-        model = v.get("model", "").strip()
-        nickname = v.get("nickname", "").strip()
-
-        # Use nickname if available, otherwise construct "Brand Model"
-        if nickname:
-            fleet_names.append(nickname)
-        elif brand and model:
-            fleet_names.append(f"{brand} {model}")
-        elif brand:
-            fleet_names.append(brand)
-        elif model:
-            fleet_names.append(model)
-
-    # Add missing vehicles with Universal Blank template
-    for v_name in fleet_names:
-        if v_name not in configs['Car'].tolist():
-            blank_row = {col: 0 for col in configs.columns}
-            blank_row['Car'] = v_name
-            # Set reasonable defaults for text fields
-            for txt_col in ['SP_F', 'P_F', 'SP_R', 'P_R', 'Tread', 'Compound', 'Pipe', 'Clutch']:
-                if txt_col in blank_row:
-                    blank_row[txt_col] = "BLANK"
-            configs = pd.concat([configs, pd.DataFrame([blank_row])], ignore_index=True)
-
-    config_service.save_configs(configs)
+    config_service.sync_fleet(racer_profile)
+    clear_config_cache(st.session_state.get('profile_id'))
@@ -80,10 +80,16 @@ def init_session_state():
     # --- Weather & Media ---
     if "weather_data" not in st.session_state:
         st.session_state.weather_data = None
+    if "weather_location" not in st.session_state:
+        st.session_state.weather_location = None
     if "track_media" not in st.session_state:
         st.session_state.track_media = []
     if "tire_media" not in st.session_state:
         st.session_state.tire_media = []
+    if "track_media_refs" not in st.session_state:
+        st.session_state.track_media_refs = []
+    if "tire_media_refs" not in st.session_state:
+        st.session_state.tire_media_refs = []
 
     # --- ORP & Race Planning ---
     if "x_factor_audit_id" not in st.session_state:
@@ -110,8 +116,12 @@ def init_session_state():
         st.session_state.experience_level = "Intermediate"  # "Sportsman", "Intermediate", or "Pro"
 
     # --- AI Chat & Setup Advisor ---
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    if "advisor_history_pages" not in st.session_state:
+        st.session_state.advisor_history_pages = 1  # Chat history pages rendered (conversation_store)
+    if "advisor_last_audio" not in st.session_state:
+        st.session_state.advisor_last_audio = None  # Hash of the last voice note answered
+    if "advisor_timings" not in st.session_state:
+        st.session_state.advisor_timings = []  # Last 50 turns' {timestamp, ttft, total, cached}
 
     # --- LiveRC Monitoring ---
     if "event_url" not in st.session_state:
@@ -120,6 +130,8 @@ def init_session_state():
         st.session_state.monitored_heats = []
     if "active_classes" not in st.session_state:
         st.session_state.active_classes = []
+    if "schedule_monitor" not in st.session_state:
+        st.session_state.schedule_monitor = None  # LiveRCScheduleMonitor (background thread)
 
     # --- Package Copy & Modal State ---
     if "show_staging_modal" not in st.session_state:
@@ -131,6 +143,10 @@ def init_session_state():
     if "comparison_baseline_id" not in st.session_state:
         st.session_state.comparison_baseline_id = None
 
+    # --- Background Jobs ---
+    if "active_jobs" not in st.session_state:
+        st.session_state.active_jobs = {}  # purpose -> job_queue job id (polled by fragments.track_job)
+
     # --- Setup Parsing & Import ---
     if "last_parsed_data" not in st.session_state:
         st.session_state.last_parsed_data = None
@@ -8,7 +8,8 @@ from contextlib import contextmanager
 
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import execute_values as pg_execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 # Write to stderr to ensure output isn't suppressed by Streamlit
 sys.stderr.write("[DB] Database module loading...\n")
@@ -31,8 +32,9 @@ class Database:
                 if self.database_url.startswith("postgres://"):
                     self.database_url = self.database_url.replace("postgres://", "postgresql://", 1)
 
-                # Create connection pool (min 1, max 10 connections)
-                self.pool = SimpleConnectionPool(1, 10, self.database_url)
+                # Create connection pool (min 1, max 10 connections); threaded because
+                # background workers and pipeline stages query concurrently
+                self.pool = ThreadedConnectionPool(1, 10, self.database_url)
                 self.is_connected = True
                 print("SUCCESS: Database connection pool established")
             except Exception as e:
@@ -105,6 +107,35 @@ class Database:
             cursor = conn.cursor()
             cursor.executemany(query, params_list)
 
+    def execute_values(self, query, params_list, page_size=500, fetch=False):
+        """Execute a multi-row statement in a single round trip.
+        Useful for bulk inserts/upserts where execute_many would send one
+        statement per row.
+
+        Args:
+            query: SQL query string with a single VALUES %s placeholder
+            params_list: List of parameter tuples (one per row)
+            page_size: Rows per generated statement
+            fetch: Whether to fetch results (e.g. RETURNING id)
+
+        Returns:
+            List of dicts if fetch=True, otherwise None
+
+        """
+        if not self.is_connected:
+            raise Exception("Database not connected")
+
+        if not params_list:
+            return [] if fetch else None
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            results = pg_execute_values(cursor, query, params_list, page_size=page_size, fetch=fetch)
+
+            if fetch:
+                return [dict(row) for row in results]
+            return None
+
     def init_schema(self):
         """Initialize database schema from schema.sql file."""
         if not self.is_connected:
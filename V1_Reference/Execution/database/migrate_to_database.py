@@ -9,8 +9,10 @@ import os
 from datetime import datetime
 
 import pandas as pd
-from config_service import csv_row_to_jsonb
+from config_service import frame_to_setups
 from database import db, get_or_create_default_profile
+from library_service import library_service
+from setup_model import setup_fingerprint
 
 
 def migrate_car_configs():
@@ -33,8 +35,9 @@ def migrate_car_configs():
     df = pd.read_csv(config_path)
     print(f"   Found {len(df)} car configs")
 
-    # Insert each config
-    for _idx, row in df.iterrows():
+    # Convert to JSONB format column-wise, then insert each config
+    setups = frame_to_setups(df)
+    for (_idx, row), setup_json in zip(df.iterrows(), setups):
         car_name = row.get('Car', '')
 
         # Parse brand/model from car name
@@ -42,15 +45,13 @@ def migrate_car_configs():
         brand = parts[0] if len(parts) > 0 else 'Unknown'
         model = parts[1] if len(parts) > 1 else car_name
 
-        # Convert to JSONB format
-        setup_json = csv_row_to_jsonb(row.to_dict())
-
         query = """
-            INSERT INTO vehicles (profile_id, brand, model, nickname, baseline_setup)
-            VALUES (%(profile_id)s, %(brand)s, %(model)s, %(nickname)s, %(setup)s)
+            INSERT INTO vehicles (profile_id, brand, model, nickname, baseline_setup, setup_fingerprint)
+            VALUES (%(profile_id)s, %(brand)s, %(model)s, %(nickname)s, %(setup)s, %(fingerprint)s)
             ON CONFLICT (profile_id, brand, model) DO UPDATE SET
                 nickname = EXCLUDED.nickname,
                 baseline_setup = EXCLUDED.baseline_setup,
+                setup_fingerprint = EXCLUDED.setup_fingerprint,
                 updated_at = CURRENT_TIMESTAMP
         """
 
@@ -59,7 +60,8 @@ def migrate_car_configs():
             'brand': brand,
             'model': model,
             'nickname': car_name,
-            'setup': json.dumps(setup_json)
+            'setup': json.dumps(setup_json),
+            'fingerprint': setup_fingerprint(setup_json)
         }
 
         try:
@@ -88,43 +90,23 @@ def migrate_master_library():
 
     print(f"   Found {len(df)} library baselines")
 
-    # Insert each baseline
-    for _idx, row in df.iterrows():
-        # Convert to JSONB format
-        setup_json = csv_row_to_jsonb(row.to_dict())
-
-        query = """
-            INSERT INTO master_library (
-                track_name, brand, vehicle_model, surface_condition,
-                setup, source, date_created
-            ) VALUES (
-                %(track)s, %(brand)s, %(vehicle)s, %(condition)s,
-                %(setup)s, %(source)s, %(date)s
-            )
-            ON CONFLICT DO NOTHING
-        """
-
-        # Parse date
-        try:
-            date_val = pd.to_datetime(row.get('Date')).date()
-        except (ValueError, TypeError, AttributeError):
-            date_val = datetime.now().date()
-
-        params = {
-            'track': row.get('Track', ''),
-            'brand': row.get('Brand', ''),
-            'vehicle': row.get('Vehicle', ''),
-            'condition': row.get('Condition', ''),
-            'setup': json.dumps(setup_json),
-            'source': row.get('Source', 'CSV Import'),
-            'date': date_val
-        }
-
-        try:
-            db.execute_query(query, params, fetch=False)
-            print(f"   ✅ Migrated: {row.get('Track', 'Unknown')} - {row.get('Vehicle', 'Unknown')}")
-        except Exception as e:
-            print(f"   ❌ Failed: {e}")
+    # One bulk write through the library service, which skips baselines
+    # already stored (same track, brand, vehicle, condition and setup)
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    entries = [{
+        'track': row.get('Track') or '',
+        'brand': row.get('Brand') or '',
+        'vehicle': row.get('Vehicle') or '',
+        'condition': row.get('Condition') or '',
+        'setup_data': row,
+        'source': row.get('Source') or 'CSV Import',
+    } for row in records]
+
+    try:
+        ids = library_service.add_baselines_bulk(entries)
+        print(f"   ✅ Migrated {len(set(ids))} unique baselines from {len(entries)} rows")
+    except Exception as e:
+        print(f"   ❌ Failed: {e}")
 
 
 def migrate_track_logs():
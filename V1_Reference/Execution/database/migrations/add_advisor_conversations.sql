@@ -0,0 +1,21 @@
+-- Migration: Add advisor_messages and advisor_summaries tables
+-- Purpose: Keep the full Setup Advisor chat history in the database (windowed
+--          in the UI), plus a running summary of turns older than the window
+
+-- conversation_id = "<profile_id>_<session_id|general>"
+CREATE TABLE IF NOT EXISTS advisor_messages (
+    id BIGSERIAL PRIMARY KEY,
+    conversation_id VARCHAR(100) NOT NULL,
+    seq INTEGER NOT NULL,  -- 0-based position in the conversation
+    role VARCHAR(20) NOT NULL,  -- "user" or "assistant"
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (conversation_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS advisor_summaries (
+    conversation_id VARCHAR(100) PRIMARY KEY,
+    summary TEXT,
+    summarized_through INTEGER DEFAULT -1,  -- Last seq folded into the summary
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,27 @@
+-- Migration: Add jobs table for the background job queue
+-- Purpose: Persist slow operations (prep plans, setup sheet parsing, LiveRC scans,
+--          report emails) so job workers can claim them with FOR UPDATE SKIP LOCKED
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,  -- Key in job_queue.JOB_HANDLERS
+    payload JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, failed, cancelled
+    priority INTEGER DEFAULT 0,
+    progress REAL DEFAULT 0,  -- 0.0 - 1.0
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    max_attempts INTEGER DEFAULT 3,
+    worker VARCHAR(100),
+    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Retry backoff
+    locked_until TIMESTAMP,  -- Worker lease; expired leases are reclaimed
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Claim query: next queued job that is due
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, run_after);
@@ -0,0 +1,15 @@
+-- Migration: Add liverc_entries table
+-- Purpose: Store LiveRC event entry lists (class and driver per entry),
+--          backfilled by liverc_crawler alongside race_results and run_logs
+
+CREATE TABLE IF NOT EXISTS liverc_entries (
+    id BIGSERIAL PRIMARY KEY,
+    event_id VARCHAR(50) NOT NULL,
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    class_name VARCHAR(255),
+    driver_name VARCHAR(255) NOT NULL,
+    entry_url VARCHAR(500),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_liverc_entries_event ON liverc_entries(event_id, session_id);
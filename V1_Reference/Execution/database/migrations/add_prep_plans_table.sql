@@ -0,0 +1,14 @@
+-- Migration: Add prep_plans table for pre-computed Race Prep Plans
+-- Purpose: Store prep plan PDFs built ahead of time for upcoming sessions, keyed
+--          by a data version so a plan is served only while its inputs are unchanged
+
+CREATE TABLE IF NOT EXISTS prep_plans (
+    data_version VARCHAR(64) PRIMARY KEY,  -- prep_plan_store.data_version(): inputs + data fingerprint
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    inputs JSONB,  -- [racer_profile, track_context, vehicle_info] for rebuilding a stale plan
+    pdf BYTEA NOT NULL,
+    timings JSONB,  -- Seconds per generate_full_plan stage
+    generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_prep_plans_session ON prep_plans(session_id);
@@ -0,0 +1,12 @@
+-- Migration: Add setup fingerprint columns
+-- Purpose: setup_model.Setup.fingerprint() of each stored setup, indexed, so library
+--          dedup and "has this setup run here before" are single equality lookups.
+--          Existing rows are filled in by migration_manager.backfill_setup_fingerprints()
+
+ALTER TABLE master_library ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_library_setup_fingerprint ON master_library(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_vehicles_setup_fingerprint ON vehicles(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_sessions_setup_fingerprint ON sessions(track_name, setup_fingerprint);
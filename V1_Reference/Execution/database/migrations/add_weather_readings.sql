@@ -0,0 +1,17 @@
+-- Migration: Add weather_readings table
+-- Purpose: Store the conditions weather_service records in the background
+--          during a racing session (temperature, humidity, pressure, DA)
+
+CREATE TABLE IF NOT EXISTS weather_readings (
+    id BIGSERIAL PRIMARY KEY,
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    lat DECIMAL(8, 5),
+    lon DECIMAL(8, 5),
+    temperature_c DECIMAL(5, 1),
+    humidity_pct DECIMAL(5, 1),
+    pressure_hpa DECIMAL(6, 1),
+    density_altitude_ft INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_weather_readings_session ON weather_readings(session_id, recorded_at);
@@ -1,12 +1,35 @@
 """Migration manager for applying pending database migrations automatically.
 
 This module checks for pending migrations and applies them on app startup.
-Currently manages the Phase 4.4 is_default column migration.
+Currently manages the Phase 4.4 is_default column migration, the
+additive table migrations listed in SQL_MIGRATIONS and the setup
+fingerprint backfill.
 """
 
+import json
+import os
+
 # Database connection will be passed in when called
 db = None
 
+# Idempotent .sql files in this directory (CREATE ... IF NOT EXISTS),
+# applied in order on every startup so existing databases pick up new tables
+SQL_MIGRATIONS = [
+    "add_jobs_table.sql",
+    "add_prep_plans_table.sql",
+    "add_setup_fingerprints.sql",
+    "add_advisor_conversations.sql",
+    "add_weather_readings.sql",
+    "add_liverc_entries.sql",
+]
+
+# (table, setup column, id type) for tables with a setup_fingerprint column
+FINGERPRINT_TABLES = [
+    ("master_library", "setup", "integer"),
+    ("vehicles", "baseline_setup", "uuid"),
+    ("sessions", "actual_setup", "uuid"),
+]
+
 
 def set_db_reference(database_connection):
     """Set reference to database connection object.
@@ -152,6 +175,84 @@ def migrate_add_is_default_column():
         return False
 
 
+def apply_sql_migration(filename):
+    """Apply an idempotent .sql migration from this directory.
+
+    Args:
+        filename (str): File name in database/migrations
+
+    Returns:
+        bool: True if every statement ran, False otherwise
+    """
+    if not db or not db.is_connected:
+        return True  # Skip in CSV mode
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    try:
+        with open(path) as f:
+            lines = [line for line in f if not line.strip().startswith("--")]
+        statements = [s.strip() for s in "".join(lines).split(";") if s.strip()]
+        for statement in statements:
+            db.execute_query(statement, fetch=False)
+        print(f"   [OK] {filename} applied ({len(statements)} statements)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Migration {filename} failed: {str(e)}")
+        return False
+
+
+def backfill_setup_fingerprints(batch_size=500):
+    """Fill setup_fingerprint for rows written before the column existed.
+
+    Fingerprints are computed in Python (setup_model), in batches of
+    batch_size rows per table, each written with one UPDATE ... FROM VALUES.
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not db or not db.is_connected:
+        return True  # Skip in CSV mode
+
+    from Execution.services.setup_model import setup_fingerprint
+
+    try:
+        for table, column, id_type in FINGERPRINT_TABLES:
+            filled = 0
+            while True:
+                rows = db.execute_query(
+                    f"""
+                    SELECT id, {column} AS setup FROM {table}
+                    WHERE setup_fingerprint IS NULL AND {column} IS NOT NULL
+                    LIMIT %s
+                    """,
+                    (batch_size,)
+                )
+                if not rows:
+                    break
+                values = []
+                for row in rows:
+                    setup = row['setup']
+                    if isinstance(setup, str):
+                        setup = json.loads(setup or "{}")
+                    values.append((str(row['id']), setup_fingerprint(setup)))
+                db.execute_values(
+                    f"""
+                    UPDATE {table} AS t SET setup_fingerprint = v.fingerprint
+                    FROM (VALUES %s) AS v(id, fingerprint)
+                    WHERE t.id = v.id::{id_type}
+                    """,
+                    values,
+                    page_size=batch_size
+                )
+                filled += len(rows)
+            if filled:
+                print(f"   [OK] Fingerprinted {filled} {table} setups")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Setup fingerprint backfill failed: {str(e)}")
+        return False
+
+
 def table_exists(table_name):
     """Check if a table exists in the database."""
     if not db or not db.is_connected:
@@ -199,6 +300,13 @@ def run_pending_migrations():
         # 2. Apply Phase 4.4 migration
         success = migrate_add_is_default_column()
 
+        # 3. Apply additive table migrations
+        for filename in SQL_MIGRATIONS:
+            success = apply_sql_migration(filename) and success
+
+        # 4. Fingerprint setups stored before add_setup_fingerprints.sql
+        success = backfill_setup_fingerprints() and success
+
         if success:
             print("[OK] All migrations applied successfully\n")
         else:
@@ -287,6 +287,17 @@ CREATE TABLE IF NOT EXISTS race_results (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- LiveRC event entry lists, backfilled by liverc_crawler (see migrations/add_liverc_entries.sql)
+CREATE TABLE IF NOT EXISTS liverc_entries (
+    id BIGSERIAL PRIMARY KEY,
+    event_id VARCHAR(50) NOT NULL,
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    class_name VARCHAR(255),
+    driver_name VARCHAR(255) NOT NULL,
+    entry_url VARCHAR(500),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================
 -- INDEXES FOR NEW TABLES
 -- ============================================================
@@ -295,6 +306,7 @@ CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status);
 CREATE INDEX IF NOT EXISTS idx_sessions_track ON sessions(track_name);
 CREATE INDEX IF NOT EXISTS idx_sessions_dates ON sessions(start_date, end_date);
 CREATE INDEX IF NOT EXISTS idx_setup_changes_session ON setup_changes(session_id);
+CREATE INDEX IF NOT EXISTS idx_liverc_entries_event ON liverc_entries(event_id, session_id);
 CREATE INDEX IF NOT EXISTS idx_setup_changes_status ON setup_changes(status);
 CREATE INDEX IF NOT EXISTS idx_setup_changes_impact ON setup_changes(impact_status);
 CREATE INDEX IF NOT EXISTS idx_x_factor_session ON x_factor_audits(session_id);
@@ -349,3 +361,105 @@ CREATE INDEX IF NOT EXISTS idx_run_logs_created ON run_logs(created_at);
 -- Trigger for updated_at
 CREATE TRIGGER update_run_logs_updated_at BEFORE UPDATE ON run_logs
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================================
+-- SETUP ADVISOR CONVERSATIONS
+-- ============================================================
+
+-- Full advisor chat history, kept out of Streamlit session state.
+-- conversation_id = "<profile_id>_<session_id|general>"
+CREATE TABLE IF NOT EXISTS advisor_messages (
+    id BIGSERIAL PRIMARY KEY,
+    conversation_id VARCHAR(100) NOT NULL,
+    seq INTEGER NOT NULL,  -- 0-based position in the conversation
+    role VARCHAR(20) NOT NULL,  -- "user" or "assistant"
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (conversation_id, seq)
+);
+
+-- Running summary of turns older than the rendered window
+CREATE TABLE IF NOT EXISTS advisor_summaries (
+    conversation_id VARCHAR(100) PRIMARY KEY,
+    summary TEXT,
+    summarized_through INTEGER DEFAULT -1,  -- Last seq folded into the summary
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================
+-- SESSION WEATHER
+-- ============================================================
+
+-- Conditions recorded in the background during a racing session (see migrations/add_weather_readings.sql)
+CREATE TABLE IF NOT EXISTS weather_readings (
+    id BIGSERIAL PRIMARY KEY,
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    lat DECIMAL(8, 5),
+    lon DECIMAL(8, 5),
+    temperature_c DECIMAL(5, 1),
+    humidity_pct DECIMAL(5, 1),
+    pressure_hpa DECIMAL(6, 1),
+    density_altitude_ft INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_weather_readings_session ON weather_readings(session_id, recorded_at);
+
+-- ============================================================
+-- BACKGROUND JOBS
+-- ============================================================
+
+-- Slow operations run by job_queue workers (see migrations/add_jobs_table.sql)
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,  -- Key in job_queue.JOB_HANDLERS
+    payload JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',  -- queued, running, succeeded, failed, cancelled
+    priority INTEGER DEFAULT 0,
+    progress REAL DEFAULT 0,  -- 0.0 - 1.0
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    max_attempts INTEGER DEFAULT 3,
+    worker VARCHAR(100),
+    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- Retry backoff
+    locked_until TIMESTAMP,  -- Worker lease; expired leases are reclaimed
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Claim query: next queued job that is due
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, run_after);
+
+-- ============================================================
+-- PRE-COMPUTED PREP PLANS
+-- ============================================================
+
+-- Race Prep Plan PDFs built ahead of time for upcoming sessions
+-- (see migrations/add_prep_plans_table.sql)
+CREATE TABLE IF NOT EXISTS prep_plans (
+    data_version VARCHAR(64) PRIMARY KEY,  -- prep_plan_store.data_version(): inputs + data fingerprint
+    session_id UUID REFERENCES sessions(id) ON DELETE CASCADE,
+    inputs JSONB,  -- [racer_profile, track_context, vehicle_info] for rebuilding a stale plan
+    pdf BYTEA NOT NULL,
+    timings JSONB,  -- Seconds per generate_full_plan stage
+    generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_prep_plans_session ON prep_plans(session_id);
+
+-- ============================================================
+-- SETUP FINGERPRINTS
+-- ============================================================
+
+-- setup_model.Setup.fingerprint() of each stored setup (see migrations/add_setup_fingerprints.sql)
+ALTER TABLE master_library ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS setup_fingerprint VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_library_setup_fingerprint ON master_library(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_vehicles_setup_fingerprint ON vehicles(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_sessions_setup_fingerprint ON sessions(track_name, setup_fingerprint);
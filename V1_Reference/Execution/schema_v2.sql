@@ -57,6 +57,7 @@ CREATE TABLE IF NOT EXISTS vehicles (
 
     -- Shop Master Baseline (JSONB for flexibility)
     baseline_setup JSONB DEFAULT '{}',
+    setup_fingerprint VARCHAR(64),  -- setup_model.Setup.fingerprint() of baseline_setup
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -111,6 +112,7 @@ CREATE TABLE IF NOT EXISTS sessions (
     -- Digital Twin: Actual Setup (Roadmap 2.3)
     -- Starts as copy of baseline, updated as changes are accepted
     actual_setup JSONB DEFAULT '{}',
+    setup_fingerprint VARCHAR(64),  -- setup_model.Setup.fingerprint() of actual_setup
 
     -- Weather data (from API)
     weather JSONB,
@@ -177,6 +179,7 @@ CREATE TABLE IF NOT EXISTS master_library (
 
     -- Setup Data (JSONB - same structure as vehicle.baseline_setup)
     setup JSONB NOT NULL,
+    setup_fingerprint VARCHAR(64),  -- setup_model.Setup.fingerprint(); library dedup key
 
     -- Provenance
     source VARCHAR(255) DEFAULT 'User Upload',  -- 'Pro Sheet', 'User Upload', 'Promoted Session'
@@ -363,6 +366,11 @@ CREATE INDEX IF NOT EXISTS idx_vehicles_setup ON vehicles USING GIN(baseline_set
 CREATE INDEX IF NOT EXISTS idx_sessions_setup ON sessions USING GIN(actual_setup);
 CREATE INDEX IF NOT EXISTS idx_library_setup ON master_library USING GIN(setup);
 
+-- Setup fingerprints: "same setup" lookups are single equality checks
+CREATE INDEX IF NOT EXISTS idx_library_setup_fingerprint ON master_library(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_vehicles_setup_fingerprint ON vehicles(setup_fingerprint);
+CREATE INDEX IF NOT EXISTS idx_sessions_setup_fingerprint ON sessions(track_name, setup_fingerprint);
+
 -- ============================================
 -- AUTO-UPDATE TIMESTAMP TRIGGER
 -- ============================================
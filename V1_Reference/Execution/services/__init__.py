@@ -1,8 +1,13 @@
 """Business logic and external integration services.
 
 This package contains services for:
-- PDF/Vision parsing (setup_parser)
-- Web scraping (liverc_harvester)
+- PDF/Vision parsing (setup_parser, setup_ingest, vision_executor, sheet_rasterizer)
+- Advisor photo preprocessing and cache (media_store)
+- Advisor chat history and running summary (conversation_store)
+- Voice note transcription (voice_pipeline)
+- Racing keyword tagging and notes search (keyword_index)
+- Track weather cache and session conditions series (weather_service)
+- Web scraping (liverc_harvester, liverc_crawler, liverc_monitor)
 - Email reports (email_service)
 - CRUD operations (baseline_manager, library_service, config_service)
 - Session tracking (session_service, history_service)
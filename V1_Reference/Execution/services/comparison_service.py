@@ -1,11 +1,24 @@
 """Setup Comparison Service for Phase 4.2
 Provides binary comparison (match/different) between setups.
 No severity scoring - just shows what's different.
+
+compare_against_many ranks one setup against many (e.g. every compatible
+library baseline). The candidates are encoded once into a SetupMatrix:
+one integer code per normalized value, per parameter. A comparison is then
+a single array equality against the user's codes, with package and overall
+scores summed from the resulting match mask.
+
+compare_matrix does the same for several setups at once (the fleet against
+candidate baselines) and returns plain arrays the UI can cache and render
+as a heatmap.
 """
 
 
+import numpy as np
 import pandas as pd
 
+from Execution.services.setup_model import MISSING_MARKER, SETUP_KEYS, Setup, canonical_value
+
 # Package definitions aligned with racer workflow
 SETUP_PACKAGES = {
     "Suspension": {
@@ -35,6 +48,82 @@ SETUP_PACKAGES = {
     }
 }
 
+# Every compared parameter in package order, and each package's column range in it
+COMPARED_PARAMS = [param for package in SETUP_PACKAGES.values() for param in package["params"]]
+_PACKAGE_SLICES = {}
+_start = 0
+for _name, _package in SETUP_PACKAGES.items():
+    _PACKAGE_SLICES[_name] = slice(_start, _start + len(_package["params"]))
+    _start += len(_package["params"])
+
+# Metadata columns carried into compare_against_many's ranked table when present
+RANKING_COLUMNS = ["ID", "Track", "Brand", "Vehicle", "Condition", "Date", "Source", "Driver"]
+
+
+def _normalize(value) -> str:
+    """Display/comparison text of a parameter value ("—" when missing)."""
+    if value is None or value == "" or pd.isna(value):
+        return MISSING_MARKER
+
+    # Convert to string for comparison
+    # Strip whitespace and standardize case for text values
+    return str(value).strip()
+
+
+class SetupMatrix:
+    """Candidate setups encoded once for one-vs-many comparison.
+
+    Each parameter column is factorized; only its distinct values are
+    normalized (as compare_setups does for a pair), so encoding costs one
+    pass in pandas plus Python work per distinct value, not per cell.
+    """
+
+    def __init__(self, candidates):
+        """Encode candidates: a flat DataFrame (library search results) or a
+        list of setups in any Setup.coerce form, e.g. get_baseline() dicts.
+        """
+        frame = candidates if isinstance(candidates, pd.DataFrame) else self._frame(candidates)
+        self.meta = frame[[c for c in RANKING_COLUMNS if c in frame.columns]].reset_index(drop=True)
+        self.codes = np.zeros((len(frame), len(COMPARED_PARAMS)), dtype=np.int32)
+        self.vocab = []  # Per parameter: normalized value -> code (missing is 0)
+        for j, param in enumerate(COMPARED_PARAMS):
+            vocab = {MISSING_MARKER: 0}
+            if param in frame.columns:
+                raw_codes, uniques = pd.factorize(frame[param].to_numpy(dtype=object), use_na_sentinel=True)
+                # Factorize's NA sentinel (-1) indexes the trailing 0 (missing)
+                remap = np.array([vocab.setdefault(_normalize(canonical_value(u)), len(vocab)) for u in uniques] + [0],
+                                 dtype=np.int32)
+                self.codes[:, j] = remap[raw_codes]
+            self.vocab.append(vocab)
+
+    @staticmethod
+    def _frame(candidates):
+        rows = []
+        for candidate in candidates:
+            setup = Setup.coerce(candidate)
+            extra = {key: value for key, value in candidate.items() if key in RANKING_COLUMNS} \
+                if isinstance(candidate, dict) else {}
+            rows.append({**extra, **setup.to_flat()})
+        return pd.DataFrame(rows, columns=None if rows else SETUP_KEYS)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def encode(self, setups):
+        """Codes (len(setups) x COMPARED_PARAMS) of other setups in this matrix's vocabulary.
+
+        A value no candidate has gets -1, which matches nothing.
+        """
+        codes = np.empty((len(setups), len(COMPARED_PARAMS)), dtype=np.int32)
+        for i, setup in enumerate(map(Setup.coerce, setups)):
+            codes[i] = [vocab.get(_normalize(setup.get(param)), -1)
+                        for param, vocab in zip(COMPARED_PARAMS, self.vocab)]
+        return codes
+
+    def match_mask(self, user_setup):
+        """Boolean array (candidates x COMPARED_PARAMS): True where the value matches."""
+        return self.codes == self.encode([user_setup])[0]
+
 
 class ComparisonService:
     """Simple binary comparison service for RC car setups.
@@ -47,6 +136,7 @@ class ComparisonService:
         Args:
             user_setup: Current setup (from actual_setup or shop master)
             reference_setup: Reference setup (from master library)
+            Either may be a flat dict, a JSONB setup or a Setup.
 
         Returns:
             Dict with:
@@ -64,6 +154,10 @@ class ComparisonService:
         total_params = 0
         match_count = 0
 
+        user = Setup.coerce(user_setup)
+        reference = Setup.coerce(reference_setup)
+        identical = user == reference
+
         # Compare by package for organized display
         for package_name, package_info in SETUP_PACKAGES.items():
             package_matches = 0
@@ -72,9 +166,9 @@ class ComparisonService:
             for param in package_info['params']:
                 total_params += 1
 
-                # Get values (handle missing params gracefully)
-                user_val = self._normalize_value(user_setup.get(param, "—"))
-                ref_val = self._normalize_value(reference_setup.get(param, "—"))
+                # Get values (missing params are None, shown as "—")
+                user_val = self._normalize_value(user.get(param))
+                ref_val = user_val if identical else self._normalize_value(reference.get(param))
 
                 # Binary comparison: match or different
                 is_match = (user_val == ref_val)
@@ -105,16 +199,133 @@ class ComparisonService:
 
     def _normalize_value(self, value) -> str:
         """Normalize parameter values for comparison.
-        Handles different data types and missing values.
+        Handles different data types and missing values (setup_model's
+        fingerprint uses the same missing marker).
+        """
+        return _normalize(value)
+
+    def encode_candidates(self, candidates) -> SetupMatrix:
+        """Encode candidate setups once, for repeated compare_against_many calls."""
+        return SetupMatrix(candidates)
+
+    def compare_against_many(self, user_setup, candidates, vehicle=None, top_n=None) -> pd.DataFrame:
+        """Compare one setup against many candidates in one vectorized pass.
+
+        Scores are the same as compare_setups would give for each pair.
+
+        Args:
+            user_setup: Current setup (flat dict, JSONB setup or Setup)
+            candidates: SetupMatrix, flat DataFrame (e.g. search_baselines())
+                        or list of setups/baseline dicts
+            vehicle: Optional dict with 'brand' and 'model'; candidates with
+                     other Brand/Vehicle values are dropped (as in
+                     validate_comparison_compatibility)
+            top_n: Optional number of best candidates to return
+
+        Returns:
+            DataFrame ranked by match_percent (best first) with the candidates'
+            ID/Track/Brand/Vehicle/Condition/Date/Source columns, match_count,
+            total_params, match_percent and one match-percent column per package
+
+        """
+        matrix = candidates if isinstance(candidates, SetupMatrix) else SetupMatrix(candidates)
+        matches = matrix.match_mask(user_setup)
+
+        table = matrix.meta.copy()
+        match_count = matches.sum(axis=1)
+        table["match_count"] = match_count
+        table["total_params"] = len(COMPARED_PARAMS)
+        table["match_percent"] = np.rint(match_count * 100 / len(COMPARED_PARAMS)).astype(int)
+        for package_name, columns in _PACKAGE_SLICES.items():
+            width = columns.stop - columns.start
+            table[package_name] = np.rint(matches[:, columns].sum(axis=1) * 100 / width).astype(int)
+
+        if vehicle and {"Brand", "Vehicle"} <= set(table.columns):
+            brand = (vehicle.get("brand") or "").strip().lower()
+            model = (vehicle.get("model") or "").strip().lower()
+            keep = ((table["Brand"].astype(str).str.strip().str.lower() == brand)
+                    & (table["Vehicle"].astype(str).str.strip().str.lower() == model))
+            table = table[keep.to_numpy()]
+
+        # Stable sort keeps the candidates' own order (e.g. newest first) among equal scores
+        table = table.sort_values("match_count", ascending=False, kind="stable")
+        if top_n is not None:
+            table = table.head(top_n)
+        return table.reset_index(drop=True)
+
+    def compare_matrix(self, fleet_setups, candidates, vehicle: dict = None) -> dict:
+        """Compare M fleet setups against N candidate setups in one pass.
+
+        Args:
+            fleet_setups: Dict of label -> setup (e.g. car name -> shop master
+                          baseline), or a config DataFrame with a 'Car' column
+            candidates: SetupMatrix, flat DataFrame (e.g. search_baselines())
+                        or list of setups/baseline dicts
+            vehicle: Optional dict with 'brand' and 'model'; keeps only fleet
+                     cars ("Brand Model" labels) and candidates (Brand/Vehicle)
+                     that pass validate_comparison_compatibility with it
+
+        Returns:
+            Dict with:
+                - rows: Fleet labels (M)
+                - columns: Candidate IDs (N), or positions if candidates have no ID
+                - packages: Package names (K, SETUP_PACKAGES order)
+                - params: Compared parameters (P, package order)
+                - match_percent: M x N overall match percentages (uint8)
+                - package_percent: M x N x K package match percentages (uint8)
+                - different: M x N x P bool, True where the parameter differs
+
         """
-        if value is None or value == "" or pd.isna(value):
-            return "—"
+        if isinstance(fleet_setups, pd.DataFrame):
+            fleet_setups = {row.get('Car'): row for row in fleet_setups.to_dict('records')}
+        matrix = candidates if isinstance(candidates, SetupMatrix) else SetupMatrix(candidates)
+        ids = matrix.meta["ID"].tolist() if "ID" in matrix.meta.columns else list(range(len(matrix)))
+        candidate_codes = matrix.codes
+
+        if vehicle:
+            # Setup geometry differs between models: never compare across them
+            def compatible(brand, model):
+                return self.validate_comparison_compatibility(
+                    vehicle, {'brand': str(brand or ''), 'model': str(model or '')})[0]
+
+            fleet_setups = {label: setup for label, setup in fleet_setups.items()
+                            if compatible(*str(label).partition(" ")[::2])}
+            if {"Brand", "Vehicle"} <= set(matrix.meta.columns):
+                keep = np.array([compatible(b, v) for b, v in zip(matrix.meta["Brand"], matrix.meta["Vehicle"])],
+                                dtype=bool)
+                candidate_codes = candidate_codes[keep]
+                ids = [i for i, kept in zip(ids, keep) if kept]
+
+        fleet_codes = matrix.encode(list(fleet_setups.values()))
+        matches = fleet_codes[:, None, :] == candidate_codes[None, :, :]
+
+        # Package match counts: sums over each package's contiguous parameter range
+        starts = [columns.start for columns in _PACKAGE_SLICES.values()]
+        widths = np.array([columns.stop - columns.start for columns in _PACKAGE_SLICES.values()])
+        package_counts = np.add.reduceat(matches, starts, axis=2)
+
+        return {
+            "rows": list(fleet_setups),
+            "columns": ids,
+            "packages": list(SETUP_PACKAGES),
+            "params": list(COMPARED_PARAMS),
+            "match_percent": np.rint(matches.sum(axis=2) * 100 / len(COMPARED_PARAMS)).astype(np.uint8),
+            "package_percent": np.rint(package_counts * 100 / widths).astype(np.uint8),
+            "different": ~matches,
+        }
 
-        # Convert to string for comparison
-        # Strip whitespace and standardize case for text values
-        str_val = str(value).strip()
+    def matrix_frame(self, comparison: dict, package: str = None) -> pd.DataFrame:
+        """Fleet x candidate match percentages from compare_matrix, overall or for one package."""
+        if package is None:
+            values = comparison["match_percent"]
+        else:
+            values = comparison["package_percent"][:, :, comparison["packages"].index(package)]
+        return pd.DataFrame(values, index=comparison["rows"], columns=comparison["columns"])
 
-        return str_val
+    def matrix_differences(self, comparison: dict, row, column) -> list[str]:
+        """Parameters that differ between one fleet setup and one candidate in compare_matrix."""
+        different = comparison["different"][comparison["rows"].index(row), comparison["columns"].index(column)]
+        return [param for param, differs in zip(comparison["params"], different) if differs]
 
     def validate_comparison_compatibility(self, user_vehicle: dict, reference_vehicle: dict) -> tuple[bool, str]:
         """Validate that two setups are for the same Brand/Model.
@@ -165,3 +376,47 @@ class ComparisonService:
 
 # Singleton instance
 comparison_service = ComparisonService()
+
+
+def _benchmark(n=5000):
+    """Rank n synthetic baselines: compare_setups per candidate vs. one matrix pass."""
+    import random
+    import time
+
+    rng = random.Random(7)
+    choices = {param: [round(rng.uniform(0, 10), 1) for _ in range(6)] for param in COMPARED_PARAMS}
+    candidates = [{param: rng.choice(values) for param, values in choices.items()} for _ in range(n)]
+    for i, candidate in enumerate(candidates):
+        candidate.update({"ID": i, "Track": "Bench", "Brand": "Tekno", "Vehicle": "NB48 2.2"})
+    user = dict(candidates[0])
+
+    start = time.perf_counter()
+    looped = [comparison_service.compare_setups(user, c)["match_count"] for c in candidates]
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matrix = comparison_service.encode_candidates(pd.DataFrame(candidates))
+    encode_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    ranked = comparison_service.compare_against_many(user, matrix)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    assert dict(zip(ranked["ID"], ranked["match_count"])) == dict(enumerate(looped))
+    print(f"{n} candidates: compare_setups loop {loop_ms:.0f} ms, "
+          f"encode {encode_ms:.0f} ms + compare_against_many {query_ms:.1f} ms")
+
+    fleet = {f"Car {i}": candidates[i * 97] for i in range(8)}
+    start = time.perf_counter()
+    looped = [[comparison_service.compare_setups(setup, c)["match_percent"] for c in candidates]
+              for setup in fleet.values()]
+    loop_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    grid = comparison_service.compare_matrix(fleet, matrix)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    assert grid["match_percent"].tolist() == looped
+    print(f"{len(fleet)} x {n} matrix: compare_setups loop {loop_ms:.0f} ms, compare_matrix {query_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
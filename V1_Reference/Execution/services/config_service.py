@@ -1,22 +1,180 @@
 """Car Configuration (Shop Master Baselines) storage and retrieval service.
 Uses JSONB for flexible setup storage.
 Supports both PostgreSQL (production) and CSV (fallback/local).
+
+save_configs and the fleet sync go through reconcile_fleet, which diffs the
+desired vehicles against the stored ones as Setup values (setup_model) and
+writes only new or changed vehicles, in one multi-row upsert.
+
+Vehicles are cached per profile in-process. Point operations (get_vehicle,
+patch_vehicle_setup) read from that cache and write a single row; a
+parameter patch is merged into baseline_setup in SQL, so a one-value tweak
+is one small UPDATE. Writes refresh or invalidate the profile's cache, and
+entries expire after CACHE_TTL_SECONDS so edits from other processes show up.
 """
 
 import json
 import os
+import threading
+import time
 
+import numpy as np
 import pandas as pd
 
 from Execution.database.database import db, get_or_create_default_profile
+from Execution.services.setup_model import SETUP_KEY_PATHS, SETUP_KEYS, Setup, setup_fingerprint
+
+CACHE_TTL_SECONDS = 60
+
+
+def _json_value(value):
+    """Plain JSON value for a setup parameter (numpy/pandas scalars and NaN included)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+# Text fields of the Universal Blank template (numeric fields are 0)
+BLANK_TEXT_KEYS = ['SP_F', 'P_F', 'SP_R', 'P_R', 'Tread', 'Compound', 'Pipe', 'Clutch']
+
+
+def blank_setup_row(car_name):
+    """Universal Blank flat config row for a new fleet vehicle."""
+    row = {key: ("BLANK" if key in BLANK_TEXT_KEYS else 0) for key in SETUP_KEYS}
+    row['Car'] = car_name
+    return row
+
+
+def fleet_vehicle_names(vehicles):
+    """Shop Master car names for a profile's fleet (nickname, else "Brand Model")."""
+    names = []
+    for v in vehicles or []:
+        brand = (v.get("brand") or "").strip()
+        model = (v.get("model") or "").strip()
+        nickname = (v.get("nickname") or "").strip()
+        if nickname:
+            names.append(nickname)
+        elif brand and model:
+            names.append(f"{brand} {model}")
+        elif brand:
+            names.append(brand)
+        elif model:
+            names.append(model)
+    return names
+
+
+def setup_patch(updates):
+    """Nested JSONB patch ({section: {field: value}}) for flat parameter updates."""
+    patch = {}
+    for key, value in updates.items():
+        if key in SETUP_KEY_PATHS:
+            section, field = SETUP_KEY_PATHS[key]
+            patch.setdefault(section, {})[field] = _json_value(value)
+    return patch
+
+
+# Declared column dtype per setup key for the bulk codec (setups_to_frame)
+SETUP_DTYPES = {
+    'DF': 'Int64', 'DC': 'Int64', 'DR': 'Int64',
+    'SO_F': 'Int64', 'SP_F': 'string', 'SB_F': 'Float64', 'P_F': 'string',
+    'Toe_F': 'Float64', 'RH_F': 'Float64', 'C_F': 'Float64', 'ST_F': 'Int64',
+    'SO_R': 'Int64', 'SP_R': 'string', 'SB_R': 'Float64', 'P_R': 'string',
+    'Toe_R': 'Float64', 'RH_R': 'Float64', 'C_R': 'Float64', 'ST_R': 'Int64',
+    'Tread': 'string', 'Compound': 'string',
+    'Venturi': 'Float64', 'Pipe': 'string', 'Clutch': 'string', 'Bell': 'Int64', 'Spur': 'Int64'
+}
+
+# JSONB layout as (section, [(field, flat key), ...]) in csv_row_to_jsonb order
+_SETUP_LAYOUT = []
+for _key, (_section, _field) in SETUP_KEY_PATHS.items():
+    if not _SETUP_LAYOUT or _SETUP_LAYOUT[-1][0] != _section:
+        _SETUP_LAYOUT.append((_section, []))
+    _SETUP_LAYOUT[-1][1].append((_field, _key))
+
+
+_NUMERIC_TYPES = {int, float, type(None)}
+_STRING_TYPES = {str, type(None)}
+
+
+def _typed_array(values, dtype):
+    """Extension array of the declared dtype, or object if the values do not all fit.
+
+    Values are never coerced: "7k" in a diff column or 2.5 in an Int64 column
+    keeps the whole column as object.
+    """
+    types = set(map(type, values))
+    if dtype == 'string':
+        if float in types and types <= _STRING_TYPES | {float}:
+            # NaN counts as missing
+            if not all(v != v for v in values if type(v) is float):
+                return pd.array(values, dtype=object)
+            values = [None if type(v) is float else v for v in values]
+            types.discard(float)
+        if types <= _STRING_TYPES:
+            return pd.array(values, dtype=dtype)
+        return pd.array(values, dtype=object)
+
+    if not types <= _NUMERIC_TYPES:
+        return pd.array(values, dtype=object)
+    # numpy turns None into NaN in C, which becomes the mask
+    data = np.array(values, dtype=np.float64)
+    mask = np.isnan(data)
+    if dtype == 'Float64':
+        return pd.arrays.FloatingArray(data, mask)
+    data[mask] = 0
+    # Integral floats (7000.0) fit Int64, 2.5 does not
+    if float in types and not np.array_equal(data, np.trunc(data)):
+        return pd.array(values, dtype=object)
+    return pd.arrays.IntegerArray(data.astype(np.int64), mask)
+
+
+def setups_to_frame(setups, car_names=None):
+    """Convert setup JSON documents to a flat typed DataFrame, column by column.
+
+    Same values as pd.DataFrame([jsonb_to_csv_row(s, name) ...]), but each
+    column gets its SETUP_DTYPES dtype. A column holding values of another
+    type (e.g. "7k" in a diff column) stays object so nothing is coerced.
+
+    Args:
+        setups: List of setup JSON dicts (None entries are treated as empty)
+        car_names: Optional list of names for a leading 'Car' column
+
+    Returns:
+        DataFrame with ['Car'] + SETUP_KEYS columns (or SETUP_KEYS only)
+
+    """
+    columns = {}
+    if car_names is not None:
+        columns['Car'] = pd.array(list(car_names), dtype=object)
+    for section, fields in _SETUP_LAYOUT:
+        parts = [(doc or {}).get(section) or {} for doc in setups]
+        for field, key in fields:
+            columns[key] = _typed_array([part.get(field) for part in parts], SETUP_DTYPES[key])
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(setups)))
+
 
-# Setup parameter keys for CSV compatibility
-SETUP_KEYS = [
-    'DF', 'DC', 'DR',
-    'SO_F', 'SP_F', 'SB_F', 'P_F', 'Toe_F', 'RH_F', 'C_F', 'ST_F',
-    'SO_R', 'SP_R', 'SB_R', 'P_R', 'Toe_R', 'RH_R', 'C_R', 'ST_R',
-    'Tread', 'Compound', 'Venturi', 'Pipe', 'Clutch', 'Bell', 'Spur'
-]
+def frame_to_setups(df):
+    """Convert a flat config DataFrame to setup JSON documents, column by column.
+
+    Same output as [csv_row_to_jsonb(row) for row in df.to_dict('records')]:
+    missing values become None and values are plain Python scalars.
+    """
+    count = len(df)
+    columns = []
+    for key in SETUP_KEY_PATHS:
+        if key in df.columns:
+            column = df[key].astype(object)
+            columns.append(column.where(column.notna(), None).tolist())
+        else:
+            columns.append([None] * count)
+
+    setups = []
+    for values in zip(*columns) if columns else []:
+        it = iter(values)
+        setups.append({section: {field: next(it) for field, _key in fields} for section, fields in _SETUP_LAYOUT})
+    return setups
 
 
 def _safe_get(row, key):
@@ -128,6 +286,11 @@ class ConfigService:
         if not os.path.exists(self.config_path):
             self._init_csv_configs()
 
+        # profile_id -> (loaded at, {vehicle_id: vehicle dict}); None key = default profile id
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "cache_loads": 0, "patches": 0}
+
     def _init_csv_configs(self):
         """Initialize default car configs CSV."""
         default_data = [
@@ -166,29 +329,15 @@ class ConfigService:
     def _load_configs_db(self, profile_id):
         """Load configs from PostgreSQL database (vehicles table)."""
         try:
-            if profile_id is None:
-                profile_id = get_or_create_default_profile()
-
+            profile_id = self._resolve_profile(profile_id)
             if profile_id is None:
                 return self._load_configs_csv()
 
-            query = """
-                SELECT nickname, brand, model, baseline_setup
-                FROM vehicles
-                WHERE profile_id = %s
-                ORDER BY nickname
-            """
-
-            results = db.execute_query(query, (profile_id,))
-
-            if results:
-                # Convert JSONB to flat DataFrame for dashboard compatibility
-                rows = []
-                for r in results:
-                    car_name = r['nickname'] or f"{r['brand']} {r['model']}"
-                    setup = r['baseline_setup'] or {}
-                    row = jsonb_to_csv_row(setup, car_name)
-                    rows.append(row)
+            vehicles = self._profile_vehicles(profile_id)
+            if vehicles:
+                # Flat DataFrame for dashboard compatibility
+                rows = [{k: v for k, v in vehicle.items() if k != 'id'}
+                        for vehicle in sorted(vehicles.values(), key=lambda v: v['Car'] or '')]
                 return pd.DataFrame(rows)
             else:
                 return pd.DataFrame(columns=['Car'] + SETUP_KEYS)
@@ -197,6 +346,68 @@ class ConfigService:
             print(f"Error loading configs from database: {e}")
             return self._load_configs_csv()
 
+    # ------------------------------------------------------------------
+    # Per-profile vehicle cache
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _vehicle_from_row(row):
+        """Flat vehicle dict (id, Car and setup keys) from a vehicles row."""
+        car_name = row['nickname'] or f"{row['brand']} {row['model']}"
+        vehicle = Setup.from_jsonb(row['baseline_setup']).to_flat(car_name)
+        vehicle['id'] = str(row['id'])
+        return vehicle
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry and time.monotonic() - entry[0] < CACHE_TTL_SECONDS:
+                self.stats["cache_hits"] += 1
+                return entry[1]
+        return None
+
+    def _resolve_profile(self, profile_id):
+        """profile_id, or the default profile's id (cached like the vehicles)."""
+        if profile_id is not None:
+            return str(profile_id)
+        cached = self._cache_get(None)
+        if cached is not None:
+            return cached
+        profile_id = get_or_create_default_profile()
+        if profile_id is not None:
+            profile_id = str(profile_id)
+            with self._cache_lock:
+                self._cache[None] = (time.monotonic(), profile_id)
+        return profile_id
+
+    def _profile_vehicles(self, profile_id):
+        """{vehicle_id: vehicle dict} for a profile, loaded once per TTL."""
+        vehicles = self._cache_get(profile_id)
+        if vehicles is not None:
+            return vehicles
+
+        results = db.execute_query(
+            """
+            SELECT id, nickname, brand, model, baseline_setup
+            FROM vehicles
+            WHERE profile_id = %s
+            """,
+            (profile_id,)
+        ) or []
+        vehicles = {str(r['id']): self._vehicle_from_row(r) for r in results}
+        with self._cache_lock:
+            self._cache[profile_id] = (time.monotonic(), vehicles)
+            self.stats["cache_loads"] += 1
+        return vehicles
+
+    def invalidate_cache(self, profile_id=None):
+        """Drop cached vehicles for one profile (or all profiles)."""
+        with self._cache_lock:
+            if profile_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(str(profile_id), None)
+
     def _load_configs_csv(self):
         """Load configs from CSV file (fallback mode)."""
         if os.path.exists(self.config_path):
@@ -216,61 +427,270 @@ class ConfigService:
 
     def _save_configs_db(self, df, profile_id):
         """Save configs to PostgreSQL database (vehicles table)."""
+        self.reconcile_fleet(df.to_dict('records'), profile_id)
+
+    def _save_configs_csv(self, df):
+        """Save configs to CSV file (fallback mode)."""
+        df.to_csv(self.config_path, index=False)
+
+    def reconcile_fleet(self, desired, profile_id=None):
+        """Write only the vehicles that are new or whose setup changed.
+
+        Desired rows are compared to the stored fleet by car name and setup
+        values (as Setup); vehicles not in `desired` are left alone (nothing is deleted).
+        In DB mode the changes go out as one multi-row upsert.
+
+        Args:
+            desired: Iterable of flat config rows (dicts with 'Car' and setup keys)
+            profile_id: Profile ID (None: default profile)
+
+        Returns:
+            Dict with inserted, updated and unchanged counts
+
+        """
+        desired = {row.get('Car'): row for row in desired if row.get('Car')}
+        summary = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        if self.use_database:
+            try:
+                resolved = self._resolve_profile(profile_id)
+                if resolved is not None:
+                    return self._reconcile_fleet_db(desired, resolved, summary)
+            except Exception as e:
+                print(f"Error saving configs to database: {e}")
+                self.invalidate_cache(profile_id)
+
+        # CSV fallback: rewrite the file only if something changed
+        df = self._load_configs_csv()
+        stored = {row['Car']: row for row in df.to_dict('records')}
+        rows = list(stored.values())
+        for car_name, row in desired.items():
+            if car_name not in stored:
+                rows.append(row)
+                summary["inserted"] += 1
+            elif Setup.from_flat(stored[car_name]) != Setup.from_flat(row):
+                rows[rows.index(stored[car_name])] = row
+                summary["updated"] += 1
+            else:
+                summary["unchanged"] += 1
+        if summary["inserted"] or summary["updated"]:
+            self._save_configs_csv(pd.DataFrame(rows, columns=list(df.columns) or ['Car'] + SETUP_KEYS))
+        return summary
+
+    def _reconcile_fleet_db(self, desired, profile_id, summary):
+        stored = {vehicle['Car']: vehicle for vehicle in self._profile_vehicles(profile_id).values()}
+        changes = {}  # (brand, model) -> row; the upsert key must be unique per statement
+
+        for car_name, row in desired.items():
+            current = stored.get(car_name)
+            setup = Setup.from_flat(row)
+            if current is not None and Setup.from_flat(current) == setup:
+                summary["unchanged"] += 1
+                continue
+            summary["updated" if current is not None else "inserted"] += 1
+
+            # Parse brand/model from car name ("NB48 2.2 Buggy" or "Brand Model")
+            parts = car_name.split(' ', 1)
+            brand = parts[0] if len(parts) > 0 else 'Unknown'
+            model = parts[1] if len(parts) > 1 else car_name
+            changes[(brand, model)] = (profile_id, brand, model, car_name, json.dumps(setup.to_jsonb()),
+                                       setup.fingerprint())
+
+        if changes:
+            db.execute_values(
+                """
+                INSERT INTO vehicles (profile_id, brand, model, nickname, baseline_setup, setup_fingerprint)
+                VALUES %s
+                ON CONFLICT (profile_id, brand, model) DO UPDATE SET
+                    nickname = EXCLUDED.nickname,
+                    baseline_setup = EXCLUDED.baseline_setup,
+                    setup_fingerprint = EXCLUDED.setup_fingerprint,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                list(changes.values()),
+                page_size=100
+            )
+            self.invalidate_cache(profile_id)
+        return summary
+
+    def sync_fleet(self, racer_profile, profile_id=None):
+        """Ensure every vehicle in a profile's fleet has a Shop Master config.
+
+        Vehicles without one get the Universal Blank template; existing
+        configs are untouched, so an unchanged fleet costs one cached read.
+        """
+        names = fleet_vehicle_names((racer_profile or {}).get("vehicles", []))
+        if not names:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        if self.use_database:
+            resolved = self._resolve_profile(profile_id)
+            existing = {v['Car'] for v in self._profile_vehicles(resolved).values()} if resolved else set()
+        else:
+            existing = set(self._load_configs_csv()['Car'].tolist())
+        missing = [blank_setup_row(name) for name in dict.fromkeys(names) if name not in existing]
+        summary = self.reconcile_fleet(missing, profile_id) if missing else {"inserted": 0, "updated": 0}
+        summary["unchanged"] = len(names) - len(missing)
+        return summary
+
+    def get_vehicle(self, profile_id, vehicle_id):
+        """Get one vehicle's config (flat dict with 'id' and 'Car'), or None.
+
+        In CSV mode vehicle_id is the car name.
+        """
+        if not self.use_database:
+            return self._get_vehicle_csv(vehicle_id)
         try:
+            profile_id = self._resolve_profile(profile_id)
             if profile_id is None:
-                profile_id = get_or_create_default_profile()
+                return self._get_vehicle_csv(vehicle_id)
+            vehicles = self._cache_get(profile_id)
+            if vehicles is None:
+                # Cold cache: one primary-key read instead of loading the fleet
+                result = db.execute_query(
+                    """
+                    SELECT id, nickname, brand, model, baseline_setup
+                    FROM vehicles
+                    WHERE id = %s AND profile_id = %s
+                    """,
+                    (str(vehicle_id), profile_id)
+                )
+                return self._vehicle_from_row(result[0]) if result else None
+            vehicle = vehicles.get(str(vehicle_id))
+            return dict(vehicle) if vehicle else None
+        except Exception as e:
+            print(f"Error loading vehicle {vehicle_id}: {e}")
+            return None
 
-            if profile_id is None:
-                self._save_configs_csv(df)
-                return
-
-            for _, row in df.iterrows():
-                car_name = row.get('Car', '')
-
-                # Parse brand/model from car name or use defaults
-                # Assuming format like "NB48 2.2 Buggy" or "Brand Model"
-                parts = car_name.split(' ', 1)
-                brand = parts[0] if len(parts) > 0 else 'Unknown'
-                model = parts[1] if len(parts) > 1 else car_name
-
-                # Convert flat row to JSONB
-                setup_json = csv_row_to_jsonb(row.to_dict())
-
-                # Upsert vehicle with baseline_setup
-                query = """
-                    INSERT INTO vehicles (profile_id, brand, model, nickname, baseline_setup)
-                    VALUES (%(profile_id)s, %(brand)s, %(model)s, %(nickname)s, %(setup)s)
-                    ON CONFLICT (profile_id, brand, model) DO UPDATE SET
-                        nickname = EXCLUDED.nickname,
-                        baseline_setup = EXCLUDED.setup,
-                        updated_at = CURRENT_TIMESTAMP
-                """
+    def _get_vehicle_csv(self, car_name):
+        df = self._load_configs_csv()
+        vehicle = df[df['Car'] == car_name]
+        if vehicle.empty:
+            return None
+        row = vehicle.iloc[0].to_dict()
+        row['id'] = car_name
+        return row
+
+    def patch_vehicle_setup(self, profile_id, vehicle_id, updates):
+        """Update specific setup parameters of one vehicle.
+
+        Only the touched JSONB sections are merged (section || patch), in a
+        single UPDATE on the vehicle's primary key; the cached entry is
+        replaced with the returned row. A patch that matches the cached
+        setup is not written. The setup_fingerprint column is set in the
+        same UPDATE when the cache is warm (a second one otherwise).
 
-                params = {
-                    'profile_id': profile_id,
-                    'brand': brand,
-                    'model': model,
-                    'nickname': car_name,
-                    'setup': json.dumps(setup_json)
-                }
+        Args:
+            profile_id: Profile ID (None: default profile)
+            vehicle_id: Vehicle ID (car name in CSV mode)
+            updates: Dict of flat parameter updates (e.g., {'SO_F': 500, 'Compound': 'Blue'})
+
+        Returns:
+            Updated vehicle dict, or None if the vehicle was not found
 
-                db.execute_query(query, params, fetch=False)
+        """
+        patch = setup_patch(updates)
+        if not patch:
+            return self.get_vehicle(profile_id, vehicle_id)
+        if not self.use_database:
+            return self._patch_vehicle_csv(vehicle_id, updates)
+
+        try:
+            profile_id = self._resolve_profile(profile_id)
+            if profile_id is None:
+                return self._patch_vehicle_csv(vehicle_id, updates)
+
+            # Nothing to write if the cached setup already holds these values
+            cached = (self._cache_get(profile_id) or {}).get(str(vehicle_id))
+            fingerprint = None
+            if cached is not None:
+                current = Setup.from_flat(cached)
+                patched = current.replace({key: value for key, value in updates.items() if key in SETUP_KEY_PATHS})
+                if patched == current:
+                    return dict(cached)
+                fingerprint = patched.fingerprint()
+
+            # Section names come from SETUP_KEY_PATHS, never from the caller
+            merges = ", ".join(
+                f"'{section}', COALESCE(baseline_setup->'{section}', '{{}}'::jsonb) || %(p_{section})s::jsonb"
+                for section in patch
+            )
+            params = {f"p_{section}": json.dumps(fields) for section, fields in patch.items()}
+            params.update(vehicle_id=str(vehicle_id), profile_id=profile_id, fingerprint=fingerprint)
+            result = db.execute_query(
+                f"""
+                UPDATE vehicles
+                SET baseline_setup = COALESCE(baseline_setup, '{{}}'::jsonb) || jsonb_build_object({merges}),
+                    setup_fingerprint = %(fingerprint)s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %(vehicle_id)s AND profile_id = %(profile_id)s
+                RETURNING id, nickname, brand, model, baseline_setup
+                """,
+                params
+            )
+            if not result:
+                return None
+
+            # The fingerprint above came from the cache; correct it if the row had other edits
+            stored = setup_fingerprint(result[0]['baseline_setup'])
+            if stored != fingerprint:
+                db.execute_query(
+                    "UPDATE vehicles SET setup_fingerprint = %s WHERE id = %s",
+                    (stored, str(vehicle_id)),
+                    fetch=False
+                )
+
+            vehicle = self._vehicle_from_row(result[0])
+            with self._cache_lock:
+                self.stats["patches"] += 1
+                entry = self._cache.get(profile_id)
+                if entry:
+                    entry[1][vehicle['id']] = vehicle
+            return dict(vehicle)
 
         except Exception as e:
-            print(f"Error saving configs to database: {e}")
-            self._save_configs_csv(df)
+            print(f"Error patching vehicle {vehicle_id}: {e}")
+            self.invalidate_cache(profile_id)
+            return None
 
-    def _save_configs_csv(self, df):
-        """Save configs to CSV file (fallback mode)."""
-        df.to_csv(self.config_path, index=False)
+    def _patch_vehicle_csv(self, car_name, updates):
+        df = self._load_configs_csv()
+        mask = df['Car'] == car_name
+        if not mask.any():
+            return None
+        for key, value in updates.items():
+            if key in SETUP_KEY_PATHS:
+                if key not in df.columns:
+                    df[key] = None
+                df[key] = df[key].astype(object)
+                df.loc[mask, key] = value
+        self._save_configs_csv(df)
+        return self._get_vehicle_csv(car_name)
+
+    def find_vehicle_id(self, car_name, profile_id=None):
+        """Vehicle ID for a car name (the name itself in CSV mode), or None."""
+        if not self.use_database:
+            return car_name
+        try:
+            profile_id = self._resolve_profile(profile_id)
+            if profile_id is None:
+                return car_name
+            for vehicle_id, vehicle in self._profile_vehicles(profile_id).items():
+                if vehicle['Car'] == car_name:
+                    return vehicle_id
+        except Exception as e:
+            print(f"Error finding vehicle {car_name}: {e}")
+        return None
 
     def get_vehicle_by_name(self, car_name, profile_id=None):
         """Get a single vehicle's config by name."""
-        df = self.load_configs(profile_id)
-        vehicle = df[df['Car'] == car_name]
-        if not vehicle.empty:
-            return vehicle.iloc[0].to_dict()
-        return None
+        vehicle_id = self.find_vehicle_id(car_name, profile_id)
+        if vehicle_id is None:
+            return None
+        vehicle = self.get_vehicle(profile_id, vehicle_id)
+        if vehicle:
+            vehicle.pop('id', None)
+        return vehicle
 
     def update_vehicle_setup(self, car_name, updates, profile_id=None):
         """Update specific setup parameters for a vehicle.
@@ -281,17 +701,70 @@ class ConfigService:
             profile_id: Profile ID (optional)
 
         """
-        df = self.load_configs(profile_id)
-        mask = df['Car'] == car_name
-
-        if mask.any():
-            for key, value in updates.items():
-                if key in df.columns:
-                    df.loc[mask, key] = value
-            self.save_configs(df, profile_id)
-            return True
-        return False
+        vehicle_id = self.find_vehicle_id(car_name, profile_id)
+        if vehicle_id is None:
+            return False
+        return self.patch_vehicle_setup(profile_id, vehicle_id, updates) is not None
 
 
 # Singleton instance
 config_service = ConfigService()
+
+
+def _frames_match(left, right):
+    """Value equality of two frames, with every kind of missing value as None."""
+    if list(left.columns) != list(right.columns) or len(left) != len(right):
+        return False
+    for column in left.columns:
+        a = left[column].astype(object)
+        b = right[column].astype(object)
+        if a.where(a.notna(), None).tolist() != b.where(b.notna(), None).tolist():
+            return False
+    return True
+
+
+def _benchmark(count=10000):
+    """Bulk codec vs. the per-row functions on `count` generated setups."""
+    import random
+
+    rng = random.Random(46)
+    names = [f"Car {i}" for i in range(count)]
+    rows = []
+    for name in names:
+        row = blank_setup_row(name)
+        for key, dtype in SETUP_DTYPES.items():
+            if rng.random() < 0.1:
+                row[key] = None
+            elif dtype == 'Int64':
+                row[key] = rng.choice([0, 350, 450, 5000, 7000, 10000])
+            elif dtype == 'Float64':
+                row[key] = rng.choice([-3.0, -1.5, 2.3, 27.0, 7.5])
+            else:
+                row[key] = rng.choice(["Green", "Blue", "1.2x4", "REDS 2143", "4-Shoe Med"])
+        rows.append(row)
+    df = pd.DataFrame(rows)
+
+    start = time.perf_counter()
+    per_row_setups = [csv_row_to_jsonb(row) for row in df.to_dict('records')]
+    to_json_row = time.perf_counter() - start
+    start = time.perf_counter()
+    bulk_setups = frame_to_setups(df)
+    to_json_bulk = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_row_frame = pd.DataFrame([jsonb_to_csv_row(setup, name) for setup, name in zip(bulk_setups, names)])
+    to_frame_row = time.perf_counter() - start
+    start = time.perf_counter()
+    bulk_frame = setups_to_frame(bulk_setups, names)
+    to_frame_bulk = time.perf_counter() - start
+
+    print(f"{count} setups")
+    print(f"  flat -> JSONB: per-row {to_json_row * 1000:.0f} ms, bulk {to_json_bulk * 1000:.0f} ms, "
+          f"identical={per_row_setups == bulk_setups}")
+    print(f"  JSONB -> flat: per-row {to_frame_row * 1000:.0f} ms, bulk {to_frame_bulk * 1000:.0f} ms, "
+          f"identical={_frames_match(per_row_frame, bulk_frame)}")
+    print(f"  bulk dtypes: {sorted(set(str(t) for t in bulk_frame.dtypes))}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,360 @@
+"""A.P.E.X. Conversation Store - Setup Advisor chat history outside session state.
+
+The full advisor conversation for a profile + racing session is stored in
+PostgreSQL (advisor_messages / advisor_summaries) or, without a database, in
+an append-only JSONL file per conversation under Execution/data/conversations.
+The UI only ever holds a window of recent messages, and older turns are rolled
+into a running summary that prompt builders can inject. Rerun cost and
+session memory stay flat however long an event runs.
+
+The JSONL backend keeps a per-conversation line-offset index in memory, so
+fetching a window seeks straight to it instead of re-reading the file.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+from psycopg2 import errors as pg_errors
+
+from Execution.database.database import db
+
+logger = logging.getLogger("apex.conversation_store")
+
+CHAT_WINDOW = 20            # Messages rendered per page / kept out of the summary
+COMPACT_EVERY = 10          # Summarize once this many messages sit above the window
+APPEND_RETRIES = 3          # Attempts when a concurrent append takes the same seq
+SUMMARY_MAX_CHARS = 4000    # Running summary cap (oldest lines dropped first)
+
+
+def extractive_summary(previous: str, messages: list[dict]) -> str:
+    """Fold messages into the running summary without an LLM call.
+
+    Keeps each driver question (first sentence) and each engineer reply's
+    [PROPOSED_CHANGE] lines, or its first sentence when there are none.
+    """
+    lines = [previous] if previous else []
+    for msg in messages:
+        content = " ".join(str(msg.get("content", "")).split())
+        if not content:
+            continue
+        if msg.get("role") == "user":
+            lines.append(f"- Driver: {content[:160]}")
+        else:
+            changes = re.findall(r"\[PROPOSED_CHANGE\]\s*([^\[]{1,80})", content)
+            if changes:
+                lines.append("- Engineer proposed: " + "; ".join(c.strip() for c in changes))
+            else:
+                first_sentence = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+                lines.append(f"- Engineer: {first_sentence[:160]}")
+
+    summary = "\n".join(lines)
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[-SUMMARY_MAX_CHARS:]
+        summary = summary[summary.find("\n") + 1:]
+    return summary
+
+
+class ConversationStore:
+    """Append-only advisor conversations with windowed reads and a running summary."""
+
+    def __init__(self, data_dir: str = "Execution/data/conversations"):
+        """Initialize the store.
+
+        Args:
+            data_dir: Directory for JSONL conversations (no-database fallback)
+
+        """
+        self.use_database = db.is_connected
+        self.data_dir = data_dir
+        self._offsets = {}  # conversation_id -> [byte offset of each line]
+        self._lock = threading.Lock()
+        if not self.use_database:
+            os.makedirs(self.data_dir, exist_ok=True)
+
+    @staticmethod
+    def conversation_id(profile_id, session_id=None) -> str:
+        """Conversation key for a profile's racing session ("general" outside a session)."""
+        return f"{profile_id or 'default'}_{session_id or 'general'}"
+
+    # ------------------------------------------------------------------
+    # JSONL backend
+    # ------------------------------------------------------------------
+
+    def _safe_name(self, conversation_id: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", conversation_id)
+
+    def _log_path(self, conversation_id: str) -> str:
+        return os.path.join(self.data_dir, f"{self._safe_name(conversation_id)}.jsonl")
+
+    def _summary_path(self, conversation_id: str) -> str:
+        return os.path.join(self.data_dir, f"{self._safe_name(conversation_id)}.summary.json")
+
+    def _line_offsets(self, conversation_id: str) -> list[int]:
+        """Byte offset of each message line, scanned once per process (lock held)."""
+        if conversation_id not in self._offsets:
+            offsets = []
+            path = self._log_path(conversation_id)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    position = 0
+                    for line in f:
+                        if line.strip():
+                            offsets.append(position)
+                        position += len(line)
+            self._offsets[conversation_id] = offsets
+        return self._offsets[conversation_id]
+
+    # ------------------------------------------------------------------
+    # Messages
+    # ------------------------------------------------------------------
+
+    def append(self, conversation_id: str, role: str, content: str) -> int:
+        """Append a message; returns its 0-based sequence number."""
+        created_at = datetime.now().isoformat(timespec="seconds")
+        if self.use_database:
+            for _attempt in range(APPEND_RETRIES):
+                try:
+                    with db.get_connection() as conn:
+                        cursor = conn.cursor()
+                        # Serialize appends per conversation until commit, so two
+                        # writers never read the same MAX(seq)
+                        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (conversation_id,))
+                        cursor.execute(
+                            """
+                            INSERT INTO advisor_messages (conversation_id, seq, role, content)
+                            SELECT %s, COALESCE(MAX(seq) + 1, 0), %s, %s
+                            FROM advisor_messages WHERE conversation_id = %s
+                            RETURNING seq
+                            """,
+                            (conversation_id, role, content, conversation_id)
+                        )
+                        return cursor.fetchone()[0]
+                except pg_errors.UniqueViolation:
+                    # Only possible against a writer that skips the lock; take the next seq
+                    logger.warning(f"Advisor message seq conflict in {conversation_id}, retrying")
+                except Exception as e:
+                    logger.error(f"Error appending advisor message: {e}")
+                    return -1
+            logger.error(f"Error appending advisor message: seq conflict after {APPEND_RETRIES} attempts")
+            return -1
+
+        with self._lock:
+            offsets = self._line_offsets(conversation_id)
+            seq = len(offsets)
+            line = json.dumps({"seq": seq, "role": role, "content": content, "created_at": created_at}) + "\n"
+            path = self._log_path(conversation_id)
+            with open(path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offsets.append(f.tell())
+                f.write(line.encode("utf-8"))
+        return seq
+
+    def count(self, conversation_id: str) -> int:
+        """Number of messages in the conversation."""
+        if self.use_database:
+            try:
+                result = db.execute_query(
+                    "SELECT COUNT(*) AS n FROM advisor_messages WHERE conversation_id = %s",
+                    (conversation_id,)
+                )
+                return result[0]["n"] if result else 0
+            except Exception as e:
+                logger.error(f"Error counting advisor messages: {e}")
+                return 0
+
+        with self._lock:
+            return len(self._line_offsets(conversation_id))
+
+    def get_window(self, conversation_id: str, limit: int = CHAT_WINDOW, before: Optional[int] = None) -> list[dict]:
+        """The last `limit` messages before sequence `before` (default: the newest), oldest first."""
+        if limit <= 0:
+            return []
+        if self.use_database:
+            try:
+                rows = db.execute_query(
+                    """
+                    SELECT seq, role, content FROM advisor_messages
+                    WHERE conversation_id = %s AND (%s IS NULL OR seq < %s)
+                    ORDER BY seq DESC LIMIT %s
+                    """,
+                    (conversation_id, before, before, limit)
+                ) or []
+                return [dict(r) for r in reversed(rows)]
+            except Exception as e:
+                logger.error(f"Error loading advisor messages: {e}")
+                return []
+
+        with self._lock:
+            offsets = self._line_offsets(conversation_id)
+            end = len(offsets) if before is None else max(0, min(before, len(offsets)))
+            start = max(0, end - limit)
+            if start == end:
+                return []
+            path = self._log_path(conversation_id)
+            with open(path, "rb") as f:
+                f.seek(offsets[start])
+                lines = [f.readline() for _ in range(end - start)]
+
+        messages = []
+        for line in lines:
+            entry = json.loads(line)
+            messages.append({"seq": entry["seq"], "role": entry["role"], "content": entry["content"]})
+        return messages
+
+    def iter_messages(self, role: Optional[str] = None):
+        """Yield every stored message (all conversations) with its conversation_id."""
+        if self.use_database:
+            try:
+                rows = db.execute_query(
+                    """
+                    SELECT conversation_id, seq, role, content, created_at FROM advisor_messages
+                    WHERE (%s IS NULL OR role = %s)
+                    ORDER BY conversation_id, seq
+                    """,
+                    (role, role)
+                ) or []
+            except Exception as e:
+                logger.error(f"Error loading advisor messages: {e}")
+                return
+            for row in rows:
+                yield dict(row, created_at=str(row["created_at"]))
+            return
+
+        if not os.path.isdir(self.data_dir):
+            return
+        for name in sorted(os.listdir(self.data_dir)):
+            if not name.endswith(".jsonl"):
+                continue
+            with open(os.path.join(self.data_dir, name), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if role is None or entry["role"] == role:
+                        yield dict(entry, conversation_id=name[:-len(".jsonl")])
+
+    # ------------------------------------------------------------------
+    # Running summary
+    # ------------------------------------------------------------------
+
+    def get_summary(self, conversation_id: str) -> dict:
+        """{"summary": str, "through": last summarized seq (-1 if none)}."""
+        if self.use_database:
+            try:
+                result = db.execute_query(
+                    "SELECT summary, summarized_through FROM advisor_summaries WHERE conversation_id = %s",
+                    (conversation_id,)
+                )
+                if result:
+                    return {"summary": result[0]["summary"] or "", "through": result[0]["summarized_through"]}
+            except Exception as e:
+                logger.error(f"Error loading advisor summary: {e}")
+            return {"summary": "", "through": -1}
+
+        path = self._summary_path(conversation_id)
+        if not os.path.exists(path):
+            return {"summary": "", "through": -1}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading advisor summary {path}: {e}")
+            return {"summary": "", "through": -1}
+
+    def _save_summary(self, conversation_id: str, summary: str, through: int):
+        if self.use_database:
+            db.execute_query(
+                """
+                INSERT INTO advisor_summaries (conversation_id, summary, summarized_through)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (conversation_id) DO UPDATE
+                SET summary = EXCLUDED.summary,
+                    summarized_through = EXCLUDED.summarized_through,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (conversation_id, summary, through),
+                fetch=False
+            )
+            return
+
+        path = self._summary_path(conversation_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"summary": summary, "through": through}, f)
+        os.replace(tmp_path, path)
+
+    def compact(self, conversation_id: str, keep_recent: int = CHAT_WINDOW, min_batch: int = COMPACT_EVERY,
+                summarizer: Callable[[str, list[dict]], str] = extractive_summary) -> bool:
+        """Roll messages older than the recent window into the running summary.
+
+        Runs only once at least `min_batch` unsummarized messages sit above the
+        window, so the summarizer is called every few turns rather than every turn.
+
+        Args:
+            conversation_id: Conversation key
+            keep_recent: Newest messages left out of the summary
+            min_batch: Minimum messages to fold per compaction
+            summarizer: (previous_summary, messages) -> new summary
+
+        Returns:
+            True if the summary was updated
+
+        """
+        total = self.count(conversation_id)
+        state = self.get_summary(conversation_id)
+        fold_end = total - keep_recent  # exclusive
+        if fold_end - (state["through"] + 1) < min_batch:
+            return False
+
+        older = self.get_window(conversation_id, limit=fold_end - (state["through"] + 1), before=fold_end)
+        try:
+            summary = summarizer(state["summary"], older)
+            self._save_summary(conversation_id, summary, fold_end - 1)
+        except Exception as e:
+            logger.error(f"Error compacting advisor conversation {conversation_id}: {e}")
+            return False
+        return True
+
+
+# Singleton instance
+conversation_store = ConversationStore()
+
+
+def _benchmark():
+    """Window fetch cost stays flat as a conversation grows (JSONL backend)."""
+    import tempfile
+    import time
+
+    store = ConversationStore(data_dir=tempfile.mkdtemp())
+    store.use_database = False
+    conversation = store.conversation_id(1, "bench")
+    written = 0
+    for size in (100, 1000, 10000):
+        for i in range(written, size):
+            role = "user" if i % 2 == 0 else "assistant"
+            text = f"Car is loose on exit, lap {i}." if role == "user" else \
+                f"Rear grip is low. Thicken the rear diff. [PROPOSED_CHANGE] DR: {3000 + i}"
+            store.append(conversation, role, text)
+            store.compact(conversation)
+        written = size
+
+        store._offsets.clear()  # cold process: offsets rebuilt once
+        start = time.perf_counter()
+        store.get_window(conversation)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(100):
+            store.get_window(conversation)
+        warm = (time.perf_counter() - start) / 100
+        summary = store.get_summary(conversation)
+        print(f"{size:>6} messages: cold window {cold * 1000:6.2f}ms  warm window {warm * 1000:5.2f}ms  "
+              f"summary {len(summary['summary'])} chars through #{summary['through']}")
+
+
+if __name__ == "__main__":
+    _benchmark()
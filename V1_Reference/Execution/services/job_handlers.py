@@ -0,0 +1,125 @@
+"""Job handlers for the A.P.E.X. background job queue.
+
+Each handler takes (payload, progress) and returns a JSON-serializable dict.
+Payloads carry plain values and spool-file paths (never Streamlit objects),
+so handlers run the same in worker threads and in worker processes.
+Services are imported inside each handler so a worker only loads what its
+jobs need.
+
+Raise JobFailed for errors that retrying cannot fix; any other exception is
+retried with backoff.
+"""
+
+from Execution.services.job_queue import JobFailed, job_queue
+
+
+def generate_prep_plan(payload: dict, progress) -> dict:
+    """Race Prep Plan PDF -> {"pdf_path", "timings", "precomputed"}.
+
+    A plan stored for the same data version is served without regenerating;
+    a freshly built plan is stored for next time.
+    """
+    from Execution.services.prep_plan_service import prep_plan_service
+    from Execution.services.prep_plan_store import plan_args, prep_plan_store
+
+    racer_profile, track_context, vehicle_info = plan_args(
+        payload["racer_profile"], payload["track_context"], payload["vehicle_info"]
+    )
+    version = prep_plan_store.data_version(racer_profile, track_context, vehicle_info)
+    pdf_bytes = prep_plan_store.get(version)
+    if pdf_bytes:
+        return {"pdf_path": job_queue.spool(pdf_bytes, ".pdf"), "timings": {}, "precomputed": True}
+
+    timings = {}
+    pdf_bytes = prep_plan_service.generate_full_plan(
+        racer_profile=racer_profile,
+        track_context=track_context,
+        vehicle_info=vehicle_info,
+        progress=progress,
+        timings=timings
+    )
+    if not pdf_bytes:
+        raise RuntimeError("Prep plan generation returned no PDF")
+    prep_plan_store.put(version, pdf_bytes, session_id=payload.get("session_id"), timings=timings,
+                        inputs=[racer_profile, track_context, vehicle_info])
+    return {"pdf_path": job_queue.spool(pdf_bytes, ".pdf"), "timings": timings, "precomputed": False}
+
+
+def precompute_prep_plans(payload: dict, progress) -> dict:
+    """Prep plans for upcoming sessions -> precompute_upcoming summary."""
+    from Execution.services.prep_plan_store import prep_plan_store
+
+    return prep_plan_store.precompute_upcoming(payload.get("days_ahead", 30), progress=progress)
+
+
+def build_session_book(payload: dict, progress) -> dict:
+    """Season book / sponsor report PDF for a profile's sessions -> {"pdf_path", "sessions", "pages"}.
+
+    The book is streamed straight into the spool directory, one session at a
+    time, so long seasons do not build up in memory.
+    """
+    import os
+    import uuid
+
+    from Execution.ai.pdf_generator import write_session_book
+    from Execution.services.session_service import session_service
+
+    sessions = session_service.get_session_history(payload.get("profile_id"), limit=payload.get("limit", 200))
+    if not sessions:
+        raise JobFailed("No sessions to include in the report")
+
+    done = iter(range(1, len(sessions) + 1))
+
+    def changes_for(session):
+        progress(min(0.95, next(done) / len(sessions)), f"Adding {session.get('session_name')}")
+        return session_service.get_session_changes(session["id"])
+
+    os.makedirs(job_queue.spool_dir, exist_ok=True)
+    path = os.path.join(job_queue.spool_dir, f"book-{uuid.uuid4().hex}.pdf")
+    summary = write_session_book(path, payload["title"], payload.get("subtitle", ""), sessions, changes_for)
+    return {"pdf_path": path, **summary}
+
+
+def parse_setup_pdf(payload: dict, progress) -> dict:
+    """Fillable PDF setup sheet -> {"setup"}."""
+    from Execution.services.setup_ingest import setup_ingest_pipeline
+
+    progress(0.1, "Extracting AcroForm fields")
+    setup = setup_ingest_pipeline.parse_file(payload["path"], payload["brand"])
+    if not setup:
+        raise JobFailed("No setup fields found in the PDF. Try AI Vision parsing instead.")
+    return {"setup": setup}
+
+
+def parse_setup_photo(payload: dict, progress) -> dict:
+    """Setup sheet photo -> {"setup"} via vision parsing."""
+    from Execution.services.setup_parser import setup_parser
+
+    image_bytes = job_queue.read_spool(payload["path"])
+    if image_bytes is None:
+        raise JobFailed("Uploaded photo is no longer available")
+    progress(0.1, "Analyzing with Claude Vision AI")
+    setup = setup_parser.parse_with_vision(image_bytes, payload["brand"])
+    if not setup:
+        raise JobFailed("Could not extract any setup parameters from the image. Try a clearer photo or different angle.")
+    return {"setup": setup}
+
+
+def scan_heat_sheets(payload: dict, progress) -> dict:
+    """LiveRC heat sheets for one racer -> {"heats"}."""
+    from Execution.services.liverc_harvester import LiveRCHarvester
+
+    progress(0.1, "Scanning heat sheets")
+    harvester = LiveRCHarvester(payload["event_url"])
+    return {"heats": harvester.scan_heat_sheets(payload["racer_name"], classes=payload.get("classes", []))}
+
+
+def send_email_report(payload: dict, progress) -> dict:
+    """Race report email -> {"message"}; SMTP failures are retried."""
+    from Execution.services.email_service import email_service
+
+    progress(0.2, f"Sending to {payload['recipient']}")
+    success, msg = email_service.send_report(payload["recipient"], payload["subject"], payload["content"])
+    if not success:
+        raise RuntimeError(msg)
+    return {"message": msg}
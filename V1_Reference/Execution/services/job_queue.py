@@ -0,0 +1,723 @@
+"""A.P.E.X. Job Queue - background execution for slow operations.
+
+PDF and vision parsing, prep-plan generation, LiveRC scans and report emails
+are submitted as jobs instead of running inside the Streamlit script run.
+Tabs keep the job id and poll it from an st.fragment (see
+components/fragments.job_status_panel), so the interactive thread never
+blocks on them.
+
+Jobs are persisted in the jobs table (PostgreSQL, see schema.sql and
+migrations/add_jobs_table.sql; claimed with FOR UPDATE SKIP LOCKED so any
+number of workers can share it) or, without a database, in a local SQLite
+file (Execution/data/jobs.db). Each job carries
+status, progress, message, result, error and attempt count. Failed jobs are
+retried with exponential backoff up to max_attempts, and a job whose worker
+died is picked up again once its lease expires.
+
+Workers run as threads inside the app process by default. Throughput scales
+with APEX_JOB_WORKERS, or with dedicated worker processes:
+
+    python -m Execution.services.job_queue --workers 4
+
+Configuration (environment):
+- APEX_JOB_WORKERS: in-app workers (default 2; 0 = enqueue only)
+- APEX_JOB_WORKER_MODE: "thread" (default) or "process"
+
+Handlers are referenced as "module:function" in JOB_HANDLERS so worker
+processes can import them; each takes (payload, progress) and returns a
+JSON-serializable dict.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Optional
+
+from Execution.database.database import db
+
+logger = logging.getLogger("apex.job_queue")
+
+JOB_HANDLERS = {
+    "prep_plan": "Execution.services.job_handlers:generate_prep_plan",
+    "prep_plan_batch": "Execution.services.job_handlers:precompute_prep_plans",
+    "session_book": "Execution.services.job_handlers:build_session_book",
+    "parse_pdf": "Execution.services.job_handlers:parse_setup_pdf",
+    "parse_vision": "Execution.services.job_handlers:parse_setup_photo",
+    "liverc_scan": "Execution.services.job_handlers:scan_heat_sheets",
+    "email_report": "Execution.services.job_handlers:send_email_report",
+}
+
+ACTIVE_STATUSES = ("queued", "running")
+LEASE_SECONDS = 300          # A running job not heard from for this long is reclaimed
+RETRY_BACKOFF_SECONDS = 5    # First retry delay; doubles per attempt
+SPOOL_MAX_AGE_SECONDS = 7 * 24 * 3600  # Job input/output files kept this long
+
+
+class JobFailed(Exception):
+    """Raise from a handler to fail the job without retrying."""
+
+
+def resolve_handler(kind: str) -> Callable:
+    """Import the handler registered for a job kind."""
+    target = JOB_HANDLERS.get(kind)
+    if target is None:
+        raise JobFailed(f"No handler registered for job kind '{kind}'")
+    if callable(target):
+        return target
+    module_name, func_name = target.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def register_handler(kind: str, target):
+    """Register a handler for a job kind.
+
+    target is "module:function", or a callable for thread workers only
+    (worker processes import their handlers by name).
+    """
+    JOB_HANDLERS[kind] = target
+
+
+def unregister_handler(kind: str):
+    """Remove a job kind's handler (no-op if it is not registered)."""
+    JOB_HANDLERS.pop(kind, None)
+
+
+def _iso(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    return value.isoformat(timespec="seconds")
+
+
+def _normalize(row: dict) -> dict:
+    """Job dict with decoded JSON fields and ISO timestamps."""
+    job = dict(row)
+    for field in ("payload", "result"):
+        if isinstance(job.get(field), str):
+            job[field] = json.loads(job[field])
+    for field in ("run_after", "locked_until", "created_at", "started_at", "updated_at", "finished_at"):
+        job[field] = _iso(job.get(field))
+    job["progress"] = float(job.get("progress") or 0.0)
+    return job
+
+
+# ----------------------------------------------------------------------
+# Stores
+# ----------------------------------------------------------------------
+
+class PostgresJobStore:
+    """jobs table in PostgreSQL; claims use FOR UPDATE SKIP LOCKED."""
+
+    spec = ("postgres",)
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int, priority: int) -> int:
+        result = db.execute_query(
+            """
+            INSERT INTO jobs (kind, payload, max_attempts, priority)
+            VALUES (%s, %s::jsonb, %s, %s)
+            RETURNING id
+            """,
+            (kind, json.dumps(payload, default=str), max_attempts, priority)
+        )
+        return result[0]["id"]
+
+    def claim(self, worker_id: str, lease_seconds: int) -> Optional[dict]:
+        # Jobs whose worker died after their last attempt are failed, not rerun
+        db.execute_query(
+            """
+            UPDATE jobs SET status = 'failed', error = 'Worker lease expired', finished_at = NOW(), updated_at = NOW()
+            WHERE status = 'running' AND locked_until < NOW() AND attempts >= max_attempts
+            """,
+            fetch=False
+        )
+        rows = db.execute_query(
+            """
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1, worker = %s,
+                locked_until = NOW() + %s * INTERVAL '1 second',
+                started_at = COALESCE(started_at, NOW()), updated_at = NOW()
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND run_after <= NOW())
+                   OR (status = 'running' AND locked_until < NOW())
+                ORDER BY priority DESC, id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+            """,
+            (worker_id, lease_seconds)
+        )
+        return _normalize(rows[0]) if rows else None
+
+    def progress(self, job_id: int, worker_id: str, fraction: float, message: str, lease_seconds: int):
+        db.execute_query(
+            """
+            UPDATE jobs SET progress = %s, message = %s,
+                locked_until = NOW() + %s * INTERVAL '1 second', updated_at = NOW()
+            WHERE id = %s AND status = 'running' AND worker = %s
+            """,
+            (fraction, message, lease_seconds, job_id, worker_id),
+            fetch=False
+        )
+
+    def complete(self, job_id: int, worker_id: str, result: dict) -> bool:
+        rows = db.execute_query(
+            """
+            UPDATE jobs SET status = 'succeeded', progress = 1, result = %s::jsonb, error = NULL,
+                locked_until = NULL, finished_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND status = 'running' AND worker = %s
+            RETURNING id
+            """,
+            (json.dumps(result, default=str), job_id, worker_id)
+        )
+        return bool(rows)
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_in: Optional[float]) -> bool:
+        if retry_in is None:
+            rows = db.execute_query(
+                """
+                UPDATE jobs SET status = 'failed', error = %s, locked_until = NULL,
+                    finished_at = NOW(), updated_at = NOW()
+                WHERE id = %s AND status = 'running' AND worker = %s
+                RETURNING id
+                """,
+                (error, job_id, worker_id)
+            )
+        else:
+            rows = db.execute_query(
+                """
+                UPDATE jobs SET status = 'queued', error = %s, locked_until = NULL,
+                    run_after = NOW() + %s * INTERVAL '1 second', updated_at = NOW()
+                WHERE id = %s AND status = 'running' AND worker = %s
+                RETURNING id
+                """,
+                (error, retry_in, job_id, worker_id)
+            )
+        return bool(rows)
+
+    def cancel(self, job_id: int) -> bool:
+        rows = db.execute_query(
+            """
+            UPDATE jobs SET status = 'cancelled', finished_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND status = 'queued'
+            RETURNING id
+            """,
+            (job_id,)
+        )
+        return bool(rows)
+
+    def get(self, job_id: int) -> Optional[dict]:
+        rows = db.execute_query("SELECT * FROM jobs WHERE id = %s", (job_id,))
+        return _normalize(rows[0]) if rows else None
+
+    def counts(self) -> dict:
+        rows = db.execute_query("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {r["status"]: r["n"] for r in rows}
+
+
+class SqliteJobStore:
+    """Offline jobs table in a local SQLite file (WAL mode, BEGIN IMMEDIATE claims).
+
+    Mirrors the PostgreSQL jobs table in schema.sql, with epoch-second
+    timestamps and JSON stored as text. The file is created on first use.
+    """
+
+    def __init__(self, path: str = "Execution/data/jobs.db"):
+        self.path = path
+        self.spec = ("sqlite", path)
+        self._ready = False
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                priority INTEGER DEFAULT 0,
+                progress REAL DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER DEFAULT 3,
+                worker TEXT,
+                run_after REAL NOT NULL,
+                locked_until REAL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, run_after)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per call: safe across worker threads and processes
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            self._create_schema(conn)
+            self._ready = True
+        return conn
+
+    def _execute(self, query: str, params=()) -> list[dict]:
+        conn = self._connect()
+        try:
+            return [dict(r) for r in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+    def _update(self, query: str, params=()) -> int:
+        """Run an UPDATE and return the number of rows it changed."""
+        conn = self._connect()
+        try:
+            return conn.execute(query, params).rowcount
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, payload: dict, max_attempts: int, priority: int) -> int:
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                """
+                INSERT INTO jobs (kind, payload, max_attempts, priority, run_after, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (kind, json.dumps(payload, default=str), max_attempts, priority, now, now, now)
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, lease_seconds: int) -> Optional[dict]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = 'Worker lease expired', finished_at = ?, updated_at = ?
+                WHERE status = 'running' AND locked_until < ? AND attempts >= max_attempts
+                """,
+                (now, now, now)
+            )
+            row = conn.execute(
+                """
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND run_after <= ?)
+                   OR (status = 'running' AND locked_until < ?)
+                ORDER BY priority DESC, id
+                LIMIT 1
+                """,
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, worker = ?, locked_until = ?,
+                    started_at = COALESCE(started_at, ?), updated_at = ?
+                WHERE id = ?
+                """,
+                (worker_id, now + lease_seconds, now, now, row["id"])
+            )
+            job = dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+            conn.execute("COMMIT")
+            return _normalize(job)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def progress(self, job_id: int, worker_id: str, fraction: float, message: str, lease_seconds: int):
+        now = time.time()
+        self._update(
+            """
+            UPDATE jobs SET progress = ?, message = ?, locked_until = ?, updated_at = ?
+            WHERE id = ? AND status = 'running' AND worker = ?
+            """,
+            (fraction, message, now + lease_seconds, now, job_id, worker_id)
+        )
+
+    def complete(self, job_id: int, worker_id: str, result: dict) -> bool:
+        now = time.time()
+        return self._update(
+            """
+            UPDATE jobs SET status = 'succeeded', progress = 1, result = ?, error = NULL,
+                locked_until = NULL, finished_at = ?, updated_at = ?
+            WHERE id = ? AND status = 'running' AND worker = ?
+            """,
+            (json.dumps(result, default=str), now, now, job_id, worker_id)
+        ) > 0
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_in: Optional[float]) -> bool:
+        now = time.time()
+        if retry_in is None:
+            return self._update(
+                """
+                UPDATE jobs SET status = 'failed', error = ?, locked_until = NULL, finished_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'running' AND worker = ?
+                """,
+                (error, now, now, job_id, worker_id)
+            ) > 0
+        return self._update(
+            """
+            UPDATE jobs SET status = 'queued', error = ?, locked_until = NULL, run_after = ?, updated_at = ?
+            WHERE id = ? AND status = 'running' AND worker = ?
+            """,
+            (error, now + retry_in, now, job_id, worker_id)
+        ) > 0
+
+    def cancel(self, job_id: int) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, now, job_id)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def get(self, job_id: int) -> Optional[dict]:
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _normalize(rows[0]) if rows else None
+
+    def counts(self) -> dict:
+        return {r["status"]: r["n"] for r in self._execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+
+def _store_from_spec(spec: tuple):
+    return PostgresJobStore() if spec[0] == "postgres" else SqliteJobStore(spec[1])
+
+
+# ----------------------------------------------------------------------
+# Workers
+# ----------------------------------------------------------------------
+
+def execute_job(store, job: dict, worker_id: str, lease_seconds: int = LEASE_SECONDS):
+    """Run one claimed job and record its outcome (retrying with backoff on failure).
+
+    Outcomes are written only while this worker still holds the job; if the
+    lease expired and another worker reclaimed it, the result is dropped.
+    """
+    def progress(fraction: float, message: str = ""):
+        store.progress(job["id"], worker_id, max(0.0, min(1.0, fraction)), message, lease_seconds)
+
+    try:
+        handler = resolve_handler(job["kind"])
+        result = handler(job["payload"] or {}, progress)
+        recorded = store.complete(job["id"], worker_id, result if result is not None else {})
+    except Exception as e:
+        logger.error(f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed: {e}")
+        retryable = not isinstance(e, JobFailed) and job["attempts"] < job["max_attempts"]
+        retry_in = RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1) if retryable else None
+        recorded = store.fail(job["id"], worker_id, f"{type(e).__name__}: {e}", retry_in)
+    if not recorded:
+        logger.warning(f"Job {job['id']} lease lost by {worker_id}; outcome of attempt {job['attempts']} dropped")
+
+
+def run_worker(store, stop_event, worker_id: str, poll_interval: float = 0.5,
+               lease_seconds: int = LEASE_SECONDS):
+    """Claim and execute jobs until stop_event is set."""
+    while not stop_event.is_set():
+        try:
+            job = store.claim(worker_id, lease_seconds)
+        except Exception as e:
+            logger.error(f"Job claim failed: {e}")
+            job = None
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+        execute_job(store, job, worker_id, lease_seconds)
+
+
+def _process_worker_main(spec: tuple, handlers: dict, stop_event, worker_id: str, poll_interval: float,
+                         lease_seconds: int):
+    """Entry point for worker processes (each opens its own store and gets the parent's handlers)."""
+    JOB_HANDLERS.update(handlers)
+    run_worker(_store_from_spec(spec), stop_event, worker_id, poll_interval, lease_seconds)
+
+
+class JobQueue:
+    """Submit jobs, poll their status, and run a worker pool."""
+
+    def __init__(self, store=None, workers: Optional[int] = None, mode: Optional[str] = None,
+                 poll_interval: float = 0.5, lease_seconds: int = LEASE_SECONDS,
+                 spool_dir: str = "Execution/data/job_spool"):
+        """Initialize the queue.
+
+        Args:
+            store: Job store (default: PostgreSQL when connected, else SQLite)
+            workers: In-app worker count (default APEX_JOB_WORKERS or 2)
+            mode: "thread" or "process" (default APEX_JOB_WORKER_MODE or "thread")
+            poll_interval: Idle wait between claim attempts (seconds)
+            lease_seconds: Running jobs silent for longer than this are reclaimed
+            spool_dir: Files passed to and returned from jobs (uploads, PDFs)
+
+        """
+        self.use_database = db.is_connected
+        self.store = store or (PostgresJobStore() if self.use_database else SqliteJobStore())
+        self.workers = int(os.environ.get("APEX_JOB_WORKERS", "2")) if workers is None else workers
+        self.mode = mode or os.environ.get("APEX_JOB_WORKER_MODE", "thread")
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.spool_dir = spool_dir
+
+        self._pool = []
+        self._stop = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, kind: str, payload: Optional[dict] = None, max_attempts: int = 3, priority: int = 0) -> int:
+        """Queue a job (starting the in-app workers on first use).
+
+        Args:
+            kind: Key in JOB_HANDLERS
+            payload: JSON-serializable handler arguments
+            max_attempts: Attempts before the job is marked failed
+            priority: Higher runs first
+
+        Returns:
+            Job id
+
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.store.enqueue(kind, payload or {}, max_attempts, priority)
+        self.ensure_workers()
+        return job_id
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """Job status dict (status, progress, message, result, error, attempts, ...)."""
+        try:
+            return self.store.get(job_id)
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {e}")
+            return None
+
+    @staticmethod
+    def is_active(job: Optional[dict]) -> bool:
+        return bool(job) and job["status"] in ACTIVE_STATUSES
+
+    def wait(self, job_id: int, timeout: float = 60.0) -> Optional[dict]:
+        """Block until the job finishes or the timeout passes (CLI and tests only)."""
+        deadline = time.monotonic() + timeout
+        job = self.get(job_id)
+        while self.is_active(job) and time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, 0.1))
+            job = self.get(job_id)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet."""
+        return self.store.cancel(job_id)
+
+    # ------------------------------------------------------------------
+    # Spool files (bytes in and out of jobs)
+    # ------------------------------------------------------------------
+
+    def spool(self, data: bytes, suffix: str = "") -> str:
+        """Write bytes to the spool directory (content-addressed) and return the path."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{hashlib.sha256(data).hexdigest()}{suffix}")
+        if os.path.exists(path):
+            os.utime(path)  # Reused input: keep it out of prune_spool
+        else:
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def prune_spool(self, max_age_seconds: int = SPOOL_MAX_AGE_SECONDS) -> int:
+        """Delete spool files older than max_age_seconds; returns the number removed."""
+        if not os.path.isdir(self.spool_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    @staticmethod
+    def read_spool(path: str) -> Optional[bytes]:
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    # ------------------------------------------------------------------
+    # Worker pool
+    # ------------------------------------------------------------------
+
+    def ensure_workers(self):
+        """Start the in-app pool if it is configured and not running."""
+        if self.workers > 0 and not self.is_running():
+            self.prune_spool()
+            self.start_workers()
+
+    def start_workers(self, count: Optional[int] = None, mode: Optional[str] = None):
+        """Start `count` worker threads or processes."""
+        count = self.workers if count is None else count
+        mode = mode or self.mode
+        with self._lock:
+            if any(w.is_alive() for w in self._pool):
+                return
+            prefix = f"apex-job-{os.getpid()}"
+            if mode == "process":
+                ctx = multiprocessing.get_context("spawn")
+                importable = {k: v for k, v in JOB_HANDLERS.items() if isinstance(v, str)}
+                self._stop = ctx.Event()
+                self._pool = [
+                    ctx.Process(target=_process_worker_main, name=f"{prefix}-{i}", daemon=True,
+                                args=(self.store.spec, importable, self._stop, f"{prefix}-{i}",
+                                      self.poll_interval, self.lease_seconds))
+                    for i in range(count)
+                ]
+            else:
+                self._stop = threading.Event()
+                self._pool = [
+                    threading.Thread(target=run_worker, name=f"{prefix}-{i}", daemon=True,
+                                     args=(self.store, self._stop, f"{prefix}-{i}",
+                                           self.poll_interval, self.lease_seconds))
+                    for i in range(count)
+                ]
+            for worker in self._pool:
+                worker.start()
+
+    def stop_workers(self, timeout: float = 5.0):
+        """Signal workers to stop after their current job and wait for them."""
+        with self._lock:
+            pool, stop = self._pool, self._stop
+            self._pool = []
+        if stop is not None:
+            stop.set()
+        for worker in pool:
+            worker.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return any(w.is_alive() for w in self._pool)
+
+    def get_stats(self) -> dict:
+        """Job counts by status plus pool size."""
+        try:
+            stats = self.store.counts()
+        except Exception as e:
+            logger.error(f"Error counting jobs: {e}")
+            stats = {}
+        with self._lock:
+            stats["workers"] = sum(1 for w in self._pool if w.is_alive())
+        stats["mode"] = self.mode
+        return stats
+
+
+# Singleton instance (workers start on first submit)
+job_queue = JobQueue()
+
+
+def _benchmark(job_count: int = 24, job_seconds: float = 0.2):
+    """Throughput of sleep-bound jobs for 1, 2 and 4 workers (SQLite store)."""
+    import tempfile
+
+    flaky_calls = {}
+
+    def sleep_job(payload, progress):
+        time.sleep(payload.get("seconds", 0.1))
+        progress(1.0, "done")
+        return {"slept": payload.get("seconds", 0.1)}
+
+    def flaky_job(payload, progress):
+        calls = flaky_calls[payload["key"]] = flaky_calls.get(payload["key"], 0) + 1
+        if calls <= payload.get("fail_times", 1):
+            raise ConnectionError(f"simulated outage #{calls}")
+        return {"calls": calls}
+
+    # Benchmark-only kinds, registered for this run and removed afterwards
+    register_handler("_sleep", sleep_job)
+    register_handler("_flaky", flaky_job)
+    try:
+        for workers in (1, 2, 4):
+            queue = JobQueue(store=SqliteJobStore(os.path.join(tempfile.mkdtemp(), "jobs.db")),
+                             workers=0, poll_interval=0.02)
+            ids = [queue.submit("_sleep", {"seconds": job_seconds}) for _ in range(job_count)]
+            start = time.perf_counter()
+            queue.start_workers(workers, mode="thread")
+            for job_id in ids:
+                queue.wait(job_id, timeout=60)
+            elapsed = time.perf_counter() - start
+            queue.stop_workers()
+            print(f"{workers} worker(s): {job_count} jobs in {elapsed:.2f}s  ({job_count / elapsed:.1f} jobs/s)  "
+                  f"{queue.get_stats()}")
+
+        # Retries: a job that fails twice then succeeds
+        global RETRY_BACKOFF_SECONDS
+        RETRY_BACKOFF_SECONDS = 0.05
+        queue = JobQueue(store=SqliteJobStore(os.path.join(tempfile.mkdtemp(), "jobs.db")), workers=1,
+                         poll_interval=0.02)
+        job = queue.wait(queue.submit("_flaky", {"fail_times": 2, "key": uuid.uuid4().hex}), timeout=10)
+        queue.stop_workers()
+        print(f"flaky job: {job['status']} after {job['attempts']} attempts (last error: {job['error']})")
+    finally:
+        unregister_handler("_sleep")
+        unregister_handler("_flaky")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run A.P.E.X. background job workers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Worker processes")
+    parser.add_argument("--threads", action="store_true", help="Use threads instead of processes")
+    parser.add_argument("--benchmark", action="store_true", help="Run the throughput benchmark and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        _benchmark()
+        return
+
+    mode = "thread" if args.threads else "process"
+    job_queue.start_workers(args.workers, mode=mode)
+    print(f"{args.workers} {mode} worker(s) polling {job_queue.store.spec[0]} jobs (Ctrl+C to stop)")
+    try:
+        while job_queue.is_running():
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        job_queue.stop_workers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""A.P.E.X. Keyword Index - racing-lexicon tagging and a searchable notes index.
+
+KeywordMatcher compiles a racing lexicon (canonical terms with categories and
+synonyms) into one Aho-Corasick automaton. A note is tagged in a single pass
+over its text, however many terms the lexicon holds. Matches must sit on
+word boundaries, so "land" matches "land" but not "landscape". Variants such
+as "landing" are listed as synonyms.
+
+NotesIndex batch-tags every historical note into an inverted index
+(term -> note ids, track -> note ids). The notes come from track_logs (DB or
+track_logs.csv), x_factor_audits.observation (DB) and driver messages from
+the advisor conversation store. The advisor also logs each question to
+track_logs, so a track_log note that repeats a chat message from the same
+day is indexed once, as the chat note. A query such as "every note
+mentioning wash at Thunder Alley" is then a set intersection.
+
+The lexicon can be configured: set APEX_LEXICON_PATH, or place a JSON file
+at Execution/data/racing_lexicon.json, in the same shape as DEFAULT_LEXICON.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from Execution.database.database import db
+
+logger = logging.getLogger("apex.keyword_index")
+
+LEXICON_PATH = os.environ.get("APEX_LEXICON_PATH", "Execution/data/racing_lexicon.json")
+
+# canonical term -> category + synonyms (matched case-insensitively, whole words)
+DEFAULT_LEXICON = {
+    # Critical handling issues
+    "Bottoming": {"category": "critical", "synonyms": ["bottoming", "bottom out", "bottoms out", "bottomed out", "bottoming out", "scraping", "scrapes"]},
+    "Wash": {"category": "critical", "synonyms": ["wash", "washes", "washing", "washy", "push", "pushes", "pushing", "understeer", "plows", "plowing"]},
+    "Stability": {"category": "critical", "synonyms": ["stability", "unstable", "instability", "nervous", "twitchy", "swapping", "swaps"]},
+    # Performance changes
+    "Loose": {"category": "performance", "synonyms": ["loose", "looser", "oversteer", "sliding", "snaps", "snap", "spins out", "rear steps out"]},
+    "Traction": {"category": "performance", "synonyms": ["traction", "grip", "bite", "forward bite", "hooked up", "hooks up"]},
+    "Rotation": {"category": "performance", "synonyms": ["rotation", "rotate", "rotates", "rotating", "turn in", "turn-in"]},
+    "Consistency": {"category": "performance", "synonyms": ["consistency", "consistent", "inconsistent", "repeatable"]},
+    # Track features
+    "Entry": {"category": "track_features", "synonyms": ["entry", "corner entry", "on entry", "turning in"]},
+    "Exit": {"category": "track_features", "synonyms": ["exit", "corner exit", "on exit", "on power", "on throttle"]},
+    "Jump": {"category": "track_features", "synonyms": ["jump", "jumps", "jumping", "triple", "double", "step up", "step-up", "tabletop", "rhythm section"]},
+    "Land": {"category": "track_features", "synonyms": ["land", "lands", "landing", "landings", "landed", "flat landing", "nose dive", "nose-dive"]},
+}
+
+CATEGORIES = ["critical", "performance", "track_features"]
+
+
+def load_lexicon(path: Optional[str] = None) -> dict:
+    """Lexicon from a JSON file when present, else DEFAULT_LEXICON."""
+    path = path or LEXICON_PATH
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading lexicon {path}: {e}")
+    return DEFAULT_LEXICON
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """Compiled Aho-Corasick matcher over a racing lexicon."""
+
+    def __init__(self, lexicon: Optional[dict] = None):
+        """Compile the automaton.
+
+        Args:
+            lexicon: {canonical: {"category": str, "synonyms": [str]}} (default load_lexicon())
+
+        """
+        self.lexicon = lexicon if lexicon is not None else load_lexicon()
+        self.terms = list(self.lexicon)
+        self._goto = [{}]      # node -> {char: node}
+        self._fail = [0]
+        self._output = [[]]    # node -> [(pattern_length, canonical)]
+        for canonical, entry in self.lexicon.items():
+            for pattern in {canonical.lower(), *(s.lower() for s in entry.get("synonyms", []))}:
+                if pattern.strip():
+                    self._add(pattern, canonical)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, canonical: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((len(pattern), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches that end here via the failure link
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """All whole-word matches as (start, end, canonical), in text order."""
+        if not text:
+            return []
+        lowered = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        node = 0
+        length = len(lowered)
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                end = i + 1
+                after_ok = end == length or not _is_word_char(lowered[end])
+                if not after_ok:
+                    continue
+                for pattern_length, canonical in output[node]:
+                    start = end - pattern_length
+                    if start == 0 or not _is_word_char(lowered[start - 1]):
+                        matches.append((start, end, canonical))
+        matches.sort()
+        return matches
+
+    def tag(self, text: str) -> list[str]:
+        """Canonical terms found in text, in lexicon order."""
+        found = {canonical for _start, _end, canonical in self.find(text)}
+        return [term for term in self.terms if term in found]
+
+    def tag_many(self, texts) -> list[list[str]]:
+        """Tag a batch of texts."""
+        return [self.tag(text) for text in texts]
+
+    def categorize(self, text: str) -> dict:
+        """{category: [canonical terms]} for every lexicon category (empty lists included)."""
+        detected = {category: [] for category in CATEGORIES}
+        for term in self.tag(text):
+            detected.setdefault(self.lexicon[term].get("category", "other"), []).append(term)
+        return detected
+
+
+class NotesIndex:
+    """Inverted index of tagged historical notes."""
+
+    def __init__(self, matcher: Optional[KeywordMatcher] = None,
+                 track_logs_csv: str = "Execution/data/track_logs.csv",
+                 sessions_csv: str = "Execution/data/sessions.csv"):
+        self.matcher = matcher or KeywordMatcher()
+        self.use_database = db.is_connected
+        self.track_logs_csv = track_logs_csv
+        self.sessions_csv = sessions_csv
+
+        self.notes = []        # note id -> note dict
+        self._by_term = {}     # canonical term (lower) -> set(note ids)
+        self._by_track = {}    # track (lower) -> set(note ids)
+        self._lock = threading.Lock()
+        self.built = False
+        self.build_stats = {}
+
+    # ------------------------------------------------------------------
+    # Sources
+    # ------------------------------------------------------------------
+
+    def _load_track_logs(self) -> list[dict]:
+        if self.use_database:
+            try:
+                rows = db.execute_query("SELECT timestamp, track, event, note FROM track_logs") or []
+                return [{"source": "track_log", "track": r["track"] or "", "session": r["event"] or "",
+                         "timestamp": str(r["timestamp"]), "text": r["note"] or ""} for r in rows]
+            except Exception as e:
+                logger.error(f"Error loading track_logs: {e}")
+                return []
+
+        if not os.path.exists(self.track_logs_csv):
+            return []
+        notes = []
+        event_tracks = {}
+        with open(self.track_logs_csv, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                text = row.get("Notes") or ""
+                event = row.get("Event") or ""
+                # SESSION_START rows carry "TRACK: <name> (...)" for the event that follows
+                track_match = re.search(r"TRACK:\s*([^(|]+)", text)
+                if text.startswith("SESSION_START") and track_match:
+                    event_tracks[event] = track_match.group(1).strip()
+                    continue
+                notes.append({"source": "track_log", "track": event_tracks.get(event, ""), "session": event,
+                              "timestamp": row.get("Date") or "", "text": text})
+        return notes
+
+    def _load_x_factor(self) -> list[dict]:
+        if not self.use_database:
+            return []
+        try:
+            rows = db.execute_query(
+                """
+                SELECT a.observation, a.created_at, s.track_name, s.session_name
+                FROM x_factor_audits a
+                LEFT JOIN sessions s ON a.session_id = s.id
+                WHERE a.observation IS NOT NULL AND a.observation <> ''
+                """
+            ) or []
+            return [{"source": "x_factor", "track": r["track_name"] or "", "session": r["session_name"] or "",
+                     "timestamp": str(r["created_at"]), "text": r["observation"]} for r in rows]
+        except Exception as e:
+            logger.error(f"Error loading x_factor observations: {e}")
+            return []
+
+    def _session_tracks(self) -> dict:
+        """session id -> track name (for chat notes keyed by conversation)."""
+        if self.use_database:
+            try:
+                rows = db.execute_query("SELECT id, track_name FROM sessions") or []
+                return {str(r["id"]): r["track_name"] or "" for r in rows}
+            except Exception as e:
+                logger.error(f"Error loading session tracks: {e}")
+                return {}
+        if not os.path.exists(self.sessions_csv):
+            return {}
+        with open(self.sessions_csv, newline="", encoding="utf-8") as f:
+            return {row["session_id"]: row.get("track_name", "") for row in csv.DictReader(f)}
+
+    def _load_chat(self) -> list[dict]:
+        from Execution.services.conversation_store import conversation_store
+
+        session_tracks = self._session_tracks()
+        notes = []
+        for message in conversation_store.iter_messages(role="user"):
+            session_id = message["conversation_id"].split("_", 1)[-1]
+            notes.append({"source": "chat", "track": session_tracks.get(session_id, ""), "session": session_id,
+                          "timestamp": message.get("created_at", ""), "text": message["content"]})
+        return notes
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def add(self, note: dict) -> int:
+        """Tag and index one note dict (source, track, session, timestamp, text); returns its id."""
+        terms = self.matcher.tag(note.get("text", ""))
+        with self._lock:
+            note_id = len(self.notes)
+            self.notes.append(dict(note, id=note_id, keywords=terms))
+            for term in terms:
+                self._by_term.setdefault(term.lower(), set()).add(note_id)
+            track = (note.get("track") or "").strip().lower()
+            if track:
+                self._by_track.setdefault(track, set()).add(note_id)
+        return note_id
+
+    @staticmethod
+    def _duplicate_key(note: dict) -> tuple:
+        """(month-day, text) shared by a chat message and the track_log row the
+        advisor writes for it (track_logs dates may omit the year)."""
+        day = re.search(r"(\d{2}-\d{2})[ T]\d{2}:\d{2}", note.get("timestamp") or "")
+        return (day.group(1) if day else "", " ".join((note.get("text") or "").split()).lower())
+
+    def _drop_logged_chat(self, track_logs: list[dict], chat: list[dict]) -> list[dict]:
+        """track_log notes minus one copy per chat message with the same day and text."""
+        pending = Counter(self._duplicate_key(note) for note in chat)
+        kept = []
+        for note in track_logs:
+            key = self._duplicate_key(note)
+            if pending[key] > 0:
+                pending[key] -= 1
+                continue
+            kept.append(note)
+        return kept
+
+    def build(self) -> dict:
+        """(Re)build the index from every source; returns timing stats."""
+        start = time.perf_counter()
+        chat = self._load_chat()
+        notes = self._drop_logged_chat(self._load_track_logs(), chat) + self._load_x_factor() + chat
+        loaded = time.perf_counter()
+
+        with self._lock:
+            self.notes, self._by_term, self._by_track = [], {}, {}
+        for note in notes:
+            self.add(note)
+        tagged = time.perf_counter()
+
+        self.built = True
+        self.build_stats = {
+            "notes": len(notes),
+            "load_seconds": loaded - start,
+            "tag_seconds": tagged - loaded,
+            "notes_per_second": len(notes) / (tagged - loaded) if tagged > loaded else 0.0,
+        }
+        return self.build_stats
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def search(self, term: str, track: Optional[str] = None, source: Optional[str] = None) -> list[dict]:
+        """Notes tagged with a term (canonical or any synonym), optionally at one track / from one source.
+
+        Returns:
+            Note dicts, newest first
+
+        """
+        self.ensure_built()
+        canonical = {c.lower() for c in self.matcher.tag(term)} or {term.strip().lower()}
+        with self._lock:
+            ids = set().union(*(self._by_term.get(c, set()) for c in canonical))
+            if track:
+                ids &= self._by_track.get(track.strip().lower(), set())
+            results = [self.notes[i] for i in ids]
+        if source:
+            results = [n for n in results if n["source"] == source]
+        return sorted(results, key=lambda n: str(n.get("timestamp", "")), reverse=True)
+
+    def term_counts(self, track: Optional[str] = None) -> dict:
+        """{canonical term: note count}, optionally for one track."""
+        self.ensure_built()
+        with self._lock:
+            track_ids = self._by_track.get(track.strip().lower(), set()) if track else None
+            counts = {}
+            for term in self.matcher.terms:
+                ids = self._by_term.get(term.lower(), set())
+                counts[term] = len(ids & track_ids) if track_ids is not None else len(ids)
+        return counts
+
+
+# Singleton instances
+keyword_matcher = KeywordMatcher()
+notes_index = NotesIndex(matcher=keyword_matcher)
+
+
+def _benchmark(n_notes: int = 20000):
+    """Substring loop vs compiled matcher on synthetic notes, plus index query time."""
+    import random
+
+    random.seed(7)
+    fragments = [
+        "car is loose on corner exit", "front end washes on entry", "bottoming out on the triple landing",
+        "good forward bite", "twitchy over the rhythm section", "pushing mid corner", "consistent laps",
+        "landscape crew watered the track", "jumped the double clean", "rear steps out on throttle",
+        "tire wear looks even", "turn-in is lazy", "fuel mileage fine", "clutch engagement smooth",
+    ]
+    notes = [" ".join(random.sample(fragments, 4)) for _ in range(n_notes)]
+    tracks = ["Thunder Alley", "Silver Dollar", "OCRC", "Mike's Hobby"]
+
+    # Legacy: substring check per word per note (11 words)
+    legacy_words = {c: [t for t, e in DEFAULT_LEXICON.items() if e["category"] == c] for c in CATEGORIES}
+    start = time.perf_counter()
+    for note in notes:
+        lowered = note.lower()
+        for words in legacy_words.values():
+            [w for w in words if w.lower() in lowered]
+    legacy = time.perf_counter() - start
+
+    # Naive whole-lexicon regex scan (all synonyms, word boundaries) for comparison
+    patterns = [(term, re.compile(r"\b" + re.escape(s.lower()) + r"\b"))
+                for term, e in DEFAULT_LEXICON.items() for s in [term] + e["synonyms"]]
+    start = time.perf_counter()
+    for note in notes:
+        lowered = note.lower()
+        {term for term, p in patterns if p.search(lowered)}
+    regex = time.perf_counter() - start
+
+    matcher = KeywordMatcher(DEFAULT_LEXICON)
+    start = time.perf_counter()
+    matcher.tag_many(notes)
+    compiled = time.perf_counter() - start
+
+    index = NotesIndex(matcher=matcher)
+    for i, note in enumerate(notes):
+        index.add({"source": "chat", "track": tracks[i % len(tracks)], "session": "", "timestamp": str(i), "text": note})
+    index.built = True
+    start = time.perf_counter()
+    hits = index.search("wash", track="Thunder Alley")
+    query = time.perf_counter() - start
+
+    print(f"{n_notes} notes, {len(patterns)} patterns")
+    print(f"legacy substring (11 words, no synonyms): {n_notes / legacy:10,.0f} notes/s")
+    print(f"per-pattern regex (all synonyms)        : {n_notes / regex:10,.0f} notes/s")
+    print(f"compiled automaton (all synonyms)       : {n_notes / compiled:10,.0f} notes/s")
+    print(f"query 'wash' @ Thunder Alley: {len(hits)} notes in {query * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    _benchmark()
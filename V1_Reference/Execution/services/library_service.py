@@ -2,6 +2,10 @@
 Manages track-specific baseline setups from pro drivers and community.
 Uses JSONB for flexible setup storage.
 Supports both PostgreSQL (production) and CSV (fallback/local).
+
+Adds are deduplicated: a setup whose fingerprint (setup_model) is already in
+the library for the same track, vehicle and condition is not stored again;
+the existing baseline's ID is returned instead.
 """
 
 import json
@@ -11,7 +15,18 @@ from datetime import datetime
 import pandas as pd
 
 from Execution.database.database import db
-from Execution.services.config_service import SETUP_KEYS, csv_row_to_jsonb, jsonb_to_csv_row
+from Execution.services.config_service import SETUP_KEYS, setups_to_frame
+from Execution.services.setup_model import Setup
+
+_SETUP_KEYS_UPPER = {key.upper(): key for key in SETUP_KEYS}
+
+
+def _as_setup(setup_data):
+    """Setup from library input: a JSONB setup, or a flat dict with SETUP_KEYS in any case."""
+    if 'diffs' in setup_data:
+        return Setup.from_jsonb(setup_data)
+    return Setup.from_flat({_SETUP_KEYS_UPPER[k.upper()]: v for k, v in setup_data.items()
+                            if k.upper() in _SETUP_KEYS_UPPER})
 
 
 class LibraryService:
@@ -24,6 +39,7 @@ class LibraryService:
         self.data_dir = os.path.join(self.base_dir, "data")
         self.library_path = os.path.join(self.data_dir, "master_library.csv")
         self.use_database = db.is_connected
+        self.stats = {"inserted": 0, "duplicates": 0}
 
         # Ensure data directory exists for CSV fallback
         os.makedirs(self.data_dir, exist_ok=True)
@@ -56,7 +72,7 @@ class LibraryService:
             submitted_by: Profile ID of submitter (optional)
 
         Returns:
-            ID of the newly created baseline
+            ID of the new baseline, or of the existing one holding the same setup
 
         """
         if self.use_database:
@@ -72,18 +88,22 @@ class LibraryService:
         """Add baseline to PostgreSQL database."""
         try:
             # Convert to JSONB if flat format
-            if 'diffs' not in setup_data:
-                setup_json = csv_row_to_jsonb(setup_data)
-            else:
-                setup_json = setup_data
+            setup = _as_setup(setup_data)
+            setup_json = setup_data if 'diffs' in setup_data else setup.to_jsonb()
+
+            key = (track, brand, vehicle, condition, setup.fingerprint())
+            existing = self._existing_baselines_db([key])
+            if key in existing:
+                self.stats["duplicates"] += 1
+                return existing[key]
 
             query = """
                 INSERT INTO master_library (
                     track_name, brand, vehicle_model, surface_condition,
-                    setup, source, driver_name, event_name, submitted_by
+                    setup, setup_fingerprint, source, driver_name, event_name, submitted_by
                 ) VALUES (
                     %(track)s, %(brand)s, %(vehicle)s, %(condition)s,
-                    %(setup)s, %(source)s, %(driver_name)s, %(event_name)s,
+                    %(setup)s, %(fingerprint)s, %(source)s, %(driver_name)s, %(event_name)s,
                     %(submitted_by)s
                 )
                 RETURNING id
@@ -95,6 +115,7 @@ class LibraryService:
                 'vehicle': vehicle,
                 'condition': condition,
                 'setup': json.dumps(setup_json),
+                'fingerprint': key[4],
                 'source': source,
                 'driver_name': driver_name,
                 'event_name': event_name,
@@ -102,6 +123,7 @@ class LibraryService:
             }
 
             result = db.execute_query(query, params, fetch=True)
+            self.stats["inserted"] += 1
             return result[0]['id']
 
         except Exception as e:
@@ -112,19 +134,29 @@ class LibraryService:
     def _add_baseline_csv(self, track, brand, vehicle, condition, setup_data, source, driver_name=None):
         """Add baseline to CSV file (fallback mode)."""
         library = pd.read_csv(self.library_path)
+        key = (track, brand, vehicle, condition, _as_setup(setup_data).fingerprint())
+        existing = self._existing_baselines_csv(library, [key])
+        if key in existing:
+            self.stats["duplicates"] += 1
+            return existing[key]
 
         # Generate unique ID
         new_id = len(library) + 1
+        new_entry = self._csv_entry(new_id, track, brand, vehicle, condition,
+                                    setup_data, source, driver_name)
+
+        library = pd.concat([library, pd.DataFrame([new_entry])], ignore_index=True)
+        library.to_csv(self.library_path, index=False)
+        self.stats["inserted"] += 1
+
+        return new_id
 
+    def _csv_entry(self, new_id, track, brand, vehicle, condition, setup_data, source, driver_name=None):
+        """Build one flat CSV library row."""
         # Ensure flat format for CSV
-        if 'diffs' in setup_data:
-            flat_setup = jsonb_to_csv_row(setup_data, "")
-            del flat_setup['Car']
-        else:
-            flat_setup = {k.upper(): v for k, v in setup_data.items()
-                          if k.upper() in SETUP_KEYS}
+        flat_setup = _as_setup(setup_data).to_flat()
 
-        new_entry = {
+        return {
             "ID": new_id,
             "Track": track,
             "Brand": brand,
@@ -136,10 +168,112 @@ class LibraryService:
             **flat_setup
         }
 
-        library = pd.concat([library, pd.DataFrame([new_entry])], ignore_index=True)
-        library.to_csv(self.library_path, index=False)
+    def add_baselines_bulk(self, entries):
+        """Add many baselines in one write (single multi-row INSERT or one CSV rewrite).
 
-        return new_id
+        Entries whose setup is already in the library (same track, brand,
+        vehicle, condition and setup fingerprint), or repeated within the
+        batch, are not inserted again.
+
+        Args:
+            entries: List of dicts with track, brand, vehicle, condition, setup_data
+                     and optional source, driver_name, event_name, submitted_by
+
+        Returns:
+            List of baseline IDs (same order as entries; existing IDs for duplicates)
+
+        """
+        if not entries:
+            return []
+
+        setups = [_as_setup(e['setup_data']) for e in entries]
+        keys = [(e['track'], e['brand'], e['vehicle'], e['condition'], setup.fingerprint())
+                for e, setup in zip(entries, setups)]
+
+        if self.use_database:
+            try:
+                ids = self._existing_baselines_db(keys)
+                new = {}  # key -> (entry, setup), first occurrence in the batch
+                for key, e, setup in zip(keys, entries, setups):
+                    if key not in ids:
+                        new.setdefault(key, (e, setup))
+
+                rows = []
+                for key, (e, setup) in new.items():
+                    setup_data = e['setup_data']
+                    setup_json = setup_data if 'diffs' in setup_data else setup.to_jsonb()
+                    rows.append((
+                        e['track'], e['brand'], e['vehicle'], e['condition'],
+                        json.dumps(setup_json), key[4], e.get('source', "User Upload"),
+                        e.get('driver_name'), e.get('event_name'), e.get('submitted_by')
+                    ))
+
+                query = """
+                    INSERT INTO master_library (
+                        track_name, brand, vehicle_model, surface_condition,
+                        setup, setup_fingerprint, source, driver_name, event_name, submitted_by
+                    ) VALUES %s
+                    RETURNING id
+                """
+                results = db.execute_values(query, rows, fetch=True)
+                ids.update(zip(new, (r['id'] for r in results)))
+                self.stats["inserted"] += len(new)
+                self.stats["duplicates"] += len(entries) - len(new)
+                return [ids[key] for key in keys]
+
+            except Exception as e:
+                print(f"Error bulk adding baselines to database: {e}")
+
+        library = pd.read_csv(self.library_path)
+        ids = self._existing_baselines_csv(library, keys)
+        new_entries = []
+        for key, e in zip(keys, entries):
+            if key in ids:
+                continue
+            ids[key] = len(library) + len(new_entries) + 1
+            new_entries.append(self._csv_entry(ids[key], e['track'], e['brand'], e['vehicle'], e['condition'],
+                                               e['setup_data'], e.get('source', "User Upload"), e.get('driver_name')))
+        if new_entries:
+            library = pd.concat([library, pd.DataFrame(new_entries)], ignore_index=True)
+            library.to_csv(self.library_path, index=False)
+        self.stats["inserted"] += len(new_entries)
+        self.stats["duplicates"] += len(entries) - len(new_entries)
+
+        return [ids[key] for key in keys]
+
+    def _existing_baselines_db(self, keys):
+        """IDs of stored baselines matching (track, brand, vehicle, condition, fingerprint) keys."""
+        rows = db.execute_query(
+            """
+            SELECT id, track_name, brand, vehicle_model, surface_condition, setup_fingerprint
+            FROM master_library
+            WHERE setup_fingerprint = ANY(%s)
+            ORDER BY id
+            """,
+            (list({key[4] for key in keys}),)
+        )
+        wanted = set(keys)
+        found = {}
+        for r in rows:
+            key = (r['track_name'], r['brand'], r['vehicle_model'], r['surface_condition'], r['setup_fingerprint'])
+            if key in wanted:
+                found.setdefault(key, r['id'])
+        return found
+
+    @staticmethod
+    def _existing_baselines_csv(library, keys):
+        """IDs of CSV baselines matching (track, brand, vehicle, condition, fingerprint) keys."""
+        wanted = set(keys)
+        metadata = {key[:4] for key in keys}
+        found = {}
+        for row in library.to_dict('records'):
+            meta = (row.get('Track'), row.get('Brand'), row.get('Vehicle'), row.get('Condition'))
+            if meta not in metadata:
+                continue
+            key = meta + (Setup.from_flat(row).fingerprint(),)
+            if key in wanted:
+                found.setdefault(key, int(row['ID']))
+        return found
 
     def search_baselines(self, search_term=None, track=None, brand=None, vehicle=None, condition=None):
         """Search for matching baselines.
@@ -201,24 +335,18 @@ class LibraryService:
             results = db.execute_query(query, params)
 
             if results:
-                # Convert JSONB to flat DataFrame
-                rows = []
-                for r in results:
-                    setup = r.get('setup') or {}
-                    flat = jsonb_to_csv_row(setup, "")
-                    del flat['Car']
-                    row = {
-                        'ID': r['id'],
-                        'Track': r['track_name'],
-                        'Brand': r['brand'],
-                        'Vehicle': r['vehicle_model'],
-                        'Condition': r['surface_condition'],
-                        'Date': r['date_created'],
-                        'Source': r['source'],
-                        **flat
-                    }
-                    rows.append(row)
-                return pd.DataFrame(rows)
+                # Convert JSONB to a flat typed DataFrame, column by column
+                meta = pd.DataFrame({
+                    'ID': [r['id'] for r in results],
+                    'Track': [r['track_name'] for r in results],
+                    'Brand': [r['brand'] for r in results],
+                    'Vehicle': [r['vehicle_model'] for r in results],
+                    'Condition': [r['surface_condition'] for r in results],
+                    'Date': [r['date_created'] for r in results],
+                    'Source': [r['source'] for r in results],
+                })
+                flat = setups_to_frame([r.get('setup') for r in results])
+                return pd.concat([meta, flat], axis=1)
             else:
                 return pd.DataFrame()
 
@@ -275,9 +403,7 @@ class LibraryService:
 
             if results:
                 r = results[0]
-                setup = r.get('setup') or {}
-                flat = jsonb_to_csv_row(setup, "")
-                del flat['Car']
+                flat = Setup.from_jsonb(r.get('setup')).to_flat()
                 return {
                     'ID': r['id'],
                     'Track': r['track_name'],
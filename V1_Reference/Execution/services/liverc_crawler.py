@@ -0,0 +1,457 @@
+"""A.P.E.X. Execution Layer - LiveRC Event Crawler
+Backfills a whole LiveRC event (its entry list and every race result page)
+into liverc_entries, race_results and run_logs in one resumable pass.
+
+Usage:
+    python -m Execution.services.liverc_crawler https://track.liverc.com/results/ 490470 \\
+        --racer "Driver Name" --session-id <uuid>
+
+Progress is checkpointed to Execution/data/liverc_crawls/<event_id>_<session>_<racer>.json
+after the entry list and every race page is written, so an interrupted crawl
+picks up where it stopped. Writing a page replaces anything an interrupted run already wrote
+for it, so a page persisted just before a crash is not duplicated on resume.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Optional
+
+import requests
+from bs4 import BeautifulSoup
+from psycopg2.extras import execute_values as pg_execute_values
+
+from Execution.database.database import db
+from Execution.services.liverc_harvester import HEADERS, parse_entry_list, parse_racer_laps, parse_results_table
+from Execution.services.run_logs_service import get_run_logs_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("apex.liverc_crawler")
+
+STATE_DIR = "Execution/data/liverc_crawls"
+RESULTS_CSV = "Execution/data/race_results.csv"
+RESULTS_COLUMNS = [
+    'session_id', 'heat_name', 'position', 'laps_completed',
+    'total_time', 'best_lap', 'consistency', 'liverc_url', 'created_at'
+]
+ENTRIES_CSV = "Execution/data/liverc_entries.csv"
+ENTRIES_COLUMNS = ['event_id', 'session_id', 'class_name', 'driver_name', 'entry_url', 'created_at']
+HEAT_NAME_MAX = 100  # race_results.heat_name / run_logs.heat_name are VARCHAR(100)
+
+
+def _to_float(value: str) -> Optional[float]:
+    """Parse a LiveRC numeric cell ('58.245', '91.2%'), None if blank."""
+    match = re.search(r'\d+(?:\.\d+)?', value or "")
+    return float(match.group()) if match else None
+
+
+def _parse_laps_time(value: str) -> tuple[Optional[int], Optional[float]]:
+    """Split a LiveRC 'Laps/Time' cell (e.g. '12/5:03.456') into laps and seconds."""
+    match = re.match(r'\s*(\d+)\s*/\s*(?:(\d+):)?(\d+(?:\.\d+)?)', value or "")
+    if not match:
+        return None, None
+    laps, minutes, seconds = match.groups()
+    return int(laps), int(minutes or 0) * 60 + float(seconds)
+
+
+def _heat_label(heat_name: str, driver: str) -> str:
+    """'<heat> - <driver>' fitted to HEAT_NAME_MAX, shortening the heat name first."""
+    suffix = f" - {driver}"
+    return (heat_name[:max(0, HEAT_NAME_MAX - len(suffix))] + suffix)[:HEAT_NAME_MAX]
+
+
+def _slug(value: Optional[str]) -> str:
+    """Filename-safe form of a checkpoint key part ('all' when unset)."""
+    return re.sub(r'[^a-z0-9]+', '-', (value or "").lower()).strip('-') or "all"
+
+
+class LiveRCEventCrawler:
+    """Crawls every race result page of a LiveRC event with bounded concurrency."""
+
+    def __init__(
+        self,
+        base_url: str,
+        event_id: str,
+        session_id: Optional[str] = None,
+        racer_name: Optional[str] = None,
+        state_path: Optional[str] = None,
+        max_concurrency: int = 4,
+    ):
+        """Initialize the crawler.
+
+        Args:
+            base_url: Any LiveRC URL on the track site (trimmed to .../results/)
+            event_id: LiveRC event ID
+            session_id: Optional session UUID to attach results/laps to
+            racer_name: Optional racer whose laps are written to run_logs
+            state_path: Checkpoint file (default
+                Execution/data/liverc_crawls/<event_id>_<session>_<racer>.json)
+            max_concurrency: Maximum simultaneous page fetches
+
+        """
+        self.base_url = base_url.split("/results/")[0] + "/results/"
+        self.event_id = str(event_id)
+        self.session_id = session_id
+        self.racer_name = racer_name
+        self.state_path = state_path or os.path.join(
+            STATE_DIR, f"{self.event_id}_{_slug(session_id)}_{_slug(racer_name)}.json"
+        )
+        self.max_concurrency = max(1, max_concurrency)
+        self.use_database = db.is_connected
+
+        self.http = requests.Session()
+        self.http.headers.update(HEADERS)
+        # Allow one pooled connection per worker
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_concurrency)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        self._write_lock = threading.Lock()
+        self._csv_keys = None  # Rows already in the CSV fallback files (loaded on first write)
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> dict[str, Any]:
+        """Load the checkpoint for this event, or start a fresh one."""
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path) as f:
+                    state = json.load(f)
+                if (state.get("session_id"), state.get("racer_name")) != (self.session_id, self.racer_name):
+                    raise ValueError("checkpoint is for a different session/racer")
+                logger.info(f"Resuming event {self.event_id}: {len(state.get('completed', []))} races already done")
+                return state
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.state_path}: {e}")
+
+        return {
+            "event_id": self.event_id,
+            "session_id": self.session_id,
+            "racer_name": self.racer_name,
+            "base_url": self.base_url,
+            "races": [],
+            "entries_done": False,
+            "completed": [],
+            "failed": {},
+            "stats": {"entries_written": 0, "results_written": 0, "laps_written": 0},
+        }
+
+    def _save_state(self):
+        """Write the checkpoint atomically so a crash never leaves a torn file."""
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        self.state["updated_at"] = datetime.now().isoformat()
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Enumeration
+    # ------------------------------------------------------------------
+
+    def _get(self, url: str) -> Optional[str]:
+        """Fetch a page through the shared session, None on HTTP error."""
+        response = self.http.get(url, timeout=15)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch {url}: Status {response.status_code}")
+            return None
+        return response.text
+
+    def enumerate_races(self) -> list[dict[str, str]]:
+        """List every race result page linked from ?p=view_event&id=EVENT_ID.
+
+        Returns:
+            List of dicts with race_id, heat_name, url
+
+        """
+        html = self._get(f"{self.base_url}?p=view_event&id={self.event_id}")
+        if not html:
+            return []
+
+        soup = BeautifulSoup(html, 'html.parser')
+        races = []
+        seen = set()
+        for link in soup.find_all('a', href=re.compile(r'p=view_race_result')):
+            match = re.search(r'id=(\d+)', link['href'])
+            if not match or match.group(1) in seen:
+                continue
+            seen.add(match.group(1))
+            races.append({
+                "race_id": match.group(1),
+                "heat_name": link.text.strip() or f"Race {match.group(1)}",
+                "url": f"{self.base_url}?p=view_race_result&id={match.group(1)}",
+            })
+
+        logger.info(f"Found {len(races)} race result pages for event {self.event_id}")
+        return races
+
+    # ------------------------------------------------------------------
+    # Fetch / parse / write
+    # ------------------------------------------------------------------
+
+    def crawl_entries(self) -> int:
+        """Fetch the event's entry list and replace any earlier write of it.
+
+        Returns:
+            Number of entries written
+
+        """
+        url = f"{self.base_url}?p=view_entry_list&id={self.event_id}"
+        html = self._get(url)
+        if html is None:
+            raise RuntimeError("entry list fetch failed")
+
+        rows = [
+            (self.event_id, self.session_id, entry["Class"][:255], entry["Driver"][:255], url)
+            for entry in parse_entry_list(html)
+        ]
+
+        if self.use_database:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM liverc_entries WHERE event_id = %s AND session_id IS NOT DISTINCT FROM %s",
+                    (self.event_id, self.session_id)
+                )
+                if rows:
+                    pg_execute_values(
+                        cursor,
+                        "INSERT INTO liverc_entries (event_id, session_id, class_name, driver_name, entry_url) VALUES %s",
+                        rows
+                    )
+            return len(rows)
+
+        existing = set()
+        if os.path.exists(ENTRIES_CSV):
+            with open(ENTRIES_CSV, newline='') as f:
+                existing = {(r['event_id'], r['session_id'], r['class_name'], r['driver_name'])
+                            for r in csv.DictReader(f)}
+        new_rows = [row for row in rows if (row[0], row[1] or "", row[2], row[3]) not in existing]
+        if new_rows:
+            new_file = not os.path.exists(ENTRIES_CSV)
+            os.makedirs(os.path.dirname(ENTRIES_CSV), exist_ok=True)
+            created_at = datetime.now().isoformat()
+            with open(ENTRIES_CSV, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(ENTRIES_COLUMNS)
+                writer.writerows([(*row, created_at) for row in new_rows])
+        return len(new_rows)
+
+    def _crawl_race(self, race: dict[str, str]) -> tuple[list[tuple], list[tuple]]:
+        """Fetch and parse one race page into race_results and run_logs rows."""
+        html = self._get(race["url"])
+        if html is None:
+            raise RuntimeError("page fetch failed")
+
+        drivers = parse_results_table(html) or []
+        heat_name = race["heat_name"][:HEAT_NAME_MAX]
+
+        result_rows = []
+        for driver in drivers:
+            laps_completed, total_time = _parse_laps_time(driver.get("Laps/Time", ""))
+            result_rows.append((
+                self.session_id,
+                _heat_label(heat_name, driver['Driver']),
+                int(driver["Pos"]) if driver.get("Pos", "").isdigit() else None,
+                laps_completed,
+                total_time,
+                _to_float(driver.get("Fastest", "")),
+                _to_float(driver.get("Consistency", "")),
+                race["url"],
+            ))
+
+        lap_rows = []
+        if self.session_id and self.racer_name:
+            for name, laps in parse_racer_laps(html).items():
+                if self.racer_name.lower() in name.lower():
+                    lap_rows = [
+                        (self.session_id, heat_name, lap_number, lap_time, 3)
+                        for lap_number, lap_time in enumerate(laps, start=1)
+                        if lap_time and lap_time > 0
+                    ]
+                    break
+
+        return result_rows, lap_rows
+
+    def _write_race(self, race: dict[str, str], result_rows: list[tuple], lap_rows: list[tuple]) -> int:
+        """Persist one race page's results and laps, replacing any earlier write of it.
+
+        In the database both tables are written in one transaction that first
+        deletes what a previous (interrupted) run wrote for this page. The CSV
+        fallback skips rows that are already in the files.
+
+        Returns:
+            Number of laps written
+
+        """
+        if self.use_database:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM race_results WHERE liverc_url = %s AND session_id IS NOT DISTINCT FROM %s",
+                    (race["url"], self.session_id)
+                )
+                if result_rows:
+                    pg_execute_values(
+                        cursor,
+                        """
+                        INSERT INTO race_results
+                        (session_id, heat_name, position, laps_completed,
+                         total_time, best_lap, consistency, liverc_url)
+                        VALUES %s
+                        """,
+                        result_rows
+                    )
+                if lap_rows:
+                    cursor.execute(
+                        "DELETE FROM run_logs WHERE session_id = %s AND heat_name = %s AND lap_number = ANY(%s)",
+                        (self.session_id, lap_rows[0][1], [row[2] for row in lap_rows])
+                    )
+                    pg_execute_values(
+                        cursor,
+                        """
+                        INSERT INTO run_logs
+                        (session_id, heat_name, lap_number, lap_time, confidence_rating)
+                        VALUES %s
+                        """,
+                        lap_rows
+                    )
+            return len(lap_rows)
+
+        if self._csv_keys is None:
+            self._csv_keys = self._load_csv_keys()
+        result_keys, lap_keys = self._csv_keys
+
+        new_results = [row for row in result_rows if (row[0] or "", row[1], row[7]) not in result_keys]
+        if new_results:
+            new_file = not os.path.exists(RESULTS_CSV)
+            os.makedirs(os.path.dirname(RESULTS_CSV), exist_ok=True)
+            created_at = datetime.now().isoformat()
+            with open(RESULTS_CSV, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(RESULTS_COLUMNS)
+                writer.writerows([(*row, created_at) for row in new_results])
+            result_keys.update((row[0] or "", row[1], row[7]) for row in new_results)
+
+        new_laps = [row for row in lap_rows if (row[0], row[1], str(row[2])) not in lap_keys]
+        laps_written = get_run_logs_service().add_laps_bulk(new_laps) if new_laps else 0
+        lap_keys.update((row[0], row[1], str(row[2])) for row in new_laps)
+        return laps_written
+
+    @staticmethod
+    def _load_csv_keys() -> tuple[set, set]:
+        """Keys of race_results (session, heat, url) and run_logs (session, heat, lap) CSV rows."""
+        result_keys, lap_keys = set(), set()
+        if os.path.exists(RESULTS_CSV):
+            with open(RESULTS_CSV, newline='') as f:
+                result_keys = {(row['session_id'], row['heat_name'], row['liverc_url']) for row in csv.DictReader(f)}
+        laps_csv = get_run_logs_service().csv_file
+        if os.path.exists(laps_csv):
+            with open(laps_csv, newline='') as f:
+                lap_keys = {(row['session_id'], row['heat_name'], row['lap_number']) for row in csv.DictReader(f)}
+        return result_keys, lap_keys
+
+    def crawl(self, retry_failed: bool = True) -> dict[str, Any]:
+        """Run (or resume) the crawl for this event.
+
+        Args:
+            retry_failed: Re-attempt races that failed on a previous run
+
+        Returns:
+            The checkpoint state (completed race IDs, failures, stats, timing)
+
+        """
+        start = time.perf_counter()
+
+        if not self.state["races"]:
+            self.state["races"] = self.enumerate_races()
+            self._save_state()
+
+        if not self.state.get("entries_done"):
+            try:
+                entries_written = self.crawl_entries()
+                self.state["entries_done"] = True
+                self.state["failed"].pop("entry_list", None)
+                self.state["stats"]["entries_written"] = self.state["stats"].get("entries_written", 0) + entries_written
+            except Exception as e:
+                logger.error(f"Error crawling entry list for event {self.event_id}: {e}")
+                self.state["failed"]["entry_list"] = str(e)
+            self._save_state()
+
+        completed = set(self.state["completed"])
+        pending = [
+            race for race in self.state["races"]
+            if race["race_id"] not in completed
+            and (retry_failed or race["race_id"] not in self.state["failed"])
+        ]
+        logger.info(f"Crawling {len(pending)} races ({len(completed)} already complete)")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {executor.submit(self._crawl_race, race): race for race in pending}
+            for future in as_completed(futures):
+                race = futures[future]
+                try:
+                    result_rows, lap_rows = future.result()
+                    # Writes and checkpoint updates are serialized; a race is only
+                    # marked complete once its rows are persisted (re-writing a
+                    # race after a crash replaces rather than duplicates them).
+                    with self._write_lock:
+                        laps_written = self._write_race(race, result_rows, lap_rows)
+                        self.state["completed"].append(race["race_id"])
+                        self.state["failed"].pop(race["race_id"], None)
+                        self.state["stats"]["results_written"] += len(result_rows)
+                        self.state["stats"]["laps_written"] += laps_written
+                        self._save_state()
+                except Exception as e:
+                    logger.error(f"Error crawling race {race['race_id']}: {e}")
+                    with self._write_lock:
+                        self.state["failed"][race["race_id"]] = str(e)
+                        self._save_state()
+
+        self.state["stats"]["last_run_seconds"] = round(time.perf_counter() - start, 2)
+        self._save_state()
+        logger.info(
+            f"Event {self.event_id}: {self.state['stats'].get('entries_written', 0)} entries, "
+            f"{len(self.state['completed'])}/{len(self.state['races'])} races, "
+            f"{self.state['stats']['results_written']} results, {self.state['stats']['laps_written']} laps, "
+            f"{len(self.state['failed'])} failed"
+        )
+        return self.state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill a LiveRC event into liverc_entries/race_results/run_logs")
+    parser.add_argument("base_url", help="LiveRC track URL, e.g. https://track.liverc.com/results/")
+    parser.add_argument("event_id", help="LiveRC event ID")
+    parser.add_argument("--racer", help="Racer name whose laps go to run_logs")
+    parser.add_argument("--session-id", help="Session UUID to attach results/laps to")
+    parser.add_argument("--state", help="Checkpoint file path")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max simultaneous page fetches")
+    args = parser.parse_args()
+
+    crawler = LiveRCEventCrawler(
+        args.base_url,
+        args.event_id,
+        session_id=args.session_id,
+        racer_name=args.racer,
+        state_path=args.state,
+        max_concurrency=args.concurrency,
+    )
+    state = crawler.crawl()
+    print(json.dumps(state["stats"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
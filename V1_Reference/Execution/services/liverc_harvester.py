@@ -14,6 +14,196 @@ from bs4 import BeautifulSoup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("apex.liverc_harvester")
 
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+
+
+def parse_results_table(html: str) -> Optional[list[dict[str, Any]]]:
+    """Parse a LiveRC race result page into driver rows.
+
+    Shared by LiveRCHarvester and the event crawler so a page fetched once
+    can be parsed without another request.
+
+    Returns:
+        List of dicts (Pos, Driver, Laps/Time, Fastest, Avg, Consistency),
+        or None if the page has no results table
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Find the main results table
+    # LiveRC tables usually have class 'results_table' or similar
+    table = soup.find('table', {'class': 'race_results'}) or soup.find('table')
+    if not table:
+        return None
+
+    driver_data = []
+
+    # Identify the driver name column index and other metrics
+    # LiveRC usually has 'Driver' in the second or third column
+    for row in table.find_all('tr'):
+        cols = row.find_all(['td', 'th'])
+        if not cols: continue
+
+        # Filter out header rows or spacer rows
+        text_content = [c.text.strip() for c in cols]
+        if "Driver" in text_content:
+            continue # Skip header
+
+        if len(cols) < 5: continue
+
+        # Driver name is usually inside an <a> tag near the 'View Laps' or in the same cell
+        # Based on the previous run, the first <a> might be 'View Laps'
+        driver_name = ""
+        all_links = row.find_all('a')
+        for link in all_links:
+            link_text = link.text.strip()
+            if link_text and "View Laps" not in link_text and "Driver Profile" not in link_text:
+                driver_name = link_text
+                break
+
+        if not driver_name:
+            driver_name = cols[1].text.replace("View Laps", "").strip()
+
+        # Cleanup Driver Name (Remove starting numbers like '1\n' or trailing IDs)
+        driver_name = re.sub(r'^\d+\s*|^\d+\n', '', driver_name).strip()
+        driver_name = re.sub(r'\s+\d+$', '', driver_name).strip()
+
+        # Consistency often has its own class or specific text pattern
+        consistency = ""
+        for c in cols:
+            if "%" in c.text:
+                consistency = c.text.strip()
+
+        processed = {
+            "Pos": cols[0].text.strip(),
+            "Driver": driver_name,
+            "Laps/Time": cols[2].text.strip() if len(cols) > 2 else "",
+            "Fastest": cols[3].text.strip() if len(cols) > 3 else "",
+            "Avg": cols[4].text.strip() if len(cols) > 4 else "",
+            "Consistency": consistency
+        }
+
+        if processed["Driver"] and processed["Driver"] != "Driver":
+            driver_data.append(processed)
+
+    return driver_data
+
+
+def parse_racer_laps(html: str) -> dict[str, list[float]]:
+    """Extract per-driver lap times from the racerLaps JavaScript on a result page.
+
+    Pattern: racerLaps[DRIVER_ID] = { driverName: '...', laps: [{... 'time' : '58.245' ...}] }
+
+    Returns:
+        Dict of driver name -> list of lap times in seconds (empty if no lap data)
+
+    """
+    laps_by_driver = {}
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for script in soup.find_all('script'):
+        if not script.string or 'racerLaps' not in script.string:
+            continue
+
+        # Each racerLaps[...] assignment is one driver block
+        for block in script.string.split('racerLaps[')[1:]:
+            name_match = re.search(r"driverName\s*:\s*'([^']*)'", block)
+            if not name_match:
+                continue
+            times = [float(t) for t in re.findall(r"'time'\s*:\s*'(\d+\.\d+)'", block)]
+            if times:
+                laps_by_driver[name_match.group(1).strip()] = times
+
+    return laps_by_driver
+
+
+def find_heat_sheet_links(html: str, base_url: str, classes: Optional[list[str]] = None) -> list[str]:
+    """List heat sheet URLs on a LiveRC results index, optionally filtered by class.
+
+    Args:
+        html: Results index page HTML
+        base_url: Track results URL (trimmed to .../results/)
+        classes: Class names to keep (matched against the link's parent text)
+
+    Returns:
+        Absolute heat sheet URLs in page order (deduplicated)
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    root = base_url.split("/results/")[0] + "/results/"
+    urls = []
+
+    # Find links to heat sheets e.g. ?p=view_heat_sheet&id=9910741
+    for link in soup.find_all('a', href=re.compile(r'p=view_heat_sheet')):
+        # Check if this heat sheet matches any of our classes if provided
+        sheet_text = link.parent.text.lower()
+        if classes and not any(c.lower() in sheet_text for c in classes):
+            continue
+        url = root + link['href']
+        if url not in urls:
+            urls.append(url)
+
+    return urls
+
+
+def parse_heat_sheet(html: str, racer_name: str) -> list[dict[str, str]]:
+    """Find the races on a heat sheet that include the racer.
+
+    Returns:
+        List of dicts with Race and Status (URL is added by the caller)
+
+    """
+    if racer_name.lower() not in html.lower():
+        return []
+
+    soup = BeautifulSoup(html, 'html.parser')
+    races = []
+    for race in soup.find_all('div', class_='race_info'):
+        # Check if racer is in this specific race block
+        if racer_name.lower() in race.parent.text.lower():
+            status = race.find('span', class_='race_status')
+            race_num = race.find('span', class_='race_number')
+            races.append({
+                "Race": race_num.text.strip() if race_num else "N/A",
+                "Status": status.text.strip() if status else "Unknown",
+            })
+    return races
+
+
+def parse_entry_list(html: str) -> list[dict[str, str]]:
+    """Parse a ?p=view_entry_list page into one row per entered driver.
+
+    Entry lists are split into class sections (class_results_header), each
+    followed by a table of entries.
+
+    Returns:
+        List of dicts with Class and Driver
+
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    entries = []
+    for section in soup.find_all('div', class_='class_results_header'):
+        class_name = section.text.strip()
+        table = section.find_next('table')
+        if not table:
+            continue
+
+        headers = [th.text.strip().lower() for th in table.find_all('th')]
+        driver_col = next((i for i, h in enumerate(headers) if 'driver' in h or 'name' in h), None)
+        for row in table.find_all('tr'):
+            cells = [td.text.strip() for td in row.find_all('td')]
+            if not cells:
+                continue  # Header row
+            if driver_col is not None and driver_col < len(cells):
+                driver = cells[driver_col]
+            else:
+                # No usable header: the first cell that is not just a number (#, transponder)
+                driver = next((c for c in cells if c and not c.replace('.', '').isdigit()), "")
+            if driver:
+                entries.append({"Class": class_name, "Driver": driver})
+    return entries
+
+
 class LiveRCHarvester:
     """Handles scraping of LiveRC result pages."""
 
@@ -25,74 +215,17 @@ class LiveRCHarvester:
     def fetch_results(self) -> bool:
         """Fetches and parses the main race result table."""
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(self.url, headers=headers, timeout=10)
+            response = requests.get(self.url, headers=HEADERS, timeout=10)
             if response.status_code != 200:
                 logger.error(f"Failed to fetch {self.url}: Status {response.status_code}")
                 return False
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Find the main results table
-            # LiveRC tables usually have class 'results_table' or similar
-            table = soup.find('table', {'class': 'race_results'}) or soup.find('table')
-            if not table:
+            rows = parse_results_table(response.text)
+            if rows is None:
                 logger.error("No results table found on page.")
                 return False
 
-            rows = table.find_all('tr')
-            if not rows:
-                logger.error("No rows found in table.")
-                return False
-
-            # Identify the driver name column index and other metrics
-            # LiveRC usually has 'Driver' in the second or third column
-            for row in rows:
-                cols = row.find_all(['td', 'th'])
-                if not cols: continue
-
-                # Filter out header rows or spacer rows
-                text_content = [c.text.strip() for c in cols]
-                if "Driver" in text_content:
-                    continue # Skip header
-
-                if len(cols) < 5: continue
-
-                # Driver name is usually inside an <a> tag near the 'View Laps' or in the same cell
-                # Based on the previous run, the first <a> might be 'View Laps'
-                driver_name = ""
-                all_links = row.find_all('a')
-                for link in all_links:
-                    link_text = link.text.strip()
-                    if link_text and "View Laps" not in link_text and "Driver Profile" not in link_text:
-                        driver_name = link_text
-                        break
-
-                if not driver_name:
-                    driver_name = cols[1].text.replace("View Laps", "").strip()
-
-                # Cleanup Driver Name (Remove starting numbers like '1\n' or trailing IDs)
-                driver_name = re.sub(r'^\d+\s*|^\d+\n', '', driver_name).strip()
-                driver_name = re.sub(r'\s+\d+$', '', driver_name).strip()
-
-                # Consistency often has its own class or specific text pattern
-                consistency = ""
-                for c in cols:
-                    if "%" in c.text:
-                        consistency = c.text.strip()
-
-                processed = {
-                    "Pos": cols[0].text.strip(),
-                    "Driver": driver_name,
-                    "Laps/Time": cols[2].text.strip() if len(cols) > 2 else "",
-                    "Fastest": cols[3].text.strip() if len(cols) > 3 else "",
-                    "Avg": cols[4].text.strip() if len(cols) > 4 else "",
-                    "Consistency": consistency
-                }
-
-                if processed["Driver"] and processed["Driver"] != "Driver":
-                    self.driver_data.append(processed)
-
+            self.driver_data.extend(rows)
             logger.info(f"Successfully harvested {len(self.driver_data)} drivers from {self.url}")
             return True
 
@@ -182,7 +315,7 @@ class LiveRCHarvester:
             logger.error(f"Error extracting lap times for {driver_name}: {str(e)}")
             return None
 
-    def scan_heat_sheets(self, racer_name: str, classes: list[str] | None = None) -> list[dict[str, Any]]:
+    def scan_heat_sheets(self, racer_name: str, classes: Optional[list[str]] = None) -> list[dict[str, Any]]:
         """Scans the main results index for active heat sheets and finds racer heats.
         Optionally filters by a list of classes.
         """
@@ -190,39 +323,12 @@ class LiveRCHarvester:
             classes = []
         try:
             res = requests.get(self.url, timeout=10)
-            soup = BeautifulSoup(res.text, 'html.parser')
             upcoming = []
 
-            # Find links to heat sheets e.g. ?p=view_heat_sheet&id=9910741
-            links = soup.find_all('a', href=re.compile(r'p=view_heat_sheet'))
-            for link in links:
-                # Check if this heat sheet matches any of our classes if provided
-                sheet_text = link.parent.text.lower()
-                if classes:
-                    match_class = any(c.lower() in sheet_text for c in classes)
-                    if not match_class: continue
-
-                sheet_url = self.url.split("/results/")[0] + "/results/" + link['href']
+            for sheet_url in find_heat_sheet_links(res.text, self.url, classes):
                 sheet_res = requests.get(sheet_url, timeout=10)
-                sheet_soup = BeautifulSoup(sheet_res.text, 'html.parser')
-
-                # Check if racer is in this sheet
-                if racer_name.lower() in sheet_soup.text.lower():
-                    # Find the specific race status
-                    races = sheet_soup.find_all('div', class_='race_info')
-                    for race in races:
-                        # Check if racer is in this specific race block
-                        if racer_name.lower() in race.parent.text.lower():
-                            status = race.find('span', class_='race_status')
-                            status_text = status.text.strip() if status else "Unknown"
-                            race_num = race.find('span', class_='race_number').text.strip() if race.find('span', class_='race_number') else "N/A"
-
-                            # Extract class name from the sheet or parent if needed
-                            upcoming.append({
-                                "Race": race_num,
-                                "Status": status_text,
-                                "URL": sheet_url
-                            })
+                for race in parse_heat_sheet(sheet_res.text, racer_name):
+                    upcoming.append({**race, "URL": sheet_url})
             return upcoming
         except Exception as e:
             logger.error(f"Error scanning heat sheets: {e}")
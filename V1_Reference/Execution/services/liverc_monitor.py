@@ -0,0 +1,248 @@
+"""A.P.E.X. Execution Layer - LiveRC Schedule Monitor
+Continuously watches LiveRC heat sheets for a team of racers across several
+events and classes on a single asyncio loop.
+
+Each poll fetches every event index and heat sheet at most once, no matter how
+many racers are watching it, then diffs race status against the previous poll.
+The loop runs on a daemon thread; the UI reads thread-safe snapshots and
+copies them into st.session_state (Streamlit state is not touched off-thread).
+Every UI read renews the monitor's lease; once the browser session is gone and
+the reads stop, the thread exits after idle_timeout seconds.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Optional
+
+import requests
+
+from Execution.services.liverc_harvester import HEADERS, find_heat_sheet_links, parse_heat_sheet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("apex.liverc_monitor")
+
+# Race status text that means the racer should head to the drivers stand
+ON_DECK_KEYWORDS = ("on deck", "staging", "next up")
+
+
+class LiveRCScheduleMonitor:
+    """Polls LiveRC heat sheets for many (racer, classes) targets concurrently."""
+
+    def __init__(self, poll_interval: int = 60, max_concurrency: int = 6, idle_timeout: int = 120):
+        """Initialize the monitor.
+
+        Args:
+            poll_interval: Seconds between polls
+            max_concurrency: Maximum simultaneous page fetches per poll
+            idle_timeout: Seconds without a touch() (no UI reading snapshots)
+                before the polling thread stops itself
+
+        """
+        self.poll_interval = poll_interval
+        self.max_concurrency = max_concurrency
+        self.idle_timeout = idle_timeout
+        self.targets = []  # [{"event_url", "racer_name", "classes"}]
+
+        self.http = requests.Session()
+        self.http.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_concurrency)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._schedule = {}  # (racer, url, race, occurrence) -> heat dict
+        self._notifications = []
+        self._thread = None
+        self._stop = threading.Event()
+        self._last_touch = time.monotonic()
+        self.last_poll = None
+        self.last_poll_seconds = None
+
+    # ------------------------------------------------------------------
+    # Targets
+    # ------------------------------------------------------------------
+
+    def set_targets(self, targets: list[dict[str, Any]]):
+        """Replace the watch list.
+
+        Args:
+            targets: List of dicts with event_url, racer_name, classes (list, may be empty)
+
+        """
+        cleaned = [
+            {
+                "event_url": t["event_url"].strip(),
+                "racer_name": t["racer_name"].strip(),
+                "classes": [c.strip() for c in t.get("classes") or [] if c.strip()],
+            }
+            for t in targets
+            if t.get("event_url", "").strip() and t.get("racer_name", "").strip()
+        ]
+        with self._lock:
+            self.targets = cleaned
+            # Drop schedule rows for racers/events no longer watched
+            watched = {(t["racer_name"], t["event_url"]) for t in cleaned}
+            self._schedule = {
+                key: heat for key, heat in self._schedule.items()
+                if (heat["Racer"], heat["Event"]) in watched
+            }
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    async def _fetch_all(self, urls: list[str]) -> dict[str, Optional[str]]:
+        """Fetch each URL once with bounded concurrency, None on failure."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                try:
+                    response = await asyncio.to_thread(self.http.get, url, timeout=10)
+                    if response.status_code != 200:
+                        logger.warning(f"Failed to fetch {url}: Status {response.status_code}")
+                        return url, None
+                    return url, response.text
+                except Exception as e:
+                    logger.warning(f"Error fetching {url}: {e}")
+                    return url, None
+
+        return dict(await asyncio.gather(*(fetch(u) for u in urls)))
+
+    async def poll_once(self) -> list[dict[str, Any]]:
+        """Run one poll across all targets and diff against the previous schedule.
+
+        Returns:
+            List of status-change notifications from this poll
+
+        """
+        start = asyncio.get_running_loop().time()
+        with self._lock:
+            targets = list(self.targets)
+        if not targets:
+            return []
+
+        # Stage 1: each event index once
+        indexes = await self._fetch_all(sorted({t["event_url"] for t in targets}))
+
+        # Stage 2: each heat sheet once, shared by every racer that needs it
+        sheets_by_target = []
+        for target in targets:
+            html = indexes.get(target["event_url"])
+            sheet_urls = find_heat_sheet_links(html, target["event_url"], target["classes"]) if html else []
+            sheets_by_target.append((target, sheet_urls))
+        sheets = await self._fetch_all(sorted({u for _, urls in sheets_by_target for u in urls}))
+
+        # Stage 3: build the new schedule and diff statuses
+        schedule = {}
+        for target, sheet_urls in sheets_by_target:
+            for url in sheet_urls:
+                if not sheets.get(url):
+                    continue
+                # Unlabelled races all parse as "N/A"; number repeats to keep them apart
+                occurrences = Counter()
+                for race in parse_heat_sheet(sheets[url], target["racer_name"]):
+                    key = (target["racer_name"], url, race["Race"], occurrences[race["Race"]])
+                    occurrences[race["Race"]] += 1
+                    schedule[key] = {
+                        **race,
+                        "URL": url,
+                        "Racer": target["racer_name"],
+                        "Event": target["event_url"],
+                    }
+
+        changes = []
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            for key, heat in schedule.items():
+                previous = self._schedule.get(key)
+                if previous is None or previous["Status"] != heat["Status"]:
+                    on_deck = any(k in heat["Status"].lower() for k in ON_DECK_KEYWORDS)
+                    changes.append({
+                        "Racer": heat["Racer"],
+                        "Race": heat["Race"],
+                        "Status": heat["Status"],
+                        "Previous": previous["Status"] if previous else None,
+                        "URL": heat["URL"],
+                        "on_deck": on_deck,
+                        "timestamp": now,
+                    })
+            # Keep last known rows for pages that failed to load this poll
+            failed = {u for u, html in {**indexes, **sheets}.items() if html is None}
+            for key, heat in self._schedule.items():
+                if key not in schedule and (heat["URL"] in failed or heat["Event"] in failed):
+                    schedule[key] = heat
+            self._schedule = schedule
+            self._notifications.extend(changes)
+            self.last_poll = now
+            self.last_poll_seconds = round(asyncio.get_running_loop().time() - start, 2)
+
+        logger.info(
+            f"Polled {len(indexes)} events / {len(sheets)} heat sheets for {len(targets)} racers: "
+            f"{len(changes)} status changes in {self.last_poll_seconds}s"
+        )
+        return changes
+
+    async def _run(self):
+        """Poll until stopped, or until no UI has touched the monitor for idle_timeout."""
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_touch > self.idle_timeout:
+                logger.info(f"No schedule reads for {self.idle_timeout}s (session ended?), stopping monitor")
+                self._stop.set()
+                break
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error during schedule poll: {e}")
+            await asyncio.to_thread(self._stop.wait, self.poll_interval)
+
+    # ------------------------------------------------------------------
+    # Background thread control
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start polling on a daemon thread (no-op if already running)."""
+        self.touch()
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._run(),),
+            name="liverc-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def touch(self):
+        """Renew the lease: a live UI session is still reading this monitor."""
+        self._last_touch = time.monotonic()
+
+    def is_running(self) -> bool:
+        """Whether the polling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # Snapshots for the UI
+    # ------------------------------------------------------------------
+
+    def get_schedule(self) -> list[dict[str, Any]]:
+        """Current schedule rows (Race, Status, URL, Racer, Event), sorted by racer."""
+        with self._lock:
+            rows = list(self._schedule.values())
+        return sorted(rows, key=lambda h: (h["Racer"], h["URL"], h["Race"]))
+
+    def drain_notifications(self) -> list[dict[str, Any]]:
+        """Return and clear status-change notifications since the last call."""
+        with self._lock:
+            notifications, self._notifications = self._notifications, []
+        return notifications
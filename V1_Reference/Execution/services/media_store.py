@@ -0,0 +1,350 @@
+"""Content-addressed image store for Setup Advisor multi-modal payloads.
+
+Track-walk and tire photos are downscaled to a maximum edge and recompressed
+to JPEG once, when they are uploaded, and stored under the SHA-256 of the
+original bytes. Re-uploading the same photo (or a Streamlit rerun that hands
+the same files back) is a hash lookup. The base64 form is kept in memory, so
+building a turn's payload costs no image work at all.
+
+Advisor turns are stateless (no earlier messages are sent), so every turn
+attaches all of the session's images; the saving is that each one is the
+small, already-encoded JPEG rather than the original upload.
+
+Configuration (environment):
+- APEX_MEDIA_MAX_EDGE: long-edge pixel cap (default 1568, the vision model's
+  useful resolution)
+- APEX_MEDIA_QUALITY: JPEG quality (default 80)
+- APEX_MEDIA_MAX_DISK_MB: size cap for the on-disk store (default 500);
+  least recently used images are deleted first
+- APEX_MEDIA_MAX_AGE_DAYS: images unused for longer are deleted (default 30)
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+MAX_EDGE = int(os.environ.get("APEX_MEDIA_MAX_EDGE", "1568"))
+JPEG_QUALITY = int(os.environ.get("APEX_MEDIA_QUALITY", "80"))
+MAX_DISK_BYTES = int(float(os.environ.get("APEX_MEDIA_MAX_DISK_MB", "500")) * 1024 * 1024)
+MAX_AGE_SECONDS = float(os.environ.get("APEX_MEDIA_MAX_AGE_DAYS", "30")) * 86400
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def _jpeg_size(data: bytes) -> tuple:
+    """(width, height) from the image header, (0, 0) if unreadable."""
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+    except Exception:
+        return (0, 0)
+
+
+class MediaStore:
+    """Downscale-once, content-addressed image cache."""
+
+    def __init__(self, store_dir: Optional[str] = None, max_edge: int = MAX_EDGE,
+                 quality: int = JPEG_QUALITY, max_memory_items: int = 64,
+                 max_disk_bytes: int = MAX_DISK_BYTES, max_age_seconds: float = MAX_AGE_SECONDS):
+        """Initialize the store.
+
+        Args:
+            store_dir: Directory for encoded images (default Execution/data/media_store,
+                created on first write)
+            max_edge: Long-edge pixel cap for stored images
+            quality: JPEG quality for stored images
+            max_memory_items: Encoded images kept in memory as base64
+            max_disk_bytes: Size cap for stored images on disk
+            max_age_seconds: Stored images unused for longer are deleted
+
+        """
+        self.store_dir = store_dir or os.path.join(DATA_DIR, "media_store")
+        self.max_edge = max_edge
+        self.quality = quality
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self._records = {}              # sha256 -> record
+        self._base64 = OrderedDict()    # sha256 -> base64 str (LRU)
+        self._lock = threading.Lock()
+        self.stats = {"encoded": 0, "reused": 0, "encode_seconds": 0.0, "bytes_in": 0, "bytes_out": 0, "pruned": 0}
+
+    # ------------------------------------------------------------------
+    # Ingestion (upload time)
+    # ------------------------------------------------------------------
+
+    def _path(self, sha256: str) -> str:
+        # Size/quality are part of the name so changing them re-encodes
+        return os.path.join(self.store_dir, f"{sha256}_{self.max_edge}_q{self.quality}.jpg")
+
+    def _encode(self, data: bytes) -> tuple[bytes, str, tuple]:
+        """Downscale and recompress to JPEG; originals that fail to decode pass through."""
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return data, "", (0, 0)
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = ImageOps.exif_transpose(image)
+                if image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                image.thumbnail((self.max_edge, self.max_edge))
+                buffer = io.BytesIO()
+                image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+                encoded = buffer.getvalue()
+                size = image.size
+        except Exception as e:
+            print(f"Error preprocessing image: {e}")
+            return data, "", (0, 0)
+
+        # Already-small JPEGs can grow when recompressed; keep whichever is smaller
+        if len(encoded) >= len(data) and data[:3] == b"\xff\xd8\xff":
+            return data, "image/jpeg", size
+        return encoded, "image/jpeg", size
+
+    def ingest(self, data: bytes, name: str = "", tag: str = "", media_type: str = "") -> dict:
+        """Store one image (encoding it only the first time its bytes are seen).
+
+        Args:
+            data: Original image bytes
+            name: Original file name (for display)
+            tag: Image group ("track", "tire", ...)
+            media_type: Original media type (used if the image cannot be re-encoded)
+
+        Returns:
+            Record dict: sha256, name, tag, media_type, width, height,
+            original_bytes, stored_bytes, encode_seconds
+
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            record = self._records.get(sha256)
+        if record is not None:
+            with self._lock:
+                self.stats["reused"] += 1
+            return dict(record, name=name or record["name"], tag=tag or record["tag"])
+
+        path = self._path(sha256)
+        start = time.perf_counter()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                encoded = f.read()
+            os.utime(path)  # Mark as recently used for pruning
+            stored_type, size, encoded_now = "image/jpeg", _jpeg_size(encoded), False
+        else:
+            encoded, stored_type, size = self._encode(data)
+            encoded_now = True
+            if stored_type:
+                os.makedirs(self.store_dir, exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(encoded)
+                os.replace(tmp_path, path)
+        seconds = time.perf_counter() - start
+
+        record = {
+            "sha256": sha256,
+            "name": name,
+            "tag": tag,
+            "media_type": stored_type or media_type or "image/jpeg",
+            "width": size[0],
+            "height": size[1],
+            "original_bytes": len(data),
+            "stored_bytes": len(encoded),
+            "encode_seconds": seconds,
+        }
+        with self._lock:
+            self._records[sha256] = record
+            self._remember(sha256, base64.b64encode(encoded).decode("utf-8"))
+            if encoded_now:
+                self.stats["encoded"] += 1
+                self.stats["encode_seconds"] += seconds
+            else:
+                self.stats["reused"] += 1
+            self.stats["bytes_in"] += len(data)
+            self.stats["bytes_out"] += len(encoded)
+        if encoded_now and stored_type:
+            self.prune(keep=sha256)
+        return dict(record)
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """Enforce the disk caps: delete images unused for max_age_seconds, then
+        the least recently used ones until the store fits in max_disk_bytes.
+
+        Deleted images are forgotten in memory too, so uploading one again
+        re-encodes it.
+
+        Args:
+            keep: Hash of an image never to delete (the one just ingested)
+
+        Returns:
+            Number of files deleted
+
+        """
+        if not os.path.isdir(self.store_dir):
+            return 0
+
+        files = []
+        for entry in os.scandir(self.store_dir):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path, entry.name))
+        files.sort()  # Least recently used first
+
+        cutoff = time.time() - self.max_age_seconds
+        total = sum(size for _mtime, size, _path, _name in files)
+        removed = []
+        for mtime, size, path, name in files:
+            if mtime >= cutoff and total <= self.max_disk_bytes:
+                break
+            if name.startswith(f"{keep}_"):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed.append(name.split("_", 1)[0])
+
+        if removed:
+            with self._lock:
+                for sha256 in removed:
+                    self._records.pop(sha256, None)
+                    self._base64.pop(sha256, None)
+                self.stats["pruned"] += len(removed)
+        return len(removed)
+
+    def ingest_uploads(self, uploaded_files, tag: str = "") -> list[dict]:
+        """Ingest Streamlit UploadedFile objects, skipping non-images (e.g. video)."""
+        records = []
+        for uploaded in uploaded_files or []:
+            media_type = getattr(uploaded, "type", "") or ""
+            if not media_type.startswith("image/"):
+                continue
+            records.append(self.ingest(uploaded.getvalue(), name=getattr(uploaded, "name", ""),
+                                       tag=tag, media_type=media_type))
+        return records
+
+    # ------------------------------------------------------------------
+    # Payload (per turn)
+    # ------------------------------------------------------------------
+
+    def _remember(self, sha256: str, encoded_b64: str):
+        """Keep base64 in the in-memory LRU (lock held)."""
+        self._base64[sha256] = encoded_b64
+        self._base64.move_to_end(sha256)
+        while len(self._base64) > self.max_memory_items:
+            self._base64.popitem(last=False)
+
+    def get_base64(self, record: dict) -> Optional[str]:
+        """Base64 of the stored image (memory first, then disk)."""
+        sha256 = record["sha256"]
+        with self._lock:
+            if sha256 in self._base64:
+                self._base64.move_to_end(sha256)
+                return self._base64[sha256]
+
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            encoded_b64 = base64.b64encode(f.read()).decode("utf-8")
+        os.utime(path)  # Mark as recently used for pruning
+        with self._lock:
+            self._remember(sha256, encoded_b64)
+        return encoded_b64
+
+    def build_image_blocks(self, records: list[dict], stats: Optional[dict] = None) -> list[dict]:
+        """Messages API image blocks for the records (each image once, in input order).
+
+        Args:
+            records: Records to attach
+            stats: Optional dict filled with images, payload_bytes (base64 chars),
+                   original_bytes and encode_seconds (time spent building blocks)
+
+        """
+        start = time.perf_counter()
+        blocks = []
+        payload_bytes = original_bytes = 0
+        seen = set()
+        for record in records:
+            if record["sha256"] in seen:
+                continue
+            seen.add(record["sha256"])
+            encoded_b64 = self.get_base64(record)
+            if encoded_b64 is None:
+                continue
+            blocks.append({
+                "type": "image",
+                "source": {"type": "base64", "media_type": record["media_type"], "data": encoded_b64}
+            })
+            payload_bytes += len(encoded_b64)
+            original_bytes += record["original_bytes"]
+
+        if stats is not None:
+            stats.update(images=len(blocks), payload_bytes=payload_bytes, original_bytes=original_bytes,
+                         encode_seconds=time.perf_counter() - start)
+        return blocks
+
+    def get_stats(self) -> dict:
+        """Encode/reuse counts, encode time and compression ratio."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["records"] = len(self._records)
+        stats["compression_ratio"] = stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else 0.0
+        return stats
+
+
+# Singleton instance
+media_store = MediaStore()
+
+
+def _benchmark():
+    """Legacy full-resolution base64 per turn vs store-once, downscaled images per turn."""
+    import tempfile
+
+    from PIL import Image, ImageDraw
+
+    photos = []
+    for i in range(6):
+        image = Image.new("RGB", (4032, 3024), (90 + i * 10, 80, 70))
+        draw = ImageDraw.Draw(image)
+        for x in range(0, 4032, 48):
+            draw.line((x, 0, 4032 - x, 3024), fill=(200, 180 - i * 10, 160), width=3)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        photos.append(buffer.getvalue())
+
+    turns = 5
+    start = time.perf_counter()
+    legacy_bytes = sum(len(base64.b64encode(p)) for _ in range(turns) for p in photos)
+    legacy_seconds = time.perf_counter() - start
+
+    store = MediaStore(store_dir=tempfile.mkdtemp())
+    start = time.perf_counter()
+    records = [store.ingest(p, tag="tire" if i % 2 else "track") for i, p in enumerate(photos)]
+    ingest_seconds = time.perf_counter() - start
+
+    total_bytes, build_seconds = 0, 0.0
+    for _ in range(turns):
+        stats = {}
+        store.build_image_blocks(records, stats)
+        total_bytes += stats["payload_bytes"]
+        build_seconds += stats["encode_seconds"]
+
+    print(f"legacy  : {turns} turns x {len(photos)} photos  payload {legacy_bytes / 1e6:7.2f} MB  "
+          f"encode {legacy_seconds * 1000:.1f}ms")
+    print(f"store   : ingest once {ingest_seconds:.2f}s, {turns} turns  payload {total_bytes / 1e6:7.2f} MB  "
+          f"per-turn build {build_seconds * 1000:.1f}ms total")
+    print(store.get_stats())
+
+
+if __name__ == "__main__":
+    _benchmark()
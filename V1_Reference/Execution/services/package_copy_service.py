@@ -3,6 +3,7 @@ Enables racers to preview package changes before applying to Digital Twin.
 """
 
 from Execution.services.comparison_service import SETUP_PACKAGES
+from Execution.services.setup_model import Setup
 
 
 class PackageCopyService:
@@ -19,8 +20,8 @@ class PackageCopyService:
 
         Args:
             package_name: str - Name of package (Suspension, Geometry, Diffs, Tires, Power)
-            reference_setup: dict - The baseline setup to copy from
-            current_setup: dict - The current actual_setup
+            reference_setup: dict or Setup - The baseline setup to copy from
+            current_setup: dict or Setup - The current actual_setup
 
         Returns:
             dict with structure:
@@ -58,9 +59,14 @@ class PackageCopyService:
         integer_params = ['DF', 'DC', 'DR', 'SO_F', 'SO_R', 'ST_F', 'ST_R', 'Bell', 'Spur']
         float_params = ['SB_F', 'SB_R', 'P_F', 'P_R', 'Toe_F', 'Toe_R', 'RH_F', 'RH_R', 'C_F', 'C_R', 'Venturi']
 
+        reference = Setup.coerce(reference_setup)
+        current = Setup.coerce(current_setup)
+        # Only params whose values differ can change; identical setups skip the string checks
+        differing = set(current.diff(reference, package_info['params']))
+
         for param in package_info['params']:
-            reference_val = reference_setup.get(param, '—')
-            current_val = current_setup.get(param, '—')
+            reference_val = reference.get(param, '—')
+            current_val = current.get(param, '—')
 
             # Determine parameter type for input rendering
             if param in integer_params:
@@ -74,7 +80,7 @@ class PackageCopyService:
             ref_normalized = str(reference_val) if reference_val != '—' else '—'
             curr_normalized = str(current_val) if current_val != '—' else '—'
 
-            will_change = (ref_normalized != curr_normalized)
+            will_change = param in differing and ref_normalized != curr_normalized
 
             change_entry = {
                 'param': param,
@@ -98,10 +104,10 @@ class PackageCopyService:
         Args:
             package_name: str - Name of package
             edited_values: dict - Parameter values after user edits (key=param, value=new_value)
-            current_setup: dict - Current actual_setup
+            current_setup: dict or Setup - Current actual_setup
 
         Returns:
-            tuple: (updated_setup: dict, changes_applied: int)
+            tuple: (updated_setup: same type as current_setup, changes_applied: int)
 
         """
         if package_name not in SETUP_PACKAGES:
@@ -109,20 +115,25 @@ class PackageCopyService:
 
         package_info = SETUP_PACKAGES[package_name]
 
-        # Create updated setup
-        updated_setup = current_setup.copy()
-        changes_applied = 0
+        current = Setup.coerce(current_setup)
+        updates = {}
 
         # Apply each parameter in the package
         for param in package_info['params']:
             if param in edited_values:
-                old_value = updated_setup.get(param, '—')
+                old_value = current.get(param, '—')
                 new_value = edited_values[param]
 
                 # Only count if value actually changed
                 if str(old_value) != str(new_value):
-                    updated_setup[param] = new_value
-                    changes_applied += 1
+                    updates[param] = new_value
+
+        if isinstance(current_setup, Setup):
+            updated_setup = current_setup.replace(updates)
+        else:
+            updated_setup = current_setup.copy()
+            updated_setup.update(updates)
+        changes_applied = len(updates)
 
         return updated_setup, changes_applied
 
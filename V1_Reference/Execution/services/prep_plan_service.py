@@ -8,23 +8,24 @@ This service orchestrates the creation of Race Prep Plans by:
 2. Compiling recommended setups from the Master Library
 3. Generating AI-powered strategic content
 4. Producing a printable PDF document
+
+generate_full_plan runs these as a small dependency graph: the data sources
+load concurrently, one library search feeds both track intelligence and the
+recommended setup, and the static PDF pages render while the LLM writes the
+strategy sections.
 """
 
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import anthropic
-from dotenv import load_dotenv
-
 from Execution.ai import prompts
-from Execution.ai.pdf_generator import generate_race_prep_plan
+from Execution.ai.llm_gateway import llm_gateway
+from Execution.ai.pdf_generator import PrepPlanStaticSections, assemble_race_prep_plan, generate_race_prep_plan
 from Execution.database.database import db
 from Execution.services.history_service import history_service
 from Execution.services.library_service import library_service
 
-load_dotenv()
-ANTHROPIC_KEY = os.environ.get("ANTHROPIC_API_KEY")
-
 
 class PrepPlanService:
     """Orchestrates the creation of Race Prep Plans.
@@ -43,13 +44,27 @@ class PrepPlanService:
     def __init__(self):
         self.use_database = db.is_connected
 
-    def get_track_intelligence(self, track_name, vehicle_id=None, brand=None, model=None):
+    def get_track_intelligence(self, track_name, vehicle_id=None, brand=None, model=None, library_results=None):
         """Gather all historical data about a specific track.
 
+        Args:
+            library_results: Optional search_baselines result to reuse instead of querying again
+
         Returns:
             Dict with track-specific knowledge
 
         """
+        if not self.use_database:
+            return self._compile_track_intelligence(None, None, None)
+
+        track_history = history_service.get_track_history(track_name, vehicle_id, limit=10)
+        if brand and model and library_results is None:
+            library_results = library_service.search_baselines(track=track_name, brand=brand)
+        symptoms = history_service.get_symptom_category_stats(vehicle_id=vehicle_id, track_name=track_name)
+        return self._compile_track_intelligence(track_history, library_results if brand and model else None, symptoms)
+
+    def _compile_track_intelligence(self, track_history, library_results, symptoms):
+        """Summarize already-loaded track history, library matches and symptom stats."""
         intelligence = {
             "previous_sessions": [],
             "best_lap_ever": None,
@@ -58,11 +73,6 @@ class PrepPlanService:
             "common_issues": []
         }
 
-        if not self.use_database:
-            return intelligence
-
-        # Get track history
-        track_history = history_service.get_track_history(track_name, vehicle_id, limit=10)
         if track_history:
             intelligence["previous_sessions"] = track_history
 
@@ -80,20 +90,17 @@ class PrepPlanService:
             if surfaces:
                 intelligence["typical_conditions"]["surface"] = max(set(surfaces), key=surfaces.count)
 
-        # Get successful setups from library
-        if brand and model:
-            library_results = library_service.search_baselines(track=track_name, brand=brand)
-            if not library_results.empty:
-                intelligence["successful_setups"] = library_results.head(3).to_dict('records')
+        # Successful setups from library
+        if library_results is not None and not library_results.empty:
+            intelligence["successful_setups"] = library_results.head(3).to_dict('records')
 
-        # Get symptom stats for common issues
-        symptoms = history_service.get_symptom_category_stats(vehicle_id=vehicle_id, track_name=track_name)
+        # Symptom stats for common issues
         if symptoms:
             intelligence["common_issues"] = list(symptoms.keys())[:3]
 
         return intelligence
 
-    def get_recommended_setup(self, track_name, conditions, brand, model):
+    def get_recommended_setup(self, track_name, conditions, brand, model, library_results=None):
         """Get the recommended starting setup for given conditions.
 
         Args:
@@ -101,6 +108,7 @@ class PrepPlanService:
             conditions: Dict with traction, surface_type, surface_condition
             brand: Vehicle brand
             model: Vehicle model
+            library_results: Optional search_baselines result to reuse instead of querying again
 
         Returns:
             Dict with setup parameters and rationale
@@ -113,7 +121,8 @@ class PrepPlanService:
         }
 
         # Try to find a match in the library
-        library_results = library_service.search_baselines(track=track_name, brand=brand)
+        if library_results is None:
+            library_results = library_service.search_baselines(track=track_name, brand=brand)
 
         if not library_results.empty:
             # Use the most recent matching baseline
@@ -343,27 +352,25 @@ class PrepPlanService:
             Dict with AI-generated sections
 
         """
-        if not ANTHROPIC_KEY:
+        if not llm_gateway.is_available():
             return {
                 "strategic_overview": "AI content unavailable - API key missing.",
                 "track_intelligence": "Historical data analysis unavailable."
             }
 
         try:
-            client = anthropic.Anthropic(api_key=ANTHROPIC_KEY)
-
             prompt = prompts.get_prep_plan_prompt(profile, track_context, historical_memory, vehicle_info)
 
-            response = client.messages.create(
+            response = llm_gateway.complete(
                 model="claude-sonnet-4-5",
                 max_tokens=2000,
                 temperature=0.5,
-                system=prompts.SYSTEM_PROMPT,
+                system=prompts.cached_system_blocks(prompts.SYSTEM_PROMPT),
                 messages=[{"role": "user", "content": prompt}]
             )
 
             # Parse the AI response
-            content = response.content[0].text
+            content = response["text"]
 
             # Try to extract sections (AI should format with headers)
             sections = {
@@ -398,13 +405,17 @@ class PrepPlanService:
                 "track_intelligence": "Historical data analysis unavailable."
             }
 
-    def generate_full_plan(self, racer_profile, track_context, vehicle_info):
+    def generate_full_plan(self, racer_profile, track_context, vehicle_info, progress=None, timings=None,
+                           parallel=True):
         """Generate a complete Race Prep Plan.
 
         Args:
             racer_profile: Dict with racer info (name, etc.)
             track_context: Dict with track/event info from Tab 1
             vehicle_info: Dict with brand, model
+            progress: Optional callback(fraction, message) for job status
+            timings: Optional dict, filled with seconds per stage plus "total"
+            parallel: Run independent stages concurrently (False runs them in order)
 
         Returns:
             bytes - PDF file content
@@ -413,47 +424,100 @@ class PrepPlanService:
         track_name = track_context.get('track_name', 'Unknown Track')
         event_name = track_context.get('event_name', 'Race Event')
         event_date = track_context.get('session_date', datetime.now().strftime('%Y-%m-%d'))
+        brand = vehicle_info.get('brand')
+        model = vehicle_info.get('model')
+        vehicle_id = None  # TODO: Get from session
         conditions = {
             'traction': track_context.get('traction', 'Medium'),
             'surface_type': track_context.get('surface_type', 'Dry'),
             'surface_condition': track_context.get('surface_condition', 'Smooth')
         }
 
-        # Gather data
-        track_intel = self.get_track_intelligence(
-            track_name,
-            vehicle_id=None,  # TODO: Get from session
-            brand=vehicle_info.get('brand'),
-            model=vehicle_info.get('model')
-        )
-
-        recommended = self.get_recommended_setup(
-            track_name,
-            conditions,
-            vehicle_info.get('brand'),
-            vehicle_info.get('model')
-        )
-
-        # Build historical memory for AI
-        if self.use_database:
-            historical_memory = history_service.build_context_for_ai(
+        progress = progress or (lambda fraction, message="": None)
+        timings = timings if timings is not None else {}
+        started = time.perf_counter()
+
+        def timed(name, fn, *args):
+            def run():
+                stage_start = time.perf_counter()
+                try:
+                    return fn(*args)
+                finally:
+                    timings[name] = round(time.perf_counter() - stage_start, 4)
+            return run
+
+        def load_library():
+            return library_service.search_baselines(track=track_name, brand=brand)
+
+        def load_track_history():
+            if not self.use_database:
+                return None
+            return history_service.get_track_history(track_name, vehicle_id, limit=10)
+
+        def load_symptoms():
+            if not self.use_database:
+                return None
+            return history_service.get_symptom_category_stats(vehicle_id=vehicle_id, track_name=track_name)
+
+        def load_historical_memory():
+            if not self.use_database:
+                return "<historical_memory>No database connected.</historical_memory>"
+            return history_service.build_context_for_ai(
                 track_name=track_name,
                 traction=conditions['traction'],
                 surface_type=conditions['surface_type'],
                 surface_condition=conditions['surface_condition'],
-                vehicle_id=None,
-                brand=vehicle_info.get('brand'),
-                model=vehicle_info.get('model')
+                vehicle_id=vehicle_id,
+                brand=brand,
+                model=model
             )
+
+        def write_ai_content(historical_memory):
+            return self.generate_ai_content(racer_profile, track_context, historical_memory, vehicle_info)
+
+        def build_static(library_results):
+            recommended = self.get_recommended_setup(track_name, conditions, brand, model,
+                                                     library_results=library_results)
+            return {
+                "recommended_setup": recommended.get('setup', {}),
+                "mechanical_checklist": self.get_mechanical_checklist(brand),
+                "parts_list": self.get_parts_list(conditions, brand),
+                "practice_strategy": self.get_practice_strategy(track_context.get('session_type', 'Race')),
+                "contingencies": self.generate_contingencies(conditions)
+            }
+
+        def prerender_static(library_results):
+            return PrepPlanStaticSections(**build_static(library_results)).prerender()
+
+        progress(0.1, "Loading track history")
+        if parallel:
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix="apex-prep") as executor:
+                # The LLM call only waits on historical memory; the rest loads beside it
+                memory_future = executor.submit(timed("historical_memory", load_historical_memory))
+                library_future = executor.submit(timed("library", load_library))
+                history_future = executor.submit(timed("track_history", load_track_history))
+                symptoms_future = executor.submit(timed("symptoms", load_symptoms))
+
+                historical_memory = memory_future.result()
+                progress(0.3, "Writing strategy")
+                ai_future = executor.submit(timed("ai_content", write_ai_content, historical_memory))
+
+                library_results = library_future.result()
+                static_sections = timed("static_pdf", prerender_static, library_results)()
+                track_history = history_future.result()
+                symptoms = symptoms_future.result()
+                ai_content = ai_future.result()
         else:
-            historical_memory = "<historical_memory>No database connected.</historical_memory>"
-
-        # Generate AI content
-        ai_content = self.generate_ai_content(
-            racer_profile,
-            track_context,
-            historical_memory,
-            vehicle_info
+            library_results = timed("library", load_library)()
+            track_history = timed("track_history", load_track_history)()
+            symptoms = timed("symptoms", load_symptoms)()
+            historical_memory = timed("historical_memory", load_historical_memory)()
+            progress(0.3, "Writing strategy")
+            ai_content = timed("ai_content", write_ai_content, historical_memory)()
+            static_sections = timed("static_sections", build_static, library_results)()
+
+        track_intel = self._compile_track_intelligence(
+            track_history, library_results if brand and model else None, symptoms
         )
 
         # Build track intelligence text
@@ -463,24 +527,53 @@ class PrepPlanService:
         if track_intel.get('common_issues'):
             track_intel_text += f"\n\nCommon issues at this track: {', '.join(track_intel['common_issues'])}"
 
-        # Generate PDF
-        pdf_bytes = generate_race_prep_plan(
-            racer_name=racer_profile.get('name', 'Unknown Racer'),
-            event_name=event_name,
-            track_name=track_name,
-            event_date=event_date,
-            vehicle_info=vehicle_info,
-            strategic_overview=ai_content.get('strategic_overview', 'No strategic analysis available.'),
-            track_intelligence=track_intel_text or 'No prior track data available.',
-            recommended_setup=recommended.get('setup', {}),
-            mechanical_checklist=self.get_mechanical_checklist(vehicle_info.get('brand')),
-            parts_list=self.get_parts_list(conditions, vehicle_info.get('brand')),
-            practice_strategy=self.get_practice_strategy(track_context.get('session_type', 'Race')),
-            contingencies=self.generate_contingencies(conditions)
-        )
+        front = {
+            "racer_name": racer_profile.get('name', 'Unknown Racer'),
+            "event_name": event_name,
+            "track_name": track_name,
+            "event_date": event_date,
+            "vehicle_info": vehicle_info,
+            "strategic_overview": ai_content.get('strategic_overview', 'No strategic analysis available.'),
+            "track_intelligence": track_intel_text or 'No prior track data available.'
+        }
+
+        # Generate PDF; the pipelined path only renders the AI pages and joins them to the static pages
+        progress(0.9, "Rendering PDF")
+        if parallel:
+            pdf_bytes = timed("assemble_pdf", lambda: assemble_race_prep_plan(static_sections, **front))()
+        else:
+            pdf_bytes = timed("render_pdf", lambda: generate_race_prep_plan(**front, **static_sections))()
 
+        timings["total"] = round(time.perf_counter() - started, 4)
         return pdf_bytes
 
 
 # Singleton instance
 prep_plan_service = PrepPlanService()
+
+
+def _benchmark(llm_latency=1.0, runs=3):
+    """Sequential vs. pipelined plan generation with a stub LLM of fixed latency."""
+    from Execution.ai.llm_gateway import StubBackend
+
+    llm_gateway.set_backend(StubBackend(latency=llm_latency))
+    racer = {"name": "Bench Racer"}
+    context = {"track_name": "Thunder Alley", "event_name": "Bench Nationals", "session_type": "Race"}
+    vehicle = {"brand": "Tekno", "model": "NB48 2.2"}
+
+    for parallel in (False, True):
+        totals = []
+        for run in range(runs):
+            # A fresh event name per run keeps the LLM response cache out of the measurement
+            context["event_name"] = f"Bench Nationals {time.time_ns()}"
+            timings = {}
+            pdf_bytes = prep_plan_service.generate_full_plan(racer, context, vehicle, timings=timings,
+                                                             parallel=parallel)
+            totals.append(timings["total"])
+        label = "pipelined" if parallel else "sequential"
+        print(f"{label:>10}: {min(totals):.3f}s best of {runs}, {len(pdf_bytes)} bytes")
+        print(f"{'':>10}  stages: {timings}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,398 @@
+"""Pre-computed Race Prep Plans for upcoming sessions.
+
+A prep plan takes 20+ seconds to build (history queries, library search, an
+LLM call and PDF rendering), and the driver asks for it at the worst possible
+moment. The batch job finds active sessions with a future start date and
+builds their plans ahead of time; Event Setup then serves the stored PDF.
+
+Artifacts are keyed by a data version: a hash of the plan inputs (racer,
+event, track, conditions, vehicle) plus a fingerprint of the history and
+library data a plan is built from. The fingerprint is scoped to the plan:
+sessions at its track, with its brand/model or by its racer (plus their setup
+changes, race results and audits), and library baselines for its track and
+brand. A new row in that scope makes the stored plan stale; activity at
+other tracks, and draft autosaves (sessions.updated_at), do not.
+
+Run the batch from a scheduler (e.g. a Railway cron) with:
+
+    python -m Execution.services.prep_plan_store --days 30
+
+Configuration (environment):
+- APEX_PREP_PLAN_MAX_AGE_DAYS: stored plans older than this are pruned (default 30)
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from Execution.database.database import db
+
+logger = logging.getLogger("apex.prep_plan_store")
+
+# Bump when the plan content or layout changes so stored plans are rebuilt
+PREP_PLAN_VERSION = 1
+MAX_AGE_DAYS = int(os.environ.get("APEX_PREP_PLAN_MAX_AGE_DAYS", "30"))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# History and library rows a plan reads, scoped to its track, vehicle and racer.
+# sessions.updated_at is left out on purpose: draft autosaves bump it constantly.
+_FINGERPRINT_QUERY = """
+    WITH scoped AS (
+        SELECT s.id, s.created_at, s.closed_at
+        FROM sessions s
+        LEFT JOIN vehicles v ON s.vehicle_id = v.id
+        LEFT JOIN racer_profiles rp ON s.profile_id = rp.id
+        WHERE LOWER(s.track_name) LIKE LOWER(%(track_pattern)s)
+           OR (v.brand = %(brand)s AND v.model = %(model)s)
+           OR rp.name = %(racer)s
+    )
+    SELECT
+        (SELECT COUNT(*) FROM scoped) AS sessions,
+        (SELECT MAX(created_at) FROM scoped) AS sessions_created,
+        (SELECT MAX(closed_at) FROM scoped) AS sessions_closed,
+        (SELECT COUNT(*) FROM setup_changes c JOIN scoped ON c.session_id = scoped.id) AS changes,
+        (SELECT MAX(c.created_at) FROM setup_changes c JOIN scoped ON c.session_id = scoped.id) AS changes_created,
+        (SELECT COUNT(*) FROM race_results r JOIN scoped ON r.session_id = scoped.id) AS results,
+        (SELECT MAX(r.created_at) FROM race_results r JOIN scoped ON r.session_id = scoped.id) AS results_created,
+        (SELECT COUNT(*) FROM x_factor_audits a JOIN scoped ON a.session_id = scoped.id) AS audits,
+        (SELECT MAX(a.created_at) FROM x_factor_audits a JOIN scoped ON a.session_id = scoped.id) AS audits_created,
+        (SELECT COUNT(*) FROM master_library
+         WHERE track_name ILIKE %(track_pattern)s AND brand ILIKE %(brand_pattern)s) AS library,
+        (SELECT MAX(created_at) FROM master_library
+         WHERE track_name ILIKE %(track_pattern)s AND brand ILIKE %(brand_pattern)s) AS library_created
+"""
+
+
+def plan_inputs(racer_profile: dict, track_context: dict, vehicle_info: dict) -> dict:
+    """The subset of generate_full_plan arguments that ends up in the PDF."""
+    return {
+        "racer": (racer_profile or {}).get("name"),
+        "track_name": track_context.get("track_name"),
+        "event_name": track_context.get("event_name"),
+        "session_type": track_context.get("session_type"),
+        "session_date": str(track_context.get("session_date")),
+        "track_size": track_context.get("track_size"),
+        "traction": track_context.get("traction"),
+        "surface_type": track_context.get("surface_type"),
+        "surface_condition": track_context.get("surface_condition"),
+        "brand": (vehicle_info or {}).get("brand"),
+        "model": (vehicle_info or {}).get("model"),
+    }
+
+
+_TRACK_KEYS = ("track_name", "event_name", "session_type", "session_date", "track_size",
+               "traction", "surface_type", "surface_condition")
+
+
+def plan_args(racer_profile: dict, track_context: dict, vehicle_info: dict) -> tuple:
+    """Only the (racer_profile, track_context, vehicle_info) fields a plan reads.
+
+    Used for job payloads and stored plan inputs, so profile details such as
+    email or fleet never leave the session.
+    """
+    track_context = track_context or {}
+    vehicle_info = vehicle_info or {}
+    return (
+        {"name": (racer_profile or {}).get("name") or "Unknown Racer"},
+        {key: track_context[key] for key in _TRACK_KEYS if track_context.get(key) is not None},
+        {"brand": vehicle_info.get("brand"), "model": vehicle_info.get("model")},
+    )
+
+
+class PrepPlanStore:
+    """Stores prep plan PDFs by data version (DB table, or files in CSV mode)."""
+
+    def __init__(self, store_dir: Optional[str] = None, fingerprint_ttl: float = 30.0):
+        """Initialize the store.
+
+        Args:
+            store_dir: Directory for PDFs in CSV mode (default Execution/data/prep_plans)
+            fingerprint_ttl: Seconds a plan's data fingerprint is reused before re-querying
+
+        """
+        self.use_database = db.is_connected
+        self.store_dir = store_dir or os.path.join(DATA_DIR, "prep_plans")
+        self.fingerprint_ttl = fingerprint_ttl
+        self._fingerprints = {}  # (track, brand, model, racer) -> (computed at, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def data_fingerprint(self, inputs: dict, refresh: bool = False) -> str:
+        """Summary of the history and library data one plan is built from.
+
+        Args:
+            inputs: plan_inputs() dict; its track, brand, model and racer scope the query
+            refresh: Re-query even if a cached value is younger than fingerprint_ttl
+
+        """
+        scope = (inputs.get("track_name") or "", inputs.get("brand") or "",
+                 inputs.get("model") or "", inputs.get("racer") or "")
+        with self._lock:
+            computed_at, value = self._fingerprints.get(scope, (0.0, None))
+            if not refresh and value is not None and time.monotonic() - computed_at < self.fingerprint_ttl:
+                return value
+
+        if self.use_database:
+            track, brand, model, racer = scope
+            try:
+                rows = db.execute_query(_FINGERPRINT_QUERY, {
+                    "track_pattern": f"%{track}%",
+                    "brand": brand,
+                    "model": model,
+                    "racer": racer,
+                    "brand_pattern": f"%{brand}%",
+                })
+                value = json.dumps(rows[0] if rows else {}, default=str, sort_keys=True)
+            except Exception as e:
+                logger.error(f"Error computing prep plan fingerprint: {e}")
+                value = f"error:{time.time()}"  # Never matches, so nothing stale is served
+        else:
+            from Execution.services.library_service import library_service
+            try:
+                stat = os.stat(library_service.library_path)
+                value = f"csv:{stat.st_size}:{stat.st_mtime_ns}"
+            except OSError:
+                value = "csv:none"
+
+        with self._lock:
+            self._fingerprints[scope] = (time.monotonic(), value)
+        return value
+
+    def data_version(self, racer_profile: dict, track_context: dict, vehicle_info: dict,
+                     fingerprint: Optional[str] = None) -> str:
+        """Version key for a plan: its inputs plus the data fingerprint of its scope."""
+        inputs = plan_inputs(racer_profile, track_context, vehicle_info)
+        key = {
+            "plan": PREP_PLAN_VERSION,
+            "inputs": inputs,
+            "data": fingerprint if fingerprint is not None else self.data_fingerprint(inputs),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Artifacts
+    # ------------------------------------------------------------------
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.store_dir, f"{version}.pdf")
+
+    def get(self, version: str) -> Optional[bytes]:
+        """Stored PDF for this data version, or None."""
+        pdf_bytes = None
+        if self.use_database:
+            try:
+                rows = db.execute_query(
+                    "SELECT pdf FROM prep_plans WHERE data_version = %s",
+                    (version,)
+                )
+                if rows:
+                    pdf_bytes = bytes(rows[0]["pdf"])
+            except Exception as e:
+                logger.error(f"Error loading prep plan: {e}")
+        else:
+            path = self._path(version)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    pdf_bytes = f.read()
+
+        with self._lock:
+            self.stats["hits" if pdf_bytes else "misses"] += 1
+        return pdf_bytes
+
+    def put(self, version: str, pdf_bytes: bytes, session_id=None, timings: Optional[dict] = None,
+            inputs: Optional[list] = None) -> bool:
+        """Store a plan; older versions for the same session are replaced.
+
+        Args:
+            inputs: [racer_profile, track_context, vehicle_info] the plan was built from
+                (plan_args shape), kept so the batch rebuilds a stale plan with the same arguments
+
+        """
+        try:
+            if self.use_database:
+                from psycopg2 import Binary
+                if session_id:
+                    db.execute_query(
+                        "DELETE FROM prep_plans WHERE session_id = %s AND data_version <> %s",
+                        (str(session_id), version),
+                        fetch=False
+                    )
+                db.execute_query(
+                    """
+                    INSERT INTO prep_plans (data_version, session_id, inputs, pdf, timings)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (data_version) DO UPDATE
+                    SET pdf = EXCLUDED.pdf, timings = EXCLUDED.timings, generated_at = CURRENT_TIMESTAMP
+                    """,
+                    (version, str(session_id) if session_id else None, json.dumps(inputs, default=str),
+                     Binary(pdf_bytes), json.dumps(timings or {})),
+                    fetch=False
+                )
+            else:
+                os.makedirs(self.store_dir, exist_ok=True)
+                tmp_path = f"{self._path(version)}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(pdf_bytes)
+                os.replace(tmp_path, self._path(version))
+        except Exception as e:
+            logger.error(f"Error storing prep plan: {e}")
+            return False
+
+        with self._lock:
+            self.stats["stored"] += 1
+        return True
+
+    def prune(self, max_age_days: int = MAX_AGE_DAYS) -> int:
+        """Delete plans generated more than max_age_days ago."""
+        if self.use_database:
+            try:
+                rows = db.execute_query(
+                    """
+                    DELETE FROM prep_plans
+                    WHERE generated_at < NOW() - %s * INTERVAL '1 day'
+                    RETURNING data_version
+                    """,
+                    (max_age_days,)
+                )
+                return len(rows or [])
+            except Exception as e:
+                logger.error(f"Error pruning prep plans: {e}")
+                return 0
+
+        if not os.path.isdir(self.store_dir):
+            return 0
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for name in os.listdir(self.store_dir):
+            path = os.path.join(self.store_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    # ------------------------------------------------------------------
+    # Batch pre-computation
+    # ------------------------------------------------------------------
+
+    def upcoming_sessions(self, days_ahead: int = 30) -> list:
+        """Active sessions starting after today and within days_ahead."""
+        if not self.use_database:
+            return []
+        try:
+            return db.execute_query(
+                """
+                SELECT s.id, s.session_name, s.session_type, s.start_date, s.track_name,
+                       s.track_size, s.traction, s.surface_type, s.surface_condition,
+                       v.brand, v.model, rp.name AS racer_name,
+                       (SELECT p.inputs FROM prep_plans p
+                        WHERE p.session_id = s.id
+                        ORDER BY p.generated_at DESC LIMIT 1) AS plan_inputs
+                FROM sessions s
+                LEFT JOIN vehicles v ON s.vehicle_id = v.id
+                LEFT JOIN racer_profiles rp ON s.profile_id = rp.id
+                WHERE s.status = 'active'
+                  AND s.start_date > CURRENT_DATE
+                  AND s.start_date <= CURRENT_DATE + %s
+                ORDER BY s.start_date
+                """,
+                (days_ahead,)
+            ) or []
+        except Exception as e:
+            logger.error(f"Error listing upcoming sessions: {e}")
+            return []
+
+    @staticmethod
+    def session_plan_args(session: dict) -> tuple:
+        """(racer_profile, track_context, vehicle_info) for an upcoming_sessions row.
+
+        Reuses the arguments of the session's last stored plan (what Event Setup
+        passed), otherwise derives them from the session, vehicle and profile.
+        """
+        if session.get("plan_inputs"):
+            return plan_args(*session["plan_inputs"])
+        racer_profile = {"name": session.get("racer_name")}
+        track_context = {
+            "track_name": session.get("track_name"),
+            "track_size": session.get("track_size"),
+            "traction": session.get("traction"),
+            "surface_type": session.get("surface_type"),
+            "surface_condition": session.get("surface_condition"),
+            "event_name": session.get("session_name"),
+            "session_type": session.get("session_type"),
+            "session_date": str(session.get("start_date")),
+        }
+        vehicle_info = {"brand": session.get("brand"), "model": session.get("model")}
+        return plan_args(racer_profile, track_context, vehicle_info)
+
+    def precompute_upcoming(self, days_ahead: int = 30, progress=None) -> dict:
+        """Build and store plans for upcoming sessions whose stored plan is missing or stale.
+
+        Args:
+            days_ahead: How far ahead to look for sessions
+            progress: Optional callback(fraction, message) for job status
+
+        Returns:
+            Dict with sessions, generated, fresh, failed counts and seconds
+
+        """
+        from Execution.services.prep_plan_service import prep_plan_service
+
+        progress = progress or (lambda fraction, message="": None)
+        started = time.perf_counter()
+        sessions = self.upcoming_sessions(days_ahead)
+        summary = {"sessions": len(sessions), "generated": 0, "fresh": 0, "failed": 0, "pruned": self.prune()}
+
+        for i, session in enumerate(sessions):
+            racer_profile, track_context, vehicle_info = self.session_plan_args(session)
+            fingerprint = self.data_fingerprint(plan_inputs(racer_profile, track_context, vehicle_info),
+                                                refresh=True)
+            version = self.data_version(racer_profile, track_context, vehicle_info, fingerprint)
+            if self.get(version):
+                summary["fresh"] += 1
+                continue
+
+            progress(i / max(len(sessions), 1), f"Building plan for {track_context['event_name']}")
+            timings = {}
+            try:
+                pdf_bytes = prep_plan_service.generate_full_plan(
+                    racer_profile, track_context, vehicle_info, timings=timings
+                )
+            except Exception as e:
+                logger.error(f"Error precomputing prep plan for session {session.get('id')}: {e}")
+                pdf_bytes = None
+            if pdf_bytes and self.put(version, pdf_bytes, session_id=session.get("id"), timings=timings,
+                                      inputs=[racer_profile, track_context, vehicle_info]):
+                summary["generated"] += 1
+            else:
+                summary["failed"] += 1
+
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+
+# Singleton instance
+prep_plan_store = PrepPlanStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-compute Race Prep Plans for upcoming sessions")
+    parser.add_argument("--days", type=int, default=30, help="Look-ahead window in days")
+    args = parser.parse_args()
+    print(json.dumps(prep_plan_store.precompute_upcoming(args.days), indent=2))
+
+
+if __name__ == "__main__":
+    main()
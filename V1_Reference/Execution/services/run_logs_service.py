@@ -115,14 +115,59 @@ class RunLogsService:
             Number of laps successfully added
 
         """
-        count = 0
-        for lap_num, lap_time in enumerate(lap_times, start=1):
-            if self.add_lap(session_id, heat_name, lap_num, lap_time, confidence_rating):
-                count += 1
+        rows = [
+            (session_id, heat_name, lap_num, lap_time, confidence_rating)
+            for lap_num, lap_time in enumerate(lap_times, start=1)
+        ]
+        count = self.add_laps_bulk(rows)
 
         logger.info(f"Added {count}/{len(lap_times)} laps to session {session_id}")
         return count
 
+    def add_laps_bulk(self, rows: list[tuple]) -> int:
+        """Add many laps (across sessions/heats) in a single write.
+
+        Used by add_laps_batch and the LiveRC event crawler so a whole heat
+        or event is one multi-row INSERT instead of one transaction per lap.
+
+        Args:
+            rows: List of (session_id, heat_name, lap_number, lap_time, confidence_rating)
+
+        Returns:
+            Number of laps written
+
+        """
+        valid_rows = [
+            row for row in rows
+            if row[0] and row[3] and row[3] > 0 and 1 <= row[4] <= 5
+        ]
+        if len(valid_rows) < len(rows):
+            logger.warning(f"Skipped {len(rows) - len(valid_rows)} invalid lap rows")
+        if not valid_rows:
+            return 0
+
+        try:
+            if self.use_database:
+                db.execute_values(
+                    """
+                    INSERT INTO run_logs
+                    (session_id, heat_name, lap_number, lap_time, confidence_rating)
+                    VALUES %s
+                    """,
+                    valid_rows
+                )
+            else:
+                created_at = datetime.now().isoformat()
+                with open(self.csv_file, 'a', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerows([(*row, created_at) for row in valid_rows])
+
+            return len(valid_rows)
+
+        except Exception as e:
+            logger.error(f"Error adding laps in bulk: {str(e)}")
+            return 0
+
     def get_session_laps(self, session_id: str) -> list[float]:
         """Get all lap times for a session (ordered by lap_number).
 
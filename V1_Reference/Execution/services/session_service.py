@@ -10,6 +10,7 @@ import uuid
 from datetime import date
 
 from Execution.database.database import db
+from Execution.services.setup_model import EMPTY_FINGERPRINT, setup_fingerprint
 
 
 class SessionService:
@@ -43,6 +44,7 @@ class SessionService:
                 - actual_setup: dict (the Digital Twin)
                 - practice_rounds: int (0-5+, optional, for ORP Strategy)
                 - qualifying_rounds: int (1-6, optional, for ORP Strategy)
+                - start_date: date (optional, defaults to today; future dates get pre-computed prep plans)
 
         Returns:
             session_id (UUID) or None if failed
@@ -59,13 +61,13 @@ class SessionService:
                 INSERT INTO sessions (
                     profile_id, vehicle_id, session_name, session_type,
                     start_date, track_name, track_size, traction,
-                    surface_type, surface_condition, actual_setup, status,
+                    surface_type, surface_condition, actual_setup, setup_fingerprint, status,
                     practice_rounds, qualifying_rounds
                 )
                 VALUES (
                     %(profile_id)s, %(vehicle_id)s, %(session_name)s, %(session_type)s,
                     %(start_date)s, %(track_name)s, %(track_size)s, %(traction)s,
-                    %(surface_type)s, %(surface_condition)s, %(actual_setup)s, 'active',
+                    %(surface_type)s, %(surface_condition)s, %(actual_setup)s, %(setup_fingerprint)s, 'active',
                     %(practice_rounds)s, %(qualifying_rounds)s
                 )
                 RETURNING id
@@ -75,13 +77,14 @@ class SessionService:
                     'vehicle_id': vehicle_id,
                     'session_name': session_data.get('session_name', 'Unnamed Session'),
                     'session_type': session_data.get('session_type', 'Practice'),
-                    'start_date': date.today(),
+                    'start_date': session_data.get('start_date') or date.today(),
                     'track_name': session_data.get('track_name', ''),
                     'track_size': session_data.get('track_size', 'Medium'),
                     'traction': session_data.get('traction', 'Medium'),
                     'surface_type': session_data.get('surface_type', 'Dry'),
                     'surface_condition': session_data.get('surface_condition', 'Smooth'),
                     'actual_setup': json.dumps(session_data.get('actual_setup', {})),
+                    'setup_fingerprint': setup_fingerprint(session_data.get('actual_setup')),
                     'practice_rounds': session_data.get('practice_rounds', 0),
                     'qualifying_rounds': session_data.get('qualifying_rounds', 0)
                 }
@@ -186,12 +189,14 @@ class SessionService:
                 """
                 UPDATE sessions
                 SET actual_setup = %(actual_setup)s,
+                    setup_fingerprint = %(setup_fingerprint)s,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = %(session_id)s
                 """,
                 {
                     'session_id': session_id,
-                    'actual_setup': json.dumps(actual_setup)
+                    'actual_setup': json.dumps(actual_setup),
+                    'setup_fingerprint': setup_fingerprint(actual_setup)
                 },
                 fetch=False
             )
@@ -201,6 +206,46 @@ class SessionService:
             print(f"Error saving session state: {e}")
             return False
 
+    def find_sessions_with_setup(self, actual_setup, track_name, exclude_session_id=None, limit=5):
+        """Past sessions at a track that ran this exact setup (by setup fingerprint).
+
+        Args:
+            actual_setup: Setup in any form (flat dict, JSONB dict or Setup)
+            track_name: Track to look at
+            exclude_session_id: Session to leave out (usually the current one)
+            limit: Maximum sessions returned, newest first
+
+        Returns:
+            List of dicts with id, session_name, session_type, start_date, status
+
+        """
+        fingerprint = setup_fingerprint(actual_setup)
+        if not self.use_database or not track_name or fingerprint == EMPTY_FINGERPRINT:
+            return []
+
+        try:
+            return db.execute_query(
+                """
+                SELECT id, session_name, session_type, start_date, status
+                FROM sessions
+                WHERE track_name = %(track_name)s
+                  AND setup_fingerprint = %(fingerprint)s
+                  AND status IN ('active', 'closed')
+                  AND id IS DISTINCT FROM %(exclude)s::uuid
+                ORDER BY start_date DESC NULLS LAST, created_at DESC
+                LIMIT %(limit)s
+                """,
+                {
+                    'track_name': track_name,
+                    'fingerprint': fingerprint,
+                    'exclude': str(exclude_session_id) if exclude_session_id else None,
+                    'limit': limit
+                }
+            )
+        except Exception as e:
+            print(f"Error finding sessions with setup: {e}")
+            return []
+
     def load_session(self, session_id):
         """Load a specific session by ID.
 
@@ -542,6 +587,7 @@ class SessionService:
                         surface_type = %(surface_type)s,
                         surface_condition = %(surface_condition)s,
                         actual_setup = %(actual_setup)s,
+                        setup_fingerprint = %(setup_fingerprint)s,
                         device_info = %(device_info)s,
                         last_updated = CURRENT_TIMESTAMP
                     WHERE id = %(session_id)s
@@ -557,6 +603,7 @@ class SessionService:
                         'surface_type': session_data.get('surface_type', 'Dry'),
                         'surface_condition': session_data.get('surface_condition', 'Smooth'),
                         'actual_setup': json.dumps(session_data.get('actual_setup', {})),
+                        'setup_fingerprint': setup_fingerprint(session_data.get('actual_setup')),
                         'device_info': device_info
                     },
                     fetch=False
@@ -569,13 +616,13 @@ class SessionService:
                     INSERT INTO sessions (
                         profile_id, vehicle_id, session_name, session_type,
                         session_date, track_name, track_size, traction,
-                        surface_type, surface_condition, actual_setup, status,
+                        surface_type, surface_condition, actual_setup, setup_fingerprint, status,
                         device_info, last_updated
                     )
                     VALUES (
                         %(profile_id)s, %(vehicle_id)s, %(session_name)s, %(session_type)s,
                         %(session_date)s, %(track_name)s, %(track_size)s, %(traction)s,
-                        %(surface_type)s, %(surface_condition)s, %(actual_setup)s, 'draft',
+                        %(surface_type)s, %(surface_condition)s, %(actual_setup)s, %(setup_fingerprint)s, 'draft',
                         %(device_info)s, CURRENT_TIMESTAMP
                     )
                     RETURNING id
@@ -592,6 +639,7 @@ class SessionService:
                         'surface_type': session_data.get('surface_type', 'Dry'),
                         'surface_condition': session_data.get('surface_condition', 'Smooth'),
                         'actual_setup': json.dumps(session_data.get('actual_setup', {})),
+                        'setup_fingerprint': setup_fingerprint(session_data.get('actual_setup')),
                         'device_info': device_info
                     }
                 )
@@ -0,0 +1,281 @@
+"""Batch setup-sheet ingestion for the Master Chassis Library.
+
+Parses a directory (or list) of setup sheet PDFs in a process pool, caches
+each parse by the file's SHA-256 so re-uploads are instant, reports per-file
+timing, and bulk-imports the results into master_library.
+
+Worker processes only read AcroForm fields. Sheets that need the Vision
+fallback are parsed afterwards in this process, so every API call goes
+through the one vision_executor and its requests-per-minute limit.
+
+Usage:
+    python -m Execution.services.setup_ingest ./Tekno_Archive --brand Tekno \\
+        --model "NB48 2.2" --track "Manufacturer Baseline" --import
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from Execution.services.setup_parser import PARSER_VERSION, VISION_PROMPT_VERSION
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's bytes (streamed in 1MB chunks)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_in_worker(path: str, brand: str, use_vision: bool = True) -> tuple[Optional[dict], Optional[str], float]:
+    """Parse one PDF and time it.
+
+    Process-pool workers pass use_vision=False: they only read AcroForm
+    fields, and sheets that need Vision are finished in the parent process.
+    """
+    from Execution.services.setup_parser import setup_parser
+
+    start = time.perf_counter()
+    try:
+        setup = setup_parser.parse_pdf(path, brand) if use_vision else setup_parser.parse_form(path, brand)
+        error = None if setup else "No setup data extracted"
+    except Exception as e:
+        setup, error = None, str(e)
+    return setup, error, time.perf_counter() - start
+
+
+def _parse_with_vision(path: str, brand: str) -> tuple[Optional[dict], Optional[str], float]:
+    """Vision-only parse of one PDF in this process (shared executor and rate limit)."""
+    from Execution.services.setup_parser import setup_parser
+
+    start = time.perf_counter()
+    try:
+        setup = setup_parser.parse_pdf_with_vision(path, brand)
+        error = None if setup else "No setup data extracted"
+    except Exception as e:
+        setup, error = None, str(e)
+    return setup, error, time.perf_counter() - start
+
+
+class SetupIngestPipeline:
+    """Parallel PDF setup-sheet parser with a hash-keyed parse cache."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        """Initialize the pipeline.
+
+        Args:
+            cache_dir: Directory for cached parses (default Execution/data/parse_cache,
+                created on first write)
+            max_workers: Process pool size (default: CPU count)
+
+        """
+        self.cache_dir = cache_dir or os.path.join(DATA_DIR, "parse_cache")
+        self.max_workers = max_workers
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_path(self, sha256: str, brand: str) -> str:
+        # Brand selects the field mapping, and the parser/prompt versions change
+        # what a parse returns, so all are part of the key
+        version = f"{PARSER_VERSION}-{VISION_PROMPT_VERSION}"
+        return os.path.join(self.cache_dir, f"{sha256}_{brand.lower()}_v{version}.json")
+
+    def get_cached(self, sha256: str, brand: str) -> Optional[dict]:
+        """Cached setup dict for a file hash + brand, or None."""
+        path = self._cache_path(sha256, brand)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)["setup"]
+        except Exception as e:
+            print(f"Error reading parse cache {path}: {e}")
+            return None
+
+    def _store(self, sha256: str, brand: str, source_name: str, setup: dict):
+        """Write a successful parse to the cache (failed parses are not cached)."""
+        path = self._cache_path(sha256, brand)
+        tmp_path = f"{path}.tmp"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "sha256": sha256,
+                "brand": brand,
+                "parser_version": PARSER_VERSION,
+                "prompt_version": VISION_PROMPT_VERSION,
+                "source": source_name,
+                "parsed_at": datetime.now().isoformat(),
+                "setup": setup,
+            }, f)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def collect_files(sources, recursive: bool = True) -> list[str]:
+        """Expand a directory, file path, or list of either into PDF paths."""
+        if isinstance(sources, str):
+            sources = [sources]
+
+        files = []
+        for source in sources:
+            if os.path.isdir(source):
+                for root, _dirs, names in os.walk(source):
+                    files.extend(os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".pdf"))
+                    if not recursive:
+                        break
+            elif os.path.isfile(source):
+                files.append(source)
+        return files
+
+    def parse_file(self, path: str, brand: str) -> Optional[dict]:
+        """Parse a single sheet in-process, using the cache (for UI uploads)."""
+        sha256 = file_sha256(path)
+        setup = self.get_cached(sha256, brand)
+        if setup is None:
+            setup, _error, _seconds = _parse_in_worker(path, brand)
+            if setup:
+                self._store(sha256, brand, os.path.basename(path), setup)
+        return setup
+
+    def ingest(self, sources, brand: str, recursive: bool = True) -> list[dict]:
+        """Parse every sheet in sources, cache hits first, misses in a process pool.
+
+        The pool reads AcroForm fields only; sheets it cannot parse get the
+        Vision fallback here, one at a time, through the shared vision_executor.
+
+        Args:
+            sources: Directory, file path, or list of either
+            brand: Vehicle brand (selects the PDF field mapping)
+            recursive: Walk sub-directories
+
+        Returns:
+            List of dicts per file: path, sha256, setup, cached, seconds, error
+
+        """
+        results = []
+        misses = []
+        for path in self.collect_files(sources, recursive):
+            start = time.perf_counter()
+            sha256 = file_sha256(path)
+            setup = self.get_cached(sha256, brand)
+            result = {
+                "path": path,
+                "sha256": sha256,
+                "setup": setup,
+                "cached": setup is not None,
+                "seconds": time.perf_counter() - start,
+                "error": None,
+            }
+            results.append(result)
+            if setup is None:
+                misses.append(result)
+
+        # Identical sheets under different names are parsed once
+        unique = {}
+        for result in misses:
+            unique.setdefault(result["sha256"], result["path"])
+
+        if unique:
+            hashes = list(unique)
+            workers = min(self.max_workers or os.cpu_count() or 1, len(hashes))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = dict(zip(hashes, executor.map(
+                    _parse_in_worker, [unique[h] for h in hashes], [brand] * len(hashes), [False] * len(hashes)
+                )))
+
+            # Vision fallback in this process only (one global API rate limit)
+            for sha256, (setup, error, seconds) in parsed.items():
+                if setup is None:
+                    setup, error, vision_seconds = _parse_with_vision(unique[sha256], brand)
+                    parsed[sha256] = (setup, error, seconds + vision_seconds)
+
+            for sha256, (setup, _error, _seconds) in parsed.items():
+                if setup:
+                    self._store(sha256, brand, os.path.basename(unique[sha256]), setup)
+
+            for result in misses:
+                setup, error, seconds = parsed[result["sha256"]]
+                result.update(setup=setup, error=error, seconds=result["seconds"] + seconds)
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Library import
+    # ------------------------------------------------------------------
+
+    def import_to_library(self, results: list[dict], track: str, brand: str, vehicle: str,
+                          condition: str = "Unknown", source: str = "Pro Sheet",
+                          submitted_by: Optional[int] = None) -> list[int]:
+        """Bulk-insert successfully parsed sheets into master_library.
+
+        Returns:
+            List of new baseline IDs
+
+        """
+        from Execution.services.library_service import library_service
+
+        entries = [
+            {
+                "track": track,
+                "brand": brand,
+                "vehicle": vehicle,
+                "condition": condition,
+                "setup_data": r["setup"],
+                "source": source,
+                "event_name": os.path.splitext(os.path.basename(r["path"]))[0],
+                "submitted_by": submitted_by,
+            }
+            for r in results if r["setup"]
+        ]
+        return library_service.add_baselines_bulk(entries)
+
+
+# Singleton instance
+setup_ingest_pipeline = SetupIngestPipeline()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-parse setup sheet PDFs into the Master Library")
+    parser.add_argument("sources", nargs="+", help="PDF files and/or directories")
+    parser.add_argument("--brand", required=True, help="Vehicle brand (Tekno, Associated, Mugen, Xray)")
+    parser.add_argument("--model", help="Vehicle model (defaults to brand)")
+    parser.add_argument("--track", default="Manufacturer Baseline", help="Track name for imported baselines")
+    parser.add_argument("--condition", default="Unknown", help="Surface condition")
+    parser.add_argument("--workers", type=int, help="Process pool size")
+    parser.add_argument("--import", dest="do_import", action="store_true", help="Import parsed sheets into master_library")
+    args = parser.parse_args()
+
+    pipeline = SetupIngestPipeline(max_workers=args.workers)
+    start = time.perf_counter()
+    results = pipeline.ingest(args.sources, args.brand)
+
+    for r in results:
+        status = "cache" if r["cached"] else ("ok" if r["setup"] else f"FAILED ({r['error']})")
+        params = len(r["setup"]) if r["setup"] else 0
+        print(f"{r['seconds']:7.2f}s  {status:<8} {params:>3} params  {r['path']}")
+
+    parsed = sum(1 for r in results if r["setup"])
+    print(f"\n{parsed}/{len(results)} sheets parsed in {time.perf_counter() - start:.2f}s "
+          f"({sum(1 for r in results if r['cached'])} from cache)")
+
+    if args.do_import:
+        ids = pipeline.import_to_library(results, args.track, args.brand, args.model or args.brand, args.condition)
+        print(f"Imported {len(ids)} baselines into master_library")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""Compact typed setup value shared by the setup services.
+
+A setup travels as a nested JSONB document (vehicles.baseline_setup,
+master_library.setup), a flat SETUP_KEYS dict (car_configs.csv rows,
+actual_setup), a pandas row, or a baseline_manager pydantic model
+(NB48_2_2 / NT48_2_2). Setup holds the values once, as a tuple in
+SETUP_KEYS order, and converts to and from each of those forms.
+
+Values are canonical: missing values (None, NaN, pd.NA) are None, numpy
+scalars are plain Python, integral floats are ints (7000.0 == 7000), and
+text values are interned, so the few distinct spring/piston/tire names are
+shared and compare by identity. A Setup is immutable; its hash is computed
+once, so equality and dict/set membership are cheap.
+
+fingerprint() is a looser, stable identity for storage: values are
+normalized the way the comparison view reads them (numeric text is a
+number, text is case- and whitespace-insensitive, blanks and the "—"
+marker are missing) and hashed. master_library, vehicles and sessions
+keep it in an indexed setup_fingerprint column, so "same setup" is one
+equality check in SQL.
+"""
+
+import hashlib
+import math
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+
+import pandas as pd
+
+# Setup parameter keys for CSV compatibility
+SETUP_KEYS = [
+    'DF', 'DC', 'DR',
+    'SO_F', 'SP_F', 'SB_F', 'P_F', 'Toe_F', 'RH_F', 'C_F', 'ST_F',
+    'SO_R', 'SP_R', 'SB_R', 'P_R', 'Toe_R', 'RH_R', 'C_R', 'ST_R',
+    'Tread', 'Compound', 'Venturi', 'Pipe', 'Clutch', 'Bell', 'Spur'
+]
+
+# Flat setup key -> (JSONB section, field), mirroring csv_row_to_jsonb
+SETUP_KEY_PATHS = {
+    'DF': ('diffs', 'front'), 'DC': ('diffs', 'center'), 'DR': ('diffs', 'rear'),
+    'SO_F': ('front', 'shock_oil'), 'SP_F': ('front', 'spring'), 'SB_F': ('front', 'sway_bar'),
+    'P_F': ('front', 'pistons'), 'Toe_F': ('front', 'toe'), 'RH_F': ('front', 'ride_height'),
+    'C_F': ('front', 'camber'), 'ST_F': ('front', 'shock_travel'),
+    'SO_R': ('rear', 'shock_oil'), 'SP_R': ('rear', 'spring'), 'SB_R': ('rear', 'sway_bar'),
+    'P_R': ('rear', 'pistons'), 'Toe_R': ('rear', 'toe'), 'RH_R': ('rear', 'ride_height'),
+    'C_R': ('rear', 'camber'), 'ST_R': ('rear', 'shock_travel'),
+    'Tread': ('tires', 'tread'), 'Compound': ('tires', 'compound'),
+    'Venturi': ('power', 'venturi'), 'Pipe': ('power', 'pipe'), 'Clutch': ('power', 'clutch'),
+    'Bell': ('power', 'bell'), 'Spur': ('power', 'spur')
+}
+
+# Flat setup key -> (model section, field) on baseline_manager.BaseVehicleSetup.
+# ST_F/ST_R have no model field and the model's droop has no flat key.
+MODEL_KEY_PATHS = {
+    'DF': ('diffs', 'front'), 'DC': ('diffs', 'center'), 'DR': ('diffs', 'rear'),
+    'SO_F': ('shocks', 'oil_front'), 'SO_R': ('shocks', 'oil_rear'),
+    'P_F': ('shocks', 'piston_front'), 'P_R': ('shocks', 'piston_rear'),
+    'SP_F': ('shocks', 'spring_front'), 'SP_R': ('shocks', 'spring_rear'),
+    'SB_F': ('shocks', 'sway_bar_front'), 'SB_R': ('shocks', 'sway_bar_rear'),
+    'Toe_F': ('geometry', 'toe_front'), 'Toe_R': ('geometry', 'toe_rear'),
+    'RH_F': ('geometry', 'ride_height_front'), 'RH_R': ('geometry', 'ride_height_rear'),
+    'C_F': ('geometry', 'camber_front'), 'C_R': ('geometry', 'camber_rear'),
+    'Tread': ('tires', 'tread'), 'Compound': ('tires', 'compound'),
+    'Venturi': ('engine', 'venturi'), 'Pipe': ('engine', 'pipe'), 'Clutch': ('engine', 'clutch'),
+    'Bell': ('gearing', 'bell'), 'Spur': ('gearing', 'spur')
+}
+
+SETUP_INDEX = {key: i for i, key in enumerate(SETUP_KEYS)}
+_MODEL_SECTIONS = list(dict.fromkeys(section for section, _field in MODEL_KEY_PATHS.values()))
+
+# JSONB layout as (section, [(field, index), ...]) in csv_row_to_jsonb order
+_JSONB_LAYOUT = []
+for _key, (_section, _field) in SETUP_KEY_PATHS.items():
+    if not _JSONB_LAYOUT or _JSONB_LAYOUT[-1][0] != _section:
+        _JSONB_LAYOUT.append((_section, []))
+    _JSONB_LAYOUT[-1][1].append((_field, SETUP_INDEX[_key]))
+_JSONB_FIELDS = [(section, [field for field, _i in fields]) for section, fields in _JSONB_LAYOUT]
+
+
+def canonical_value(value):
+    """Canonical setup value: missing -> None, numpy -> Python, 7000.0 -> 7000, text interned."""
+    kind = type(value)
+    if kind is float:
+        if value.is_integer():
+            return int(value)
+        return None if value != value else value
+    if kind is str:
+        return sys.intern(value)
+    if kind is int or value is None:
+        return value
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, 'item'):
+        return canonical_value(value.item())
+    return value
+
+
+# Bump when fingerprint_token changes (and clear the stored setup_fingerprint
+# columns so migration_manager.backfill_setup_fingerprints recomputes them)
+FINGERPRINT_VERSION = 1
+MISSING_MARKER = "—"  # ComparisonService's display value for a missing parameter
+_MISSING_TEXT = frozenset(["", MISSING_MARKER, "-", "nan", "none", "null", "n/a"])
+
+
+def _number_token(number):
+    if number != number or number in (math.inf, -math.inf):
+        return MISSING_MARKER
+    if number == int(number):
+        return str(int(number))
+    return format(number, '.9g')
+
+
+@lru_cache(maxsize=4096)
+def _text_token(text):
+    # Text values repeat (springs, pistons, compounds), so tokens are memoized
+    text = " ".join(text.split()).casefold()
+    if text in _MISSING_TEXT:
+        return MISSING_MARKER
+    if text[0] in "0123456789+-.":
+        try:
+            return _number_token(float(text))
+        except ValueError:
+            pass
+    return text
+
+
+def fingerprint_token(value):
+    """Normalized text of one setup value, as used in the fingerprint.
+
+    7000, 7000.0 and " 7000 " are "7000"; "Yellow  (78mm)" and "yellow (78MM)"
+    are the same text; None, NaN, "" and "—" are the missing marker.
+    """
+    return _token(canonical_value(value))
+
+
+def _token(value):
+    """fingerprint_token of an already canonical value."""
+    kind = type(value)
+    if kind is str:
+        return _text_token(value)
+    if kind is int:
+        return str(value)
+    if value is None:
+        return MISSING_MARKER
+    if kind is float:
+        return _number_token(value)
+    if kind is bool:
+        return str(value).lower()
+    return _text_token(str(value))
+
+
+def setup_fingerprint(setup):
+    """Fingerprint of a setup in any supported form (see Setup.coerce)."""
+    return Setup.coerce(setup).fingerprint()
+
+
+class Setup(Mapping):
+    """Immutable setup values in SETUP_KEYS order.
+
+    Reads like a read-only flat dict (setup['DF'], setup.get('Tread'),
+    dict(setup)), so it can stand in where a flat setup dict is read.
+    """
+
+    __slots__ = ('_values', '_hash', '_fingerprint')
+
+    def __init__(self, values=()):
+        """Build from values in SETUP_KEYS order (missing trailing values are None)."""
+        values = tuple(map(canonical_value, values))
+        if len(values) > len(SETUP_KEYS):
+            raise ValueError(f"Setup takes at most {len(SETUP_KEYS)} values, got {len(values)}")
+        self._values = values + (None,) * (len(SETUP_KEYS) - len(values))
+        self._hash = None
+        self._fingerprint = None
+
+    @classmethod
+    def _from_values(cls, values):
+        """Wrap a full tuple of already canonical values (no conversion)."""
+        setup = cls.__new__(cls)
+        setup._values = values
+        setup._hash = None
+        setup._fingerprint = None
+        return setup
+
+    # --- Construction ---
+
+    @classmethod
+    def from_flat(cls, row):
+        """From a flat mapping with SETUP_KEYS entries (dict, pandas row, Setup)."""
+        if isinstance(row, Setup):
+            return row
+        get = row.get
+        return cls([get(key) for key in SETUP_KEYS])
+
+    @classmethod
+    def from_jsonb(cls, setup_json):
+        """From a nested JSONB setup document ({section: {field: value}})."""
+        setup_json = setup_json or {}
+        values = []
+        for section, fields in _JSONB_FIELDS:
+            values.extend(map((setup_json.get(section) or {}).get, fields))
+        return cls(values)
+
+    @classmethod
+    def from_model(cls, model):
+        """From a baseline_manager vehicle setup model (NB48_2_2, NT48_2_2)."""
+        sections = {section: getattr(model, section, None) for section in _MODEL_SECTIONS}
+        return cls([getattr(sections[MODEL_KEY_PATHS[key][0]], MODEL_KEY_PATHS[key][1], None)
+                    if key in MODEL_KEY_PATHS else None
+                    for key in SETUP_KEYS])
+
+    @classmethod
+    def coerce(cls, setup):
+        """Setup from any supported form: Setup, JSONB document, model or flat mapping."""
+        if isinstance(setup, Setup):
+            return setup
+        if setup is None:
+            return cls()
+        if hasattr(setup, 'model_fields') and hasattr(setup, 'shocks'):
+            return cls.from_model(setup)
+        if any(section in setup for section in ('diffs', 'front', 'rear', 'tires', 'power')):
+            return cls.from_jsonb(setup)
+        return cls.from_flat(setup)
+
+    # --- Conversion ---
+
+    def to_flat(self, car_name=None):
+        """Flat dict of SETUP_KEYS; with car_name, a config row like jsonb_to_csv_row."""
+        flat = dict(zip(SETUP_KEYS, self._values))
+        if car_name is not None:
+            return {'Car': car_name, **flat}
+        return flat
+
+    def to_jsonb(self):
+        """Nested JSONB document, same layout as csv_row_to_jsonb."""
+        values = self._values
+        return {section: {field: values[i] for field, i in fields} for section, fields in _JSONB_LAYOUT}
+
+    def to_series(self, name=None):
+        """pandas row (object dtype) indexed by SETUP_KEYS."""
+        return pd.Series(self._values, index=SETUP_KEYS, dtype=object, name=name)
+
+    def to_model(self, model_cls, **fields):
+        """baseline_manager model of `model_cls` (e.g. NB48_2_2).
+
+        Values missing here (and the model-only droop section) keep the
+        model's defaults; `fields` supplies id, name, version and overrides.
+        """
+        sections = {}
+        for section in _MODEL_SECTIONS:
+            default = model_cls.model_fields[section].get_default(call_default_factory=True)
+            sections[section] = default.model_dump() if hasattr(default, 'model_dump') else {}
+        for key, (section, field) in MODEL_KEY_PATHS.items():
+            value = self._values[SETUP_INDEX[key]]
+            if value is not None:
+                sections[section][field] = value
+        return model_cls(**{**sections, **fields})
+
+    # --- Updates and comparison ---
+
+    def replace(self, updates):
+        """New Setup with the given flat keys changed (unknown keys raise KeyError)."""
+        values = list(self._values)
+        for key, value in updates.items():
+            values[SETUP_INDEX[key]] = value
+        return Setup(values)
+
+    def diff(self, other, keys=None):
+        """Keys (in SETUP_KEYS order, or of `keys`) whose values differ from `other`."""
+        other = Setup.coerce(other)
+        if self == other:
+            return []
+        mine, theirs = self._values, other._values
+        if keys is None:
+            return [key for key, a, b in zip(SETUP_KEYS, mine, theirs) if a != b]
+        return [key for key in keys if mine[SETUP_INDEX[key]] != theirs[SETUP_INDEX[key]]]
+
+    def fingerprint(self):
+        """Stable SHA-256 hex of the normalized values (see fingerprint_token).
+
+        Unlike ==, which compares exact values, setups that differ only in
+        number formatting, text case/whitespace or missing markers share a
+        fingerprint. It is stable across processes and releases (until
+        FINGERPRINT_VERSION changes), so it can be stored and indexed.
+        """
+        if self._fingerprint is None:
+            tokens = [f"v{FINGERPRINT_VERSION}"] + list(map(_token, self._values))
+            self._fingerprint = hashlib.sha256("\x1f".join(tokens).encode("utf-8")).hexdigest()
+        return self._fingerprint
+
+    # --- Mapping protocol ---
+
+    def __getitem__(self, key):
+        return self._values[SETUP_INDEX[key]]
+
+    def get(self, key, default=None):
+        index = SETUP_INDEX.get(key)
+        if index is None:
+            return default
+        value = self._values[index]
+        return default if value is None else value
+
+    def __iter__(self):
+        return iter(SETUP_KEYS)
+
+    def __len__(self):
+        return len(SETUP_KEYS)
+
+    def __contains__(self, key):
+        return key in SETUP_INDEX
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Setup):
+            return NotImplemented
+        return hash(self) == hash(other) and self._values == other._values
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._values)
+        return self._hash
+
+    def __repr__(self):
+        values = ', '.join(f"{key}={value!r}" for key, value in zip(SETUP_KEYS, self._values) if value is not None)
+        return f"Setup({values})"
+
+    def __getstate__(self):
+        return self._values
+
+    def __setstate__(self, state):
+        self._values = state
+        self._hash = None
+        self._fingerprint = None
+
+
+# Fingerprint of a setup with no values; lookups skip it so blank setups never "match"
+EMPTY_FINGERPRINT = Setup().fingerprint()
+
+
+def _benchmark(count=10000):
+    """Compare dict-based setup handling with Setup on `count` setups."""
+    import hashlib
+    import json
+    import random
+    import time
+
+    from Execution.services.config_service import csv_row_to_jsonb, jsonb_to_csv_row
+
+    rng = random.Random(7)
+    springs = ["Yellow (78mm)", "Yellow (73mm)", "Pink (85mm)", "Red (90mm)"]
+    rows = []
+    for _ in range(count):
+        row = {key: float(rng.choice([500, 550, 600])) for key in SETUP_KEYS}
+        for key in ('SP_F', 'SP_R', 'P_F', 'P_R', 'Tread', 'Compound', 'Pipe', 'Clutch'):
+            row[key] = rng.choice(springs)
+        rows.append(row)
+    docs = [csv_row_to_jsonb(row) for row in rows]
+
+    def dict_digest(row):
+        values = {key: row.get(key) for key in SETUP_KEYS}
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        result = fn()
+        print(f"  {label}: {(time.perf_counter() - start) * 1000:.0f} ms")
+        return result
+
+    print(f"{count} setups")
+    setups = timed("JSONB -> Setup", lambda: [Setup.from_jsonb(doc) for doc in docs])
+    timed("JSONB -> flat dict (jsonb_to_csv_row)", lambda: [jsonb_to_csv_row(doc, "") for doc in docs])
+    timed("Setup -> JSONB", lambda: [setup.to_jsonb() for setup in setups])
+    timed("flat dict -> JSONB (csv_row_to_jsonb)", lambda: [csv_row_to_jsonb(row) for row in rows])
+
+    copies = [Setup.from_flat(row) for row in rows]
+    timed("equality, flat dicts by digest", lambda: sum(dict_digest(a) == dict_digest(b) for a, b in zip(rows, rows)))
+    timed("equality, Setup", lambda: sum(a == b for a, b in zip(setups, copies)))
+    timed("distinct setups, Setup set", lambda: len(set(setups)))
+    timed("fingerprint (stored dedup key)", lambda: [setup.fingerprint() for setup in copies])
+
+    size = sys.getsizeof
+    dict_bytes = size(rows[0]) + sum(size(v) for v in rows[0].values())
+    setup_bytes = size(setups[0]) + size(setups[0]._values)
+    print(f"  per setup: flat dict ~{dict_bytes} B, Setup ~{setup_bytes} B (values shared)")
+    assert all(setup.to_jsonb() == Setup.from_flat(row).to_jsonb() for setup, row in zip(setups, rows))
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -1,8 +1,23 @@
 import os
+from itertools import islice
 from typing import Optional
 
 import PyPDF2
 
+from Execution.services.sheet_rasterizer import FULL_PAGE, rasterize_regions
+from Execution.services.vision_executor import vision_executor
+
+# Bump when the vision prompt changes so cached Vision results are not reused
+VISION_PROMPT_VERSION = "1.7.1"
+
+# Bump when field mappings or type conversion change; setup_ingest's parse
+# cache is keyed on it (together with VISION_PROMPT_VERSION)
+PARSER_VERSION = "1.7.2"
+
+# Fewer extracted parameters than this counts as a failed extraction
+# (AcroForm -> Vision fallback, ROI crops -> full-page render)
+MIN_SETUP_KEYS = 5
+
 
 class SetupParser:
     """Hybrid parsing engine for setup sheets.
@@ -133,87 +148,136 @@ class SetupParser:
             reader = PyPDF2.PdfReader(pdf_path)
 
             # Try AcroForm extraction first
-            if "/AcroForm" in reader.trailer["/Root"]:
-                fields = reader.get_fields()
-
-                if fields:
-                    # Get brand-specific mapping
-                    mapping = self.brand_mappings.get(brand, {})
-
-                    # Extract and map values
-                    setup_data = {}
-                    for field_name, field_data in fields.items():
-                        if field_name in mapping:
-                            our_key = mapping[field_name]
-                            value = field_data.get('/V', '')
-
-                            # Type conversion
-                            if our_key in ['DF', 'DC', 'DR', 'SO_F', 'SO_R', 'Bell', 'Spur']:
-                                setup_data[our_key] = int(value) if value else 0
-                            elif our_key in ['SB_F', 'SB_R', 'Toe_F', 'Toe_R', 'RH_F', 'RH_R', 'C_F', 'C_R', 'Venturi']:
-                                setup_data[our_key] = float(value) if value else 0.0
-                            else:
-                                setup_data[our_key] = str(value)
-
-                    # If we got enough data (5+ parameters), return it
-                    if len(setup_data) >= 5:
-                        return setup_data
+            setup_data = self.parse_form(pdf_path, brand, reader=reader)
+            if setup_data:
+                return setup_data
 
             # FALLBACK: Convert PDF to image and use Vision AI
             # This handles: Mugen (no fields), Xray (numeric codes), or insufficient extraction
             print(f"AcroForm extraction insufficient for {brand}. Falling back to Vision AI...")
-            return self._pdf_to_vision(pdf_path, brand)
+            return self._pdf_to_vision(pdf_path, brand, reader=reader)
 
         except Exception as e:
             print(f"PDF parsing error: {e}")
             return None
 
-    def _pdf_to_vision(self, pdf_path: str, brand: str) -> Optional[dict]:
-        """Convert PDF first page to image and parse with Vision AI.
-        Internal method used as fallback from parse_pdf.
+    def parse_form(self, pdf_path: str, brand: str, reader=None) -> Optional[dict]:
+        """AcroForm extraction only (no Vision fallback).
+
+        Used by parse_pdf, and by setup_ingest's worker processes so that all
+        Vision calls stay in the parent process under one rate limit.
+
+        Returns:
+            Dict with 5+ extracted parameters, or None if the form is insufficient
+
         """
-        try:
-            # Convert PDF first page to image using PyPDF2 + PIL
-            import io
+        reader = reader or PyPDF2.PdfReader(pdf_path)
+        if "/AcroForm" in reader.trailer["/Root"]:
+            fields = reader.get_fields()
+
+            if fields:
+                # Get brand-specific mapping
+                mapping = self.brand_mappings.get(brand, {})
+
+                # Extract and map values
+                setup_data = {}
+                for field_name, field_data in fields.items():
+                    if field_name in mapping:
+                        our_key = mapping[field_name]
+                        value = field_data.get('/V', '')
+
+                        # Type conversion
+                        if our_key in ['DF', 'DC', 'DR', 'SO_F', 'SO_R', 'Bell', 'Spur']:
+                            setup_data[our_key] = int(value) if value else 0
+                        elif our_key in ['SB_F', 'SB_R', 'Toe_F', 'Toe_R', 'RH_F', 'RH_R', 'C_F', 'C_R', 'Venturi']:
+                            setup_data[our_key] = float(value) if value else 0.0
+                        else:
+                            setup_data[our_key] = str(value)
+
+                # If we got enough data (5+ parameters), return it
+                if len(setup_data) >= MIN_SETUP_KEYS:
+                    return setup_data
+        return None
+
+    def parse_pdf_with_vision(self, pdf_path: str, brand: str) -> Optional[dict]:
+        """Vision-only parse of a PDF sheet (parse_pdf's fallback on its own)."""
+        return self._pdf_to_vision(pdf_path, brand)
+
+    def _pdf_to_vision(self, pdf_path: str, brand: str, reader=None, stats: Optional[dict] = None) -> Optional[dict]:
+        """Rasterize the PDF's first page into brand ROI crops and parse them with Vision AI.
+        Internal method used as fallback from parse_pdf (which passes its
+        already-open reader so the PDF is not parsed twice).
+
+        Crops are rendered at an adaptive DPI in grayscale (see sheet_rasterizer)
+        and sent to the vision executor as one batch, so its concurrency cap
+        and rate limit apply across them. Each crop's result is limited to its
+        block's keys. The ROI boxes are approximate, so when the crops yield
+        fewer than MIN_SETUP_KEYS parameters the whole page is parsed instead.
 
-            reader = PyPDF2.PdfReader(pdf_path)
-            if len(reader.pages) == 0:
-                return None
-
-            # Convert PDF to image using pdf2image library
-            try:
-                from pdf2image import convert_from_path
-                images = convert_from_path(pdf_path, first_page=1, last_page=1, dpi=200)
-                if images:
-                    # Convert PIL Image to bytes
-                    img_byte_arr = io.BytesIO()
-                    images[0].save(img_byte_arr, format='JPEG', quality=95)
-                    img_byte_arr = img_byte_arr.getvalue()
-
-                    # Use Vision AI parsing
-                    return self.parse_with_vision(img_byte_arr, brand)
-            except ImportError:
-                print("pdf2image not installed. Cannot convert PDF to image for Vision AI fallback.")
-                print("Install with: pip install pdf2image")
-                return None
+        Args:
+            pdf_path: Path to the PDF file
+            brand: Vehicle brand (selects the ROI template)
+            reader: Already-open PyPDF2 reader
+            stats: Optional dict filled with rasterization stats (dpi, payload_bytes, ...)
 
+        """
+        try:
+            setup_data, cropped = self._parse_regions(pdf_path, brand, reader=reader, stats=stats)
+            if cropped and len(setup_data) < MIN_SETUP_KEYS:
+                print(f"ROI crops gave {len(setup_data)} parameters for {brand}. Parsing the full page...")
+                full_page, _cropped = self._parse_regions(pdf_path, brand, reader=reader, regions=FULL_PAGE)
+                if len(full_page) > len(setup_data):
+                    setup_data = full_page
+            return setup_data or None
+
+        except ImportError:
+            print("pdf2image not installed. Cannot convert PDF to image for Vision AI fallback.")
+            print("Install with: pip install pdf2image")
+            return None
         except Exception as e:
             print(f"PDF to Vision fallback error: {e}")
             return None
 
-    def parse_with_vision(self, image_bytes: bytes, brand: str) -> Optional[dict]:
-        """Extract setup data from an image using AI Vision (Claude). v1.7.0."""
-        import base64
-        import json
-
-        import anthropic
+    def _parse_regions(self, pdf_path: str, brand: str, reader=None, regions=None,
+                       stats: Optional[dict] = None) -> tuple[dict, bool]:
+        """Parse page-1 crops and merge them.
 
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
-            return None
+        Crops are pulled from the rasterizer in batches of the executor's
+        concurrency and sent to vision as each batch fills, so only one
+        batch of JPEGs is held in memory at a time.
 
-        client = anthropic.Anthropic(api_key=api_key)
+        Returns:
+            Tuple of (merged setup dict, whether the page was cropped into regions)
 
+        """
+        crops = rasterize_regions(pdf_path, brand, reader=reader, regions=regions, stats=stats)
+        batch_size = max(1, vision_executor.max_concurrency)
+
+        setup_data = {}
+        cropped = False
+        while True:
+            batch = list(islice(crops, batch_size))
+            if not batch:
+                break
+            prompts = [self._vision_prompt(brand, keys=region["keys"], region=region["name"]) for region, _jpeg in batch]
+            results = vision_executor.parse_many([jpeg for _region, jpeg in batch], prompts=prompts,
+                                                 prompt_version=VISION_PROMPT_VERSION)
+
+            # Merge crops; keys outside a crop's block are ignored
+            for (region, _jpeg), result in zip(batch, results):
+                result = result or {}
+                if region["keys"] is not None:
+                    cropped = True
+                    result = {key: value for key, value in result.items() if key in region["keys"]}
+                setup_data.update(result)
+        return setup_data, cropped
+
+    def _vision_prompt(self, brand: str, keys: Optional[list[str]] = None, region: Optional[str] = None) -> str:
+        """Vision extraction prompt for a brand (bump VISION_PROMPT_VERSION when editing).
+
+        When keys are given the image is a cropped block of the sheet and the
+        prompt is narrowed to that block's parameters.
+        """
         # Enhanced vision prompt with examples (v1.7.0)
         vision_prompt = f"""
 You are analyzing an RC car setup sheet for {brand}. Extract all visible setup parameters.
@@ -239,32 +303,33 @@ EXAMPLE OUTPUT:
 {{"DF": 5000, "DC": 7000, "DR": 3000, "SO_F": 450, "SO_R": 500, "SP_F": "Silver", "SP_R": "Gold", "Tread": "Bar Codes", "Compound": "Blue"}}
 
 If a parameter is not visible or unclear, omit it from the JSON. Only include parameters you can clearly read.
+"""
+        if keys:
+            vision_prompt += f"""
+This image is a cropped section ({region}) of the sheet. Only return these keys if visible: {", ".join(keys)}
 """
 
-        try:
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-            response = client.messages.create(
-                model="claude-3-5-sonnet-20241022",  # v1.7.0 - Latest vision model
-                max_tokens=1000,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": image_base64}},
-                        {"type": "text", "text": vision_prompt}
-                    ]
-                }]
-            )
-
-            # Extract JSON from response
-            res_text = response.content[0].text
-            import re
-            json_match = re.search(r'\{.*\}', res_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-            return None
-        except Exception as e:
-            print(f"Vision parsing error: {e}")
-            return None
+        return vision_prompt
+
+    def parse_with_vision(self, image_bytes: bytes, brand: str) -> Optional[dict]:
+        """Extract setup data from an image using AI Vision (Claude). v1.7.0.
+        Results are cached by image bytes + prompt version (see vision_executor).
+        """
+        return vision_executor.parse(image_bytes, self._vision_prompt(brand), VISION_PROMPT_VERSION)
+
+    def parse_many_with_vision(self, images: list[bytes], brand: str) -> list[Optional[dict]]:
+        """Parse several setup sheet images concurrently (cached, rate-limited).
+
+        Args:
+            images: Image bytes for each sheet
+            brand: Vehicle brand
+
+        Returns:
+            Parsed setup dicts (None where parsing failed), in input order
+
+        """
+        return vision_executor.parse_many(images, prompt=self._vision_prompt(brand),
+                                          prompt_version=VISION_PROMPT_VERSION)
 
     def save_custom_template(self, uploaded_file, brand: str, model: str):
         """Save a user-uploaded template to the templates directory.
@@ -0,0 +1,233 @@
+"""Region-aware rasterization of setup-sheet PDFs for Vision parsing.
+
+Replaces the 200 DPI full-page / quality-95 JPEG render used by the Vision
+fallback with:
+- an adaptive DPI that targets the vision model's useful resolution
+  (long edge ~1568px) instead of a fixed 200 DPI,
+- grayscale rendering (setup sheets carry no information in color),
+- brand ROI templates that crop the page to the diff, shock, geometry and
+  gearing blocks, each sent with a prompt limited to that block's keys,
+- a generator that encodes one crop at a time so the page bitmap is dropped
+  as soon as the crops are cut.
+
+ROI boxes are fractions of the page (x0, y0, x1, y1) measured from the top-left.
+They are approximate block positions for each brand's usual sheet layout and
+have not been measured against every sheet revision, so boxes are generous
+and the parser re-sends the full page when the crops yield too few
+parameters. register_roi_template() overrides or adds a brand. Brands
+without a template are sent as one full-page crop at the adaptive DPI.
+"""
+
+import io
+import time
+import tracemalloc
+from typing import Iterator, Optional
+
+# Long-edge pixel target: larger images are downscaled by the vision API anyway
+TARGET_LONG_EDGE_PX = 1568
+MIN_DPI = 72
+MAX_DPI = 200
+JPEG_QUALITY = 80
+
+DIFF_KEYS = ["DF", "DC", "DR"]
+SHOCK_KEYS = ["SO_F", "SP_F", "P_F", "ST_F", "SO_R", "SP_R", "P_R", "ST_R"]
+GEOMETRY_KEYS = ["SB_F", "Toe_F", "RH_F", "C_F", "SB_R", "Toe_R", "RH_R", "C_R"]
+GEARING_KEYS = ["Tread", "Compound", "Clutch", "Bell", "Spur", "Pipe", "Venturi"]
+
+ROI_TEMPLATES = {
+    "Tekno": [
+        {"name": "diffs", "box": (0.00, 0.08, 0.50, 0.30), "keys": DIFF_KEYS},
+        {"name": "shocks", "box": (0.00, 0.28, 1.00, 0.62), "keys": SHOCK_KEYS},
+        {"name": "geometry", "box": (0.50, 0.08, 1.00, 0.30), "keys": GEOMETRY_KEYS},
+        {"name": "gearing", "box": (0.00, 0.60, 1.00, 0.92), "keys": GEARING_KEYS},
+    ],
+    "Associated": [
+        {"name": "diffs", "box": (0.00, 0.55, 0.50, 0.75), "keys": DIFF_KEYS},
+        {"name": "shocks", "box": (0.00, 0.10, 1.00, 0.45), "keys": SHOCK_KEYS},
+        {"name": "geometry", "box": (0.00, 0.10, 1.00, 0.45), "keys": GEOMETRY_KEYS},
+        {"name": "gearing", "box": (0.50, 0.55, 1.00, 0.95), "keys": GEARING_KEYS},
+    ],
+    "Mugen": [
+        {"name": "diffs", "box": (0.30, 0.30, 0.70, 0.55), "keys": DIFF_KEYS},
+        {"name": "shocks", "box": (0.00, 0.05, 1.00, 0.35), "keys": SHOCK_KEYS},
+        {"name": "geometry", "box": (0.00, 0.05, 1.00, 0.35), "keys": GEOMETRY_KEYS},
+        {"name": "gearing", "box": (0.00, 0.55, 1.00, 0.95), "keys": GEARING_KEYS},
+    ],
+    "Xray": [
+        {"name": "diffs", "box": (0.25, 0.35, 0.75, 0.60), "keys": DIFF_KEYS},
+        {"name": "shocks", "box": (0.00, 0.05, 1.00, 0.40), "keys": SHOCK_KEYS},
+        {"name": "geometry", "box": (0.00, 0.05, 1.00, 0.40), "keys": GEOMETRY_KEYS},
+        {"name": "gearing", "box": (0.00, 0.60, 1.00, 0.95), "keys": GEARING_KEYS},
+    ],
+}
+
+FULL_PAGE = [{"name": "page", "box": (0.0, 0.0, 1.0, 1.0), "keys": None}]
+
+
+def register_roi_template(brand: str, regions: list[dict]):
+    """Add or replace a brand's ROI template.
+
+    Args:
+        brand: Vehicle brand
+        regions: List of dicts with name, box (fractional x0, y0, x1, y1), keys
+
+    """
+    ROI_TEMPLATES[brand] = regions
+
+
+def get_roi_template(brand: str) -> list[dict]:
+    """ROI regions for a brand, merging regions that share an identical box."""
+    merged = {}
+    for region in ROI_TEMPLATES.get(brand, FULL_PAGE):
+        box = tuple(region["box"])
+        if box in merged and region["keys"] is not None:
+            merged[box]["name"] += f"+{region['name']}"
+            merged[box]["keys"] = merged[box]["keys"] + region["keys"]
+        else:
+            merged[box] = {"name": region["name"], "box": box, "keys": region["keys"]}
+    return list(merged.values())
+
+
+def adaptive_dpi(page_width_pt: float, page_height_pt: float,
+                 regions: Optional[list[dict]] = None) -> int:
+    """DPI that puts the largest crop's long edge near TARGET_LONG_EDGE_PX.
+
+    Args:
+        page_width_pt: Page width in PDF points (1/72 inch)
+        page_height_pt: Page height in PDF points
+        regions: ROI regions (fractions of the page); full page if omitted
+
+    """
+    regions = regions or FULL_PAGE
+    long_edge_in = max(
+        max((r["box"][2] - r["box"][0]) * page_width_pt, (r["box"][3] - r["box"][1]) * page_height_pt)
+        for r in regions
+    ) / 72.0
+    dpi = int(TARGET_LONG_EDGE_PX / long_edge_in) if long_edge_in else MAX_DPI
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+
+def render_first_page(pdf_path: str, dpi: int):
+    """Render page 1 as a grayscale PIL image (requires pdf2image + poppler)."""
+    from pdf2image import convert_from_path
+    images = convert_from_path(pdf_path, first_page=1, last_page=1, dpi=dpi, grayscale=True)
+    return images[0] if images else None
+
+
+def iter_region_crops(page_image, regions: list[dict], quality: int = JPEG_QUALITY) -> Iterator[tuple[dict, bytes]]:
+    """Yield (region, jpeg_bytes) one crop at a time."""
+    width, height = page_image.size
+    for region in regions:
+        x0, y0, x1, y1 = region["box"]
+        crop = page_image.crop((int(x0 * width), int(y0 * height), int(x1 * width), int(y1 * height)))
+        buffer = io.BytesIO()
+        crop.save(buffer, format="JPEG", quality=quality, optimize=True)
+        crop.close()
+        yield region, buffer.getvalue()
+
+
+def rasterize_regions(pdf_path: str, brand: str, reader=None, render=render_first_page,
+                      stats: Optional[dict] = None,
+                      regions: Optional[list[dict]] = None) -> Iterator[tuple[dict, bytes]]:
+    """Render page 1 at an adaptive DPI and stream brand ROI crops as JPEG bytes.
+
+    Args:
+        pdf_path: Path to the PDF
+        brand: Vehicle brand (selects the ROI template)
+        reader: Already-open PyPDF2 reader (avoids re-parsing the PDF)
+        render: Page renderer (pdf_path, dpi) -> PIL image; swappable for tests
+        stats: Optional dict filled with dpi, regions, payload_bytes, bitmap_bytes,
+               render_seconds
+        regions: Regions to crop instead of the brand template (e.g. FULL_PAGE)
+
+    """
+    if reader is None:
+        import PyPDF2
+        reader = PyPDF2.PdfReader(pdf_path)
+    if len(reader.pages) == 0:
+        return
+
+    box = reader.pages[0].mediabox
+    regions = regions or get_roi_template(brand)
+    dpi = adaptive_dpi(float(box.width), float(box.height), regions)
+
+    start = time.perf_counter()
+    page_image = render(pdf_path, dpi)
+    if page_image is None:
+        return
+    if page_image.mode != "L":
+        page_image = page_image.convert("L")
+
+    if stats is not None:
+        # Decoded page bitmap dominates peak memory (PIL buffers are not seen by tracemalloc)
+        bitmap_bytes = page_image.size[0] * page_image.size[1] * len(page_image.getbands())
+        stats.update(dpi=dpi, regions=len(regions), payload_bytes=0, bitmap_bytes=bitmap_bytes,
+                     render_seconds=time.perf_counter() - start)
+
+    try:
+        for region, jpeg_bytes in iter_region_crops(page_image, regions):
+            if stats is not None:
+                stats["payload_bytes"] += len(jpeg_bytes)
+            yield region, jpeg_bytes
+    finally:
+        page_image.close()
+
+
+def measure(fn, *args, **kwargs) -> tuple[object, dict]:
+    """Run fn and report wall time and Python-heap peak memory (tracemalloc).
+
+    PIL pixel buffers are allocated outside the Python heap; use the
+    bitmap_bytes stat from rasterize_regions for those.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, {"seconds": time.perf_counter() - start, "peak_bytes": peak}
+
+
+def _benchmark():
+    """Legacy 200 DPI RGB q95 full page vs adaptive grayscale ROI crops.
+
+    Uses a synthetic Letter-size page so it runs without poppler.
+    """
+    from PIL import Image, ImageDraw
+
+    def synthetic_render(_pdf_path, dpi, mode="L"):
+        image = Image.new(mode, (int(8.5 * dpi), int(11 * dpi)), "white")
+        draw = ImageDraw.Draw(image)
+        for y in range(0, image.size[1], max(1, dpi // 6)):
+            draw.text((dpi // 2, y), "DF 7000  SO_F 450  Bell 13  Spur 48  Toe -1.0", fill="black")
+        return image
+
+    class _Page:
+        class mediabox:
+            width, height = 612, 792
+
+    class _Reader:
+        pages = [_Page()]
+
+    def legacy():
+        image = synthetic_render(None, 200, mode="RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=95)
+        return len(buffer.getvalue()), image.size[0] * image.size[1] * 3
+
+    def regions():
+        stats = {}
+        crops = list(rasterize_regions("synthetic.pdf", "Tekno", reader=_Reader(), render=synthetic_render, stats=stats))
+        return stats["payload_bytes"], stats["bitmap_bytes"], stats["dpi"], len(crops)
+
+    (legacy_bytes, legacy_bitmap), legacy_m = measure(legacy)
+    (roi_bytes, roi_bitmap, dpi, count), roi_m = measure(regions)
+    print(f"legacy : 200 dpi RGB q95 full page  payload {legacy_bytes / 1024:8.1f} KB  "
+          f"bitmap {legacy_bitmap / 1e6:5.1f} MB  {legacy_m['seconds']:.2f}s")
+    print(f"regions: {dpi} dpi gray q{JPEG_QUALITY}, {count} crops  payload {roi_bytes / 1024:8.1f} KB  "
+          f"bitmap {roi_bitmap / 1e6:5.1f} MB  {roi_m['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    _benchmark()
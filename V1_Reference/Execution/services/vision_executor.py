@@ -0,0 +1,265 @@
+"""Concurrent, rate-limited Vision parsing with a persistent response cache.
+
+Setup-sheet images are keyed by SHA-256 of the image bytes plus the prompt
+text and version, and parsed JSON is cached on disk, so re-parsing a known
+sheet is a file read instead of an API round trip. Uncached images are sent
+concurrently under a concurrency cap and a requests-per-minute limit.
+
+The client is pluggable: AnthropicVisionClient talks to the API,
+StubVisionClient returns canned JSON for offline tests and benchmarks.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def _media_type(image_bytes: bytes) -> str:
+    """Detect the image media type from magic bytes (defaults to JPEG)."""
+    if image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    if image_bytes[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+class AnthropicVisionClient:
+    """Vision client backed by the Anthropic Messages API."""
+
+    def __init__(self, model: str = "claude-3-5-sonnet-20241022", max_tokens: int = 1000):
+        self.model = model
+        self.max_tokens = max_tokens
+        self._client = None
+
+    def complete(self, image_bytes: bytes, prompt: str) -> Optional[str]:
+        """Send one image + prompt, return the response text (None without an API key)."""
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            return None
+
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=api_key)
+
+        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+        response = self._client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "image", "source": {"type": "base64", "media_type": _media_type(image_bytes), "data": image_base64}},
+                    {"type": "text", "text": prompt}
+                ]
+            }]
+        )
+        return response.content[0].text
+
+
+class StubVisionClient:
+    """Offline stand-in for tests and benchmarks: canned JSON after a fixed delay."""
+
+    model = "stub"
+
+    def __init__(self, response: Optional[dict] = None, latency: float = 0.0):
+        self.response = response or {"DF": 5000, "DC": 7000, "DR": 3000, "SO_F": 450, "SO_R": 500}
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, image_bytes: bytes, prompt: str) -> Optional[str]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return json.dumps(self.response)
+
+
+class RateLimiter:
+    """Spaces calls at least 60/requests_per_minute seconds apart across threads."""
+
+    def __init__(self, requests_per_minute: Optional[float]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class VisionParseExecutor:
+    """Cached, concurrent Vision parsing."""
+
+    def __init__(self, client=None, cache_dir: Optional[str] = None,
+                 max_concurrency: int = 4, requests_per_minute: Optional[float] = 50):
+        """Initialize the executor.
+
+        Args:
+            client: Object with complete(image_bytes, prompt) -> str (default AnthropicVisionClient)
+            cache_dir: Directory for cached responses (default Execution/data/vision_cache,
+                created on first write)
+            max_concurrency: Maximum simultaneous API calls
+            requests_per_minute: API call rate limit (None to disable)
+
+        """
+        self.cache_dir = cache_dir or os.path.join(DATA_DIR, "vision_cache")
+        self.client = client or AnthropicVisionClient()
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.stats = {"hits": 0, "misses": 0, "api_calls": 0, "api_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def set_client(self, client):
+        """Swap the backend (e.g. StubVisionClient in tests)."""
+        self.client = client
+
+    @staticmethod
+    def cache_key(image_bytes: bytes, prompt: str, prompt_version: str, model: str = "") -> str:
+        """SHA-256 over image bytes, model, prompt version and prompt text."""
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f"\0{model}\0{prompt_version}\0{prompt}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _read_cache(self, key: str) -> Optional[dict]:
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)["result"]
+        except Exception as e:
+            print(f"Error reading vision cache {path}: {e}")
+            return None
+
+    def _write_cache(self, key: str, prompt_version: str, result: dict):
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"prompt_version": prompt_version, "cached_at": datetime.now().isoformat(), "result": result}, f)
+        os.replace(tmp_path, path)
+
+    def _call(self, image_bytes: bytes, prompt: str) -> Optional[dict]:
+        """One rate-limited API call, parsed to a JSON object."""
+        self.rate_limiter.wait()
+        start = time.perf_counter()
+        try:
+            text = self.client.complete(image_bytes, prompt)
+        except Exception as e:
+            print(f"Vision parsing error: {e}")
+            return None
+        finally:
+            self._count(api_calls=1, api_seconds=time.perf_counter() - start)
+
+        if not text:
+            return None
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            return json.loads(json_match.group(0))
+        except json.JSONDecodeError as e:
+            print(f"Vision parsing error: invalid JSON in response ({e})")
+            return None
+
+    def parse(self, image_bytes: bytes, prompt: str, prompt_version: str) -> Optional[dict]:
+        """Parse one image, from cache when possible."""
+        return self.parse_many([image_bytes], prompt=prompt, prompt_version=prompt_version)[0]
+
+    def parse_many(self, images: list[bytes], prompt=None, prompt_version: str = "",
+                   prompts: Optional[list[str]] = None) -> list[Optional[dict]]:
+        """Parse several images; cache hits return immediately, misses run concurrently.
+
+        Args:
+            images: Image bytes
+            prompt: Prompt shared by all images
+            prompt_version: Bumped whenever the prompt changes meaningfully
+            prompts: Per-image prompts (overrides prompt)
+
+        Returns:
+            Parsed JSON dicts (None where parsing failed), in input order
+
+        """
+        prompts = prompts or [prompt] * len(images)
+        model = getattr(self.client, "model", "")
+        keys = [self.cache_key(img, p, prompt_version, model) for img, p in zip(images, prompts)]
+
+        results = [self._read_cache(k) for k in keys]
+        self._count(hits=sum(r is not None for r in results), misses=sum(r is None for r in results))
+
+        # Duplicate images in one batch share a single call
+        pending = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            def run(key):
+                first = pending[key][0]
+                return key, self._call(images[first], prompts[first])
+
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as executor:
+                for key, result in executor.map(run, list(pending)):
+                    if result is not None:
+                        self._write_cache(key, prompt_version, result)
+                    for i in pending[key]:
+                        results[i] = result
+
+        return results
+
+    def get_stats(self) -> dict:
+        """Hit/miss counts, hit ratio and mean API latency."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["avg_api_seconds"] = stats["api_seconds"] / stats["api_calls"] if stats["api_calls"] else 0.0
+        return stats
+
+
+# Singleton instance
+vision_executor = VisionParseExecutor()
+
+
+def _benchmark():
+    """Cold vs warm batch with the stub client (no network)."""
+    import tempfile
+
+    executor = VisionParseExecutor(
+        client=StubVisionClient(latency=0.2), cache_dir=tempfile.mkdtemp(),
+        max_concurrency=4, requests_per_minute=None
+    )
+    images = [os.urandom(2048) for _ in range(8)]
+
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        executor.parse_many(images, prompt="benchmark", prompt_version="bench")
+        print(f"{label}: {len(images)} images in {time.perf_counter() - start:.2f}s")
+    print(executor.get_stats())
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,220 @@
+"""A.P.E.X. Voice Pipeline - background transcription with an audio-hash cache.
+
+Voice notes from mic_recorder are transcribed off the Streamlit script
+thread, straight from memory (no temp file), and the text is cached by the
+SHA-256 of the audio bytes. A rerun that still holds the same recording gets
+the cached text back instead of a second Whisper call.
+
+The same worker pool runs prefetch jobs, so the advisor can load ORP and
+conversation context while the transcript is still in flight.
+
+Backends:
+- "whisper" (default): OpenAI Whisper API (OPENAI_API_KEY)
+- "stub": canned transcript after an optional delay, for offline tests
+
+Select the backend with APEX_TRANSCRIBE_BACKEND=stub or voice_pipeline.set_backend().
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger("apex.voice_pipeline")
+
+
+class WhisperBackend:
+    """OpenAI Whisper backend (client created once, reused)."""
+
+    name = "whisper"
+
+    def __init__(self, model: str = "whisper-1"):
+        self.model = model
+        self._client = None
+
+    def is_available(self) -> bool:
+        return bool(os.environ.get("OPENAI_API_KEY"))
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        if self._client is None:
+            import openai
+            self._client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+        # (filename, bytes, content type) uploads from memory
+        transcript = self._client.audio.transcriptions.create(
+            model=self.model, file=("voice_note.wav", audio_bytes, "audio/wav")
+        )
+        return transcript.text
+
+
+class StubTranscriptionBackend:
+    """Offline stand-in: fixed transcript after a fixed delay."""
+
+    name = "stub"
+
+    def __init__(self, text: str = "Car is loose on corner exit and bottoming on the big jump landing.",
+                 latency: float = 0.0):
+        self.text = text
+        self.latency = latency
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.text
+
+
+class VoicePipeline:
+    """Cached, off-thread transcription plus context prefetch."""
+
+    def __init__(self, backend=None, max_workers: int = 3, cache_size: int = 128):
+        """Initialize the pipeline.
+
+        Args:
+            backend: Object with transcribe(bytes) -> str and is_available()
+                     (default from APEX_TRANSCRIBE_BACKEND)
+            max_workers: Worker threads shared by transcription and prefetch jobs
+            cache_size: Transcripts kept in memory (LRU)
+
+        """
+        if backend is None:
+            stub = os.environ.get("APEX_TRANSCRIBE_BACKEND", "").lower() == "stub"
+            backend = StubTranscriptionBackend() if stub else WhisperBackend()
+        self.backend = backend
+        self.cache_size = cache_size
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="apex-voice")
+        self._cache = OrderedDict()  # audio sha256 -> transcript
+        self._pending = {}           # audio sha256 -> Future
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "transcribe_seconds": 0.0}
+
+    def set_backend(self, backend):
+        """Swap the backend (e.g. StubTranscriptionBackend() in tests)."""
+        self.backend = backend
+
+    def is_available(self) -> bool:
+        return self.backend.is_available()
+
+    @staticmethod
+    def audio_key(audio_bytes: bytes) -> str:
+        return hashlib.sha256(audio_bytes).hexdigest()
+
+    def _run(self, key: str, audio_bytes: bytes) -> str:
+        start = time.perf_counter()
+        try:
+            text = self.backend.transcribe(audio_bytes)
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._pending.pop(key, None)
+            raise
+
+        with self._lock:
+            self.stats["transcribe_seconds"] += time.perf_counter() - start
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self._pending.pop(key, None)
+        return text
+
+    def submit(self, audio_bytes: bytes) -> str:
+        """Start transcribing in the background (no-op if cached or in flight).
+
+        Returns:
+            Audio key for result()
+
+        """
+        key = self.audio_key(audio_bytes)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return key
+            if key in self._pending:
+                self.stats["hits"] += 1
+                return key
+            self.stats["misses"] += 1
+            if not self.backend.is_available():
+                return key
+            self._pending[key] = self._executor.submit(self._run, key, audio_bytes)
+        return key
+
+    def result(self, key: str, timeout: Optional[float] = 60.0) -> Optional[str]:
+        """Transcript for an audio key, waiting for an in-flight job (None on failure)."""
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            future = self._pending.get(key)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            return None
+
+    def transcribe(self, audio_bytes: bytes, timeout: Optional[float] = 60.0) -> Optional[str]:
+        """Blocking convenience wrapper: submit() then result()."""
+        return self.result(self.submit(audio_bytes), timeout)
+
+    def prefetch(self, fn, *args, **kwargs) -> Future:
+        """Run fn on the worker pool (e.g. context loading while transcription runs).
+
+        fn must not touch st.session_state; read what it needs beforehand.
+        """
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached"] = len(self._cache)
+            stats["in_flight"] = len(self._pending)
+        stats["backend"] = self.backend.name
+        return stats
+
+
+# Singleton instance
+voice_pipeline = VoicePipeline()
+
+
+def _benchmark():
+    """Serial transcribe-then-load vs overlapped, and a rerun cache hit (stub backend)."""
+    pipeline = VoicePipeline(backend=StubTranscriptionBackend(latency=0.8))
+    audio = os.urandom(64 * 1024)
+
+    def load_context():
+        time.sleep(0.5)  # ORP + library + summary
+        return {"orp_score": 72}
+
+    start = time.perf_counter()
+    pipeline.backend.transcribe(audio)
+    load_context()
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    key = pipeline.submit(audio)
+    context = pipeline.prefetch(load_context)
+    pipeline.result(key)
+    context.result()
+    overlapped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.transcribe(audio)
+    rerun = time.perf_counter() - start
+
+    print(f"serial {serial:.2f}s  overlapped {overlapped:.2f}s  rerun (cache hit) {rerun * 1000:.2f}ms")
+    print(pipeline.get_stats())
+
+
+if __name__ == "__main__":
+    _benchmark()
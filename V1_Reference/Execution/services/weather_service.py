@@ -0,0 +1,402 @@
+"""A.P.E.X. Weather Service - cached track weather and per-session time series.
+
+Readings come from Open-Meteo over one pooled requests.Session. They are
+cached by rounded lat/lon (2 decimals, about 1 km) with a TTL, so pressing
+"Sync Track Weather" or opening several tabs at one track costs one request.
+
+While a racing session is active, a daemon thread refreshes the reading on an
+interval and appends it to the session's weather series: temperature,
+humidity, pressure and density altitude, each timestamped. The series is
+stored in weather_readings (DB) or Execution/data/weather_readings.csv. The
+advisor and history features read the local series instead of the network.
+
+Refreshers hold a lease: the sidebar's weather fragment renews it with touch()
+on every rerun, and a refresher that goes idle_timeout seconds without one
+(browser closed, session switched) stops and removes itself.
+
+Backends:
+- "open-meteo" (default): Open-Meteo current-conditions API
+- "stub": fixed, slowly drifting readings for offline runs and tests
+
+Select the backend with APEX_WEATHER_BACKEND=stub or weather_service.set_backend().
+"""
+
+import csv
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Execution.database.database import db
+
+logger = logging.getLogger("apex.weather_service")
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+SERIES_FIELDS = ["session_id", "recorded_at", "lat", "lon", "temperature_c", "humidity_pct",
+                 "pressure_hpa", "density_altitude_ft"]
+
+
+def density_altitude_ft(temperature_c: float, pressure_hpa: float) -> int:
+    """Density altitude estimate used across A.P.E.X. (120 ft/°C, 30 ft/hPa below 1013)."""
+    return int((temperature_c * 120) + ((1013 - pressure_hpa) * 30))
+
+
+class OpenMeteoBackend:
+    """Open-Meteo current conditions over a pooled HTTP session."""
+
+    name = "open-meteo"
+
+    def __init__(self, timeout: float = 5.0, pool_size: int = 4):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, lat: float, lon: float) -> dict:
+        response = self.session.get(
+            OPEN_METEO_URL,
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "current": "temperature_2m,relative_humidity_2m,surface_pressure",
+                "timezone": "auto",
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        current = response.json()["current"]
+        return {
+            "temperature_c": current["temperature_2m"],
+            "humidity_pct": current["relative_humidity_2m"],
+            "pressure_hpa": current["surface_pressure"],
+        }
+
+
+class StubWeatherBackend:
+    """Offline stand-in: a base reading with a slow daily drift, no network."""
+
+    name = "stub"
+
+    def __init__(self, temperature_c: float = 24.0, humidity_pct: float = 45.0, pressure_hpa: float = 1005.0):
+        self.base = {"temperature_c": temperature_c, "humidity_pct": humidity_pct, "pressure_hpa": pressure_hpa}
+        self.calls = 0
+
+    def fetch(self, lat: float, lon: float) -> dict:
+        self.calls += 1
+        phase = (time.time() % 86400) / 86400 * 2 * math.pi
+        return {
+            "temperature_c": round(self.base["temperature_c"] + 4 * math.sin(phase), 1),
+            "humidity_pct": round(self.base["humidity_pct"] - 10 * math.sin(phase)),
+            "pressure_hpa": round(self.base["pressure_hpa"] + math.cos(phase), 1),
+        }
+
+
+class WeatherService:
+    """TTL-cached weather lookups plus background per-session recording."""
+
+    def __init__(self, backend=None, ttl_seconds: int = 600, precision: int = 2,
+                 csv_file: str = "Execution/data/weather_readings.csv", idle_timeout: float = 300):
+        """Initialize the service.
+
+        Args:
+            backend: Object with fetch(lat, lon) -> dict (default from APEX_WEATHER_BACKEND)
+            ttl_seconds: Cached readings younger than this are reused
+            precision: Decimal places lat/lon are rounded to for the cache key
+            csv_file: Series storage when the database is offline
+            idle_timeout: Seconds without touch() before a session's refresher stops
+
+        """
+        if backend is None:
+            stub = os.environ.get("APEX_WEATHER_BACKEND", "").lower() == "stub"
+            backend = StubWeatherBackend() if stub else OpenMeteoBackend()
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self.use_database = db.is_connected
+        self.csv_file = csv_file
+        self.idle_timeout = idle_timeout
+
+        self._cache = {}          # (lat, lon) -> (fetched_monotonic, reading)
+        self._refreshers = {}     # session_id -> (thread, stop event)
+        self._last_touch = {}     # session_id -> monotonic time of the last lease renewal
+        self._lock = threading.Lock()
+        self._csv_lock = threading.Lock()
+        self.stats = {"hits": 0, "fetches": 0, "errors": 0}
+
+    def set_backend(self, backend):
+        """Swap the backend (e.g. StubWeatherBackend() in tests)."""
+        self.backend = backend
+        with self._lock:
+            self._cache.clear()
+
+    def cache_key(self, lat: float, lon: float) -> tuple:
+        return (round(float(lat), self.precision), round(float(lon), self.precision))
+
+    # ------------------------------------------------------------------
+    # Readings
+    # ------------------------------------------------------------------
+
+    def get_reading(self, lat: float, lon: float, max_age: Optional[float] = None) -> Optional[dict]:
+        """Current conditions for a location (cached).
+
+        Args:
+            lat, lon: Coordinates
+            max_age: Override the TTL for this call (seconds)
+
+        Returns:
+            Dict with recorded_at, lat, lon, temperature_c, humidity_pct,
+            pressure_hpa, density_altitude_ft; the last cached reading if the
+            fetch fails; None if nothing is available
+
+        """
+        key = self.cache_key(lat, lon)
+        max_age = self.ttl_seconds if max_age is None else max_age
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < max_age:
+                self.stats["hits"] += 1
+                return dict(cached[1])
+
+        try:
+            raw = self.backend.fetch(*key)
+        except Exception as e:
+            logger.error(f"Weather fetch failed for {key}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return dict(cached[1]) if cached else None
+
+        reading = {
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "lat": key[0],
+            "lon": key[1],
+            "temperature_c": raw["temperature_c"],
+            "humidity_pct": raw["humidity_pct"],
+            "pressure_hpa": raw["pressure_hpa"],
+            "density_altitude_ft": density_altitude_ft(raw["temperature_c"], raw["pressure_hpa"]),
+        }
+        with self._lock:
+            self._cache[key] = (time.monotonic(), reading)
+            self.stats["fetches"] += 1
+        return dict(reading)
+
+    @staticmethod
+    def format_reading(reading: Optional[dict]) -> dict:
+        """Legacy display dict: {"Temp", "Hum", "DA"} or {"Error": "Weather Offline"}."""
+        if not reading:
+            return {"Error": "Weather Offline"}
+        return {
+            "Temp": f"{reading['temperature_c']}°C",
+            "Hum": f"{reading['humidity_pct']}%",
+            "DA": f"{reading['density_altitude_ft']} ft",
+        }
+
+    # ------------------------------------------------------------------
+    # Session time series
+    # ------------------------------------------------------------------
+
+    def record(self, session_id: str, reading: dict) -> bool:
+        """Append a reading to a session's weather series."""
+        row = dict(reading, session_id=session_id)
+        if self.use_database:
+            try:
+                db.execute_query(
+                    """
+                    INSERT INTO weather_readings
+                    (session_id, recorded_at, lat, lon, temperature_c, humidity_pct, pressure_hpa, density_altitude_ft)
+                    VALUES (%(session_id)s, %(recorded_at)s, %(lat)s, %(lon)s, %(temperature_c)s,
+                            %(humidity_pct)s, %(pressure_hpa)s, %(density_altitude_ft)s)
+                    """,
+                    row,
+                    fetch=False
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Error recording weather reading: {e}")
+                return False
+
+        try:
+            with self._csv_lock:
+                new_file = not os.path.exists(self.csv_file)
+                if new_file:
+                    os.makedirs(os.path.dirname(self.csv_file), exist_ok=True)
+                with open(self.csv_file, "a", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=SERIES_FIELDS, extrasaction="ignore")
+                    if new_file:
+                        writer.writeheader()
+                    writer.writerow(row)
+            return True
+        except Exception as e:
+            logger.error(f"Error recording weather reading: {e}")
+            return False
+
+    def get_series(self, session_id: str, since: Optional[str] = None) -> list[dict]:
+        """A session's readings, oldest first (since: ISO timestamp filter)."""
+        if not session_id:
+            return []
+        if self.use_database:
+            try:
+                rows = db.execute_query(
+                    """
+                    SELECT recorded_at, lat, lon, temperature_c, humidity_pct, pressure_hpa, density_altitude_ft
+                    FROM weather_readings
+                    WHERE session_id = %s AND (%s IS NULL OR recorded_at >= %s)
+                    ORDER BY recorded_at ASC
+                    """,
+                    (session_id, since, since)
+                ) or []
+                return [
+                    {k: (v.isoformat(timespec="seconds") if k == "recorded_at" else float(v) if v is not None else None)
+                     for k, v in r.items()}
+                    for r in rows
+                ]
+            except Exception as e:
+                logger.error(f"Error loading weather series: {e}")
+                return []
+
+        if not os.path.exists(self.csv_file):
+            return []
+        series = []
+        with self._csv_lock, open(self.csv_file, newline="") as f:
+            for row in csv.DictReader(f):
+                if row["session_id"] != str(session_id) or (since and row["recorded_at"] < since):
+                    continue
+                series.append({k: (row[k] if k == "recorded_at" else float(row[k]))
+                               for k in SERIES_FIELDS if k != "session_id"})
+        return series
+
+    def latest(self, session_id: str) -> Optional[dict]:
+        """Most recent recorded reading for a session."""
+        series = self.get_series(session_id)
+        return series[-1] if series else None
+
+    def describe_session(self, session_id: str) -> str:
+        """One-line conditions summary for prompts: latest reading plus DA trend."""
+        series = self.get_series(session_id)
+        if not series:
+            return ""
+        first, last = series[0], series[-1]
+        text = (f"Weather ({last['recorded_at']}): {last['temperature_c']:.1f}°C, "
+                f"{last['humidity_pct']:.0f}% RH, {last['pressure_hpa']:.0f} hPa, DA {last['density_altitude_ft']:.0f} ft")
+        if len(series) > 1:
+            text += f" | DA change since {first['recorded_at']}: {last['density_altitude_ft'] - first['density_altitude_ft']:+.0f} ft"
+        return text
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def refresh_once(self, session_id: str, lat: float, lon: float) -> Optional[dict]:
+        """Fetch (bypassing the TTL) and record one reading."""
+        reading = self.get_reading(lat, lon, max_age=0)
+        if reading:
+            self.record(session_id, reading)
+        return reading
+
+    def touch(self, session_id: str):
+        """Renew a session refresher's lease (called from the UI on every rerun)."""
+        with self._lock:
+            self._last_touch[session_id] = time.monotonic()
+
+    def _lease_expired(self, session_id: str) -> bool:
+        with self._lock:
+            last = self._last_touch.get(session_id)
+        return last is None or time.monotonic() - last > self.idle_timeout
+
+    def start_refresh(self, session_id: str, lat: float, lon: float, interval: int = 900):
+        """Record a reading now and every `interval` seconds on a daemon thread (one per session).
+
+        Also renews the lease, so calling it on every rerun keeps the refresher alive.
+        """
+        self.touch(session_id)
+        with self._lock:
+            if session_id in self._refreshers and self._refreshers[session_id][0].is_alive():
+                return
+            stop = threading.Event()
+
+            def loop():
+                next_due = 0.0
+                while not stop.is_set() and not self._lease_expired(session_id):
+                    if time.monotonic() >= next_due:
+                        try:
+                            self.refresh_once(session_id, lat, lon)
+                        except Exception as e:
+                            logger.error(f"Weather refresh error: {e}")
+                        next_due = time.monotonic() + interval
+                    # Wake at least once per idle_timeout to notice an expired lease
+                    stop.wait(min(max(next_due - time.monotonic(), 0), self.idle_timeout))
+
+                with self._lock:
+                    if self._refreshers.get(session_id, (None,))[0] is threading.current_thread():
+                        del self._refreshers[session_id]
+                        self._last_touch.pop(session_id, None)
+                if not stop.is_set():
+                    logger.info(f"Weather refresh for session {session_id} stopped (lease expired)")
+
+            thread = threading.Thread(target=loop, name=f"apex-weather-{session_id}", daemon=True)
+            self._refreshers[session_id] = (thread, stop)
+        thread.start()
+
+    def stop_refresh(self, session_id: Optional[str] = None):
+        """Stop one session's refresher, or all of them."""
+        with self._lock:
+            targets = [session_id] if session_id else list(self._refreshers)
+            stopped = [self._refreshers.pop(s) for s in targets if s in self._refreshers]
+            for s in targets:
+                self._last_touch.pop(s, None)
+        for thread, stop in stopped:
+            stop.set()
+            thread.join(timeout=5)
+
+    def is_refreshing(self, session_id: str) -> bool:
+        with self._lock:
+            entry = self._refreshers.get(session_id)
+        return bool(entry and entry[0].is_alive())
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached_locations"] = len(self._cache)
+            stats["refreshing_sessions"] = sum(1 for t, _ in self._refreshers.values() if t.is_alive())
+        stats["backend"] = self.backend.name
+        return stats
+
+
+# Singleton instance
+weather_service = WeatherService()
+
+
+def _benchmark():
+    """Cache hits vs fetches and background series recording (stub backend, no network)."""
+    import tempfile
+
+    service = WeatherService(backend=StubWeatherBackend(),
+                             csv_file=os.path.join(tempfile.mkdtemp(), "weather_readings.csv"))
+    service.use_database = False
+
+    start = time.perf_counter()
+    for i in range(1000):
+        service.get_reading(33.7490 + (i % 3) * 0.0001, -84.3880)  # nearby points share a key
+    print(f"1000 lookups in {(time.perf_counter() - start) * 1000:.1f}ms, {service.backend.calls} backend fetches")
+
+    service.start_refresh("bench-session", 33.749, -84.388, interval=0.05)
+    time.sleep(0.3)
+    service.stop_refresh("bench-session")
+    print(f"series: {len(service.get_series('bench-session'))} readings")
+    print(service.describe_session("bench-session"))
+
+    # Nobody renews the lease, so the refresher stops on its own
+    service.idle_timeout = 0.2
+    service.start_refresh("idle-session", 33.749, -84.388, interval=0.05)
+    time.sleep(0.5)
+    print(f"idle refresher running after lease expiry: {service.is_refreshing('idle-session')}")
+    print(service.get_stats())
+
+
+if __name__ == "__main__":
+    _benchmark()
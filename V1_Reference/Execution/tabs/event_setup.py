@@ -10,8 +10,9 @@ Handles:
 
 State Management:
 - Reads: racer_profile, actual_setup
-- Writes: active_session_id, actual_setup, track_context, session_just_started
-         practice_rounds, qualifying_rounds, draft_session_id
+- Writes: active_session_id, actual_setup, track_context, session_just_started, track_media_refs
+         practice_rounds, qualifying_rounds, draft_session_id, active_jobs, prep_plan_pdf,
+         setup_history_check
 """
 
 import os
@@ -20,11 +21,38 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 
+from Execution.components import fragments
 from Execution.services.autosave_manager import autosave_manager
 from Execution.services.config_service import config_service
+from Execution.services.job_queue import job_queue
+from Execution.services.media_store import media_store
 from Execution.services.orp_service import ORPService
-from Execution.services.prep_plan_service import prep_plan_service
+from Execution.services.prep_plan_store import plan_args, prep_plan_store
 from Execution.services.session_service import session_service
+from Execution.services.setup_model import setup_fingerprint
+from Execution.utils.cached_helpers import clear_config_cache
+
+
+def _vehicle_info(selected_car):
+    """Brand/model dict for the prep plan from the selected car name."""
+    car_parts = selected_car.split(' ', 1) if selected_car else ['Tekno', 'NB48']
+    return {
+        'brand': car_parts[0] if len(car_parts) > 0 else 'Tekno',
+        'model': car_parts[1] if len(car_parts) > 1 else selected_car
+    }
+
+
+def _prep_plan_payload(selected_car, session_id):
+    """prep_plan job payload with only the fields the plan reads (not the whole profile)."""
+    racer_profile, track_context, vehicle_info = plan_args(
+        st.session_state.racer_profile, st.session_state.track_context, _vehicle_info(selected_car)
+    )
+    return {
+        "racer_profile": racer_profile,
+        "track_context": track_context,
+        "vehicle_info": vehicle_info,
+        "session_id": str(session_id) if session_id else None
+    }
 
 
 def render():
@@ -132,6 +160,8 @@ def render():
         )
         if t_up:
             st.session_state.track_media = t_up
+            # Downscale/recompress once; reruns with the same files are hash lookups
+            st.session_state.track_media_refs = media_store.ingest_uploads(t_up, tag="track")
 
         # === ORP STRATEGY INPUTS (Phase 5 Sprint 2) ===
         st.write("### 📊 Step 2: Race Schedule (for ORP Strategy)")
@@ -225,7 +255,8 @@ def render():
                     'surface_condition': track_surface,
                     'actual_setup': st.session_state.actual_setup or {},
                     'practice_rounds': practice_rounds,
-                    'qualifying_rounds': qualifying_rounds
+                    'qualifying_rounds': qualifying_rounds,
+                    'start_date': session_date
                 }
 
                 # Phase 4.3: Auto-Save - Promote draft if one exists, otherwise create new session
@@ -250,6 +281,11 @@ def render():
                     if new_session_id:
                         st.session_state.active_session_id = new_session_id
 
+                        # Registered ahead of the event: build the prep plan in the background
+                        # so it is ready (and kept fresh by the prep_plan_batch job) when asked for
+                        if session_date > datetime.now().date():
+                            job_queue.submit("prep_plan", _prep_plan_payload(selected_car, new_session_id))
+
                         # Log session start to track_logs
                         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
                         log_path = os.path.join(base_dir, "data", "track_logs.csv")
@@ -376,6 +412,24 @@ def render():
             new_tread, new_comp, new_v, new_p, new_cl, new_b, new_s
         ]
 
+        # Has this exact setup (by fingerprint) run at this track before?
+        # Looked up once per setup/track, not on every rerun
+        history_track = (st.session_state.get('track_context') or {}).get('track_name')
+        if st.session_state.actual_setup and history_track:
+            fingerprint = setup_fingerprint(st.session_state.actual_setup)
+            check = st.session_state.get('setup_history_check')
+            if not check or check[:2] != (fingerprint, history_track):
+                check = (fingerprint, history_track, session_service.find_sessions_with_setup(
+                    st.session_state.actual_setup, history_track,
+                    exclude_session_id=st.session_state.get('active_session_id')
+                ))
+                st.session_state.setup_history_check = check
+            if check[2]:
+                last = check[2][0]
+                more = f" (+{len(check[2]) - 1} more)" if len(check[2]) > 1 else ""
+                st.info(f"🔁 This exact setup ran at {history_track} before: "
+                        f"{last['session_name']} on {last['start_date']}{more}")
+
         c1, c2 = st.columns(2)
         if c1.button("🔄 APPLY TO ACTUAL SETUP (SESSION)"):
             st.session_state.actual_setup = dict(zip(cols, vals))
@@ -384,13 +438,14 @@ def render():
 
         if c2.button("💾 UPDATE PERMANENT SHOP MASTER"):
             if selected_car in configs['Car'].values:
-                configs.loc[configs['Car'] == selected_car, cols] = vals
+                # Point update: merges the parameters into this vehicle's row only
+                config_service.update_vehicle_setup(selected_car, dict(zip(cols, vals)))
             else:
                 new_row = dict(zip(cols, vals))
                 new_row['Car'] = selected_car
                 configs = pd.concat([configs, pd.DataFrame([new_row])], ignore_index=True)
-
-            config_service.save_configs(configs)
+                config_service.save_configs(configs)
+            clear_config_cache(st.session_state.get('profile_id'))
             st.success(f"✅ Master Baseline for {selected_car} Updated.")
             st.rerun()
 
@@ -406,29 +461,39 @@ def render():
 
             col_prep1, col_prep2 = st.columns(2)
             if col_prep1.button("Generate Race Prep Plan", type="primary"):
-                with st.spinner("Building your race strategy..."):
-                    # Get vehicle info from selected car
-                    car_parts = selected_car.split(' ', 1) if selected_car else ['Tekno', 'NB48']
-                    vehicle_info = {
-                        'brand': car_parts[0] if len(car_parts) > 0 else 'Tekno',
-                        'model': car_parts[1] if len(car_parts) > 1 else selected_car
-                    }
-
-                    pdf_bytes = prep_plan_service.generate_full_plan(
-                        racer_profile=st.session_state.racer_profile,
-                        track_context=st.session_state.track_context,
-                        vehicle_info=vehicle_info
-                    )
+                payload = _prep_plan_payload(selected_car, st.session_state.active_session_id)
 
-                    st.session_state.prep_plan_pdf = pdf_bytes
-                    st.session_state.session_just_started = False
-                    st.success("✅ Race Prep Plan Generated!")
-                    st.rerun()
+                # Served instantly if the batch already built it for this data version;
+                # otherwise built on a job worker and polled below
+                version = prep_plan_store.data_version(
+                    payload["racer_profile"], payload["track_context"], payload["vehicle_info"]
+                )
+                stored_pdf = prep_plan_store.get(version)
+                if stored_pdf:
+                    st.session_state.prep_plan_pdf = stored_pdf
+                else:
+                    st.session_state.active_jobs["prep_plan"] = job_queue.submit("prep_plan", payload)
+                st.session_state.session_just_started = False
+                st.rerun()
 
             if col_prep2.button("Skip for Now"):
                 st.session_state.session_just_started = False
                 st.rerun()
 
+    # --- PREP PLAN JOB STATUS ---
+    prep_job = fragments.track_job("prep_plan", "Building your race strategy")
+    if prep_job:
+        if prep_job["status"] == "succeeded":
+            st.session_state.prep_plan_pdf = job_queue.read_spool(prep_job["result"]["pdf_path"])
+            st.success("✅ Race Prep Plan Generated!")
+            timings = prep_job["result"].get("timings", {})
+            if prep_job["result"].get("precomputed"):
+                st.caption("Served from the pre-computed plan")
+            elif timings:
+                st.caption(f"Built in {timings.get('total', 0):.1f}s")
+        else:
+            st.error(f"❌ Race Prep Plan failed: {prep_job['error']}")
+
     # --- DOWNLOAD PREP PLAN ---
     if "prep_plan_pdf" in st.session_state and st.session_state.prep_plan_pdf:
         with st.container(border=True):
@@ -9,33 +9,39 @@ Handles:
 - Lap time visualization & charts
 - Race report generation (AI-powered)
 - Email report distribution
+- Historical notes keyword search
 
 State Management:
-- Reads: actual_setup, active_session_id, messages
-- Writes: x_factor_audit_id, x_factor_state, last_report
+- Reads: actual_setup, active_session_id
+- Writes: x_factor_audit_id, x_factor_state, last_report, active_jobs
 
 Dependencies:
 - x_factor_service: X-Factor audit logic
 - session_service: Session CRUD operations
 - LiveRCHarvester: LiveRC web scraping
-- email_service: Report distribution
+- job_queue: Background report emails (email_service)
 - visualization_utils: Charts and graphs
 - prompts: AI report generation
+- keyword_index: Tagged, searchable track/X-Factor/chat notes
+- weather_service: Stops session weather recording at closeout
 """
 
 import os
 from datetime import datetime
 
-import anthropic
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 from streamlit_mic_recorder import mic_recorder
 
 from Execution.ai import prompts
-from Execution.services.email_service import email_service
+from Execution.ai.llm_gateway import llm_gateway
+from Execution.components import fragments
+from Execution.services.job_queue import job_queue
+from Execution.services.keyword_index import notes_index
 from Execution.services.liverc_harvester import LiveRCHarvester
 from Execution.services.session_service import session_service
+from Execution.services.weather_service import weather_service
 from Execution.services.x_factor_service import FAILURE_SYMPTOMS, SUCCESS_GAINS, x_factor_service
 from Execution.utils import transcribe_voice
 
@@ -43,8 +49,7 @@ from Execution.utils import transcribe_voice
 def render():
     """Render Tab 4: Post Event Analysis."""
     # On Railway, get API key from environment variables (secrets.toml not available in container)
-    ANTHROPIC_KEY = os.getenv("ANTHROPIC_API_KEY")
-    if not ANTHROPIC_KEY:
+    if not llm_gateway.is_available():
         st.error("❌ ANTHROPIC_API_KEY not configured. Please set environment variable in Railway dashboard.")
         st.stop()
     LOG_PATH = "Execution/data/track_logs.csv"
@@ -187,6 +192,7 @@ def render():
 
                     # Close the session
                     session_service.close_session(st.session_state.get('active_session_id'))
+                    weather_service.stop_refresh(st.session_state.get('active_session_id'))
 
                     # Reset state
                     st.session_state.active_session_id = None
@@ -233,13 +239,10 @@ Powered by AGR A.P.E.X. v1.8.3 - Phase 6 Modular Refactor
 Accelerate Performance + Experimentation = X-Factor
 """
 
-                            success, msg = email_service.send_report(recipient, subject, summary)
-
-                            if success:
-                                st.success(f"✅ Report sent to {recipient}")
-                                st.caption(msg)
-                            else:
-                                st.error(f"❌ Failed to send report: {msg}")
+                            # Sent (and retried on SMTP errors) by a job worker
+                            st.session_state.active_jobs["email_report"] = job_queue.submit("email_report", {
+                                "recipient": recipient, "subject": subject, "content": summary
+                            })
 
                     st.balloons()
                     st.rerun()
@@ -331,7 +334,6 @@ Accelerate Performance + Experimentation = X-Factor
 
         if rc2.button("📝 GENERATE AI RACE REPORT"):
             with st.status("🤖 Drafting Race Report..."):
-                client = anthropic.Anthropic(api_key=ANTHROPIC_KEY)
                 session_summary = ev_logs.to_string()
                 profile = st.session_state.racer_profile
 
@@ -346,17 +348,17 @@ Accelerate Performance + Experimentation = X-Factor
                     'actual_setup': st.session_state.get('actual_setup', {})
                 }
 
-                # Get Analyst persona system prompt with dynamic context injection
-                analyst_system_prompt = prompts.get_system_prompt("analyst", analyst_context)
+                # Analyst persona as a provider-cached prefix + dynamic context
+                analyst_system_prompt = prompts.get_system_blocks("analyst", analyst_context)
 
-                response = client.messages.create(
+                response = llm_gateway.complete(
                     model="claude-sonnet-4-5",
                     max_tokens=2000,
                     temperature=0.7,
                     system=analyst_system_prompt,
                     messages=[{"role": "user", "content": prompt}]
                 )
-                st.session_state.last_report = response.content[0].text
+                st.session_state.last_report = response["text"]
 
         if st.session_state.get("last_report"):
             st.markdown(st.session_state.last_report)
@@ -365,12 +367,36 @@ Accelerate Performance + Experimentation = X-Factor
             drc1.download_button("💾 Download Report (.md)", st.session_state.last_report, file_name=f"APEX_Report_{selected_ev}.md")
 
             if drc2.button("📩 PREPARE EMAIL REPORT"):
-                with st.status("📧 Preparing email..."):
-                    recipient = st.session_state.racer_profile.get("email", "racer@example.com")
-                    subject = f"A.P.E.X. Race Report: {selected_ev}"
-                    success, msg = email_service.send_report(recipient, subject, st.session_state.last_report)
-
-                if success:
-                    st.success(msg)
-                else:
-                    st.error(msg)
+                st.session_state.active_jobs["email_report"] = job_queue.submit("email_report", {
+                    "recipient": st.session_state.racer_profile.get("email", "racer@example.com"),
+                    "subject": f"A.P.E.X. Race Report: {selected_ev}",
+                    "content": st.session_state.last_report
+                })
+
+    email_job = fragments.track_job("email_report", "📧 Sending report")
+    if email_job:
+        if email_job["status"] == "succeeded":
+            st.success(f"✅ Report sent to {email_job['payload']['recipient']}")
+            st.caption(email_job["result"]["message"])
+        else:
+            st.error(f"❌ Failed to send report: {email_job['error']}")
+
+    # === HISTORICAL NOTES SEARCH ===
+    st.divider()
+    with st.expander("🔎 Search Historical Notes", expanded=False):
+        n1, n2, n3 = st.columns([2, 2, 1])
+        note_term = n1.text_input("Keyword", placeholder="e.g. wash, bottoming, landing", key="notes_search_term")
+        note_track = n2.text_input("Track (optional)", placeholder="e.g. Thunder Alley", key="notes_search_track")
+        if n3.button("🔄 Rebuild Index", key="notes_rebuild"):
+            build_stats = notes_index.build()
+            st.caption(f"Indexed {build_stats['notes']} notes in {build_stats['tag_seconds'] * 1000:.0f}ms")
+
+        if note_term:
+            note_hits = notes_index.search(note_term, track=note_track or None)
+            st.caption(f"{len(note_hits)} matching notes")
+            if note_hits:
+                st.dataframe(
+                    pd.DataFrame(note_hits)[["timestamp", "source", "track", "session", "text", "keywords"]],
+                    use_container_width=True,
+                    hide_index=True
+                )
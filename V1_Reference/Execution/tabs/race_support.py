@@ -10,7 +10,7 @@ Handles:
 
 State Management:
 - Reads: racer_profile, active_session_id, actual_setup, pending_changes
-- Writes: event_url, monitored_heats, active_classes
+- Writes: event_url, monitored_heats, active_classes, schedule_monitor, active_jobs
 
 Architecture:
 - Imported by dashboard.py (the orchestrator)
@@ -21,7 +21,25 @@ Architecture:
 import pandas as pd
 import streamlit as st
 
-from Execution.services.liverc_harvester import LiveRCHarvester
+from Execution.components import fragments
+from Execution.services.job_queue import job_queue
+from Execution.services.liverc_monitor import LiveRCScheduleMonitor
+
+
+def _parse_monitor_targets(text, default_event_url):
+    """Parse 'Driver | Class A, Class B | event URL' lines into monitor targets.
+
+    Class list and event URL are optional; the URL defaults to the Main Event URL.
+    """
+    targets = []
+    for line in text.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if not parts[0]:
+            continue
+        classes = parts[1].split(",") if len(parts) > 1 else []
+        event_url = parts[2] if len(parts) > 2 and parts[2] else default_event_url
+        targets.append({"racer_name": parts[0], "classes": classes, "event_url": event_url or ""})
+    return targets
 
 
 def render():
@@ -43,32 +61,55 @@ def render():
         col_m1, col_m2 = st.columns([1, 1])
         if col_m1.button("🔍 SCAN FOR MY HEATS"):
             if st.session_state.event_url:
-                with st.spinner("Scanning Heat Sheets..."):
-                    harvester = LiveRCHarvester(st.session_state.event_url)
-                    r_name = st.session_state.racer_profile["name"]
-                    classes = st.session_state.active_classes
-                    st.session_state.monitored_heats = harvester.scan_heat_sheets(r_name, classes=classes)
-                    if st.session_state.monitored_heats:
-                        st.success(f"Found {len(st.session_state.monitored_heats)} races for {r_name}!")
-                    else:
-                        st.warning("No matches found. Ensure your name in the Profile matches LiveRC exactly.")
+                st.session_state.active_jobs["heat_scan"] = job_queue.submit("liverc_scan", {
+                    "event_url": st.session_state.event_url,
+                    "racer_name": st.session_state.racer_profile["name"],
+                    "classes": st.session_state.active_classes
+                })
             else:
                 st.error("Enter an Event URL first.")
 
-        if st.session_state.monitored_heats:
-            st.divider()
-            st.write("### 📅 Your Event Schedule")
-            for heat in st.session_state.monitored_heats:
-                c1, c2, c3 = st.columns([1, 2, 1])
-                c1.write(f"**{heat['Race']}**")
-                status = heat['Status']
-                if "Not Yet Run" in status:
-                    c2.info(f"⌛ {status}")
-                elif "Complete" in status:
-                    c2.success(f"🏁 {status}")
-                else:
-                    c2.warning(status)
-                c3.link_button("🔗 VIEW", heat['URL'])
+        scan_job = fragments.track_job("heat_scan", "Scanning Heat Sheets")
+        if scan_job:
+            r_name = scan_job["payload"].get("racer_name", st.session_state.racer_profile["name"])
+            if scan_job["status"] != "succeeded":
+                st.error(f"Heat sheet scan failed: {scan_job['error']}")
+            elif scan_job["result"]["heats"]:
+                st.session_state.monitored_heats = scan_job["result"]["heats"]
+                st.success(f"Found {len(st.session_state.monitored_heats)} races for {r_name}!")
+            else:
+                st.session_state.monitored_heats = []
+                st.warning("No matches found. Ensure your name in the Profile matches LiveRC exactly.")
+
+        # --- Team Monitor: continuous polling for several drivers/classes/events ---
+        st.divider()
+        st.write("#### 👥 Team Monitor")
+        r_name = st.session_state.racer_profile["name"]
+        default_targets = f"{r_name} | {', '.join(st.session_state.active_classes)}"
+        targets_text = st.text_area(
+            "Drivers to monitor",
+            value=default_targets,
+            help="One per line: Driver Name | Class A, Class B | Event URL (optional, defaults to Main Event URL)"
+        )
+        monitor = st.session_state.schedule_monitor
+        col_t1, col_t2 = st.columns([1, 1])
+        if col_t1.button("▶️ START MONITOR"):
+            targets = _parse_monitor_targets(targets_text, st.session_state.event_url)
+            if not any(t["event_url"] for t in targets):
+                st.error("Enter an Event URL first.")
+            else:
+                if monitor is None:
+                    monitor = LiveRCScheduleMonitor()
+                    st.session_state.schedule_monitor = monitor
+                monitor.set_targets(targets)
+                monitor.start()
+        if monitor is not None and monitor.is_running() and col_t2.button("⏹️ STOP MONITOR"):
+            monitor.stop()
+
+        if monitor is not None and monitor.is_running():
+            fragments.schedule_monitor_panel(monitor)
+        elif st.session_state.monitored_heats:
+            fragments.render_heat_schedule(st.session_state.monitored_heats)
 
     st.divider()
 
@@ -10,37 +10,70 @@ Handles:
 
 State Management:
 - Reads: track_context, actual_setup, racer_profile
-- Writes: messages, weather_data, pending_changes
+- Writes: advisor_history_pages, advisor_last_audio, weather_data, pending_changes, advisor_timings, tire_media_refs
 
 Dependencies:
-- anthropic: LLM for AI recommendations
-- openai: Whisper transcription
+- llm_gateway: Cached LLM calls for AI recommendations
+- media_store: Downscaled, content-addressed track/tire photos
+- voice_pipeline: Cached off-thread Whisper transcription + context prefetch
 - streamlit_mic_recorder: Voice recording
 - plotly: Performance visualizations
 - prompts: AI prompt templates
-- RunLogsService: Session lap data
+- run_logs_service: Session lap data
+- conversation_store: Advisor chat history (windowed) and running summary
+- weather_service: Recorded session conditions and density altitude trend
 """
 
 import os
 from datetime import datetime
 
-import anthropic
 import pandas as pd
 import streamlit as st
 from streamlit_mic_recorder import mic_recorder
 
 from Execution.ai import prompts
+from Execution.ai import prompt_budget
+from Execution.ai.llm_gateway import llm_gateway
 from Execution.components import fragments
-from Execution.services.run_logs_service import RunLogsService
-from Execution.utils import detect_technical_keywords, encode_image, get_system_context, transcribe_voice
+from Execution.services.conversation_store import CHAT_WINDOW, conversation_store
+from Execution.services.keyword_index import notes_index
+from Execution.services.media_store import media_store
+from Execution.services.run_logs_service import get_run_logs_service
+from Execution.services.voice_pipeline import voice_pipeline
+from Execution.services.weather_service import weather_service
+from Execution.utils import detect_technical_keywords, get_system_context
 from Execution.visualization_utils import create_fade_indicator, create_lap_trend_chart, create_performance_window_chart
 
+# Per-turn timing rows kept in st.session_state.advisor_timings (oldest dropped first)
+ADVISOR_TIMINGS_MAX = 50
+
+
+def _load_turn_context(session_id, experience_level, driver_confidence, active_config_text, conversation_id):
+    """Load the library, ORP metrics, conversation summary and weather for one advisor turn.
+
+    Runs on the voice pipeline's workers while a voice note is transcribed,
+    so it takes plain values and never touches st.session_state.
+    """
+    orp_context = {}
+    if session_id:
+        orp_context = get_run_logs_service().calculate_orp_from_session(
+            session_id=session_id,
+            experience_level=experience_level,
+            driver_confidence=driver_confidence
+        )
+
+    return {
+        "lib": get_system_context(active_config_text=active_config_text),
+        "orp_context": orp_context,
+        "conversation_summary": conversation_store.get_summary(conversation_id)["summary"],
+        "weather": weather_service.describe_session(session_id),
+    }
+
 
 def render():
     """Render Tab 2: Setup Advisor."""
     # On Railway, get API key from environment variables (secrets.toml not available in container)
-    ANTHROPIC_KEY = os.getenv("ANTHROPIC_API_KEY")
-    if not ANTHROPIC_KEY:
+    if not llm_gateway.is_available():
         st.error("❌ ANTHROPIC_API_KEY not configured. Please set environment variable in Railway dashboard.")
         st.stop()
     LOG_PATH = "Execution/data/track_logs.csv"
@@ -59,7 +92,18 @@ def render():
         fleet_list = ["NB48 2.2 Buggy", "NT48 2.2 Truggy"]
 
     active_car_adv = st.selectbox("Car on Stand:", fleet_list, key="adv_car")
-    for msg in st.session_state.messages:
+
+    # Chat history lives in conversation_store; only a recent window is rendered
+    conversation_id = conversation_store.conversation_id(
+        st.session_state.get('profile_id'), st.session_state.get('active_session_id')
+    )
+    total_messages = conversation_store.count(conversation_id)
+    shown_messages = min(total_messages, CHAT_WINDOW * st.session_state.advisor_history_pages)
+    if total_messages > shown_messages:
+        if st.button(f"⬆️ Load earlier messages ({total_messages - shown_messages} more)", key="advisor_load_earlier"):
+            st.session_state.advisor_history_pages += 1
+            st.rerun()
+    for msg in conversation_store.get_window(conversation_id, limit=shown_messages):
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
 
@@ -72,31 +116,50 @@ def render():
         tire_up = st.file_uploader("Upload Tire/Chassis Wear Photos", type=["jpg", "png"], accept_multiple_files=True, key="tire_up")
         if tire_up:
             st.session_state.tire_media = tire_up
+            st.session_state.tire_media_refs = media_store.ingest_uploads(tire_up, tag="tire")
 
     # Get current session for context
     current_session = st.session_state.get('active_session_id', 'General')
 
-    query = transcribe_voice(audio['bytes']) if audio else manual_in
+    # A rerun hands back the same recording; it has already been answered
+    audio_key = voice_pipeline.audio_key(audio['bytes']) if audio else None
+    if audio_key and audio_key == st.session_state.advisor_last_audio:
+        audio_key = None
+
+    query = manual_in
+    context_future = None
+    if audio_key or manual_in:
+        if audio_key:
+            voice_pipeline.submit(audio['bytes'])
+        # Load ORP / library / conversation context while the transcript is in flight
+        context_future = voice_pipeline.prefetch(
+            _load_turn_context,
+            st.session_state.get('active_session_id'),
+            st.session_state.get('experience_level', 'Intermediate'),
+            st.session_state.get('driver_confidence', 3),
+            str(st.session_state.get('actual_setup', {})),
+            conversation_id
+        )
+        if audio_key:
+            st.session_state.advisor_last_audio = audio_key
+            with st.spinner("🎧 Transcribing voice note..."):
+                query = voice_pipeline.result(audio_key)
+            if not query:
+                st.warning("Voice note could not be transcribed (check OPENAI_API_KEY). Type your observation instead.")
+
     if query:
-        st.session_state.messages.append({"role": "user", "content": query})
+        conversation_store.append(conversation_id, "user", query)
         with st.chat_message("assistant"):
             with st.status("🧠 Engineering Analysis (with ORP Constraints)..."):
-                client = anthropic.Anthropic(api_key=ANTHROPIC_KEY)
-
-                # Get active setup display
-                active_config_display = st.session_state.get('actual_setup', {})
-                lib = get_system_context(active_config_text=str(active_config_display))
+                turn_context = context_future.result()
+                lib = turn_context["lib"]
+                conversation_summary = turn_context["conversation_summary"]
                 event_info = f"Session: {current_session} | Best Lap: {lap_val}s" if lap_val > 0 else f"Session: {current_session}"
+                if turn_context["weather"]:
+                    event_info += f" | {turn_context['weather']}"
 
                 # === ORP CONTEXT INJECTION ===
-                run_logs_service = RunLogsService()
-                orp_context = {}
-                if st.session_state.get('active_session_id'):
-                    orp_context = run_logs_service.calculate_orp_from_session(
-                        session_id=st.session_state.get('active_session_id'),
-                        experience_level=st.session_state.get('experience_level', 'Intermediate'),
-                        driver_confidence=st.session_state.get('driver_confidence', 3)
-                    )
+                orp_context = turn_context["orp_context"]
 
                 # Fallback if ORP unavailable
                 if not orp_context:
@@ -129,6 +192,30 @@ def render():
                     confidence=confidence
                 )
 
+                # === BUILD PERSONA CONTEXT (Phase 5.1) ===
+                engineer_context = {
+                    'scenario': scenario,
+                    'orp_score': orp_score,
+                    'consistency_pct': orp_context.get('consistency', 0),
+                    'fade_factor': orp_context.get('fade', 1.0),
+                    'driver_confidence': confidence,
+                    'experience_level': experience_level,
+                    'change_history': st.session_state.get('change_history', [])
+                }
+
+                # Persona + theory docs form a stable, provider-cached system prefix;
+                # ORP and change history follow as the uncached suffix
+                active_config_lib, theory_docs = prompt_budget.split_library(lib)
+                engineer_system_blocks = prompts.get_system_blocks(
+                    "engineer", engineer_context, theory=prompt_budget.trim_theory(theory_docs)
+                )
+
+                # The system prompt shares the token ceiling with the user prompt
+                prompt_ceiling = prompt_budget.PROMPT_TOKEN_CEILING - sum(
+                    prompt_budget.estimate_tokens(block["text"]) for block in engineer_system_blocks
+                )
+                prompt_report = {}
+
                 # Get track context for memory lookup
                 tc = st.session_state.get('track_context', {})
                 if tc:
@@ -142,60 +229,66 @@ def render():
                         car=active_car_adv,
                         query=query,
                         event_context=event_info,
-                        library=lib,
+                        library=active_config_lib,
                         orp_context=orp_context,
                         experience_level=experience_level,
                         scenario=scenario,
                         orp_score=orp_score,
-                        confidence=confidence
+                        confidence=confidence,
+                        token_ceiling=prompt_ceiling,
+                        token_report=prompt_report,
+                        conversation_summary=conversation_summary
                     )
                 else:
                     # Fallback to basic prompt if no session context
-                    prompt_text = prompts.get_tuning_prompt(active_car_adv, query, event_info, lib)
-
-                # === BUILD PERSONA CONTEXT (Phase 5.1) ===
-                engineer_context = {
-                    'scenario': scenario,
-                    'orp_score': orp_score,
-                    'consistency_pct': orp_context.get('consistency', 0),
-                    'fade_factor': orp_context.get('fade', 1.0),
-                    'driver_confidence': confidence,
-                    'experience_level': experience_level,
-                    'change_history': st.session_state.get('change_history', [])
-                }
+                    prompt_text = prompts.get_tuning_prompt(
+                        active_car_adv, query, event_info, active_config_lib,
+                        token_ceiling=prompt_ceiling, token_report=prompt_report,
+                        conversation_summary=conversation_summary
+                    )
 
                 # Multi-modal payload construction
                 content = [{"type": "text", "text": prompt_text}]
 
-                # Attach Track Media from Session Setup (Tab 1)
-                track_media = st.session_state.get('track_media', [])
-                for img in track_media:
-                    if hasattr(img, 'type') and img.type.startswith("image/"):
-                        content.append({
-                            "type": "image",
-                            "source": {"type": "base64", "media_type": img.type, "data": encode_image(img)}
-                        })
-
-                # Attach Tire Media from Advisor Tab (Tab 2)
-                tire_media = st.session_state.get('tire_media', [])
-                for img in tire_media:
-                    if hasattr(img, 'type') and img.type.startswith("image/"):
-                        content.append({
-                            "type": "image",
-                            "source": {"type": "base64", "media_type": img.type, "data": encode_image(img)}
-                        })
-
-                # Get Engineer persona system prompt with dynamic context injection
-                engineer_system_prompt = prompts.get_system_prompt("engineer", engineer_context)
-
-                response = client.messages.create(
-                    model="claude-sonnet-4-5",
-                    max_tokens=2000,
-                    temperature=0.3,
-                    system=engineer_system_prompt,
-                    messages=[{"role": "user", "content": content}]
-                )
-            reply = response.content[0].text
+                # Attach Track Media (Tab 1) and Tire Media (Tab 2), preprocessed at upload.
+                # Each turn is a single stateless message, so every photo goes with it.
+                media_refs = st.session_state.get('track_media_refs', []) + st.session_state.get('tire_media_refs', [])
+                media_stats = {}
+                content.extend(media_store.build_image_blocks(media_refs, media_stats))
+
+            # Stream the reply so the driver sees tokens as they arrive;
+            # parsing and keyword detection run once the stream completes.
+            turn_stats = {}
+            reply = st.write_stream(llm_gateway.stream(
+                model="claude-sonnet-4-5",
+                max_tokens=2000,
+                temperature=0.3,
+                system=engineer_system_blocks,
+                messages=[{"role": "user", "content": content}],
+                stats=turn_stats
+            ))
+            st.session_state.advisor_timings.append({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "ttft": turn_stats.get("ttft"),
+                "total": turn_stats.get("total"),
+                "cached": turn_stats.get("cached", False),
+                "prompt_tokens": prompt_report.get("total_tokens"),
+                "prompt_cache_read_tokens": turn_stats.get("usage", {}).get("cache_read_input_tokens", 0),
+                "prompt_trimmed": prompt_report.get("trimmed", False),
+                "media_images": media_stats.get("images", 0),
+                "media_payload_bytes": media_stats.get("payload_bytes", 0),
+                "media_encode_seconds": media_stats.get("encode_seconds", 0.0),
+                "prompt_sections": {sec["name"]: sec["tokens_out"] for sec in prompt_report.get("sections", [])}
+            })
+            del st.session_state.advisor_timings[:-ADVISOR_TIMINGS_MAX]
+            st.caption(f"⏱️ First token {turn_stats.get('ttft', 0):.1f}s · Total {turn_stats.get('total', 0):.1f}s"
+                       + f" · Prompt ~{prompt_report.get('total_tokens', 0):,} tokens"
+                       + (" (trimmed)" if prompt_report.get("trimmed") else "")
+                       + (f" · {media_stats['images']} photo(s) {media_stats['payload_bytes'] / 1024:,.0f} KB"
+                          if media_stats.get("images") else "")
+                       + (f" · {turn_stats['usage']['cache_read_input_tokens']:,} from prompt cache"
+                          if turn_stats.get("usage", {}).get("cache_read_input_tokens") else "")
+                       + (" · cached" if turn_stats.get("cached") else ""))
 
             # === AUTOMATIC KEYWORD DETECTION ===
             detected = detect_technical_keywords(query)
@@ -208,8 +301,9 @@ def render():
             if detected.get("track_features"):
                 st.info(f"🏁 **TRACK INSIGHT:** {', '.join(detected['track_features'])}")
 
-            st.markdown(reply)
-            st.session_state.messages.append({"role": "assistant", "content": reply})
+            conversation_store.append(conversation_id, "assistant", reply)
+            # Fold turns that scrolled out of the window into the running summary
+            conversation_store.compact(conversation_id)
 
             # === ORP ANALYSIS CONTEXT DISPLAY ===
             st.divider()
@@ -256,7 +350,7 @@ def render():
 
             # Get lap times from run_logs_service for visualization
             if st.session_state.get('active_session_id'):
-                lap_times = run_logs_service.get_session_laps(st.session_state.get('active_session_id'))
+                lap_times = get_run_logs_service().get_session_laps(st.session_state.get('active_session_id'))
 
                 if lap_times and len(lap_times) > 0:
                     best_lap = min(lap_times)
@@ -305,6 +399,14 @@ def render():
             else:
                 os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
                 pd.DataFrame([log_entry]).to_csv(LOG_PATH, mode='w', index=False)
+            if notes_index.built:
+                notes_index.add({
+                    "source": "chat",
+                    "track": st.session_state.get('track_context', {}).get('track_name', ''),
+                    "session": current_session,
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "text": query
+                })
 
     # === PENDING RECOMMENDATIONS DISPLAY (Phase 6.5.1: Isolated fragment) ===
     if st.session_state.get('pending_changes'):
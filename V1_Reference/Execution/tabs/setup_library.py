@@ -9,7 +9,7 @@ Handles:
 
 State Management:
 - Reads: racer_profile, active_session_id, actual_setup, comparison_baseline_id
-- Writes: actual_setup, last_parsed_*, staging_*, show_library_save, comparison_baseline_id
+- Writes: actual_setup, last_parsed_*, staging_*, show_library_save, comparison_baseline_id, active_jobs
 
 Architecture:
 - Imported by dashboard.py (the orchestrator)
@@ -24,12 +24,14 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 
+from Execution.components import fragments
 from Execution.services.comparison_service import SETUP_PACKAGES, comparison_service
+from Execution.services.job_queue import job_queue
 from Execution.services.library_service import library_service
 from Execution.services.package_copy_service import package_copy_service
 from Execution.services.session_service import session_service
-from Execution.services.setup_parser import setup_parser
-from Execution.utils.cached_helpers import search_library_cached, clear_library_cache
+from Execution.utils.cached_helpers import compare_fleet_cached, search_library_cached, clear_library_cache
+from Execution.visualization_utils import create_setup_match_heatmap
 
 
 def render_staging_modal():
@@ -316,18 +318,24 @@ def render():
             s_brand = s_brand if s_brand != "All" else None
 
         # Search library (Phase 6.5.1: Cached for performance)
-        results = search_library_cached(
-            search_term=s_track if s_track else "",
-            filters={
-                'brand': s_brand if s_brand else None,
-                'vehicle': selected_vehicle if compare_mode and selected_vehicle else None
-            }
-        )
+        search_term = s_track if s_track else ""
+        search_filters = {
+            'brand': s_brand if s_brand else None,
+            'vehicle': selected_vehicle if compare_mode and selected_vehicle else None
+        }
+        results = search_library_cached(search_term=search_term, filters=search_filters)
 
         if not results.empty:
             # Sort by date descending
             results = results.sort_values('Date', ascending=False) if 'Date' in results.columns else results
 
+            # In compare mode, rank every result against the Digital Twin (best match first)
+            match_by_id = {}
+            if compare_mode and st.session_state.actual_setup and 'ID' in results.columns:
+                ranked = comparison_service.compare_against_many(st.session_state.actual_setup, results)
+                match_by_id = dict(zip(ranked['ID'], ranked['match_percent']))
+                results = results.set_index('ID', drop=False).loc[ranked['ID']]
+
             st.caption(f"Found {len(results)} setup(s)")
 
             # Display setups as expandable cards
@@ -341,6 +349,8 @@ def render():
 
                 # Card title
                 card_title = f"{setup_brand} {setup_vehicle} - {setup_track} ({setup_date})"
+                if setup['ID'] in match_by_id:
+                    card_title = f"{match_by_id[setup['ID']]}% match · {card_title}"
 
                 with st.expander(card_title):
                     col1, col2 = st.columns([3, 1])
@@ -369,6 +379,31 @@ def render():
                             st.session_state.actual_setup = clean_setup
                             st.success("✅ Imported setup to Digital Twin!")
                             st.rerun()
+
+            # Fleet x library matrix (cached; reruns only re-slice it)
+            if compare_mode and selected_brand and selected_vehicle:
+                with st.expander("🗺️ Fleet vs Library Matrix"):
+                    matrix = compare_fleet_cached(st.session_state.get('profile_id'), selected_brand,
+                                                  selected_vehicle, search_term, search_filters)
+                    if not matrix["rows"] or not matrix["columns"]:
+                        st.info(f"ℹ️ No {selected_brand} {selected_vehicle} fleet configs or baselines to compare.")
+                    else:
+                        view = st.selectbox("Package", ["Overall"] + matrix["packages"], key="fleet_matrix_package")
+                        package = None if view == "Overall" else view
+                        st.plotly_chart(
+                            create_setup_match_heatmap(comparison_service.matrix_frame(matrix, package),
+                                                       title=f"{view} Match %"),
+                            use_container_width=True
+                        )
+
+                        cell_col1, cell_col2 = st.columns(2)
+                        car = cell_col1.selectbox("Fleet Car", matrix["rows"], key="fleet_matrix_car")
+                        baseline_id = cell_col2.selectbox("Baseline ID", matrix["columns"], key="fleet_matrix_baseline")
+                        different = comparison_service.matrix_differences(matrix, car, baseline_id)
+                        if different:
+                            st.markdown(f"**Different ({len(different)}):** {', '.join(different)}")
+                        else:
+                            st.success("✅ Identical setups")
         else:
             st.info("📭 No setups found. Upload your first setup sheet to get started!")
 
@@ -462,11 +497,6 @@ def render():
         st.write("### 🏗️ Hybrid Parsing Engine (v1.7.0)")
         st.info("✨ **NEW**: Upload a fillable PDF setup sheet OR a clear photo of physical setup sheet to automatically extract its configuration using AI Vision.")
 
-        # Get DATA_DIR for temp files
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        DATA_DIR = os.path.join(BASE_DIR, "data")
-        os.makedirs(DATA_DIR, exist_ok=True)
-
         # Stage 1: Precision PDF Parsing
         with st.expander("📄 Stage 1: PDF Precision Parsing", expanded=True):
             st.caption("For fillable PDF setup sheets (Tekno, Associated, Mugen, Xray)")
@@ -478,17 +508,13 @@ def render():
             pdf_file = st.file_uploader("Upload PDF Setup Sheet", type=["pdf"], key="pdf_upload")
 
             if pdf_file and st.button("🔍 Parse PDF", key="parse_pdf"):
-                with st.spinner("Extracting AcroForm fields..."):
-                    temp_path = os.path.join(DATA_DIR, "temp_import.pdf")
-                    with open(temp_path, "wb") as f:
-                        f.write(pdf_file.getbuffer())
-
-                    st.session_state.last_parsed_data = setup_parser.parse_pdf(temp_path, up_brand_pdf)
-                    st.session_state.last_parsed_source = "PDF"
-                    st.session_state.last_parsed_brand = up_brand_pdf
-                    st.session_state.last_parsed_model = up_model_pdf if up_model_pdf else up_brand_pdf
-                    os.remove(temp_path)
-                    st.rerun()
+                # Parsed on a job worker (cached by file hash in setup_ingest)
+                st.session_state.active_jobs["setup_parse"] = job_queue.submit("parse_pdf", {
+                    "path": job_queue.spool(pdf_file.getvalue(), ".pdf"),
+                    "brand": up_brand_pdf,
+                    "model": up_model_pdf if up_model_pdf else up_brand_pdf
+                })
+                st.rerun()
 
         # Stage 2: AI Vision Fallback
         with st.expander("📸 Stage 2: AI Vision Parsing", expanded=True):
@@ -504,23 +530,23 @@ def render():
                 st.image(photo_file, caption="Uploaded Setup Sheet", use_column_width=True)
 
                 if st.button("🔍 Parse with AI Vision", key="parse_vision"):
-                    with st.spinner("🤖 Analyzing with Claude Vision AI... (This may take 10-15 seconds)"):
-                        try:
-                            image_bytes = photo_file.read()
-                            parsed_result = setup_parser.parse_with_vision(image_bytes, up_brand_vis)
-
-                            if parsed_result and len(parsed_result) > 0:
-                                st.session_state.last_parsed_data = parsed_result
-                                st.session_state.last_parsed_source = "Vision"
-                                st.session_state.last_parsed_brand = up_brand_vis
-                                st.session_state.last_parsed_model = up_model_vis if up_model_vis else up_brand_vis
-                                st.success(f"✅ Successfully extracted {len(parsed_result)} setup parameters!")
-                                st.rerun()
-                            else:
-                                st.error("❌ Could not extract any setup parameters from the image. Try a clearer photo or different angle.")
-                        except Exception as e:
-                            st.error(f"❌ Vision parsing failed: {str(e)}")
-                            print(f"Vision parsing error: {e}")
+                    st.session_state.active_jobs["setup_parse"] = job_queue.submit("parse_vision", {
+                        "path": job_queue.spool(photo_file.getvalue(), os.path.splitext(photo_file.name)[1]),
+                        "brand": up_brand_vis,
+                        "model": up_model_vis if up_model_vis else up_brand_vis
+                    })
+                    st.rerun()
+
+        # Parse job status (PDF or Vision)
+        parse_job = fragments.track_job("setup_parse", "Parsing setup sheet")
+        if parse_job:
+            if parse_job["status"] == "succeeded":
+                st.session_state.last_parsed_data = parse_job["result"]["setup"]
+                st.session_state.last_parsed_source = "PDF" if parse_job["kind"] == "parse_pdf" else "Vision"
+                st.session_state.last_parsed_brand = parse_job["payload"]["brand"]
+                st.session_state.last_parsed_model = parse_job["payload"]["model"]
+            else:
+                st.error(f"❌ Parsing failed: {parse_job['error']}")
 
         # Display Parsed Results
         if "last_parsed_data" in st.session_state and st.session_state.last_parsed_data:
@@ -694,6 +720,7 @@ def render():
                                     driver_name=racer_name if racer_name else None
                                 )
 
+                                clear_library_cache()
                                 st.success(f"✅ Setup saved to Master Library! (ID: {baseline_id})")
                                 st.balloons()
 
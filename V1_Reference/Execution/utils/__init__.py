@@ -9,12 +9,11 @@ These utilities do NOT access st.session_state directly and can be imported
 and tested independently by any tab module.
 """
 
-from .ui_helpers import detect_technical_keywords, encode_image, get_system_context, get_weather, transcribe_voice
+from .ui_helpers import detect_technical_keywords, get_system_context, get_weather, transcribe_voice
 
 __all__ = [
     "transcribe_voice",
     "get_system_context",
     "detect_technical_keywords",
-    "encode_image",
     "get_weather"
 ]
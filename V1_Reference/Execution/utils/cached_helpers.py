@@ -9,6 +9,8 @@ Functions:
 - search_library_cached: Cache library_service.search_baselines()
 - list_profiles_cached: Cache profile_service.list_profiles()
 - load_session_history_cached: Cache CSV reads for session history
+- encode_library_cached: Cache the encoded SetupMatrix of a library search
+- compare_fleet_cached: Cache the fleet x library comparison matrix
 """
 
 import streamlit as st
@@ -114,15 +116,66 @@ def get_baseline_cached(baseline_id):
     return library_service.get_baseline(baseline_id)
 
 
+@st.cache_data(ttl=600)  # 10-minute TTL
+def encode_library_cached(search_term="", filters=None):
+    """
+    Encode a library search's setups for comparison with 10-minute cache.
+
+    Args:
+        search_term (str): Search query (as for search_library_cached)
+        filters (dict): Optional filter dict (as for search_library_cached)
+
+    Returns:
+        SetupMatrix: Cached encoded candidates
+
+    Benefit: Fleet or Digital Twin changes re-compare without re-encoding
+    """
+    from Execution.services.comparison_service import comparison_service
+
+    return comparison_service.encode_candidates(search_library_cached(search_term, filters))
+
+
+@st.cache_data(ttl=600)  # 10-minute TTL
+def compare_fleet_cached(profile_id, brand, model, search_term="", filters=None):
+    """
+    Compare the profile's fleet configs against a library search with 10-minute cache.
+
+    Only fleet cars and baselines of the given brand/model are compared
+    (cross-model comparisons are not valid).
+
+    Args:
+        profile_id (int): Profile ID whose configs form the rows
+        brand (str): Vehicle brand to compare
+        model (str): Vehicle model to compare
+        search_term (str): Search query (as for search_library_cached)
+        filters (dict): Optional filter dict (as for search_library_cached)
+
+    Returns:
+        dict: Cached comparison_service.compare_matrix() result
+
+    Benefit: Heatmap reruns (package switches, cell lookups) reuse the matrix
+    """
+    from Execution.services.comparison_service import comparison_service
+
+    return comparison_service.compare_matrix(
+        load_configs_cached(profile_id),
+        encode_library_cached(search_term, filters),
+        vehicle={'brand': brand, 'model': model}
+    )
+
+
 # Cache invalidation helpers
 def clear_config_cache(profile_id):
     """Clear cached configs for a profile (e.g., after save)."""
     load_configs_cached.clear()
+    compare_fleet_cached.clear()
 
 
 def clear_library_cache():
     """Clear cached library search results."""
     search_library_cached.clear()
+    encode_library_cached.clear()
+    compare_fleet_cached.clear()
 
 
 def clear_profile_cache():
@@ -7,21 +7,20 @@ Functions:
 - get_weather(): Fetch weather data from Open-Meteo API
 - transcribe_voice(): Convert audio to text using OpenAI Whisper
 - get_system_context(): Assemble theory library context for AI
-- encode_image(): Encode uploaded image to base64
 - detect_technical_keywords(): Scan transcript for racing keywords
 """
 
-import base64
 import os
 
-import openai
 import PyPDF2
-import requests
 
 
 def get_weather(lat, lon):
     """Fetch real-time weather and density altitude from Open-Meteo API.
 
+    Readings are cached per location by the shared weather service, so
+    repeated syncs at the same track reuse one request.
+
     Args:
         lat (float): Latitude
         lon (float): Longitude
@@ -30,48 +29,31 @@ def get_weather(lat, lon):
         Dict: {"Temp": "25°C", "Hum": "65%", "DA": "1200 ft"} or {"Error": "Weather Offline"}
 
     """
-    try:
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,surface_pressure&timezone=auto"
-        res = requests.get(url, timeout=5).json()['current']
-        da = int((res['temperature_2m'] * 120) + ((1013 - res['surface_pressure']) * 30))
-        return {
-            "Temp": f"{res['temperature_2m']}°C",
-            "Hum": f"{res['relative_humidity_2m']}%",
-            "DA": f"{da} ft"
-        }
-    except Exception:
-        return {"Error": "Weather Offline"}
+    from Execution.services.weather_service import weather_service
+    return weather_service.format_reading(weather_service.get_reading(lat, lon))
 
 
-def transcribe_voice(audio_bytes, openai_key, data_dir):
+def transcribe_voice(audio_bytes):
     """Transcribe audio bytes to text using OpenAI Whisper API.
 
+    Runs through voice_pipeline: audio is sent from memory (no temp file) and
+    transcripts are cached by audio hash, so Streamlit reruns holding the same
+    recording do not transcribe again.
+
     Args:
-        audio_bytes (bytes): Audio data in WAV format
-        openai_key (str): OpenAI API key
-        data_dir (str): Path to temporary file directory
+        audio_bytes (bytes): Audio data in WAV format (the backend reads OPENAI_API_KEY)
 
     Returns:
         str: Transcribed text or error message
 
     """
-    if not openai_key:
-        return "Error: API Key missing."
-
-    client = openai.OpenAI(api_key=openai_key)
-    temp_file = os.path.join(data_dir, "temp_audio.wav")
+    from Execution.services.voice_pipeline import voice_pipeline
 
-    try:
-        with open(temp_file, "wb") as f:
-            f.write(audio_bytes)
-
-        with open(temp_file, "rb") as f:
-            transcript = client.audio.transcriptions.create(model="whisper-1", file=f)
+    if not voice_pipeline.is_available():
+        return "Error: API Key missing."
 
-        return transcript.text
-    finally:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+    text = voice_pipeline.transcribe(audio_bytes)
+    return text if text is not None else "Error: Transcription failed."
 
 
 def get_system_context(active_config_text="", theory_path=None):
@@ -112,24 +94,13 @@ def get_system_context(active_config_text="", theory_path=None):
     return context
 
 
-def encode_image(uploaded_file):
-    """Encode a Streamlit uploaded file to base64 string for API submission.
-
-    Args:
-        uploaded_file: Streamlit UploadedFile object
-
-    Returns:
-        str: Base64 encoded image data
-
-    """
-    return base64.b64encode(uploaded_file.getvalue()).decode("utf-8")
-
-
 def detect_technical_keywords(transcript: str) -> dict:
     """Scan transcript for technical racing keywords.
 
     Identifies critical handling issues, performance changes, and track features.
-    Used by Scribe service to categorize voice notes.
+    Used by Scribe service to categorize voice notes. Matching runs through
+    keyword_index's compiled lexicon (whole words, synonyms such as
+    "push" -> Wash, "landing" -> Land).
 
     v1.7.0 - Optimized Scribe (No Wake Words Required)
 
@@ -144,18 +115,6 @@ def detect_technical_keywords(transcript: str) -> dict:
         }
 
     """
-    keywords = {
-        "critical": ["Bottoming", "Wash", "Stability"],
-        "performance": ["Loose", "Traction", "Rotation", "Consistency"],
-        "track_features": ["Entry", "Exit", "Jump", "Land"]
-    }
-
-    detected = {"critical": [], "performance": [], "track_features": []}
-    transcript_lower = transcript.lower()
-
-    for category, words in keywords.items():
-        for word in words:
-            if word.lower() in transcript_lower:
-                detected[category].append(word)
+    from Execution.services.keyword_index import keyword_matcher
 
-    return detected
+    return keyword_matcher.categorize(transcript)
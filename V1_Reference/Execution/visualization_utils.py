@@ -5,6 +5,7 @@ Provides Plotly chart generation functions for:
 - Fade indicator (gauge showing pace degradation)
 - ORP score interpretation
 - Lap time trends
+- Setup match heatmap (fleet x library comparison)
 
 All functions accept ORP metrics and return Plotly figures ready for Streamlit display.
 """
@@ -394,3 +395,40 @@ def create_consistency_bar_chart(
     )
 
     return fig
+
+
+def create_setup_match_heatmap(
+    match_frame,
+    title: str = "Setup Match"
+) -> go.Figure:
+    """Create fleet x library setup match heatmap.
+
+    Args:
+        match_frame: DataFrame of match percentages (fleet rows x baseline
+                     columns), e.g. comparison_service.matrix_frame()
+        title: Chart title
+
+    Returns:
+        Plotly Figure (heatmap)
+
+    """
+    fig = go.Figure(go.Heatmap(
+        z=match_frame.values,
+        x=[f"#{column}" for column in match_frame.columns],
+        y=list(match_frame.index),
+        zmin=0,
+        zmax=100,
+        colorscale=[[0, 'red'], [0.5, 'yellow'], [1, 'green']],
+        text=match_frame.values,
+        texttemplate='%{text}%',
+        hovertemplate='<b>%{y}</b> vs baseline %{x}<br>%{z}% match<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f"<b>{title}</b>",
+        xaxis_title="Library Baseline",
+        height=max(250, 60 * len(match_frame.index) + 120),
+        margin=dict(l=150, r=50, t=60, b=50)
+    )
+
+    return fig